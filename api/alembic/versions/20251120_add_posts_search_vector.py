@@ -0,0 +1,72 @@
+"""add posts.search_vector tsvector with GIN index and trigger maintenance
+
+Context7 best practice: предвычисленный tsvector вместо to_tsvector() в WHERE/ORDER BY.
+Колонка добавляется nullable (без перезаписи таблицы), новые и изменённые посты
+поддерживаются триггером, существующие — батчевым backfill
+(scripts/backfill_posts_search_vector.py). GIN индекс создаётся CONCURRENTLY.
+
+Revision ID: 20251120_posts_search_vector
+Revises: 20251119_merge_branches
+Create Date: 2025-11-20
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20251120_posts_search_vector'
+down_revision = '20251119_merge_branches'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Context7: lock_timeout — лучше явная ошибка, чем зависание под нагрузкой ingest
+    op.execute("SET lock_timeout = '2min'")
+
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    existing_columns = {col['name'] for col in inspector.get_columns('posts')}
+
+    # Шаг 1: nullable колонка без DEFAULT — только изменение каталога, таблица не перезаписывается
+    if 'search_vector' not in existing_columns:
+        op.execute("ALTER TABLE posts ADD COLUMN search_vector tsvector")
+
+    # Шаг 2: Инкрементальная поддержка для новых и изменённых постов
+    op.execute("""
+        CREATE OR REPLACE FUNCTION posts_search_vector_update()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('russian', COALESCE(NEW.content, ''));
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    op.execute("DROP TRIGGER IF EXISTS trg_posts_search_vector ON posts")
+    op.execute("""
+        CREATE TRIGGER trg_posts_search_vector
+        BEFORE INSERT OR UPDATE OF content ON posts
+        FOR EACH ROW
+        EXECUTE FUNCTION posts_search_vector_update();
+    """)
+
+    # Шаг 3: GIN индекс без блокировки записи (CONCURRENTLY вне транзакции)
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_search_vector
+            ON posts USING GIN (search_vector)
+        """)
+
+    # Context7: backfill существующих постов выполняется отдельно батчами:
+    #   python scripts/backfill_posts_search_vector.py
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_search_vector")
+
+    op.execute("DROP TRIGGER IF EXISTS trg_posts_search_vector ON posts")
+    op.execute("DROP FUNCTION IF EXISTS posts_search_vector_update()")
+    op.execute("ALTER TABLE posts DROP COLUMN IF EXISTS search_vector")
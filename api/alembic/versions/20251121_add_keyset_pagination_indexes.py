@@ -0,0 +1,66 @@
+"""add keyset pagination indexes for posts and trend clusters
+
+Context7: GET /posts и списки кластеров трендов пагинируются курсором по
+(created_at, id) / (last_activity_at, id) DESC. Индексы повторяют порядок сортировки
+и фильтры (канал, статус), поэтому каждая страница - индексный диапазон без OFFSET.
+Индексы создаются CONCURRENTLY, чтобы не блокировать запись ingest.
+
+Revision ID: 20251121_keyset_pagination
+Revises: 20251120_posts_search_vector
+Create Date: 2025-11-21
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20251121_keyset_pagination'
+down_revision = '20251120_posts_search_vector'
+branch_labels = None
+depends_on = None
+
+
+KEYSET_INDEXES = (
+    # Лента канала (Mini App): WHERE channel_id = ? ORDER BY created_at DESC, id DESC
+    ("ix_posts_channel_created_id", "posts (channel_id, created_at DESC, id DESC)"),
+    # Общая лента / лента арендатора через JOIN channels
+    ("ix_posts_created_id", "posts (created_at DESC, id DESC)"),
+    # /trends/emerging и /trends/clusters?status=...
+    ("ix_trend_clusters_status_activity_id", "trend_clusters (status, last_activity_at DESC, id DESC)"),
+    # /trends/clusters без фильтра по статусу
+    ("ix_trend_clusters_activity_id", "trend_clusters (last_activity_at DESC, id DESC)"),
+)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    channel_columns = {col['name'] for col in inspector.get_columns('channels')}
+
+    with op.get_context().autocommit_block():
+        for name, definition in KEYSET_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+        # Фильтр по арендатору идёт через channels.tenant_id (если колонка есть в схеме)
+        if 'tenant_id' in channel_columns:
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_channels_tenant_id_id "
+                "ON channels (tenant_id, id)"
+            )
+
+    # idx_trend_clusters_last_activity покрывается ix_trend_clusters_activity_id
+    op.execute("DROP INDEX IF EXISTS idx_trend_clusters_last_activity")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "idx_trend_clusters_last_activity",
+        "trend_clusters",
+        ["last_activity_at"],
+        postgresql_ops={"last_activity_at": "DESC"},
+    )
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_channels_tenant_id_id")
+        for name, _ in reversed(KEYSET_INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
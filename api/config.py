@@ -166,7 +166,18 @@ class Settings(BaseSettings):
     rag_conversation_history_enabled: bool = True
     rag_max_conversation_turns: int = 5  # Максимальное количество пар вопрос-ответ для контекста
     rag_conversation_window_hours: int = 24  # Окно времени для истории (часы)
-    
+
+    # RAG Hybrid Search Budgets - Context7: per-leg дедлайны fan-out поиска (мс)
+    rag_qdrant_budget_ms: int = 1500
+    rag_fts_budget_ms: int = 1000
+    rag_graph_budget_ms: int = 1200
+
+    # RAG Rank Fusion - Context7: rrf | minmax | zscore | weighted (legacy), override per tenant
+    rag_fusion_strategy: str = "rrf"
+    rag_fusion_tenant_strategies: dict[str, str] = {}  # JSON: {"<tenant_id>": "minmax"}
+    rag_fusion_fetch_multiplier: int = 2  # Первый (конкурентный) fan-out: выборка ветки = limit * N
+    rag_fusion_max_fetch_multiplier: int = 4  # Догрузка неисчерпанных веток, если top-k не стабилен
+
     # OpenAI-compatible API (gpt2giga-proxy) - Context7: для работы с GigaChat через LangChain
     # Context7: Используем URL без /v1, так как прокси может перенаправлять на /chat/completions
     # LangChain автоматически добавит /v1 при необходимости
@@ -177,6 +188,20 @@ class Settings(BaseSettings):
     gigachat_credentials: SecretStr = SecretStr("")  # SecretStr для безопасности
     gigachat_scope: str = "GIGACHAT_API_PERS"
     gigachat_proxy_url: str = "http://gpt2giga-proxy:8090"  # URL gpt2giga-proxy для embeddings
+    gigachat_embeddings_model: str = "EmbeddingsGigaR"  # Должен совпадать с worker (ключ кэша)
+    
+    # Embedding Cache - Context7: общий с worker content-addressed кэш (LRU + Redis blob'ы)
+    embedding_cache_enabled: bool = True
+    embedding_cache_lru_max_items: int = 2000
+    embedding_cache_lru_max_mb: int = 16
+    embedding_cache_ttl_seconds: int = 30 * 24 * 3600
+    embedding_cache_redis_max_items: int = 500000
+    embedding_cache_dtype: str = "float16"  # float16 | float32
+    
+    # Shared digest candidates - Context7: кандидаты тем дайджеста считаются один раз на (tenant, тема, окно)
+    digest_shared_candidates_enabled: bool = True
+    digest_shared_candidates_window_min: int = 60  # Размер окна и TTL общих кандидатов в Redis
+    digest_shared_candidates_max_fetch: int = 200  # Потолок глубины Qdrant/FTS темы в плане окна
     
     # Qdrant Configuration - Context7: для векторного поиска
     qdrant_url: str = "http://qdrant:6333"
@@ -91,6 +91,17 @@ async def lifespan(app: FastAPI):
         logger.error("Failed to start scheduler", error=str(e), exc_info=True)
         # Продолжаем без scheduler
     
+    # Context7: [C7-ID: NEO4J-SCHEMA-001] Ограничения и индексы Neo4j до первых запросов
+    try:
+        from shared.feature_flags import feature_flags as shared_feature_flags
+        if shared_feature_flags.integrations.neo4j_enabled:
+            from services.graph_service import get_graph_service
+            await get_graph_service().connect()
+            logger.info("Neo4j connected, graph schema ensured")
+    except Exception as e:
+        logger.error("Failed to initialize Neo4j schema", error=str(e))
+        # Продолжаем: GraphService подключится лениво при первом запросе
+    
     # Инициализация Redis для rate limiter
     try:
         logger.info("Initializing rate limiter...")
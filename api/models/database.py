@@ -2,8 +2,8 @@
 
 from sqlalchemy import create_engine, Column, String, Integer, Boolean, DateTime, Text, JSON, BigInteger, ForeignKey, UniqueConstraint, Index, CheckConstraint, PrimaryKeyConstraint, func, text, event, REAL, Time, Date, Computed, TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, Session
-from sqlalchemy.dialects.postgresql import UUID, JSONB, BYTEA
+from sqlalchemy.orm import sessionmaker, relationship, Session, deferred
+from sqlalchemy.dialects.postgresql import UUID, JSONB, BYTEA, TSVECTOR
 from sqlalchemy.dialects.postgresql.base import ischema_names
 import json
 import uuid
@@ -410,6 +410,10 @@ class Post(Base):
     # Context7 P3: Поле source для различения источников (channel/group/dm/persona)
     source = Column(String(20), nullable=True, server_default="channel")  # channel|group|dm|persona
     
+    # Context7: Предвычисленный tsvector для FTS (GIN ix_posts_search_vector).
+    # Поддерживается триггером trg_posts_search_vector, в ORM только читается; deferred — не грузим в каждый SELECT
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+    
     # Relationships
     channel = relationship("Channel", back_populates="posts")
     indexing_status = relationship("IndexingStatus", back_populates="post")
@@ -1212,7 +1216,9 @@ class TrendCluster(Base):
 
     __table_args__ = (
         Index('idx_trend_clusters_status', 'status'),
-        Index('idx_trend_clusters_last_activity', 'last_activity_at', postgresql_ops={'last_activity_at': 'DESC'}),
+        # Context7: keyset пагинация списков кластеров по (last_activity_at, id) DESC
+        Index('ix_trend_clusters_status_activity_id', 'status', 'last_activity_at', 'id', postgresql_ops={'last_activity_at': 'DESC', 'id': 'DESC'}),
+        Index('ix_trend_clusters_activity_id', 'last_activity_at', 'id', postgresql_ops={'last_activity_at': 'DESC', 'id': 'DESC'}),
         Index('idx_trend_clusters_novelty', 'novelty_score', postgresql_ops={'novelty_score': 'DESC NULLS LAST'}),
         Index('idx_trend_clusters_quality_score', 'quality_score', postgresql_ops={'quality_score': 'DESC NULLS LAST'}),
     )
@@ -1,13 +1,15 @@
 """Роутер для работы с постами."""
 
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi import Request
+from fastapi import Request, Response
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from pydantic import BaseModel
 from typing import List, Optional
+from uuid import UUID
 import structlog
 from config import settings
+from utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 logger = structlog.get_logger()
@@ -42,14 +44,28 @@ def get_db():
 @router.get("/", response_model=List[PostResponse])
 async def get_posts(
     request: Request,
+    response: Response,
     channel_id: Optional[str] = None,
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db = Depends(get_db)
 ):
-    """Получение списка постов с изоляцией по tenant_id (Context7)."""
+    """
+    Получение списка постов с изоляцией по tenant_id (Context7).
+    
+    Context7: keyset пагинация по (created_at, id) - курсор следующей страницы
+    возвращается в заголовке X-Next-Cursor; offset оставлен для обратной совместимости.
+    """
     from dependencies.auth import get_current_tenant_id_optional
     
+    try:
+        position = decode_cursor(cursor)
+        if position:
+            position = (position[0], str(UUID(position[1])))
+    except (InvalidCursorError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
     try:
         # Context7: Извлекаем tenant_id из JWT
         tenant_id = get_current_tenant_id_optional(request)
@@ -75,16 +91,26 @@ async def get_posts(
             conditions.append("p.channel_id = :channel_id")
             params["channel_id"] = channel_id
         
+        # Context7: позиция курсора - индексный диапазон вместо OFFSET
+        if position:
+            conditions.append("(p.created_at, p.id) < (:cursor_created_at, CAST(:cursor_id AS uuid))")
+            params["cursor_created_at"], params["cursor_id"] = position
+        
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
         
-        query += " ORDER BY p.created_at DESC LIMIT :limit OFFSET :offset"
-        params.update({"limit": limit, "offset": offset})
+        query += " ORDER BY p.created_at DESC, p.id DESC LIMIT :limit"
+        params["limit"] = limit
+        if not position and offset:
+            query += " OFFSET :offset"
+            params["offset"] = offset
         
-        result = db.execute(text(query), params)
+        rows = db.execute(text(query), params).fetchall()
+        if rows and len(rows) == limit:
+            response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
         
         posts = []
-        for row in result:
+        for row in rows:
             # Используем tenant_id из результата запроса (через JOIN)
             row_tenant_id = str(row.tenant_id) if row.tenant_id else tenant_id or ""
             posts.append(PostResponse(
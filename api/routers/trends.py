@@ -3,6 +3,7 @@ Trends API endpoints for accessing detected trends.
 Context7: фильтрация по min_frequency, min_growth, min_engagement
 """
 
+import asyncio
 import json
 import os
 import time
@@ -13,8 +14,8 @@ from uuid import UUID
 import httpx
 import structlog
 from fastapi import APIRouter, HTTPException, Depends, Query, Body
-from pydantic import BaseModel, Field, ConfigDict
-from sqlalchemy import and_, or_
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, or_, tuple_
 from sqlalchemy.orm import Session
 
 from models.database import (
@@ -24,7 +25,6 @@ from models.database import (
     TrendMetrics,
     ChatTrendSubscription,
     TrendClusterPost,
-    UserChannel,
     UserTrendProfile,
     TrendInteraction,
 )
@@ -35,6 +35,22 @@ from trends.card_utils import (
     fallback_why_from_stats,
     serialize_example_posts,
 )
+from utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from trends.card_assembler import (
+    TrendCardAssembler,
+    TrendClusterResponse,
+    build_trend_card,
+    cluster_post_to_dict,
+    cluster_to_response,
+    json_dict,
+    load_user_channel_ids,
+)
+from trends.qa_cache import (
+    TrendQAVerdictCache,
+    cluster_revision,
+    profile_hash,
+    qa_cache_key,
+)
 
 logger = structlog.get_logger()
 router = APIRouter(prefix="/trends", tags=["trends"])
@@ -59,6 +75,11 @@ try:
         "Latency of QA agent filtering",
         ["outcome"],
     )
+    trend_qa_cache_total = Counter(
+        "trend_qa_cache_total",
+        "QA verdict lookups by outcome",
+        ["outcome"],  # pending, error
+    )
 except Exception:  # prometheus not available in some run modes
     class _Noop:
         def labels(self, *args, **kwargs):
@@ -70,6 +91,7 @@ except Exception:  # prometheus not available in some run modes
     trends_personal_requests_total = _Noop()
     trend_qa_filtered_total = _Noop()
     trend_qa_latency_seconds = _Noop()
+    trend_qa_cache_total = _Noop()
 # ============================================================================
 # PYDANTIC MODELS
 # ============================================================================
@@ -97,77 +119,6 @@ class TrendListResponse(BaseModel):
     page_size: int
 
 
-class TrendTimeWindow(BaseModel):
-    start: datetime
-    end: datetime
-    duration_minutes: int
-
-
-class TrendStats(BaseModel):
-    mentions: int
-    baseline: int
-    burst_score: Optional[float]
-    sources: int
-    channels: int
-    coherence: Optional[float]
-
-
-class TrendExamplePost(BaseModel):
-    post_id: Optional[str]
-    channel_id: Optional[str]
-    channel_title: Optional[str]
-    posted_at: Optional[datetime]
-    content_snippet: Optional[str]
-
-
-class TrendCard(BaseModel):
-    title: str
-    summary: Optional[str]
-    why_important: Optional[str]
-    keywords: List[str] = Field(default_factory=list)
-    topics: List[str] = Field(default_factory=list)
-    time_window: TrendTimeWindow
-    stats: TrendStats
-    example_posts: List[TrendExamplePost] = Field(default_factory=list)
-
-
-class TrendMetricsResponse(BaseModel):
-    """Метрики по кластеру тренда."""
-
-    freq_short: int
-    freq_long: int
-    freq_baseline: Optional[int]
-    rate_of_change: Optional[float]
-    burst_score: Optional[float]
-    source_diversity: Optional[int]
-    coherence_score: Optional[float]
-    metrics_at: datetime
-
-    model_config = ConfigDict(from_attributes=True)
-
-
-class TrendClusterResponse(BaseModel):
-    """Ответ по кластеру тренда."""
-
-    id: UUID
-    cluster_key: str
-    status: str
-    label: Optional[str]
-    summary: Optional[str]
-    keywords: List[str]
-    primary_topic: Optional[str]
-    novelty_score: Optional[float]
-    coherence_score: Optional[float]
-    source_diversity: Optional[int]
-    first_detected_at: Optional[datetime]
-    last_activity_at: Optional[datetime]
-    resolved_trend_id: Optional[UUID]
-    latest_metrics: Optional[TrendMetricsResponse] = None
-    card: Optional[TrendCard] = None
-
-    model_config = ConfigDict(from_attributes=True)
-
-
 class TrendClusterListResponse(BaseModel):
     """Ответ со списком кластеров трендов."""
 
@@ -176,6 +127,7 @@ class TrendClusterListResponse(BaseModel):
     page: int
     page_size: int
     window: Optional[str] = None
+    next_cursor: Optional[str] = None
 
 
 class SummarizeClusterRequest(BaseModel):
@@ -203,21 +155,6 @@ class TrendSubscriptionListResponse(BaseModel):
 
 
 
-def _load_latest_metrics_map(db: Session, clusters: List[TrendCluster]) -> Dict[UUID, TrendMetrics]:
-    """Возвращает map cluster_id -> последний TrendMetrics."""
-    metrics_map: Dict[UUID, TrendMetrics] = {}
-    for cluster in clusters:
-        metric = (
-            db.query(TrendMetrics)
-            .filter(TrendMetrics.cluster_id == cluster.id)
-            .order_by(TrendMetrics.metrics_at.desc())
-            .first()
-        )
-        if metric:
-            metrics_map[cluster.id] = metric
-    return metrics_map
-
-
 def _parse_window_param(window: str) -> timedelta:
     """Парсит window вида '30m', '3h', '7d'."""
     if not window:
@@ -237,191 +174,15 @@ def _parse_window_param(window: str) -> timedelta:
     raise HTTPException(status_code=422, detail="Unsupported window unit")
 
 
-def _json_dict(data: Any) -> Dict[str, Any]:
-    if not data:
-        return {}
-    if isinstance(data, dict):
-        return data
-    if isinstance(data, str):
-        try:
-            return json.loads(data)
-        except json.JSONDecodeError:
-            return {}
-    return {}
-
-
-def _build_trend_card(cluster: TrendCluster) -> Optional[TrendCard]:
-    if not cluster.window_start or not cluster.window_end:
-        return None
-    duration_minutes = max(
-        1, int((cluster.window_end - cluster.window_start).total_seconds() // 60)
-    )
-    def _is_generic_title(value: Optional[str]) -> bool:
-        if not value:
-            return True
-        s = (value or "").strip()
-        if len(s) < 4:
-            return True
-        low = s.lower()
-        generic = {"trend", "тренд", "индивидуальные", "работы"}
-        if low in generic:
-            return True
-        if " " not in s and not s.startswith("#"):
-            return True
-        return False
-
-    def _derive_better_title(raw_payload: Dict[str, Any]) -> Optional[str]:
-        # 1) из topics: взять 2 самые первые и соединить
-        topics = raw_payload.get("topics") or []
-        topics = [t.strip() for t in topics if isinstance(t, str) and t.strip()]
-        if len(topics) >= 2:
-            return f"{topics[0]} — {topics[1]}"[:120]
-        if len(topics) == 1 and " " in topics[0]:
-            return topics[0][:120]
-        # 2) из keywords: склеить 2–3 ключевые
-        kws = raw_payload.get("keywords") or []
-        kws = [k.strip() for k in kws if isinstance(k, str) and k.strip()]
-        if len(kws) >= 2:
-            return f"{kws[0]} — {kws[1]}"[:120]
-        if len(kws) == 1 and " " in kws[0]:
-            return kws[0][:120]
-        # 3) из example_posts: взять первые 3–5 слов из первого сниппета
-        ex = raw_payload.get("example_posts") or []
-        for p in ex:
-            snippet = (p.get("content_snippet") or "").strip()
-            if snippet:
-                words = snippet.replace("\n", " ").split()
-                candidate = " ".join(words[:6])
-                if len(candidate) >= 10 and " " in candidate:
-                    return candidate[:120]
-        return None
-
-    stats = TrendStats(
-        mentions=cluster.window_mentions or 0,
-        baseline=cluster.freq_baseline or 0,
-        burst_score=cluster.burst_score,
-        sources=cluster.sources_count or cluster.source_diversity or 0,
-        channels=cluster.channels_count or cluster.source_diversity or 0,
-        coherence=cluster.coherence_score,
-    )
-    raw_payload = _json_dict(cluster.card_payload)
-    # Санитизация заголовка: если generic — пытаемся вывести более содержательный
-    base_title = cluster.label or cluster.primary_topic
-    if _is_generic_title(base_title):
-        derived = _derive_better_title(raw_payload)
-        if derived and not _is_generic_title(derived):
-            base_title = derived
-    if _is_generic_title(base_title):
-        # финальный fallback — «Тренд», но лучше короткая фраза из keywords/topics
-        base_title = _derive_better_title(raw_payload) or "Тренд"
-    example_posts = [
-        TrendExamplePost(**post)
-        for post in raw_payload.get("example_posts", [])
-        if isinstance(post, dict)
-    ]
-    return TrendCard(
-        title=base_title or "Без названия",
-        summary=cluster.summary,
-        why_important=cluster.why_important,
-        keywords=cluster.keywords or [],
-        topics=cluster.topics or raw_payload.get("topics", []),
-        time_window=TrendTimeWindow(
-            start=cluster.window_start,
-            end=cluster.window_end,
-            duration_minutes=duration_minutes,
-        ),
-        stats=stats,
-        example_posts=example_posts,
-    )
-
-def _load_user_channel_ids(db: Session, user_id: UUID) -> Set[UUID]:
-    """Возвращает множество channel_id для заданного пользователя."""
-    rows = db.query(UserChannel.channel_id).filter(UserChannel.user_id == user_id, UserChannel.is_active == True).all()  # noqa: E712
-    return {row[0] for row in rows}
-
 def _personalize_cluster_sample_posts(
     db: Session,
     cluster_id: UUID,
     user_channel_ids: Set[UUID],
     limit: int = 5,
 ) -> List[Dict[str, Any]]:
-    if not user_channel_ids:
-        return []
-    posts = (
-        db.query(TrendClusterPost)
-        .filter(TrendClusterPost.cluster_id == cluster_id)
-        .filter(TrendClusterPost.channel_id.in_(list(user_channel_ids)))
-        .order_by(TrendClusterPost.posted_at.desc().nullslast(), TrendClusterPost.created_at.desc())
-        .limit(limit)
-        .all()
-    )
-    results: List[Dict[str, Any]] = []
-    for post in posts:
-        results.append(
-            {
-                "post_id": str(post.post_id) if post.post_id else None,
-                "channel_id": str(post.channel_id) if post.channel_id else None,
-                "channel_title": post.channel_title,
-                "posted_at": post.posted_at,
-                "content_snippet": post.content_snippet,
-            }
-        )
-    return results
+    posts = TrendCardAssembler(db).load_personalized_posts([cluster_id], user_channel_ids, limit=limit)
+    return posts.get(cluster_id, [])
 
-def _apply_personalization(
-    db: Session,
-    cluster: TrendCluster,
-    base_card: TrendCard,
-    user_id: Optional[UUID],
-) -> TrendCard:
-    """Если передан user_id — фильтруем example_posts и пересчитываем mentions/sources/channels."""
-    if not user_id:
-        return base_card
-    user_channels = _load_user_channel_ids(db, user_id)
-    if not user_channels:
-        # нет подписок — вернём пустую карточку, чтобы далее кластер отфильтровался вызывающим кодом
-        return TrendCard(
-            title=base_card.title,
-            summary=base_card.summary,
-            why_important=base_card.why_important,
-            keywords=base_card.keywords,
-            topics=base_card.topics,
-            time_window=base_card.time_window,
-            stats=TrendStats(
-                mentions=0,
-                baseline=base_card.stats.baseline,
-                burst_score=base_card.stats.burst_score,
-                sources=0,
-                channels=0,
-                coherence=base_card.stats.coherence,
-            ),
-            example_posts=[],
-        )
-    posts = _personalize_cluster_sample_posts(db, cluster.id, user_channels, limit=10)
-    mentions = len(posts)
-    sources = len({p.get("channel_id") for p in posts if p.get("channel_id")})
-    channels = sources
-    stats = TrendStats(
-        mentions=mentions,
-        baseline=base_card.stats.baseline,  # используем глобальный baseline
-        burst_score=base_card.stats.burst_score,
-        sources=sources,
-        channels=channels,
-        coherence=base_card.stats.coherence,
-    )
-    return TrendCard(
-        title=base_card.title,
-        summary=base_card.summary,
-        why_important=base_card.why_important,
-        keywords=base_card.keywords,
-        topics=base_card.topics,
-        time_window=base_card.time_window,
-        stats=stats,
-        example_posts=[
-            TrendExamplePost(**p)
-            for p in serialize_example_posts(posts, limit=5)
-        ],
-    )
 
 def _normalize_topics(topics: List[str]) -> List[str]:
     normalized: List[str] = []
@@ -437,10 +198,14 @@ async def _call_qa_agent(
     user_id: Optional[UUID],
     user_profile: Optional[Dict[str, Any]],
     db: Session,
+    user_channels: Optional[Set[UUID]] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Context7: QA-агент для оценки качества и релевантности тренда.
     Возвращает решение: показывать ли тренд пользователю.
+
+    user_channels можно передать заранее - тогда db не используется и вызов безопасен
+    после закрытия сессии запроса (фоновая дооценка в кэше вердиктов).
     """
     qa_start = time.time()
     qa_enabled = os.getenv("TREND_QA_ENABLED", "true").lower() == "true"
@@ -463,7 +228,8 @@ async def _call_qa_agent(
         return {"should_show": True, "relevance_score": cluster.quality_score or 0.8}
 
     # С пользователем - вызываем LLM для оценки релевантности
-    user_channels = _load_user_channel_ids(db, user_id)
+    if user_channels is None:
+        user_channels = load_user_channel_ids(db, user_id)
     user_channels_list = [str(ch_id) for ch_id in user_channels]
 
     api_base = (
@@ -489,7 +255,7 @@ async def _call_qa_agent(
         api_base if api_base.endswith("/chat/completions") else f"{api_base}/chat/completions"
     )
 
-    card = _build_trend_card(cluster)
+    card = build_trend_card(cluster)
     prompt_payload = {
         "title": card.title if card else cluster.label or cluster.primary_topic,
         "summary": card.summary if card else cluster.summary,
@@ -542,7 +308,7 @@ async def _call_qa_agent(
         if response.status_code != 200:
             logger.debug("trend_qa_llm_error", status=response.status_code)
             # При ошибке LLM показываем тренд (fail-open)
-            return {"should_show": True, "relevance_score": 0.7, "reasoning": "LLM недоступен"}
+            return {"should_show": True, "relevance_score": 0.7, "reasoning": "LLM недоступен", "transient": True}
         data = response.json()
         content = data["choices"][0]["message"]["content"]
         parsed = json.loads(content.strip().strip("```json").strip("```"))
@@ -552,7 +318,7 @@ async def _call_qa_agent(
         logger.debug("trend_qa_llm_failure", error=str(exc))
         trend_qa_latency_seconds.labels(outcome="error").observe(time.time() - qa_start)
         # При ошибке показываем тренд (fail-open)
-        return {"should_show": True, "relevance_score": 0.7, "reasoning": f"Ошибка LLM: {str(exc)}"}
+        return {"should_show": True, "relevance_score": 0.7, "reasoning": f"Ошибка LLM: {str(exc)}", "transient": True}
 
 
 def _load_user_profile(db: Session, user_id: UUID) -> Optional[Dict[str, Any]]:
@@ -569,15 +335,129 @@ def _load_user_profile(db: Session, user_id: UUID) -> Optional[Dict[str, Any]]:
     }
 
 
+_qa_cache: Optional[TrendQAVerdictCache] = None
+
+
+def _get_qa_cache() -> Optional[TrendQAVerdictCache]:
+    """Ленивый singleton кэша QA-вердиктов (None, если Redis недоступен)."""
+    global _qa_cache
+    if _qa_cache is None:
+        try:
+            import redis.asyncio as redis
+
+            _qa_cache = TrendQAVerdictCache(
+                redis.from_url(settings.redis_url, decode_responses=True),
+                ttl_seconds=int(os.getenv("TREND_QA_CACHE_TTL_SEC", str(6 * 3600))),
+                budget_seconds=int(os.getenv("TREND_QA_BUDGET_MS", "300")) / 1000.0,
+                max_concurrency=int(os.getenv("TREND_QA_CONCURRENCY", "8")),
+            )
+        except Exception as exc:
+            logger.warning("trend_qa_cache_unavailable", error=str(exc))
+            return None
+    return _qa_cache
+
+
+def _pending_qa_verdict(cluster: TrendCluster) -> Dict[str, Any]:
+    """Вердикт для кластера, чья оценка ещё идёт в фоне (fail-open, как при ошибке LLM)."""
+    return {
+        "should_show": True,
+        "relevance_score": cluster.quality_score if cluster.quality_score is not None else 0.5,
+        "reasoning": "QA оценка в процессе",
+        "pending": True,
+    }
+
+
+def _load_cluster_member_ids(db: Session, cluster_ids: List[UUID]) -> Dict[UUID, Set[UUID]]:
+    """map cluster_id -> post_id постов кластера (состав для ревизии QA-вердикта), один запрос."""
+    if not cluster_ids:
+        return {}
+    members: Dict[UUID, Set[UUID]] = {}
+    rows = (
+        db.query(TrendClusterPost.cluster_id, TrendClusterPost.post_id)
+        .filter(TrendClusterPost.cluster_id.in_(cluster_ids))
+        .all()
+    )
+    for cluster_id, post_id in rows:
+        members.setdefault(cluster_id, set()).add(post_id)
+    return members
+
+
+async def _resolve_qa_verdicts(
+    clusters: List[TrendCluster],
+    user_id: Optional[UUID],
+    user_profile: Optional[Dict[str, Any]],
+    db: Session,
+    budget_seconds: Optional[float] = None,
+    user_channels: Optional[Set[UUID]] = None,
+    member_ids: Optional[Dict[UUID, Set[UUID]]] = None,
+) -> Dict[UUID, Optional[Dict[str, Any]]]:
+    """
+    Context7: QA-вердикты для набора кластеров.
+
+    Без пользователя вердикт считается локально (без LLM). С пользователем - из кэша
+    по (кластер, ревизия кластера, хэш профиля); промахи оцениваются параллельно
+    в пределах бюджета, остальные получают pending-вердикт и дооцениваются в фоне.
+    user_channels - каналы пользователя, если хендлер уже загрузил их для сборки карточек;
+    member_ids - состав кластеров, если вызывающий уже загрузил его (предрасчёт).
+    """
+    if not clusters:
+        return {}
+    if not user_id:
+        return {
+            cluster.id: await _call_qa_agent(cluster, None, None, db)
+            for cluster in clusters
+        }
+
+    if user_channels is None:
+        user_channels = load_user_channel_ids(db, user_id)
+    user_hash = profile_hash(user_id, user_profile, user_channels)
+    cache = _get_qa_cache()
+
+    def factory(cluster: TrendCluster):
+        return lambda: _call_qa_agent(cluster, user_id, user_profile, db, user_channels=user_channels)
+
+    if cache is None:
+        # Без кэша: параллельная оценка (LLM вызовы не блокируют друг друга)
+        results = await asyncio.gather(*(factory(cluster)() for cluster in clusters))
+        return {cluster.id: result for cluster, result in zip(clusters, results)}
+
+    if member_ids is None:
+        member_ids = _load_cluster_member_ids(db, [cluster.id for cluster in clusters])
+    keys = {
+        cluster.id: qa_cache_key(cluster.id, cluster_revision(cluster, member_ids.get(cluster.id)), user_hash)
+        for cluster in clusters
+    }
+    try:
+        resolved = await cache.resolve(
+            {keys[cluster.id]: factory(cluster) for cluster in clusters},
+            budget_seconds=budget_seconds,
+        )
+    except Exception as exc:
+        trend_qa_cache_total.labels(outcome="error").inc()
+        logger.warning("trend_qa_cache_error", error=str(exc))
+        return {cluster.id: _pending_qa_verdict(cluster) for cluster in clusters}
+
+    verdicts: Dict[UUID, Optional[Dict[str, Any]]] = {}
+    for cluster in clusters:
+        verdict = resolved.get(keys[cluster.id])
+        if verdict is None:
+            trend_qa_cache_total.labels(outcome="pending").inc()
+            verdict = _pending_qa_verdict(cluster)
+        verdicts[cluster.id] = verdict
+    return verdicts
+
+
 async def _filter_trends_with_qa(
     clusters: List[TrendCluster],
     user_id: Optional[UUID],
     db: Session,
     limit: int = 20,
+    user_channels: Optional[Set[UUID]] = None,
 ) -> List[TrendCluster]:
     """
     Context7: Фильтрация и ранжирование трендов через QA-агента.
     Возвращает top-K трендов, прошедших проверку качества и релевантности.
+    Вердикты берутся из кэша (см. _resolve_qa_verdicts), LLM не вызывается последовательно.
     """
     qa_enabled = os.getenv("TREND_QA_ENABLED", "true").lower() == "true"
     if not qa_enabled:
@@ -587,9 +467,11 @@ async def _filter_trends_with_qa(
     if user_id:
         user_profile = _load_user_profile(db, user_id)
 
+    verdicts = await _resolve_qa_verdicts(clusters, user_id, user_profile, db, user_channels=user_channels)
+
     filtered: List[Tuple[TrendCluster, float]] = []
     for cluster in clusters:
-        qa_result = await _call_qa_agent(cluster, user_id, user_profile, db)
+        qa_result = verdicts.get(cluster.id)
         if not qa_result or not qa_result.get("should_show", True):
             reason = qa_result.get("reasoning", "unknown") if qa_result else "no_result"
             trend_qa_filtered_total.labels(reason=reason[:50]).inc()
@@ -612,32 +494,6 @@ def _subscription_to_response(subscription: ChatTrendSubscription) -> TrendSubsc
     )
 
 
-def _cluster_to_response(
-    cluster: TrendCluster,
-    metric: Optional[TrendMetrics],
-) -> TrendClusterResponse:
-    """Формирует DTO для кластера тренда."""
-    metrics_payload = TrendMetricsResponse.model_validate(metric) if metric else None
-    keywords = cluster.keywords or []
-    return TrendClusterResponse(
-        id=cluster.id,
-        cluster_key=cluster.cluster_key,
-        status=cluster.status,
-        label=cluster.label,
-        summary=cluster.summary,
-        keywords=keywords,
-        primary_topic=cluster.primary_topic,
-        novelty_score=cluster.novelty_score,
-        coherence_score=cluster.coherence_score,
-        source_diversity=cluster.source_diversity,
-        first_detected_at=cluster.first_detected_at,
-        last_activity_at=cluster.last_activity_at,
-        resolved_trend_id=cluster.resolved_trend_id,
-        latest_metrics=metrics_payload,
-        card=_build_trend_card(cluster),
-    )
-
-
 def _cluster_card_to_trend_response(cluster: TrendCluster) -> TrendResponse:
     card = cluster.card_payload or {}
     stats = card.get("stats") or {}
@@ -703,18 +559,7 @@ def _fetch_cluster_posts(db: Session, cluster_id: UUID, limit: int) -> List[Dict
         .limit(limit)
         .all()
     )
-    results: List[Dict[str, Any]] = []
-    for post in posts:
-        results.append(
-            {
-                "post_id": str(post.post_id) if post.post_id else None,
-                "channel_id": str(post.channel_id) if post.channel_id else None,
-                "channel_title": post.channel_title,
-                "posted_at": post.posted_at,
-                "content_snippet": post.content_snippet,
-            }
-        )
-    return results
+    return [cluster_post_to_dict(post) for post in posts]
 
 
 async def _call_cluster_llm(prompt_payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -770,6 +615,39 @@ async def _call_cluster_llm(prompt_payload: Dict[str, Any]) -> Optional[Dict[str
         return None
 
 
+def _paginate_clusters(query, page: int, page_size: int, cursor: Optional[str]) -> Tuple[List[TrendCluster], Optional[str]]:
+    """
+    Context7: keyset пагинация кластеров по (last_activity_at, id) DESC.
+
+    С курсором страница берётся индексным диапазоном; без курсора - OFFSET по page
+    (обратная совместимость). next_cursor - позиция последней выбранной строки,
+    поэтому строки, отсеянные QA-фильтром после выборки, не сдвигают следующую страницу.
+    """
+    try:
+        position = decode_cursor(cursor)
+        if position:
+            position = (position[0], UUID(position[1]))
+    except (InvalidCursorError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if position:
+        last_activity_at, cluster_id = position
+        # Row comparison - Postgres берёт диапазон по индексу (last_activity_at DESC, id DESC)
+        query = query.filter(
+            tuple_(TrendCluster.last_activity_at, TrendCluster.id)
+            < tuple_(last_activity_at, cluster_id)
+        )
+    query = query.order_by(TrendCluster.last_activity_at.desc(), TrendCluster.id.desc())
+    if not position:
+        query = query.offset((page - 1) * page_size)
+    clusters = query.limit(page_size).all()
+
+    next_cursor = None
+    if clusters and len(clusters) == page_size:
+        next_cursor = encode_cursor(clusters[-1].last_activity_at, clusters[-1].id)
+    return clusters, next_cursor
+
+
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
@@ -783,6 +661,7 @@ async def get_emerging_trends(
     ),
     page: int = Query(1, ge=1, description="Номер страницы"),
     page_size: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor)"),
     user_id: Optional[UUID] = Query(None, description="Персонализация по user_id"),
     db: Session = Depends(get_db),
 ):
@@ -799,37 +678,17 @@ async def get_emerging_trends(
             trends_personal_requests_total.labels(endpoint="emerging", outcome="requested").inc()
         except Exception:
             pass
-    offset = (page - 1) * page_size
-    clusters = (
-        base_query.order_by(TrendCluster.last_activity_at.desc())
-        .offset(offset)
-        .limit(page_size)
-        .all()
-    )
+    clusters, next_cursor = _paginate_clusters(base_query, page, page_size, cursor)
+
+    # Каналы пользователя - один запрос на хендлер (QA-вердикты и персонализация карточек)
+    user_channels = load_user_channel_ids(db, user_id) if user_id else set()
 
     # Context7: Фильтрация через QA-агента перед показом
-    clusters = await _filter_trends_with_qa(clusters, user_id, db, limit=page_size * 2)
+    clusters = await _filter_trends_with_qa(clusters, user_id, db, limit=page_size * 2, user_channels=user_channels)
 
-    metrics_map = _load_latest_metrics_map(db, clusters)
-    responses: List[TrendClusterResponse] = []
-    for cluster in clusters:
-        if min_sources and (cluster.source_diversity or 0) < min_sources:
-            continue
-        metric = metrics_map.get(cluster.id)
-        if min_burst and (not metric or (metric.burst_score or 0.0) < min_burst):
-            continue
-        # базовая карточка
-        base = _cluster_to_response(cluster, metric)
-        # персонализация (фильтрация по каналам пользователя)
-        card = _apply_personalization(db, cluster, base.card, user_id) if base.card else None
-        if user_id and card and card.stats.mentions <= 0:
-            # пусто для данного пользователя — пропускаем
-            continue
-        responses.append(
-            TrendClusterResponse(
-                **{**base.model_dump(), "card": card or base.card}
-            )
-        )
+    responses = TrendCardAssembler(db, user_id, user_channels).assemble(
+        clusters, min_sources=min_sources, min_burst=min_burst
+    )
     if user_id:
         try:
             trends_personal_requests_total.labels(endpoint="emerging", outcome="success").inc()
@@ -842,6 +701,7 @@ async def get_emerging_trends(
         page=page,
         page_size=page_size,
         window=window,
+        next_cursor=next_cursor,
     )
 
 
@@ -853,6 +713,7 @@ async def list_trend_clusters(
     ),
     page: int = Query(1, ge=1, description="Номер страницы"),
     page_size: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor)"),
     user_id: Optional[UUID] = Query(None, description="Персонализация по user_id"),
     db: Session = Depends(get_db),
 ):
@@ -868,29 +729,16 @@ async def list_trend_clusters(
         query = query.filter(TrendCluster.last_activity_at >= cutoff)
 
     total = query.count()
-    offset = (page - 1) * page_size
-    clusters = (
-        query.order_by(TrendCluster.last_activity_at.desc())
-        .offset(offset)
-        .limit(page_size * 2)  # Берём больше для фильтрации
-        .all()
-    )
+    clusters, next_cursor = _paginate_clusters(query, page, page_size, cursor)
+    user_channels = load_user_channel_ids(db, user_id) if user_id else set()
     
-    # Context7: Фильтрация через QA-агента перед показом
-    clusters = await _filter_trends_with_qa(clusters, user_id, db, limit=page_size)
+    # Context7: Фильтрация через QA-агента перед показом (без обрезки: следующая страница
+    # начинается после последней выбранной строки, обрезанные кластеры потерялись бы)
+    clusters = await _filter_trends_with_qa(
+        clusters, user_id, db, limit=len(clusters), user_channels=user_channels
+    )
     
-    metrics_map = _load_latest_metrics_map(db, clusters)
-    responses: List[TrendClusterResponse] = []
-    for cluster in clusters:
-        base = _cluster_to_response(cluster, metrics_map.get(cluster.id))
-        card = _apply_personalization(db, cluster, base.card, user_id) if base.card else None
-        if user_id and card and card.stats.mentions <= 0:
-            continue
-        responses.append(
-            TrendClusterResponse(
-                **{**base.model_dump(), "card": card or base.card}
-            )
-        )
+    responses = TrendCardAssembler(db, user_id, user_channels).assemble(clusters)
     if user_id:
         try:
             trends_personal_requests_total.labels(endpoint="clusters", outcome="success").inc()
@@ -903,6 +751,7 @@ async def list_trend_clusters(
         page=page,
         page_size=page_size,
         window=requested_window,
+        next_cursor=next_cursor,
     )
 
 
@@ -919,26 +768,20 @@ async def get_trend_cluster(
     
     # Context7: Проверка через QA-агента
     user_profile = None
+    user_channels: Set[UUID] = set()
     if user_id:
         user_profile = _load_user_profile(db, user_id)
-    qa_result = await _call_qa_agent(cluster, user_id, user_profile, db)
+        user_channels = load_user_channel_ids(db, user_id)
+    verdicts = await _resolve_qa_verdicts([cluster], user_id, user_profile, db, user_channels=user_channels)
+    qa_result = verdicts.get(cluster.id)
     if not qa_result or not qa_result.get("should_show", True):
         raise HTTPException(status_code=404, detail="Trend cluster not available")
     
-    metric = (
-        db.query(TrendMetrics)
-        .filter(TrendMetrics.cluster_id == cluster.id)
-        .order_by(TrendMetrics.metrics_at.desc())
-        .first()
-    )
-    base = _cluster_to_response(cluster, metric)
-    card = _apply_personalization(db, cluster, base.card, user_id) if base.card else None
-    if user_id and card and card.stats.mentions <= 0:
+    responses = TrendCardAssembler(db, user_id, user_channels).assemble([cluster])
+    if not responses:
         # Возвращаем 404, если кластер пуст для пользователя
         raise HTTPException(status_code=404, detail="Trend cluster not found for this user")
-    return TrendClusterResponse(
-        **{**base.model_dump(), "card": card or base.card}
-    )
+    return responses[0]
 
 
 @router.get("/", response_model=TrendListResponse)
@@ -1021,13 +864,13 @@ async def summarize_cluster_card(
         raise HTTPException(status_code=404, detail="Trend cluster not found")
 
     if user_id:
-        user_channels = _load_user_channel_ids(db, user_id)
+        user_channels = load_user_channel_ids(db, user_id)
         sample_posts = _personalize_cluster_sample_posts(db, cluster.id, user_channels, request.max_posts)
     else:
         sample_posts = _fetch_cluster_posts(db, cluster.id, request.max_posts)
     stats = _cluster_stats_payload(cluster)
     window = _cluster_window_info(cluster)
-    existing_card = _json_dict(cluster.card_payload)
+    existing_card = json_dict(cluster.card_payload)
     need_refresh = request.force or not existing_card.get("summary")
 
     if need_refresh:
@@ -1099,7 +942,7 @@ async def summarize_cluster_card(
         .order_by(TrendMetrics.metrics_at.desc())
         .first()
     )
-    return _cluster_to_response(cluster, metric)
+    return cluster_to_response(cluster, metric)
 
 
 @router.get("/{trend_id}", response_model=TrendResponse)
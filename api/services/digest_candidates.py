@@ -0,0 +1,202 @@
+"""
+Общие кандидаты тем для пользовательских дайджестов.
+
+Context7: [C7-ID: digest-shared-candidates-001] scheduler группирует пользователей, чьи
+дайджесты наступают в одном окне, по (tenant, тема, окно) и считает кандидатов каждой темы
+один раз (DigestService.plan_shared_candidates). Кандидаты лежат в Redis в течение окна;
+digest worker берёт их вместо повторного embedding/Qdrant/FTS и фильтрует по каналам
+пользователя перед LLM.
+
+Запись переиспользуется, только если каналы пользователя входят в каналы, по которым она
+посчитана, и её глубины хватает пользователю: источник, упёршийся в глубину выборки, должен
+дать не меньше лимита пользователя по его каналам - иначе тема считается заново.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import redis.asyncio as redis_async
+import structlog
+from prometheus_client import Counter as PromCounter
+
+from config import settings
+
+logger = structlog.get_logger()
+
+digest_topic_candidates_total = PromCounter(
+    'digest_topic_candidates_total',
+    'Темы дайджестов по источнику кандидатов (shared - из плана окна, computed - посчитаны заново, '
+    'fallback - запись плана есть, но её не хватает пользователю)',
+    ['tenant_id', 'result']
+)
+
+digest_plan_user_topics_total = PromCounter(
+    'digest_plan_user_topics_total',
+    'Пары (пользователь, тема) в планах окон дайджестов',
+    ['tenant_id']
+)
+
+digest_plan_topic_retrievals_total = PromCounter(
+    'digest_plan_topic_retrievals_total',
+    'Уникальные темы, посчитанные планировщиком окна (reuse = 1 - retrievals / user_topics)',
+    ['tenant_id']
+)
+
+
+@dataclass
+class DigestPlanEntry:
+    """Пользователь, чей дайджест наступает в текущем окне."""
+
+    user_id: str
+    topics: List[str]
+    channel_ids: List[str]
+    limit_per_topic: int
+
+
+@dataclass
+class TopicCandidates:
+    """Кандидаты темы, посчитанные для объединения каналов группы пользователей."""
+
+    posts: List[Dict[str, Any]]
+    channel_ids: List[str]
+    fetch_limit: int  # Глубина Qdrant/FTS выборки темы
+
+    def for_user(self, channel_ids: Iterable[str], limit_per_topic: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Кандидаты пользователя: посты его каналов, не больше limit_per_topic на источник.
+
+        Returns:
+            None, если запись может дать меньше постов, чем поиск пользователя: каналы вне
+            записи, лимит больше глубины или источник упёрся в глубину, а постов каналов
+            пользователя в нём меньше лимита (их вытеснили посты других каналов).
+        """
+        allowed = {str(cid) for cid in channel_ids}
+        if limit_per_topic > self.fetch_limit or not allowed <= set(self.channel_ids):
+            return None
+
+        by_source: Dict[str, List[Dict[str, Any]]] = {}
+        for post in self.posts:
+            by_source.setdefault(post['source'], []).append(post)
+
+        selected: List[Dict[str, Any]] = []
+        for source, posts in by_source.items():
+            own = [post for post in posts if post['channel_id'] in allowed][:limit_per_topic]
+            # Глубина GraphRAG не зависит от каналов - усечение графа не проверяется
+            truncated = source != 'graph' and len(posts) >= self.fetch_limit
+            if truncated and len(own) < limit_per_topic:
+                return None
+            selected.extend(own)
+        return selected
+
+
+def candidate_window_start(now: Optional[datetime] = None, window_minutes: Optional[int] = None) -> datetime:
+    """Начало окна группировки (UTC, кратно window_minutes от полуночи)."""
+    now = now or datetime.now(timezone.utc)
+    window_minutes = window_minutes or settings.digest_shared_candidates_window_min
+    now = now.astimezone(timezone.utc)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = int((now - midnight).total_seconds() // 60)
+    return midnight + timedelta(minutes=elapsed - elapsed % window_minutes)
+
+
+def _encode_post(post: Dict[str, Any]) -> Dict[str, Any]:
+    posted_at = post.get('posted_at')
+    return {**post, 'posted_at': posted_at.isoformat() if isinstance(posted_at, datetime) else posted_at}
+
+
+def _decode_post(post: Dict[str, Any]) -> Dict[str, Any]:
+    posted_at = post.get('posted_at')
+    return {**post, 'posted_at': datetime.fromisoformat(posted_at) if posted_at else None}
+
+
+class DigestCandidateStore:
+    """Redis-хранилище кандидатов тем: ключ на (tenant, окно, тема)."""
+
+    def __init__(self, redis_client: Any, window_minutes: int, namespace: str = "digest:candidates"):
+        self.redis_client = redis_client
+        self.window_minutes = window_minutes
+        self.namespace = namespace
+
+    def key_for(self, tenant_id: str, window_start: datetime, topic: str) -> str:
+        topic_hash = hashlib.sha1(topic.encode("utf-8")).hexdigest()[:16]
+        return f"{self.namespace}:{tenant_id}:{int(window_start.timestamp())}:{topic_hash}"
+
+    async def get_many(
+        self,
+        tenant_id: str,
+        window_starts: Sequence[datetime],
+        topics: Sequence[str]
+    ) -> Dict[str, TopicCandidates]:
+        """
+        Кандидаты найденных тем одним MGET; ошибки Redis - пустой результат.
+        
+        window_starts в порядке приоритета: событие, запланированное в конце окна, может
+        обработаться уже в следующем - поэтому worker передаёт текущее и предыдущее окно.
+        """
+        if not topics or not window_starts:
+            return {}
+        keys = [self.key_for(tenant_id, window_start, topic) for topic in topics for window_start in window_starts]
+        try:
+            raw_values = await self.redis_client.mget(keys)
+        except Exception as e:
+            logger.warning("digest_candidates_get_failed", tenant_id=tenant_id, error=str(e))
+            return {}
+
+        found: Dict[str, TopicCandidates] = {}
+        per_topic = len(window_starts)
+        for index, topic in enumerate(topics):
+            raw = next((value for value in raw_values[index * per_topic:(index + 1) * per_topic] if value), None)
+            if not raw:
+                continue
+            try:
+                data = json.loads(raw)
+                found[topic] = TopicCandidates(
+                    posts=[_decode_post(post) for post in data['posts']],
+                    channel_ids=data['channel_ids'],
+                    fetch_limit=data['fetch_limit'],
+                )
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning("digest_candidates_decode_failed", tenant_id=tenant_id, topic=topic, error=str(e))
+        return found
+
+    async def set_many(
+        self,
+        tenant_id: str,
+        window_start: datetime,
+        candidates: Dict[str, TopicCandidates]
+    ) -> None:
+        """Запись кандидатов одним pipeline; TTL - два окна (текущее и следующее, см. get_many)."""
+        if not candidates:
+            return
+        ttl = self.window_minutes * 60 * 2
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for topic, entry in candidates.items():
+                payload = json.dumps({
+                    'posts': [_encode_post(post) for post in entry.posts],
+                    'channel_ids': sorted(entry.channel_ids),
+                    'fetch_limit': entry.fetch_limit,
+                }, ensure_ascii=False, default=str)
+                pipe.set(self.key_for(tenant_id, window_start, topic), payload, ex=ttl)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("digest_candidates_set_failed", tenant_id=tenant_id, error=str(e))
+
+
+_candidate_store: Optional[DigestCandidateStore] = None
+
+
+def get_digest_candidate_store() -> Optional[DigestCandidateStore]:
+    """Singleton хранилища кандидатов процесса (None, если общие кандидаты отключены)."""
+    global _candidate_store
+    if not settings.digest_shared_candidates_enabled:
+        return None
+    if _candidate_store is None:
+        _candidate_store = DigestCandidateStore(
+            redis_client=redis_async.from_url(settings.redis_url, decode_responses=True),
+            window_minutes=settings.digest_shared_candidates_window_min,
+        )
+    return _candidate_store
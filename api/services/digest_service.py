@@ -3,18 +3,20 @@ Digest Service для генерации дайджестов новостей
 Context7: сбор контента ТОЛЬКО по пользовательским тематикам из digest_settings.topics
 """
 
+import os
 import time
 from collections import Counter
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from uuid import UUID
-from datetime import datetime, date, timezone
+from datetime import datetime, date, timedelta, timezone
 
 import structlog
 from prometheus_client import Counter as PromCounter, Histogram
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import func, cast, Text
+from sqlalchemy.dialects.postgresql import TSQUERY
 from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchAny
+from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchAny, SearchRequest
 from langchain_gigachat import GigaChat
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableParallel
@@ -24,6 +26,16 @@ from pydantic import BaseModel, SecretStr
 from models.database import Post, PostEnrichment, Channel, User, DigestSettings, DigestHistory, UserChannel
 from api.services.rag_service import RAGService  # Для генерации embedding
 from services.graph_service import get_graph_service
+from api.services.embedding_cache import embed_text, embed_texts
+from api.services.digest_candidates import (
+    DigestPlanEntry,
+    TopicCandidates,
+    candidate_window_start,
+    digest_plan_topic_retrievals_total,
+    digest_plan_user_topics_total,
+    digest_topic_candidates_total,
+    get_digest_candidate_store,
+)
 from config import settings
 
 logger = structlog.get_logger()
@@ -46,6 +58,39 @@ digest_graph_hits_total = PromCounter(
     ['tenant_id']
 )
 
+# Context7: кэш существования коллекций Qdrant на процесс: {(qdrant_url, name): (exists, checked_at)}
+QDRANT_COLLECTION_MISS_TTL_SEC = float(os.getenv("DIGEST_QDRANT_COLLECTION_MISS_TTL_SEC", "60"))
+_qdrant_collections: Dict[Tuple[str, str], Tuple[bool, float]] = {}
+
+
+def resolve_digest_channel_ids(digest_settings: Any, user_channel_ids: List[Any]) -> List[str]:
+    """Каналы дайджеста: channels_filter из настроек, иначе все каналы пользователя."""
+    if digest_settings.channels_filter:
+        return [str(cid) for cid in digest_settings.channels_filter]
+    return [str(cid) for cid in user_channel_ids]
+
+
+def _post_to_digest_item(post: Any, channel: Any, topic: str, score: float, source: str) -> Dict[str, Any]:
+    return {
+        'post_id': str(post.id),
+        'channel_id': str(post.channel_id),
+        'grouped_id': post.grouped_id,
+        'content': post.content or "",
+        'channel_title': channel.title if channel else "Неизвестный канал",
+        'channel_username': channel.username if channel else None,
+        'permalink': post.telegram_post_url,
+        'posted_at': post.posted_at,
+        'topic': topic,
+        'score': score,
+        'source': source,
+        # Context7: Метрики популярности для отображения в дайджесте
+        'engagement_score': float(post.engagement_score) if post.engagement_score else 0.0,
+        'views_count': post.views_count or 0,
+        'reactions_count': post.reactions_count or 0,
+        'forwards_count': post.forwards_count or 0,
+        'replies_count': post.replies_count or 0
+    }
+
 # ============================================================================
 # PYDANTIC MODELS
 # ============================================================================
@@ -182,257 +227,274 @@ class DigestService:
         logger.info("Digest Service initialized", qdrant_url=qdrant_url)
     
     async def _generate_embedding(self, text: str) -> List[float]:
-        """Генерация embedding для текста через GigaChat."""
-        try:
-            import requests
-            import os
-            
-            proxy_url = getattr(settings, 'gigachat_proxy_url', None) or os.getenv("GIGACHAT_PROXY_URL", "http://gpt2giga-proxy:8090")
-            url = f"{proxy_url}/v1/embeddings"
-            
-            credentials = os.getenv("GIGACHAT_CREDENTIALS")
-            scope = os.getenv("GIGACHAT_SCOPE", "GIGACHAT_API_PERS")
-            auth_header = f"giga-cred-{credentials}:{scope}"
-            
-            response = requests.post(
-                url,
-                json={
-                    "input": text,
-                    "model": "any"  # gpt2giga сам отправит на EmbeddingsGigaR
-                },
-                headers={
-                    "Authorization": f"Bearer {auth_header}",
-                    "Content-Type": "application/json"
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'data' in data and len(data['data']) > 0:
-                    embedding = data['data'][0].get('embedding', [])
-                    return embedding
-            
-            logger.warning("Failed to generate embedding", status_code=response.status_code)
-            return []
+        """
+        Генерация embedding для текста через GigaChat.
+        
+        Context7: [C7-ID: AI-EMBEDDING-CACHE-001] общий с RAGService путь (кэш + async
+        запрос в gpt2giga-proxy, см. services.embedding_cache.embed_text).
+        """
+        return await embed_text(text)
+    
+    async def _embed_topics(self, topics: List[str]) -> List[List[float]]:
+        """
+        Embeddings всех тем одним вызовом (промахи кэша уходят в прокси одним батчем).
         
+        Returns:
+            Векторы в порядке topics; [] для пустой темы или при ошибке
+        """
+        return await embed_texts(topics)
+    
+    def _qdrant_collection_exists(self, collection_name: str) -> bool:
+        """
+        Проверка коллекции Qdrant с кэшем на процесс.
+        
+        Context7: найденные коллекции кэшируются бессрочно, отсутствующие - на
+        DIGEST_QDRANT_COLLECTION_MISS_TTL_SEC (коллекция тенанта может появиться позже).
+        """
+        now = time.monotonic()
+        key = (self.qdrant_url, collection_name)
+        cached = _qdrant_collections.get(key)
+        if cached is not None and (cached[0] or now - cached[1] < QDRANT_COLLECTION_MISS_TTL_SEC):
+            return cached[0]
+        
+        collection_names = {c.name for c in self.qdrant_client.get_collections().collections}
+        if "tNone_posts" in collection_names:
+            logger.error("Detected legacy Qdrant collection without tenant binding")
+        for name in collection_names:
+            _qdrant_collections[(self.qdrant_url, name)] = (True, now)
+        exists = collection_name in collection_names
+        if not exists:
+            _qdrant_collections[key] = (False, now)
+        return exists
+    
+    def _search_topics_in_qdrant(
+        self,
+        tenant_id: str,
+        topics: List[str],
+        embeddings: List[List[float]],
+        channel_ids: List[str],
+        limit_per_topic: int,
+        topic_limits: Optional[Dict[str, int]] = None
+    ) -> Dict[str, List[Any]]:
+        """Один batch search по всем темам с фильтром tenant/каналы. Returns {topic: [ScoredPoint]}."""
+        topic_limits = topic_limits or {}
+        searchable = [(topic, vector) for topic, vector in zip(topics, embeddings) if vector]
+        if not searchable:
+            return {}
+        
+        collection_name = f"t{tenant_id}_posts"
+        if not self._qdrant_collection_exists(collection_name):
+            logger.warning("Qdrant collection not found", collection=collection_name)
+            return {}
+        
+        search_filter = Filter(must=[
+            FieldCondition(key="tenant_id", match=MatchValue(value=str(tenant_id))),
+            FieldCondition(key="channel_id", match=MatchAny(any=list(channel_ids))),
+        ])
+        batch_results = self.qdrant_client.search_batch(
+            collection_name=collection_name,
+            requests=[
+                SearchRequest(
+                    vector=vector,
+                    filter=search_filter,
+                    limit=topic_limits.get(topic, limit_per_topic),
+                    with_payload=True
+                )
+                for topic, vector in searchable
+            ]
+        )
+        return {topic: results for (topic, _), results in zip(searchable, batch_results)}
+    
+    async def _search_topics_in_graph(
+        self,
+        topics: List[str],
+        tenant_id: str,
+        limit_per_topic: int
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """GraphRAG: посты по теме и связанным темам. Returns {topic: [graph_post + related_topic]}."""
+        hits: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            # Context7: health_check один раз на сбор, а не на каждую тему
+            if not await self.graph_service.health_check():
+                return hits
         except Exception as e:
-            logger.error("Error generating embedding", error=str(e))
-            return []
+            logger.warning("GraphRAG search failed in digest, continuing without graph", error=str(e))
+            return hits
+        
+        for topic in topics:
+            try:
+                # Находим похожие темы через граф
+                similar_topics = await self.graph_service.find_similar_topics(topic, limit=3, tenant_id=tenant_id)
+                
+                # Расширяем поиск по связанным темам
+                related_topics = [topic] + [st['topic'] for st in similar_topics if st.get('similarity', 0) > 0.6]
+                
+                for related_topic in related_topics:
+                    graph_posts = await self.graph_service.search_related_posts(
+                        query=related_topic,
+                        topic=related_topic,
+                        tenant_id=tenant_id,
+                        limit=limit_per_topic // len(related_topics),
+                        max_depth=getattr(settings, 'neo4j_max_graph_depth', 2)
+                    )
+                    hits.setdefault(topic, []).extend(
+                        {**graph_post, 'related_topic': related_topic}
+                        for graph_post in graph_posts if graph_post.get('post_id')
+                    )
+            except Exception as e:
+                logger.warning("GraphRAG search failed in digest, continuing without graph", topic=topic, error=str(e))
+        return hits
     
-    async def _collect_posts_by_topics(
+    async def _retrieve_topic_candidates(
         self,
         topics: List[str],
         tenant_id: str,
-        user_id: UUID,
-        channel_ids: Optional[List[str]] = None,
-        limit_per_topic: int = 10,
-        db: Optional[Session] = None
-    ) -> List[Dict[str, Any]]:
+        channel_ids: List[str],
+        limit_per_topic: int,
+        db: Session,
+        failed_topics: Optional[set] = None,
+        topic_limits: Optional[Dict[str, int]] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
         """
-        Сбор постов по пользовательским тематикам.
+        Context7: [C7-ID: digest-batch-retrieval-001] Кандидаты постов по каждой теме.
         
-        Context7: ТОЛЬКО по темам из digest_settings.topics, не глобальный анализ.
-        """
-        if not db:
-            return []
+        - embeddings всех тем одним вызовом (через общий кэш эмбеддингов);
+        - один Qdrant search_batch с фильтром tenant/каналы;
+        - посты из Qdrant и графа гидрируются одним запросом WHERE id IN (...) вместе с каналами;
+        - FTS по-прежнему один запрос на тему (свой лимит и сортировка по теме).
         
-        if not channel_ids:
-            raise ValueError("Отсутствуют каналы пользователя для подбора постов.")
+        topic_limits переопределяет глубину Qdrant/FTS для отдельных тем (план окна берёт
+        глубже, чтобы хватило каждому пользователю группы); GraphRAG идёт с limit_per_topic.
         
-        normalized_channel_ids = [str(cid) for cid in channel_ids]
-        if not normalized_channel_ids:
-            raise ValueError("Список каналов пользователя пуст.")
-        channel_id_set = set(normalized_channel_ids)
+        Returns:
+            {topic: [post_dict]} в порядке источников qdrant → graph → fts;
+            темы с ошибкой Qdrant/PostgreSQL добавляются в failed_topics (если передан)
+        """
+        failed_topics = failed_topics if failed_topics is not None else set()
+        topic_limits = topic_limits or {}
+        channel_id_set = {str(cid) for cid in channel_ids}
+        embeddings = await self._embed_topics(topics)
         
-        all_posts = []
+        qdrant_hits: Dict[str, List[Any]] = {}
+        try:
+            qdrant_hits = self._search_topics_in_qdrant(
+                tenant_id, topics, embeddings, list(channel_id_set), limit_per_topic, topic_limits
+            )
+        except Exception as e:
+            failed_topics.update(topics)
+            logger.error("Error searching topics in Qdrant", tenant_id=str(tenant_id), error=str(e))
+        graph_hits = await self._search_topics_in_graph(topics, tenant_id, limit_per_topic)
+        
+        hit_ids = set()
+        for results in qdrant_hits.values():
+            hit_ids.update(str(r.payload.get('post_id')) for r in results if r.payload and r.payload.get('post_id'))
+        for graph_posts in graph_hits.values():
+            hit_ids.update(str(graph_post['post_id']) for graph_post in graph_posts)
+        try:
+            hydrated = self._hydrate_posts(db, hit_ids)
+        except Exception as e:
+            hydrated = {}
+            failed_topics.update(topics)
+            logger.error("Error hydrating digest posts", posts_count=len(hit_ids), error=str(e))
         
-        # Для каждой темы собираем посты
+        channel_uuids = [UUID(cid) for cid in channel_id_set]
+        candidates: Dict[str, List[Dict[str, Any]]] = {}
         for topic in topics:
+            topic_posts: List[Dict[str, Any]] = []
             try:
-                # Генерируем embedding для темы
-                topic_embedding = await self._generate_embedding(topic)
-                
-                if topic_embedding:
-                    # Поиск в Qdrant по теме
-                    collection_name = f"t{tenant_id}_posts"
-                    
-                    # Проверка существования коллекции
-                    collections = self.qdrant_client.get_collections()
-                    collection_names = [c.name for c in collections.collections]
-                    if "tNone_posts" in collection_names:
-                        logger.error(
-                            "Detected legacy Qdrant collection without tenant binding",
-                            tenant_id=tenant_id
-                        )
-                    if collection_name not in collection_names:
-                        logger.warning("Qdrant collection not found", collection=collection_name)
+                for result in qdrant_hits.get(topic, []):
+                    post_id = result.payload.get('post_id') if result.payload else None
+                    row = hydrated.get(str(post_id)) if post_id else None
+                    if row is None:
                         continue
-                    
-                    # Фильтр по каналам пользователя (если указаны)
-                    filter_conditions = []
-                    filter_conditions.append(
-                        FieldCondition(
-                            key="tenant_id",
-                            match=MatchValue(value=str(tenant_id))
-                        )
-                    )
-                    
-                    if channel_id_set:
-                        filter_conditions.append(
-                            FieldCondition(
-                                key="channel_id",
-                                match=MatchAny(any=list(channel_id_set))
-                            )
+                    post, channel = row
+                    if str(post.channel_id) not in channel_id_set:
+                        logger.warning(
+                            "Skipping Qdrant result: channel not in user scope",
+                            post_id=str(post_id),
+                            channel_id=str(post.channel_id)
                         )
-                    
-                    search_filter = Filter(must=filter_conditions) if filter_conditions else None
-                    
-                    # Поиск в Qdrant
-                    search_results = self.qdrant_client.search(
-                        collection_name=collection_name,
-                        query_vector=topic_embedding,
-                        query_filter=search_filter,
-                        limit=limit_per_topic
-                    )
-                    
-                    # Получаем полные данные постов из БД
-                    for result in search_results:
-                        post_id = result.payload.get('post_id')
-                        if post_id:
-                            post = db.query(Post).filter(Post.id == post_id).first()
-                            if post:
-                                if str(post.channel_id) not in channel_id_set:
-                                    logger.warning(
-                                        "Skipping Qdrant result: channel not in user scope",
-                                        post_id=str(post_id),
-                                        channel_id=str(post.channel_id),
-                                        allowed_channels=list(channel_id_set)
-                                    )
-                                    continue
-                                channel = db.query(Channel).filter(Channel.id == post.channel_id).first()
-                                
-                                all_posts.append({
-                                    'post_id': str(post_id),
-                                    'content': post.content or "",
-                                    'channel_title': channel.title if channel else "Неизвестный канал",
-                                    'channel_username': channel.username if channel else None,
-                                    'permalink': post.telegram_post_url,
-                                    'posted_at': post.posted_at,
-                                    'topic': topic,
-                                    'score': result.score,
-                                    'source': 'qdrant',
-                                    # Context7: Метрики популярности для отображения в дайджесте
-                                    'engagement_score': float(post.engagement_score) if post.engagement_score else 0.0,
-                                    'views_count': post.views_count or 0,
-                                    'reactions_count': post.reactions_count or 0,
-                                    'forwards_count': post.forwards_count or 0,
-                                    'replies_count': post.replies_count or 0
-                                })
+                        continue
+                    topic_posts.append(_post_to_digest_item(post, channel, topic, result.score, 'qdrant'))
                 
-                # Context7: Использование Neo4j для поиска связанных тем через граф
-                try:
-                    if await self.graph_service.health_check():
-                        # Находим похожие темы через граф
-                        similar_topics = await self.graph_service.find_similar_topics(topic, limit=3, tenant_id=tenant_id)
-                        
-                        # Расширяем поиск по связанным темам
-                        related_topics = [topic] + [st['topic'] for st in similar_topics if st.get('similarity', 0) > 0.6]
-                        
-                        # Поиск постов через граф для каждой связанной темы
-                        for related_topic in related_topics:
-                            graph_posts = await self.graph_service.search_related_posts(
-                                query=related_topic,
-                                topic=related_topic,
-                                tenant_id=tenant_id,
-                                limit=limit_per_topic // len(related_topics),
-                                max_depth=getattr(settings, 'neo4j_max_graph_depth', 2)
-                            )
-                            
-                            for graph_post in graph_posts:
-                                post_id = graph_post.get('post_id')
-                                if post_id:
-                                    # Проверяем, не добавлен ли уже
-                                    if not any(p['post_id'] == str(post_id) for p in all_posts):
-                                        post = db.query(Post).filter(Post.id == UUID(post_id)).first()
-                                        if post:
-                                            # Фильтр по каналам пользователя (если указаны)
-                                            if str(post.channel_id) not in channel_id_set:
-                                                continue
-                                            
-                                            channel = db.query(Channel).filter(Channel.id == post.channel_id).first()
-                                            
-                                            all_posts.append({
-                                                'post_id': str(post_id),
-                                                'content': graph_post.get('content', post.content or ""),
-                                                'channel_title': channel.title if channel else "Неизвестный канал",
-                                                'channel_username': channel.username if channel else None,
-                                                'permalink': post.telegram_post_url,
-                                                'posted_at': post.posted_at,
-                                                'topic': related_topic,
-                                                'score': graph_post.get('score', 0.7),
-                                                'related_topic': related_topic != topic,  # Флаг связанной темы
-                                                'source': 'graph',
-                                                # Context7: Метрики популярности
-                                                'engagement_score': float(post.engagement_score) if post.engagement_score else 0.0,
-                                                'views_count': post.views_count or 0,
-                                                'reactions_count': post.reactions_count or 0,
-                                                'forwards_count': post.forwards_count or 0,
-                                                'replies_count': post.replies_count or 0
-                                            })
-                except Exception as e:
-                    logger.warning("GraphRAG search failed in digest, continuing without graph", error=str(e))
+                for graph_post in graph_hits.get(topic, []):
+                    row = hydrated.get(str(graph_post['post_id']))
+                    if row is None or str(row[0].channel_id) not in channel_id_set:
+                        continue
+                    post, channel = row
+                    item = _post_to_digest_item(
+                        post, channel, graph_post['related_topic'], graph_post.get('score', 0.7), 'graph'
+                    )
+                    item['content'] = graph_post.get('content', post.content or "")
+                    item['related_topic'] = graph_post['related_topic'] != topic  # Флаг связанной темы
+                    topic_posts.append(item)
                 
                 # Также ищем через PostgreSQL FTS по ключевым словам
-                # Используем простой поиск по словам темы
-                topic_words = topic.split()
-                fts_query = db.query(Post).join(Channel).filter(
-                    and_(
-                        Post.content.isnot(None),
-                        or_(*[Post.content.ilike(f"%{word}%") for word in topic_words])
-                    )
+                # Context7: posts.search_vector (GIN ix_posts_search_vector) вместо ILIKE '%word%';
+                # слова темы объединяются через OR, как и в прежнем поиске
+                topic_tsquery = cast(
+                    func.replace(cast(func.plainto_tsquery('russian', topic), Text), '&', '|'),
+                    TSQUERY
                 )
-                
-                if channel_id_set:
-                    fts_query = fts_query.filter(Post.channel_id.in_([UUID(cid) for cid in normalized_channel_ids]))
-                
-                fts_posts = fts_query.order_by(Post.posted_at.desc()).limit(limit_per_topic).all()
-                
-                for post in fts_posts:
-                    # Проверяем, не добавлен ли уже
-                    if not any(p['post_id'] == str(post.id) for p in all_posts):
-                        if str(post.channel_id) not in channel_id_set:
-                            logger.warning(
-                                "Skipping FTS result: channel not in user scope",
-                                post_id=str(post.id),
-                                channel_id=str(post.channel_id),
-                                allowed_channels=list(channel_id_set)
-                            )
-                            continue
-                        
-                        channel = db.query(Channel).filter(Channel.id == post.channel_id).first()
-                        
-                        all_posts.append({
-                            'post_id': str(post.id),
-                            'content': post.content or "",
-                            'channel_title': channel.title if channel else "Неизвестный канал",
-                            'channel_username': channel.username if channel else None,
-                            'permalink': post.telegram_post_url,
-                            'posted_at': post.posted_at,
-                            'topic': topic,
-                            'score': 0.5,  # Средний score для FTS результатов
-                            'source': 'fts',
-                            # Context7: Метрики популярности
-                            'engagement_score': float(post.engagement_score) if post.engagement_score else 0.0,
-                            'views_count': post.views_count or 0,
-                            'reactions_count': post.reactions_count or 0,
-                            'forwards_count': post.forwards_count or 0,
-                            'replies_count': post.replies_count or 0
-                        })
-            
+                fts_rows = (
+                    db.query(Post, Channel)
+                    .join(Channel, Channel.id == Post.channel_id)
+                    .filter(Post.search_vector.op('@@')(topic_tsquery))
+                    .filter(Post.channel_id.in_(channel_uuids))
+                    .order_by(Post.posted_at.desc())
+                    .limit(topic_limits.get(topic, limit_per_topic))
+                    .all()
+                )
+                for post, channel in fts_rows:
+                    topic_posts.append(_post_to_digest_item(post, channel, topic, 0.5, 'fts'))  # Средний score для FTS
             except Exception as e:
+                failed_topics.add(topic)
                 logger.error("Error collecting posts for topic", topic=topic, error=str(e))
+            candidates[topic] = topic_posts
+        return candidates
+    
+    @staticmethod
+    def _hydrate_posts(db: Session, post_ids: Any) -> Dict[str, Tuple[Any, Any]]:
+        """Посты с каналами одним запросом. Returns {post_id: (Post, Channel | None)}."""
+        uuids = []
+        for post_id in post_ids:
+            try:
+                uuids.append(UUID(str(post_id)))
+            except ValueError:
                 continue
+        if not uuids:
+            return {}
+        rows = (
+            db.query(Post, Channel)
+            .outerjoin(Channel, Channel.id == Post.channel_id)
+            .filter(Post.id.in_(uuids))
+            .all()
+        )
+        return {str(post.id): (post, channel) for post, channel in rows}
+    
+    @staticmethod
+    def _merge_topic_candidates(
+        topics: List[str],
+        candidates: Dict[str, List[Dict[str, Any]]],
+        channel_ids: List[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Посты пользователя из кандидатов тем: фильтр по каналам, сортировка по времени и
+        релевантности, дедупликация постов и альбомов.
+        """
+        channel_id_set = {str(cid) for cid in channel_ids}
+        all_posts: List[Dict[str, Any]] = []
+        seen_ids = set()
+        for topic in topics:
+            for item in candidates.get(topic, []):
+                if item['channel_id'] not in channel_id_set:
+                    continue
+                # Graph/FTS результаты не дублируют уже найденные посты; дубли Qdrant
+                # между темами разрешаются дедупликацией после сортировки
+                if item['source'] != 'qdrant' and item['post_id'] in seen_ids:
+                    continue
+                seen_ids.add(item['post_id'])
+                all_posts.append(dict(item))
         
         # Сортируем по времени и релевантности
         all_posts.sort(key=lambda x: (x['posted_at'] or datetime.min, x['score']), reverse=True)
@@ -445,52 +507,161 @@ class DigestService:
                 seen.add(post['post_id'])
                 unique_posts.append(post)
         
-        # Context7: Дедупликация альбомов - оставляем только первый пост из альбома с наивысшим score
-        try:
-            # Получаем grouped_id для всех постов из БД
-            post_ids = [UUID(p['post_id']) for p in unique_posts]
-            if post_ids:
-                posts_with_grouped = db.query(
-                    Post.id,
-                    Post.grouped_id
-                ).filter(Post.id.in_(post_ids)).all()
-                
-                # Создаем словарь post_id -> grouped_id
-                post_grouped_map = {str(post.id): post.grouped_id for post in posts_with_grouped if post.grouped_id}
-                
-                # Группируем посты по альбомам
-                album_posts = {}  # grouped_id -> список (post_index, score)
-                for idx, post_data in enumerate(unique_posts):
-                    grouped_id = post_grouped_map.get(post_data['post_id'])
-                    if grouped_id:
-                        if grouped_id not in album_posts:
-                            album_posts[grouped_id] = []
-                        album_posts[grouped_id].append((idx, post_data['score']))
-                
-                # Для каждого альбома оставляем только пост с наивысшим score
-                indices_to_remove = set()
-                for grouped_id, posts_list in album_posts.items():
-                    if len(posts_list) > 1:
-                        # Сортируем по score и оставляем только первый
-                        posts_list.sort(key=lambda x: x[1], reverse=True)
-                        # Удаляем все посты кроме первого
-                        for idx, _ in posts_list[1:]:
-                            indices_to_remove.add(idx)
-                
-                # Удаляем дубликаты альбомов (в обратном порядке, чтобы не сбить индексы)
-                for idx in sorted(indices_to_remove, reverse=True):
-                    unique_posts.pop(idx)
-                
-                logger.debug(
-                    "Album deduplication applied in digest",
-                    albums_count=len(album_posts),
-                    removed_duplicates=len(indices_to_remove)
-                )
-        except Exception as e:
-            logger.warning("Error during album deduplication in digest", error=str(e))
-            # Продолжаем без дедупликации при ошибке
+        # Context7: Дедупликация альбомов - оставляем только пост из альбома с наивысшим score
+        # (grouped_id уже загружен вместе с постами, отдельный запрос не нужен)
+        best_in_album: Dict[Any, Dict[str, Any]] = {}
+        for post in unique_posts:
+            grouped_id = post.get('grouped_id')
+            if grouped_id and (grouped_id not in best_in_album or post['score'] > best_in_album[grouped_id]['score']):
+                best_in_album[grouped_id] = post
+        deduplicated = [
+            post for post in unique_posts
+            if not post.get('grouped_id') or best_in_album[post['grouped_id']] is post
+        ]
+        if len(deduplicated) != len(unique_posts):
+            logger.debug(
+                "Album deduplication applied in digest",
+                albums_count=len(best_in_album),
+                removed_duplicates=len(unique_posts) - len(deduplicated)
+            )
+        return deduplicated
+    
+    async def _collect_posts_by_topics(
+        self,
+        topics: List[str],
+        tenant_id: str,
+        user_id: UUID,
+        channel_ids: Optional[List[str]] = None,
+        limit_per_topic: int = 10,
+        db: Optional[Session] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Сбор постов по пользовательским тематикам.
+        
+        Context7: ТОЛЬКО по темам из digest_settings.topics, не глобальный анализ.
+        """
+        if not db:
+            return []
+        
+        if not channel_ids:
+            raise ValueError("Отсутствуют каналы пользователя для подбора постов.")
         
-        return unique_posts
+        normalized_channel_ids = [str(cid) for cid in channel_ids]
+        if not normalized_channel_ids:
+            raise ValueError("Список каналов пользователя пуст.")
+        
+        candidates = await self._load_shared_candidates(
+            topics, str(tenant_id), normalized_channel_ids, limit_per_topic
+        )
+        missing_topics = [topic for topic in topics if topic not in candidates]
+        if missing_topics:
+            candidates.update(await self._retrieve_topic_candidates(
+                missing_topics, tenant_id, normalized_channel_ids, limit_per_topic, db
+            ))
+        
+        # computed включает темы с result='fallback' (запись плана есть, но её не хватает пользователю)
+        digest_topic_candidates_total.labels(tenant_id=str(tenant_id), result='shared').inc(len(topics) - len(missing_topics))
+        digest_topic_candidates_total.labels(tenant_id=str(tenant_id), result='computed').inc(len(missing_topics))
+        return self._merge_topic_candidates(topics, candidates, normalized_channel_ids)
+    
+    async def _load_shared_candidates(
+        self,
+        topics: List[str],
+        tenant_id: str,
+        channel_ids: List[str],
+        limit_per_topic: int
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Кандидаты тем из плана окна scheduler, урезанные до каналов и лимита пользователя.
+        
+        Темы, для которых запись плана может дать меньше постов, чем собственный поиск
+        пользователя (TopicCandidates.for_user вернул None), считаются заново.
+        """
+        store = get_digest_candidate_store()
+        if store is None:
+            return {}
+        current_window = candidate_window_start(window_minutes=store.window_minutes)
+        previous_window = current_window - timedelta(minutes=store.window_minutes)
+        shared = await store.get_many(tenant_id, [current_window, previous_window], topics)
+        
+        candidates: Dict[str, List[Dict[str, Any]]] = {}
+        for topic, entry in shared.items():
+            posts = entry.for_user(channel_ids, limit_per_topic)
+            if posts is None:
+                digest_topic_candidates_total.labels(tenant_id=tenant_id, result='fallback').inc()
+                continue
+            candidates[topic] = posts
+        return candidates
+    
+    async def plan_shared_candidates(
+        self,
+        tenant_id: str,
+        entries: List[DigestPlanEntry],
+        db: Session,
+        now: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """
+        Context7: [C7-ID: digest-shared-candidates-001] Планирование окна дайджестов арендатора.
+        
+        Пользователи группируются по теме; кандидаты всех тем считаются одним проходом
+        _retrieve_topic_candidates по объединению каналов группы и кладутся в
+        DigestCandidateStore. Глубина Qdrant/FTS темы - максимальный лимит группы, умноженный
+        на число её пользователей (не больше digest_shared_candidates_max_fetch): top-k по
+        объединению каналов иначе вытесняет посты тихих каналов. При генерации записи
+        урезаются до каналов и лимита пользователя (TopicCandidates.for_user).
+        
+        Returns:
+            {"user_topics": пары (пользователь, тема), "topics": посчитанные темы}
+        """
+        store = get_digest_candidate_store()
+        users_by_topic: Dict[str, List[DigestPlanEntry]] = {}
+        for entry in entries:
+            if not entry.channel_ids:
+                continue
+            for topic in dict.fromkeys(entry.topics):
+                if topic:
+                    users_by_topic.setdefault(topic, []).append(entry)
+        
+        user_topics = sum(len(users) for users in users_by_topic.values())
+        stats = {"user_topics": user_topics, "topics": len(users_by_topic)}
+        if store is None or not users_by_topic:
+            return stats
+        
+        topics = list(users_by_topic)
+        channel_ids = sorted({str(cid) for users in users_by_topic.values() for entry in users for cid in entry.channel_ids})
+        limit_per_topic = max(entry.limit_per_topic for users in users_by_topic.values() for entry in users)
+        max_fetch = max(getattr(settings, 'digest_shared_candidates_max_fetch', 200), limit_per_topic)
+        topic_limits = {
+            topic: min(max(entry.limit_per_topic for entry in users) * len(users), max_fetch)
+            for topic, users in users_by_topic.items()
+        }
+        
+        # Темы с ошибкой источника не публикуются: пользователи посчитают их сами
+        failed_topics: set = set()
+        candidates = await self._retrieve_topic_candidates(
+            topics, tenant_id, channel_ids, limit_per_topic, db,
+            failed_topics=failed_topics, topic_limits=topic_limits
+        )
+        await store.set_many(
+            str(tenant_id),
+            candidate_window_start(now, store.window_minutes),
+            {
+                topic: TopicCandidates(posts=posts, channel_ids=channel_ids, fetch_limit=topic_limits[topic])
+                for topic, posts in candidates.items() if topic not in failed_topics
+            }
+        )
+        
+        digest_plan_user_topics_total.labels(tenant_id=str(tenant_id)).inc(user_topics)
+        digest_plan_topic_retrievals_total.labels(tenant_id=str(tenant_id)).inc(len(topics))
+        logger.info(
+            "Digest window planned",
+            tenant_id=str(tenant_id),
+            users=len(entries),
+            topics=len(topics),
+            user_topics=user_topics,
+            reuse_ratio=round(1 - len(topics) / user_topics, 3)
+        )
+        return stats
     
     async def _assemble_context(self, posts: List[Dict[str, Any]], max_posts: int = 20) -> str:
         """
@@ -627,14 +798,7 @@ class DigestService:
         
         # Получаем каналы пользователя (если channels_filter не указан, используем все)
         user_channels = db.query(UserChannel).filter(UserChannel.user_id == user_id).all()
-        channel_ids = None
-        
-        if digest_settings.channels_filter:
-            # Используем только указанные каналы
-            channel_ids = digest_settings.channels_filter
-        else:
-            # Используем все каналы пользователя
-            channel_ids = [str(uc.channel_id) for uc in user_channels]
+        channel_ids = resolve_digest_channel_ids(digest_settings, [uc.channel_id for uc in user_channels])
         
         if not channel_ids:
             logger.warning(
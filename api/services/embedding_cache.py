@@ -0,0 +1,121 @@
+"""
+Кэш эмбеддингов для API (RAG, дайджесты, тренды).
+
+Context7: [C7-ID: AI-EMBEDDING-CACHE-001] тот же content-addressed кэш, что и в worker
+(shared.embeddings.EmbeddingCache, общий Redis namespace) — запрос или тема дайджеста,
+совпадающие с уже проиндексированным текстом, не уходят в GigaChat повторно.
+
+embed_text/embed_texts - общий путь эмбеддингов RAGService и DigestService: нормализация
+как при индексации, кэш, промахи одним асинхронным запросом в gpt2giga-proxy (httpx,
+без блокировки event loop).
+"""
+
+import os
+from typing import List, Optional
+
+import httpx
+import redis.asyncio as redis_async
+import structlog
+from shared.embeddings import EmbeddingCache, normalize_text
+
+from config import settings
+
+logger = structlog.get_logger()
+
+EMBEDDING_REQUEST_TIMEOUT_SEC = 30.0
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Singleton кэша эмбеддингов API процесса (None, если кэш отключён)."""
+    global _embedding_cache
+    if not settings.embedding_cache_enabled:
+        return None
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            model=settings.gigachat_embeddings_model,
+            # decode_responses=False: в Redis лежат бинарные blob'ы векторов
+            redis_client=redis_async.from_url(settings.redis_url, decode_responses=False),
+            lru_max_items=settings.embedding_cache_lru_max_items,
+            lru_max_bytes=settings.embedding_cache_lru_max_mb * 1024 * 1024,
+            redis_ttl_seconds=settings.embedding_cache_ttl_seconds,
+            redis_max_items=settings.embedding_cache_redis_max_items,
+            dtype=settings.embedding_cache_dtype,
+        )
+    return _embedding_cache
+
+
+async def request_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Embeddings нескольких текстов одним вызовом gpt2giga-proxy (без кэша).
+
+    Returns:
+        Векторы в порядке texts; [] для текста без ответа или при ошибке
+    """
+    if not texts:
+        return []
+    proxy_url = getattr(settings, 'gigachat_proxy_url', None) or os.getenv("GIGACHAT_PROXY_URL", "http://gpt2giga-proxy:8090")
+    credentials = os.getenv("GIGACHAT_CREDENTIALS")
+    scope = os.getenv("GIGACHAT_SCOPE", "GIGACHAT_API_PERS")
+    try:
+        async with httpx.AsyncClient(timeout=EMBEDDING_REQUEST_TIMEOUT_SEC) as client:
+            response = await client.post(
+                f"{proxy_url}/v1/embeddings",
+                json={
+                    "input": texts if len(texts) > 1 else texts[0],
+                    "model": "any"  # gpt2giga сам отправит на EmbeddingsGigaR
+                },
+                headers={
+                    "Authorization": f"Bearer giga-cred-{credentials}:{scope}",
+                    "Content-Type": "application/json"
+                },
+            )
+        if response.status_code != 200:
+            logger.warning("Failed to generate embedding", status_code=response.status_code)
+            return [[] for _ in texts]
+        data = response.json().get('data') or []
+        # Context7: порядок ответа восстанавливается по index (OpenAI-совместимый формат)
+        embeddings: List[List[float]] = [[] for _ in texts]
+        for position, item in enumerate(data):
+            index = item.get('index', position)
+            if 0 <= index < len(texts):
+                embeddings[index] = item.get('embedding', []) or []
+        return embeddings
+    except Exception as e:
+        logger.error("Error generating embedding", error=str(e))
+        return [[] for _ in texts]
+
+
+async def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embeddings текстов через кэш; промахи уходят в прокси одним батчем.
+
+    Returns:
+        Векторы в порядке texts; [] для пустого текста или при ошибке
+    """
+    normalized = [normalize_text(text) for text in texts]
+    present = list(dict.fromkeys(text for text in normalized if text))
+    if not present:
+        return [[] for _ in texts]
+
+    cache = get_embedding_cache()
+    try:
+        if cache is None:
+            vectors = await request_embeddings(present)
+        else:
+            vectors = await cache.get_or_compute(present, request_embeddings)
+    except Exception as e:
+        logger.error("Error generating embeddings", texts_count=len(present), error=str(e))
+        return [[] for _ in texts]
+
+    by_text = {
+        text: vector for text, vector in zip(present, vectors)
+        if vector and not isinstance(vector, BaseException)
+    }
+    return [by_text.get(text, []) for text in normalized]
+
+
+async def embed_text(text: str) -> List[float]:
+    """Embedding одного текста (запрос RAG, тема дайджеста); [] при ошибке."""
+    return (await embed_texts([text]))[0]
@@ -14,6 +14,7 @@ from neo4j import AsyncGraphDatabase
 from neo4j.exceptions import ServiceUnavailable, AuthError
 
 from config import settings
+from shared.graph import ensure_graph_schema, schema_bootstrap_enabled
 
 logger = structlog.get_logger()
 
@@ -57,6 +58,7 @@ class GraphService:
         # Context7: Async-loop provider (как в worker/integrations/neo4j_client.py)
         self._driver = None
         self._current_loop = None
+        self._schema_ready = False
         
         logger.info("GraphService initialized", uri=self.uri, username=self.username)
     
@@ -81,11 +83,27 @@ class GraphService:
                 await self._ping()
                 
                 logger.info("GraphService connected successfully")
+                
+                await self.ensure_schema()
             
         except Exception as e:
             logger.error("Failed to connect to Neo4j", error=str(e))
             raise
     
+    async def ensure_schema(self) -> None:
+        """
+        Context7: [C7-ID: NEO4J-SCHEMA-001] Ограничения и индексы для MERGE/MATCH по ключам.
+        
+        Та же схема, что и у worker (shared.graph); ошибки не прерывают старт API.
+        """
+        if self._schema_ready or not self._driver or not schema_bootstrap_enabled():
+            return
+        try:
+            await ensure_graph_schema(self._driver)
+            self._schema_ready = True
+        except Exception as e:
+            logger.error("Neo4j schema bootstrap failed", error=str(e))
+    
     async def _ping(self):
         """Health-пинг перед операциями."""
         try:
@@ -8,7 +8,7 @@ import time
 import json
 import hashlib
 from collections import defaultdict
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from uuid import UUID
 from datetime import datetime, timezone
 
@@ -28,10 +28,16 @@ from models.database import Post, PostEnrichment, User
 from services.intent_classifier import get_intent_classifier, IntentResponse
 from services.searxng_service import get_searxng_service
 from services.graph_service import get_graph_service
+from api.services.retrieval_fanout import FanOutResult, FanOutRetriever, RetrievalLeg
+from api.services.rank_fusion import fuse, resolve_fusion_strategy
+from api.services.embedding_cache import embed_text
 from config import settings
 
 logger = structlog.get_logger()
 
+# Context7: веса веток при отсутствии query embedding (FTS + GraphRAG)
+FTS_GRAPH_FALLBACK_WEIGHTS = {"fts": 0.7, "graph": 0.3}
+
 # ============================================================================
 # PYDANTIC MODELS
 # ============================================================================
@@ -96,6 +102,9 @@ class RAGService:
         # Context7: Инициализация GraphService для GraphRAG
         self.graph_service = graph_service or get_graph_service()
         
+        # Context7: Fan-out движок для конкурентного гибридного поиска
+        self._retriever = FanOutRetriever()
+        
         # Инициализация GigaChat LLM через langchain-gigachat
         # Context7: Исправлен URL (без /v1) для обработки редиректов прокси
         api_base = openai_api_base or settings.openai_api_base or "http://gpt2giga-proxy:8090"
@@ -223,43 +232,13 @@ class RAGService:
         )
     
     async def _generate_embedding(self, text: str) -> List[float]:
-        """Генерация embedding для запроса через GigaChat."""
-        try:
-            import requests
-            import os
-            
-            proxy_url = getattr(settings, 'gigachat_proxy_url', None) or os.getenv("GIGACHAT_PROXY_URL", "http://gpt2giga-proxy:8090")
-            url = f"{proxy_url}/v1/embeddings"
-            
-            credentials = os.getenv("GIGACHAT_CREDENTIALS")
-            scope = os.getenv("GIGACHAT_SCOPE", "GIGACHAT_API_PERS")
-            auth_header = f"giga-cred-{credentials}:{scope}"
-            
-            response = requests.post(
-                url,
-                json={
-                    "input": text,
-                    "model": "any"  # gpt2giga сам отправит на EmbeddingsGigaR
-                },
-                headers={
-                    "Authorization": f"Bearer {auth_header}",
-                    "Content-Type": "application/json"
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'data' in data and len(data['data']) > 0:
-                    embedding = data['data'][0].get('embedding', [])
-                    return embedding
-            
-            logger.warning("Failed to generate embedding", status_code=response.status_code)
-            return []
+        """
+        Генерация embedding для запроса через GigaChat.
         
-        except Exception as e:
-            logger.error("Error generating embedding", error=str(e))
-            return []
+        Context7: [C7-ID: AI-EMBEDDING-CACHE-001] общий с DigestService путь (кэш + async
+        запрос в gpt2giga-proxy, см. services.embedding_cache.embed_text).
+        """
+        return await embed_text(text)
     
     async def _search_qdrant(
         self,
@@ -273,7 +252,8 @@ class RAGService:
             collection_name = f"t{tenant_id}_posts"
             
             # Проверка существования коллекции
-            collections = self.qdrant_client.get_collections()
+            # Context7: sync Qdrant клиент выполняется в потоке, чтобы не блокировать event loop
+            collections = await asyncio.to_thread(self.qdrant_client.get_collections)
             if collection_name not in [c.name for c in collections.collections]:
                 logger.warning("Qdrant collection not found", collection=collection_name)
                 return []
@@ -298,7 +278,8 @@ class RAGService:
             search_filter = Filter(must=filter_conditions) if filter_conditions else None
             
             # Поиск
-            search_results = self.qdrant_client.search(
+            search_results = await asyncio.to_thread(
+                self.qdrant_client.search,
                 collection_name=collection_name,
                 query_vector=query_embedding,
                 query_filter=search_filter,
@@ -332,36 +313,42 @@ class RAGService:
             return []
         
         try:
-            # Context7: PostgreSQL FTS для keyword search
-            # Используем tsvector для поиска по content
-            # Context7: Фильтрация по tenant_id через JOIN с user_channel и по channel_ids
-            base_query = """
-                SELECT DISTINCT
-                    p.id,
-                    p.channel_id,
-                    p.content,
-                    p.telegram_post_url,
-                    ts_rank(to_tsvector('russian', COALESCE(p.content, '')), plainto_tsquery('russian', :query)) as rank
-                FROM posts p
-                JOIN channels c ON p.channel_id = c.id
-                JOIN user_channel uc ON uc.channel_id = c.id
-                JOIN users u ON u.id = uc.user_id
-                WHERE to_tsvector('russian', COALESCE(p.content, '')) @@ plainto_tsquery('russian', :query)
-                    AND u.tenant_id = CAST(:tenant_id AS uuid)
-            """
-            
+            # Context7: PostgreSQL FTS по предвычисленному posts.search_vector (GIN ix_posts_search_vector)
+            # Сначала сужаем до каналов арендатора (tenant -> channel prefilter), без DISTINCT по постам
+            channel_filter = ""
             params = {"query": query, "tenant_id": tenant_id, "limit": limit}
             
             # Добавляем фильтрацию по channel_ids если указаны
             if channel_ids:
-                base_query += " AND p.channel_id = ANY(CAST(:channel_ids AS uuid[]))"
+                channel_filter = " AND uc.channel_id = ANY(CAST(:channel_ids AS uuid[]))"
                 params["channel_ids"] = channel_ids
             
-            base_query += " ORDER BY rank DESC LIMIT :limit"
+            base_query = f"""
+                WITH tenant_channels AS (
+                    SELECT DISTINCT uc.channel_id
+                    FROM user_channel uc
+                    JOIN users u ON u.id = uc.user_id
+                    WHERE u.tenant_id = CAST(:tenant_id AS uuid){channel_filter}
+                )
+                SELECT
+                    p.id,
+                    p.channel_id,
+                    p.content,
+                    p.telegram_post_url,
+                    ts_rank(p.search_vector, q.tsq) as rank
+                FROM tenant_channels tc
+                JOIN posts p ON p.channel_id = tc.channel_id
+                CROSS JOIN plainto_tsquery('russian', :query) AS q(tsq)
+                WHERE p.search_vector @@ q.tsq
+                ORDER BY rank DESC
+                LIMIT :limit
+            """
             
             fts_query = text(base_query)
-            result = db.execute(fts_query, params)
-            rows = result.fetchall()
+            # Context7: sync Session выполняется в потоке, чтобы не блокировать event loop
+            rows = await asyncio.to_thread(
+                lambda: db.execute(fts_query, params).fetchall()
+            )
             
             results = []
             for row in rows:
@@ -456,6 +443,51 @@ class RAGService:
             # Context7: Graceful degradation - возвращаем пустой список при ошибке
             return []
     
+    async def _fanout_retrieval(
+        self,
+        query: str,
+        tenant_id: str,
+        fetch_limit: int,
+        channel_ids: Optional[List[str]] = None,
+        db: Optional[Session] = None,
+        user_id: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None,
+        only_legs: Optional[Set[str]] = None
+    ) -> FanOutResult:
+        """
+        Конкурентный запуск веток поиска (Qdrant / FTS / GraphRAG) с per-leg дедлайнами.
+
+        Ветка Qdrant запускается только при наличии query_embedding; only_legs ограничивает
+        запуск подмножеством веток (догрузка). По возвращении sync Session снова свободна:
+        FTS-ветка, превысившая бюджет, дожидается здесь.
+        """
+        legs = []
+        if query_embedding:
+            legs.append(RetrievalLeg(
+                name="qdrant",
+                factory=lambda: self._search_qdrant(query_embedding, tenant_id, fetch_limit, channel_ids),
+                budget_seconds=settings.rag_qdrant_budget_ms / 1000
+            ))
+        if db is not None:
+            legs.append(RetrievalLeg(
+                name="fts",
+                factory=lambda: self._search_postgres_fts(query, tenant_id, fetch_limit, channel_ids, db),
+                budget_seconds=settings.rag_fts_budget_ms / 1000,
+                join_on_timeout=True
+            ))
+        legs.append(RetrievalLeg(
+            name="graph",
+            factory=lambda: self._search_neo4j_graph(query, user_id, tenant_id=tenant_id, limit=fetch_limit),
+            budget_seconds=settings.rag_graph_budget_ms / 1000
+        ))
+
+        if only_legs is not None:
+            legs = [leg for leg in legs if leg.name in only_legs]
+        fanout = await self._retriever.run(legs)
+        # Context7: Session дальше используется для дедупликации альбомов и сборки контекста
+        await fanout.join_detached()
+        return fanout
+
     async def _hybrid_search(
         self,
         query: str,
@@ -464,7 +496,8 @@ class RAGService:
         limit: int = 10,
         channel_ids: Optional[List[str]] = None,
         db: Optional[Session] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        weights: Optional[Dict[str, float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Hybrid search: Qdrant ANN + PostgreSQL FTS + Neo4j GraphRAG с re-ranking.
@@ -473,87 +506,90 @@ class RAGService:
         - Qdrant (вес 0.5) - семантический поиск
         - PostgreSQL FTS (вес 0.2) - keyword search
         - Neo4j GraphRAG (вес 0.3) - графовые связи и интересы пользователя
+
+        Context7: ветки выполняются конкурентно через FanOutRetriever, каждая в своём
+        latency-бюджете; ветка, превысившая бюджет, деградирует до пустого результата.
+        Скоры веток объединяются через rank_fusion (стратегия выбирается per-tenant);
+        без query_embedding ветка Qdrant пропускается.
         """
-        # Параллельный поиск в Qdrant, PostgreSQL и Neo4j
-        qdrant_results = await self._search_qdrant(query_embedding, tenant_id, limit * 2, channel_ids)
-        fts_results = await self._search_postgres_fts(query, tenant_id, limit * 2, channel_ids, db)
+        strategy = resolve_fusion_strategy(
+            tenant_id, settings.rag_fusion_strategy, settings.rag_fusion_tenant_strategies
+        )
         
-        # Context7: GraphRAG поиск (с fallback при недоступности Neo4j)
-        graph_results = []
-        try:
-            graph_results = await self._search_neo4j_graph(query, user_id, tenant_id=tenant_id, limit=limit * 2)
-        except Exception as e:
-            logger.warning("GraphRAG search failed, continuing without graph results", error=str(e))
+        # Context7: ранняя остановка без последовательных fan-out: все ветки конкурентно на
+        # малой глубине (limit * N); если top-k слияния ещё может измениться, одним вторым
+        # fan-out догружаются только неисчерпанные ветки (вернувшие ровно fetch_limit)
+        fetch_limit = max(limit * settings.rag_fusion_fetch_multiplier, limit, 1)
+        max_fetch_limit = max(limit * settings.rag_fusion_max_fetch_multiplier, fetch_limit)
+        # Параллельный поиск в Qdrant, PostgreSQL и Neo4j
+        fanout = await self._fanout_retrieval(
+            query, tenant_id, fetch_limit, channel_ids, db, user_id, query_embedding=query_embedding
+        )
+        legs = {name: fanout.results(name) for name in fanout.outcomes}
+        fusion = fuse(legs, strategy=strategy, weights=weights, limit=limit, fetch_limit=fetch_limit)
+        
+        deepened: List[str] = []
+        if not fusion.stable and not fanout.degraded and max_fetch_limit > fetch_limit:
+            deepened = [name for name, results in legs.items() if len(results) >= fetch_limit]
+        if deepened:
+            deeper = await self._fanout_retrieval(
+                query, tenant_id, max_fetch_limit, channel_ids, db, user_id,
+                query_embedding=query_embedding, only_legs=set(deepened)
+            )
+            for name in deepened:
+                # Ветка, деградировавшая при догрузке, остаётся с результатами первого прохода
+                if deeper.results(name):
+                    legs[name] = deeper.results(name)
+            fetch_limit = max_fetch_limit
+            fusion = fuse(legs, strategy=strategy, weights=weights, limit=limit, fetch_limit=fetch_limit)
+        
+        logger.debug(
+            "Hybrid search fused",
+            strategy=strategy,
+            fetch_limit=fetch_limit,
+            deepened_legs=deepened,
+            topk_stable=fusion.stable,
+            candidates=len(fusion.hits)
+        )
         
         # Объединение и дедупликация результатов
         post_scores = {}
-        
-        # Добавляем результаты из Qdrant (вес 0.5)
-        for result in qdrant_results:
-            post_id = result['post_id']
-            score = result['score'] * 0.5
-            if post_id not in post_scores:
-                post_scores[post_id] = {
-                    'post_id': post_id,
-                    'payload': result.get('payload', {}),
-                    'qdrant_score': result['score'],
-                    'fts_score': 0.0,
-                    'graph_score': 0.0,
-                    'hybrid_score': score
-                }
+        for hit in fusion.hits:
+            qdrant_item = hit.items.get("qdrant")
+            fts_item = hit.items.get("fts")
+            graph_item = hit.items.get("graph")
+            
+            # Payload: Qdrant payload -> FTS строка -> графовые данные
+            if qdrant_item is not None:
+                payload = dict(qdrant_item.get('payload') or {})
+                if fts_item and 'content' not in payload:
+                    payload.update(fts_item)
+            elif fts_item is not None:
+                payload = dict(fts_item)
             else:
-                post_scores[post_id]['hybrid_score'] += score
-                post_scores[post_id]['qdrant_score'] = result['score']
-        
-        # Добавляем результаты из FTS (вес 0.2)
-        for result in fts_results:
-            post_id = result['post_id']
-            score = result['score'] * 0.2
-            if post_id not in post_scores:
-                post_scores[post_id] = {
-                    'post_id': post_id,
-                    'payload': result,
-                    'qdrant_score': 0.0,
-                    'fts_score': result['score'],
-                    'graph_score': 0.0,
-                    'hybrid_score': score
+                payload = {
+                    'content': graph_item.get('content', ''),
+                    'topic': graph_item.get('topic'),
+                    'topics': graph_item.get('topics', []),
+                    'channel_title': graph_item.get('channel_title')
                 }
-            else:
-                post_scores[post_id]['hybrid_score'] += score
-                post_scores[post_id]['fts_score'] = result['score']
-                if 'content' not in post_scores[post_id]['payload']:
-                    post_scores[post_id]['payload'].update(result)
-        
-        # Добавляем результаты из Neo4j GraphRAG (вес 0.3)
-        for result in graph_results:
-            post_id = result.get('post_id')
-            if not post_id:
-                continue
             
-            score = result.get('graph_score', 0.8) * 0.3
-            if post_id not in post_scores:
-                post_scores[post_id] = {
-                    'post_id': post_id,
-                    'payload': {
-                        'content': result.get('content', ''),
-                        'topic': result.get('topic'),
-                        'topics': result.get('topics', []),
-                        'channel_title': result.get('channel_title')
-                    },
-                    'qdrant_score': 0.0,
-                    'fts_score': 0.0,
-                    'graph_score': result.get('graph_score', 0.8),
-                    'hybrid_score': score,
-                    'relation_type': result.get('relation_type', 'direct')
-                }
-            else:
-                post_scores[post_id]['hybrid_score'] += score
-                post_scores[post_id]['graph_score'] = result.get('graph_score', 0.8)
+            entry = {
+                'post_id': hit.post_id,
+                'payload': payload,
+                'qdrant_score': hit.leg_scores.get('qdrant', 0.0),
+                'fts_score': hit.leg_scores.get('fts', 0.0),
+                'graph_score': graph_item.get('graph_score', 0.8) if graph_item else 0.0,
+                'hybrid_score': hit.fused_score
+            }
+            if graph_item is not None:
+                entry['relation_type'] = graph_item.get('relation_type', 'direct')
                 # Обогащаем payload графовыми данными
-                if 'topics' in result:
-                    existing_topics = post_scores[post_id]['payload'].get('topics', [])
+                if (qdrant_item is not None or fts_item is not None) and 'topics' in graph_item:
+                    existing_topics = payload.get('topics', [])
                     if isinstance(existing_topics, list):
-                        post_scores[post_id]['payload']['topics'] = list(set(existing_topics + result.get('topics', [])))
+                        payload['topics'] = list(set(existing_topics + graph_item.get('topics', [])))
+            post_scores[hit.post_id] = entry
         
         # Context7: Дедупликация альбомов - получаем grouped_id из БД и оставляем только первый пост с наивысшим score
         if db:
@@ -1265,39 +1301,10 @@ class RAGService:
                 )
             else:
                 # Fallback на FTS + GraphRAG (без векторов)
-                fts_results = await self._search_postgres_fts(
-                    query, tenant_id, limit * 2, channel_ids, db
+                search_results = await self._hybrid_search(
+                    query, [], tenant_id, limit * 2, channel_ids, db,
+                    user_id=str(user_id), weights=FTS_GRAPH_FALLBACK_WEIGHTS
                 )
-                graph_results = await self._search_neo4j_graph(query, str(user_id), tenant_id=tenant_id, limit=limit * 2)
-                
-                # Объединяем результаты
-                post_scores = {}
-                for result in fts_results:
-                    post_id = result['post_id']
-                    post_scores[post_id] = {
-                        'post_id': post_id,
-                        'payload': result,
-                        'hybrid_score': result['score'] * 0.7
-                    }
-                
-                for result in graph_results:
-                    post_id = result.get('post_id')
-                    if post_id:
-                        score = result.get('graph_score', 0.8) * 0.3
-                        if post_id in post_scores:
-                            post_scores[post_id]['hybrid_score'] += score
-                        else:
-                            post_scores[post_id] = {
-                                'post_id': post_id,
-                                'payload': result,
-                                'hybrid_score': score
-                            }
-                
-                search_results = sorted(
-                    post_scores.values(),
-                    key=lambda x: x['hybrid_score'],
-                    reverse=True
-                )[:limit * 2]
             
             if not search_results:
                 logger.warning("No search results found", query=query[:50])
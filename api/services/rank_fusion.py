@@ -0,0 +1,232 @@
+"""
+Rank Fusion для гибридного RAG поиска
+Context7 best practice: скоры Qdrant (cosine), PostgreSQL FTS (ts_rank) и Neo4j несопоставимы,
+поэтому ветки объединяются через reciprocal-rank fusion или нормализованные скоры.
+
+Стратегии:
+- rrf: reciprocal-rank fusion (только ранги, устойчиво к шкалам)
+- minmax: min-max нормализация скоров ветки в [0, 1] + взвешенная сумма
+- zscore: z-score нормализация (через CDF нормального распределения в [0, 1]) + взвешенная сумма
+- weighted: исторический режим — взвешенная сумма сырых скоров
+
+Итоговый fused_score всех стратегий (кроме weighted) лежит в [0, 1], поэтому пороги
+уверенности (например, searxng_enrichment_score_threshold) остаются применимыми.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Context7: веса веток по умолчанию (исторические веса _hybrid_search)
+DEFAULT_LEG_WEIGHTS: Dict[str, float] = {
+    "qdrant": 0.5,
+    "fts": 0.2,
+    "graph": 0.3,
+}
+
+RRF_K = 60
+
+
+# ============================================================================
+# NORMALIZERS
+# ============================================================================
+
+def minmax_normalize(scores: List[float]) -> List[float]:
+    """Min-max нормализация в [0, 1]; при вырожденном диапазоне все скоры = 1.0."""
+    if not scores:
+        return []
+    low, high = min(scores), max(scores)
+    if math.isclose(high, low):
+        return [1.0 for _ in scores]
+    span = high - low
+    return [(s - low) / span for s in scores]
+
+
+def zscore_normalize(scores: List[float]) -> List[float]:
+    """Z-score нормализация, отображённая в [0, 1] через CDF нормального распределения."""
+    if not scores:
+        return []
+    mean = sum(scores) / len(scores)
+    variance = sum((s - mean) ** 2 for s in scores) / len(scores)
+    std = math.sqrt(variance)
+    if std == 0.0:
+        return [0.5 for _ in scores]
+    return [0.5 * (1.0 + math.erf((s - mean) / (std * math.sqrt(2.0)))) for s in scores]
+
+
+NORMALIZERS: Dict[str, Callable[[List[float]], List[float]]] = {
+    "minmax": minmax_normalize,
+    "zscore": zscore_normalize,
+}
+
+
+# ============================================================================
+# FUSION
+# ============================================================================
+
+@dataclass
+class FusedHit:
+    """Результат слияния для одного поста."""
+    post_id: str
+    fused_score: float = 0.0
+    leg_scores: Dict[str, float] = field(default_factory=dict)  # сырые скоры веток
+    leg_ranks: Dict[str, int] = field(default_factory=dict)  # ранги в ветках (с 1)
+    items: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # исходные элементы веток
+
+
+@dataclass
+class FusionOutcome:
+    """Результат слияния веток."""
+    hits: List[FusedHit]
+    stable: bool  # top-k не может измениться при догрузке веток
+
+
+def _leg_contributions(
+    strategy: str,
+    results: List[Dict[str, Any]],
+    weight: float,
+    total_weight: float
+) -> List[float]:
+    """Вклад каждого элемента ветки в fused_score (элементы в порядке ранга)."""
+    if strategy == "rrf":
+        max_rrf = total_weight / (RRF_K + 1)
+        return [weight / (RRF_K + rank) / max_rrf for rank in range(1, len(results) + 1)]
+
+    raw = [float(item.get("score") or 0.0) for item in results]
+    if strategy == "weighted":
+        return [weight * s for s in raw]
+
+    normalized = NORMALIZERS[strategy](raw)
+    return [weight / total_weight * s for s in normalized]
+
+
+def _unseen_bound(
+    strategy: str,
+    results: List[Dict[str, Any]],
+    contributions: List[float],
+    weight: float,
+    total_weight: float,
+    fetch_limit: Optional[int]
+) -> float:
+    """
+    Верхняя граница вклада ветки для поста, которого ветка ещё не вернула.
+
+    Context7: ветка, вернувшая меньше fetch_limit элементов, исчерпана — граница 0.
+    Для score-нормализаторов граница — вклад последнего элемента (ветки отсортированы по убыванию).
+    """
+    if fetch_limit is None or len(results) < fetch_limit:
+        return 0.0
+    if strategy == "rrf":
+        max_rrf = total_weight / (RRF_K + 1)
+        return weight / (RRF_K + len(results) + 1) / max_rrf
+    return contributions[-1] if contributions else 0.0
+
+
+def fuse(
+    legs: Dict[str, List[Dict[str, Any]]],
+    strategy: str = "rrf",
+    weights: Optional[Dict[str, float]] = None,
+    limit: Optional[int] = None,
+    fetch_limit: Optional[int] = None
+) -> FusionOutcome:
+    """
+    Слияние результатов веток поиска.
+
+    Args:
+        legs: Результаты веток (leg -> список dict с ключами post_id и score), по убыванию score
+        strategy: rrf | minmax | zscore | weighted
+        weights: Веса веток (по умолчанию DEFAULT_LEG_WEIGHTS)
+        limit: Размер top-k для проверки стабильности
+        fetch_limit: Сколько элементов запрашивалось у каждой ветки (для ранней остановки)
+
+    Returns:
+        FusionOutcome с постами по убыванию fused_score и флагом стабильности top-k
+    """
+    if strategy not in FUSION_STRATEGIES:
+        raise ValueError(f"Unknown fusion strategy: {strategy}")
+
+    weights = weights or DEFAULT_LEG_WEIGHTS
+    active_legs = {name: results for name, results in legs.items() if weights.get(name, 0.0) > 0}
+    total_weight = sum(weights[name] for name in active_legs) or 1.0
+
+    hits: Dict[str, FusedHit] = {}
+    bounds: Dict[str, float] = {}
+
+    for leg_name, results in active_legs.items():
+        # Context7: посты без post_id не участвуют в слиянии; дубли внутри ветки — по первому рангу
+        seen = set()
+        ranked = []
+        for item in results:
+            post_id = item.get("post_id")
+            if not post_id or post_id in seen:
+                continue
+            seen.add(post_id)
+            ranked.append(item)
+
+        weight = weights[leg_name]
+        contributions = _leg_contributions(strategy, ranked, weight, total_weight)
+        bounds[leg_name] = _unseen_bound(
+            strategy, ranked, contributions, weight, total_weight, fetch_limit
+        )
+
+        for rank, (item, contribution) in enumerate(zip(ranked, contributions), start=1):
+            post_id = str(item["post_id"])
+            hit = hits.setdefault(post_id, FusedHit(post_id=post_id))
+            hit.fused_score += contribution
+            hit.leg_scores[leg_name] = float(item.get("score") or 0.0)
+            hit.leg_ranks[leg_name] = rank
+            hit.items[leg_name] = item
+
+    ordered = sorted(hits.values(), key=lambda h: h.fused_score, reverse=True)
+    stable = _is_topk_stable(ordered, bounds, limit) if limit else False
+    return FusionOutcome(hits=ordered, stable=stable)
+
+
+def _is_topk_stable(
+    ordered: List[FusedHit],
+    bounds: Dict[str, float],
+    limit: int
+) -> bool:
+    """
+    Проверка стабильности top-k (threshold algorithm).
+
+    top-k стабилен, если k-й fused_score не меньше максимально достижимого скора
+    любого поста за пределами top-k: как уже найденного (добор недостающих веток),
+    так и ещё не найденного ни одной веткой.
+    """
+    if len(ordered) < limit:
+        # Context7: top-k не заполнен — стабилен только если все ветки исчерпаны
+        return all(bound == 0.0 for bound in bounds.values())
+
+    kth_score = ordered[limit - 1].fused_score
+    unseen_max = sum(bounds.values())
+    if unseen_max > kth_score:
+        return False
+
+    for hit in ordered[limit:]:
+        upper = hit.fused_score + sum(
+            bound for leg, bound in bounds.items() if leg not in hit.leg_ranks
+        )
+        if upper > kth_score:
+            return False
+    return True
+
+
+FUSION_STRATEGIES = ("rrf", "minmax", "zscore", "weighted")
+
+
+def resolve_fusion_strategy(
+    tenant_id: Optional[str],
+    default: str,
+    tenant_overrides: Optional[Dict[str, str]] = None
+) -> str:
+    """Выбор стратегии слияния для арендатора (override -> default -> rrf)."""
+    strategy = (tenant_overrides or {}).get(str(tenant_id), default) if tenant_id else default
+    if strategy not in FUSION_STRATEGIES:
+        logger.warning("Unknown fusion strategy, falling back to rrf", strategy=strategy, tenant_id=tenant_id)
+        return "rrf"
+    return strategy
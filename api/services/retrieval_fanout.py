@@ -0,0 +1,187 @@
+"""
+Fan-out Retrieval Engine для гибридного RAG поиска
+Context7 best practice: параллельный опрос бэкендов (Qdrant / PostgreSQL FTS / Neo4j)
+с собственным latency-бюджетом на каждую ветку и деградацией до частичного результата.
+
+Latency гибридного поиска = max(ветки), а не сумма: ветка, не уложившаяся в бюджет,
+возвращает пустой список и помечается как timeout, остальные результаты используются как есть.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import structlog
+from prometheus_client import Counter, Histogram
+
+logger = structlog.get_logger()
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+rag_retrieval_leg_duration_seconds = Histogram(
+    'rag_retrieval_leg_duration_seconds',
+    'Длительность ветки гибридного поиска',
+    ['leg', 'status'],  # leg: qdrant | fts | graph; status: ok | timeout | error
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+)
+
+rag_retrieval_leg_total = Counter(
+    'rag_retrieval_leg_total',
+    'Результаты веток гибридного поиска',
+    ['leg', 'status']
+)
+
+rag_retrieval_fanout_duration_seconds = Histogram(
+    'rag_retrieval_fanout_duration_seconds',
+    'Общая длительность fan-out поиска (по самой медленной ветке)',
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+)
+
+LEG_OK = "ok"
+LEG_TIMEOUT = "timeout"
+LEG_ERROR = "error"
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class RetrievalLeg:
+    """
+    Описание одной ветки поиска.
+
+    Attributes:
+        name: Имя ветки (метка в метриках)
+        factory: Фабрика корутины, возвращающей список результатов
+        budget_seconds: Latency-бюджет ветки
+        join_on_timeout: Ветка держит разделяемый ресурс (например, sync Session в потоке);
+            после таймаута её задачу нужно дождаться через FanOutResult.join_detached()
+            перед повторным использованием ресурса
+    """
+    name: str
+    factory: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    budget_seconds: float
+    join_on_timeout: bool = False
+
+
+@dataclass
+class LegOutcome:
+    """Результат выполнения ветки."""
+    name: str
+    status: str
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    duration_ms: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class FanOutResult:
+    """Результаты всех веток fan-out поиска."""
+    outcomes: Dict[str, LegOutcome]
+    detached: List[asyncio.Task] = field(default_factory=list)
+
+    def results(self, name: str) -> List[Dict[str, Any]]:
+        """Результаты ветки (пустой список, если ветка не уложилась или упала)."""
+        outcome = self.outcomes.get(name)
+        return outcome.results if outcome else []
+
+    @property
+    def degraded(self) -> bool:
+        """True, если хотя бы одна ветка вернула частичный (пустой) результат."""
+        return any(o.status != LEG_OK for o in self.outcomes.values())
+
+    async def join_detached(self) -> None:
+        """
+        Дождаться веток с join_on_timeout, превысивших бюджет.
+
+        Context7: результат таких веток уже отброшен, ожидание нужно только для
+        освобождения разделяемого ресурса (sync Session не потокобезопасна).
+        """
+        if not self.detached:
+            return
+        await asyncio.gather(*self.detached, return_exceptions=True)
+        self.detached = []
+
+
+# ============================================================================
+# FAN-OUT RETRIEVER
+# ============================================================================
+
+class FanOutRetriever:
+    """Параллельный запуск веток поиска с per-leg дедлайнами."""
+
+    async def run(self, legs: List[RetrievalLeg]) -> FanOutResult:
+        """
+        Запуск всех веток конкурентно.
+
+        Ошибки и таймауты веток не пробрасываются: ветка деградирует до пустого результата.
+        """
+        started_at = time.perf_counter()
+        tasks = [asyncio.create_task(leg.factory(), name=f"rag-leg-{leg.name}") for leg in legs]
+
+        outcomes_list = await asyncio.gather(
+            *(self._await_leg(leg, task, started_at) for leg, task in zip(legs, tasks))
+        )
+
+        detached = [
+            task for leg, task in zip(legs, tasks)
+            if leg.join_on_timeout and not task.done()
+        ]
+
+        rag_retrieval_fanout_duration_seconds.observe(time.perf_counter() - started_at)
+
+        outcomes = {outcome.name: outcome for outcome in outcomes_list}
+        degraded_legs = [o.name for o in outcomes_list if o.status != LEG_OK]
+        if degraded_legs:
+            logger.warning(
+                "Hybrid search degraded to partial results",
+                degraded_legs=degraded_legs,
+                durations_ms={o.name: o.duration_ms for o in outcomes_list}
+            )
+
+        return FanOutResult(outcomes=outcomes, detached=detached)
+
+    async def _await_leg(
+        self,
+        leg: RetrievalLeg,
+        task: asyncio.Task,
+        started_at: float
+    ) -> LegOutcome:
+        """Ожидание одной ветки в пределах её бюджета."""
+        status = LEG_OK
+        results: List[Dict[str, Any]] = []
+        error: Optional[str] = None
+
+        try:
+            # Context7: shield — для join_on_timeout задача продолжает работу после таймаута,
+            # остальные ветки отменяются явно ниже
+            results = await asyncio.wait_for(asyncio.shield(task), timeout=leg.budget_seconds)
+            results = results or []
+        except asyncio.TimeoutError:
+            status = LEG_TIMEOUT
+            if not leg.join_on_timeout:
+                task.cancel()
+        except Exception as e:
+            status = LEG_ERROR
+            error = str(e)
+
+        duration = time.perf_counter() - started_at
+        rag_retrieval_leg_duration_seconds.labels(leg=leg.name, status=status).observe(duration)
+        rag_retrieval_leg_total.labels(leg=leg.name, status=status).inc()
+
+        if status == LEG_ERROR:
+            logger.warning("Retrieval leg failed", leg=leg.name, error=error)
+        elif status == LEG_TIMEOUT:
+            logger.warning("Retrieval leg exceeded budget", leg=leg.name, budget_s=leg.budget_seconds)
+
+        return LegOutcome(
+            name=leg.name,
+            status=status,
+            results=results,
+            duration_ms=int(duration * 1000),
+            error=error
+        )
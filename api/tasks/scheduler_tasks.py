@@ -28,9 +28,11 @@ from models.database import (
     GroupMessage,
     ChatTrendSubscription,
     UserTrendProfile,
+    TrendInteraction,
     Tenant,
+    UserChannel,
 )
-from sqlalchemy import and_
+from sqlalchemy import and_, or_
 from services.trend_detection_service import get_trend_detection_service
 from services.user_interest_service import get_user_interest_service
 from services.graph_service import get_graph_service
@@ -423,6 +425,52 @@ async def enqueue_group_digest(
         db.close()
 
 
+async def _plan_digest_window(due_digests, db: Session, current_utc: datetime) -> None:
+    """
+    Планирование окна дайджестов: группировка пользователей по (tenant, тема, окно).
+    
+    Context7: [C7-ID: digest-shared-candidates-001] кандидаты каждой темы арендатора
+    считаются один раз (DigestService.plan_shared_candidates), digest worker фильтрует их
+    по каналам пользователя. Ошибка планирования не блокирует постановку дайджестов.
+    """
+    if not due_digests or not settings.digest_shared_candidates_enabled:
+        return
+    
+    from api.services.digest_service import get_digest_service, resolve_digest_channel_ids
+    from api.services.digest_candidates import DigestPlanEntry
+    
+    settings_by_tenant: Dict[str, List[DigestSettings]] = {}
+    for setting, tenant_id, _ in due_digests:
+        settings_by_tenant.setdefault(tenant_id, []).append(setting)
+    
+    for tenant_id, tenant_settings in settings_by_tenant.items():
+        try:
+            if settings.feature_rls_enabled:
+                set_tenant_id_in_session(db, tenant_id)
+            
+            user_channel_ids: Dict[UUID, List[UUID]] = {}
+            rows = db.query(UserChannel.user_id, UserChannel.channel_id).filter(
+                UserChannel.user_id.in_([setting.user_id for setting in tenant_settings])
+            ).all()
+            for user_id, channel_id in rows:
+                user_channel_ids.setdefault(user_id, []).append(channel_id)
+            
+            entries = [
+                DigestPlanEntry(
+                    user_id=str(setting.user_id),
+                    topics=list(setting.topics),
+                    channel_ids=resolve_digest_channel_ids(setting, user_channel_ids.get(setting.user_id, [])),
+                    limit_per_topic=setting.max_items_per_digest,
+                )
+                for setting in tenant_settings
+            ]
+            await get_digest_service().plan_shared_candidates(tenant_id, entries, db, now=current_utc)
+        except Exception as e:
+            logger.warning("Digest window planning failed, users will retrieve individually",
+                           tenant_id=tenant_id,
+                           error=str(e))
+
+
 async def process_digests_task():
     """
     Периодическая задача для генерации дайджестов.
@@ -441,6 +489,7 @@ async def process_digests_task():
         ).all()
         
         current_utc = datetime.now(timezone.utc)
+        due_digests = []
         
         for setting in digest_settings:
             try:
@@ -532,27 +581,31 @@ async def process_digests_task():
                             status=existing.status
                         )
                         digest_retry_counter.labels(tenant_id=tenant_id).inc()
-                        await generate_digest_for_user(
-                            user_id=str(setting.user_id),
-                            tenant_id=tenant_id,
-                            topics=setting.topics,
-                            db=db,
-                            trigger="scheduler_retry"
-                        )
+                        due_digests.append((setting, tenant_id, "scheduler_retry"))
                     else:
                         # Генерируем дайджест
-                        await generate_digest_for_user(
-                            user_id=str(setting.user_id),
-                            tenant_id=tenant_id,
-                            topics=setting.topics,
-                            db=db,
-                            trigger="scheduler"
-                        )
+                        due_digests.append((setting, tenant_id, "scheduler"))
             
             except Exception as e:
                 logger.error("Error processing digest for user", user_id=str(setting.user_id), error=str(e))
                 continue
         
+        # Context7: кандидаты тем считаются один раз на окно до постановки событий в очередь
+        await _plan_digest_window(due_digests, db, current_utc)
+        
+        for setting, tenant_id, trigger in due_digests:
+            try:
+                await generate_digest_for_user(
+                    user_id=str(setting.user_id),
+                    tenant_id=tenant_id,
+                    topics=setting.topics,
+                    db=db,
+                    trigger=trigger
+                )
+            except Exception as e:
+                logger.error("Error processing digest for user", user_id=str(setting.user_id), error=str(e))
+                continue
+        
         db.close()
         logger.info("Digest processing task completed")
     
@@ -763,6 +816,104 @@ async def analyze_trend_thresholds_task():
         if tuner:
             await tuner.close()
 
+async def precompute_trend_qa_task():
+    """
+    Предрасчёт QA-вердиктов для emerging кластеров.
+    
+    Context7: вердикты кэшируются по (кластер, ревизия кластера, хэш профиля) -
+    /trends/emerging отдаёт их из кэша без ожидания LLM. Цикл оценивает только кластеры,
+    чья ревизия изменилась с прошлого предрасчёта (TrendQAVerdictCache.mark_precomputed),
+    и только для недавно активных пользователей (last_active_at или взаимодействие с
+    трендами за TREND_QA_PRECOMPUTE_ACTIVE_HOURS); остальные получат вердикт по запросу.
+    """
+    db = None
+    try:
+        if os.getenv("TREND_QA_ENABLED", "true").lower() != "true":
+            return
+        from routers.trends import (
+            _get_qa_cache,
+            _load_cluster_member_ids,
+            _load_user_profile,
+            _resolve_qa_verdicts,
+        )
+        from trends.qa_cache import cluster_revision, is_final_verdict
+
+        cache = _get_qa_cache()
+        if cache is None:
+            return
+
+        db = next(get_db())
+        window_hours = int(os.getenv("TREND_QA_PRECOMPUTE_WINDOW_HOURS", "3"))
+        max_clusters = int(os.getenv("TREND_QA_PRECOMPUTE_MAX_CLUSTERS", "100"))
+        max_users = int(os.getenv("TREND_QA_PRECOMPUTE_MAX_USERS", "200"))
+        active_hours = int(os.getenv("TREND_QA_PRECOMPUTE_ACTIVE_HOURS", "24"))
+        budget_seconds = float(os.getenv("TREND_QA_PRECOMPUTE_BUDGET_SEC", "60"))
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=window_hours)
+
+        clusters = (
+            db.query(TrendCluster)
+            .filter(TrendCluster.status == "emerging")
+            .filter(TrendCluster.last_activity_at >= cutoff)
+            .order_by(TrendCluster.last_activity_at.desc())
+            .limit(max_clusters)
+            .all()
+        )
+        if not clusters:
+            return
+
+        member_ids = _load_cluster_member_ids(db, [cluster.id for cluster in clusters])
+        revisions = {cluster.id: cluster_revision(cluster, member_ids.get(cluster.id)) for cluster in clusters}
+        precomputed = await cache.get_precomputed_revisions(list(revisions))
+        changed = [cluster for cluster in clusters if precomputed.get(cluster.id) != revisions[cluster.id]]
+        if not changed:
+            logger.debug("Trend QA precompute skipped: no changed clusters", clusters=len(clusters))
+            return
+
+        # User.last_active_at пишется naive UTC (datetime.utcnow)
+        active_since = datetime.now(timezone.utc) - timedelta(hours=active_hours)
+        recent_interaction = (
+            db.query(TrendInteraction.id)
+            .filter(TrendInteraction.user_id == UserTrendProfile.user_id)
+            .filter(TrendInteraction.created_at >= active_since)
+            .exists()
+        )
+        user_ids = [
+            user_id
+            for (user_id,) in db.query(UserTrendProfile.user_id)
+            .join(User, User.id == UserTrendProfile.user_id)
+            .filter(or_(User.last_active_at >= active_since.replace(tzinfo=None), recent_interaction))
+            .order_by(User.last_active_at.desc().nullslast())
+            .limit(max_users)
+            .all()
+        ]
+        # Кластер отмечается посчитанным, только если вердикты всех пользователей легли в кэш:
+        # transient (ошибка LLM) и не уложившиеся в бюджет оцениваются на следующем цикле
+        cached_for_all = {cluster.id for cluster in changed} if user_ids else set()
+        for user_id in user_ids:
+            user_profile = _load_user_profile(db, user_id)
+            verdicts = await _resolve_qa_verdicts(
+                changed, user_id, user_profile, db,
+                budget_seconds=budget_seconds, member_ids=member_ids,
+            )
+            cached_for_all &= {cluster_id for cluster_id, verdict in verdicts.items() if is_final_verdict(verdict)}
+            # Задача фоновая: дожидаемся и оценок, вышедших за бюджет (они попадут в кэш)
+            await cache.drain()
+        await cache.mark_precomputed({cluster_id: revisions[cluster_id] for cluster_id in cached_for_all})
+
+        logger.info(
+            "Trend QA verdicts precomputed",
+            clusters=len(clusters),
+            changed_clusters=len(changed),
+            marked_clusters=len(cached_for_all),
+            users=len(user_ids),
+        )
+    except Exception as e:
+        logger.error("Error in precompute_trend_qa_task", error=str(e), exc_info=True)
+    finally:
+        if db:
+            db.close()
+
+
 def _cluster_card_payload(cluster: TrendCluster) -> Dict[str, Any]:
     payload = cluster.card_payload or {}
     if isinstance(payload, str):
@@ -1464,6 +1615,15 @@ def setup_scheduled_tasks():
         replace_existing=True
     )
 
+    # Context7: Предрасчёт QA-вердиктов трендов (только новые/изменившиеся кластеры)
+    scheduler.add_job(
+        precompute_trend_qa_task,
+        trigger=CronTrigger(minute="*/5"),
+        id="precompute_trend_qa",
+        name="Precompute trend QA verdicts",
+        replace_existing=True,
+    )
+
     scheduler.add_job(
         send_trend_digest_subscriptions_task,
         trigger=CronTrigger(minute="*/5"),
@@ -1488,6 +1648,7 @@ def setup_scheduled_tasks():
             "detect_trends",
             "sync_user_interests",
             "trends_stable",
+            "precompute_trend_qa",
             "trend_digest_subscriptions",
             "calculate_tenant_storage_usage",
         ],
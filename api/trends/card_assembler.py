@@ -0,0 +1,384 @@
+"""
+Сборка карточек кластеров трендов для API.
+
+Context7: DTO карточек и TrendCardAssembler вынесены из routers.trends, чтобы сборка
+импортировалась без зависимостей роутера (trend_detection_service и т.п.); роутер и
+трендовые хендлеры бота используют их отсюда.
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+from uuid import UUID
+
+from pydantic import BaseModel, Field, ConfigDict
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.database import TrendCluster, TrendClusterPost, TrendMetrics, UserChannel
+from trends.card_utils import serialize_example_posts
+
+
+class TrendTimeWindow(BaseModel):
+    start: datetime
+    end: datetime
+    duration_minutes: int
+
+
+class TrendStats(BaseModel):
+    mentions: int
+    baseline: int
+    burst_score: Optional[float]
+    sources: int
+    channels: int
+    coherence: Optional[float]
+
+
+class TrendExamplePost(BaseModel):
+    post_id: Optional[str]
+    channel_id: Optional[str]
+    channel_title: Optional[str]
+    posted_at: Optional[datetime]
+    content_snippet: Optional[str]
+
+
+class TrendCard(BaseModel):
+    title: str
+    summary: Optional[str]
+    why_important: Optional[str]
+    keywords: List[str] = Field(default_factory=list)
+    topics: List[str] = Field(default_factory=list)
+    time_window: TrendTimeWindow
+    stats: TrendStats
+    example_posts: List[TrendExamplePost] = Field(default_factory=list)
+
+
+class TrendMetricsResponse(BaseModel):
+    """Метрики по кластеру тренда."""
+
+    freq_short: int
+    freq_long: int
+    freq_baseline: Optional[int]
+    rate_of_change: Optional[float]
+    burst_score: Optional[float]
+    source_diversity: Optional[int]
+    coherence_score: Optional[float]
+    metrics_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TrendClusterResponse(BaseModel):
+    """Ответ по кластеру тренда."""
+
+    id: UUID
+    cluster_key: str
+    status: str
+    label: Optional[str]
+    summary: Optional[str]
+    keywords: List[str]
+    primary_topic: Optional[str]
+    novelty_score: Optional[float]
+    coherence_score: Optional[float]
+    source_diversity: Optional[int]
+    first_detected_at: Optional[datetime]
+    last_activity_at: Optional[datetime]
+    resolved_trend_id: Optional[UUID]
+    latest_metrics: Optional[TrendMetricsResponse] = None
+    card: Optional[TrendCard] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+def json_dict(data: Any) -> Dict[str, Any]:
+    if not data:
+        return {}
+    if isinstance(data, dict):
+        return data
+    if isinstance(data, str):
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError:
+            return {}
+    return {}
+
+
+def build_trend_card(cluster: TrendCluster) -> Optional[TrendCard]:
+    if not cluster.window_start or not cluster.window_end:
+        return None
+    duration_minutes = max(
+        1, int((cluster.window_end - cluster.window_start).total_seconds() // 60)
+    )
+    def _is_generic_title(value: Optional[str]) -> bool:
+        if not value:
+            return True
+        s = (value or "").strip()
+        if len(s) < 4:
+            return True
+        low = s.lower()
+        generic = {"trend", "тренд", "индивидуальные", "работы"}
+        if low in generic:
+            return True
+        if " " not in s and not s.startswith("#"):
+            return True
+        return False
+
+    def _derive_better_title(raw_payload: Dict[str, Any]) -> Optional[str]:
+        # 1) из topics: взять 2 самые первые и соединить
+        topics = raw_payload.get("topics") or []
+        topics = [t.strip() for t in topics if isinstance(t, str) and t.strip()]
+        if len(topics) >= 2:
+            return f"{topics[0]} — {topics[1]}"[:120]
+        if len(topics) == 1 and " " in topics[0]:
+            return topics[0][:120]
+        # 2) из keywords: склеить 2–3 ключевые
+        kws = raw_payload.get("keywords") or []
+        kws = [k.strip() for k in kws if isinstance(k, str) and k.strip()]
+        if len(kws) >= 2:
+            return f"{kws[0]} — {kws[1]}"[:120]
+        if len(kws) == 1 and " " in kws[0]:
+            return kws[0][:120]
+        # 3) из example_posts: взять первые 3–5 слов из первого сниппета
+        ex = raw_payload.get("example_posts") or []
+        for p in ex:
+            snippet = (p.get("content_snippet") or "").strip()
+            if snippet:
+                words = snippet.replace("\n", " ").split()
+                candidate = " ".join(words[:6])
+                if len(candidate) >= 10 and " " in candidate:
+                    return candidate[:120]
+        return None
+
+    stats = TrendStats(
+        mentions=cluster.window_mentions or 0,
+        baseline=cluster.freq_baseline or 0,
+        burst_score=cluster.burst_score,
+        sources=cluster.sources_count or cluster.source_diversity or 0,
+        channels=cluster.channels_count or cluster.source_diversity or 0,
+        coherence=cluster.coherence_score,
+    )
+    raw_payload = json_dict(cluster.card_payload)
+    # Санитизация заголовка: если generic — пытаемся вывести более содержательный
+    base_title = cluster.label or cluster.primary_topic
+    if _is_generic_title(base_title):
+        derived = _derive_better_title(raw_payload)
+        if derived and not _is_generic_title(derived):
+            base_title = derived
+    if _is_generic_title(base_title):
+        # финальный fallback — «Тренд», но лучше короткая фраза из keywords/topics
+        base_title = _derive_better_title(raw_payload) or "Тренд"
+    example_posts = [
+        TrendExamplePost(**post)
+        for post in raw_payload.get("example_posts", [])
+        if isinstance(post, dict)
+    ]
+    return TrendCard(
+        title=base_title or "Без названия",
+        summary=cluster.summary,
+        why_important=cluster.why_important,
+        keywords=cluster.keywords or [],
+        topics=cluster.topics or raw_payload.get("topics", []),
+        time_window=TrendTimeWindow(
+            start=cluster.window_start,
+            end=cluster.window_end,
+            duration_minutes=duration_minutes,
+        ),
+        stats=stats,
+        example_posts=example_posts,
+    )
+
+def load_user_channel_ids(db: Session, user_id: UUID) -> Set[UUID]:
+    """Возвращает множество channel_id для заданного пользователя."""
+    rows = db.query(UserChannel.channel_id).filter(UserChannel.user_id == user_id, UserChannel.is_active == True).all()  # noqa: E712
+    return {row[0] for row in rows}
+
+def cluster_post_to_dict(post: Any) -> Dict[str, Any]:
+    return {
+        "post_id": str(post.post_id) if post.post_id else None,
+        "channel_id": str(post.channel_id) if post.channel_id else None,
+        "channel_title": post.channel_title,
+        "posted_at": post.posted_at,
+        "content_snippet": post.content_snippet,
+    }
+
+
+def cluster_to_response(
+    cluster: TrendCluster,
+    metric: Optional[TrendMetrics],
+) -> TrendClusterResponse:
+    """Формирует DTO для кластера тренда."""
+    metrics_payload = TrendMetricsResponse.model_validate(metric) if metric else None
+    keywords = cluster.keywords or []
+    return TrendClusterResponse(
+        id=cluster.id,
+        cluster_key=cluster.cluster_key,
+        status=cluster.status,
+        label=cluster.label,
+        summary=cluster.summary,
+        keywords=keywords,
+        primary_topic=cluster.primary_topic,
+        novelty_score=cluster.novelty_score,
+        coherence_score=cluster.coherence_score,
+        source_diversity=cluster.source_diversity,
+        first_detected_at=cluster.first_detected_at,
+        last_activity_at=cluster.last_activity_at,
+        resolved_trend_id=cluster.resolved_trend_id,
+        latest_metrics=metrics_payload,
+        card=build_trend_card(cluster),
+    )
+
+
+def personalized_card(base_card: TrendCard, posts: List[Dict[str, Any]]) -> TrendCard:
+    """Карточка по постам из каналов пользователя: пересчёт mentions/sources/channels и примеров.
+
+    Пустой posts (нет подписок или совпадений) даёт нулевые stats - вызывающий код отфильтрует кластер.
+    """
+    sources = len({p.get("channel_id") for p in posts if p.get("channel_id")})
+    stats = TrendStats(
+        mentions=len(posts),
+        baseline=base_card.stats.baseline,  # используем глобальный baseline
+        burst_score=base_card.stats.burst_score,
+        sources=sources,
+        channels=sources,
+        coherence=base_card.stats.coherence,
+    )
+    return TrendCard(
+        title=base_card.title,
+        summary=base_card.summary,
+        why_important=base_card.why_important,
+        keywords=base_card.keywords,
+        topics=base_card.topics,
+        time_window=base_card.time_window,
+        stats=stats,
+        example_posts=[
+            TrendExamplePost(**p)
+            for p in serialize_example_posts(posts, limit=5)
+        ],
+    )
+
+
+class TrendCardAssembler:
+    """
+    Context7: сборка карточек страницы кластеров фиксированным числом запросов (без N+1).
+
+    - последние метрики всех кластеров - один SELECT DISTINCT ON (cluster_id);
+    - каналы пользователя - один раз на запрос;
+    - персональные примеры постов - один оконный запрос row_number() по кластеру.
+
+    Используется /trends/emerging, /trends/clusters и /trends/clusters/{id}
+    (их же вызывают трендовые хендлеры бота). Хендлер загружает каналы пользователя один
+    раз и передаёт их и в QA-вердикты, и в сборку (user_channel_ids).
+    """
+
+    # Столько персональных постов считается в mentions карточки (как до батчевой сборки)
+    PERSONAL_SAMPLE_LIMIT = 10
+
+    def __init__(
+        self,
+        db: Session,
+        user_id: Optional[UUID] = None,
+        user_channel_ids: Optional[Set[UUID]] = None,
+    ):
+        self.db = db
+        self.user_id = user_id
+        self._user_channel_ids = user_channel_ids
+
+    @property
+    def user_channel_ids(self) -> Set[UUID]:
+        if self._user_channel_ids is None:
+            self._user_channel_ids = load_user_channel_ids(self.db, self.user_id) if self.user_id else set()
+        return self._user_channel_ids
+
+    def latest_metrics_query(self, cluster_ids: List[UUID]):
+        # Порядок (cluster_id DESC, metrics_at DESC) - обратный проход по uq_trend_metrics_cluster_snapshot
+        return (
+            self.db.query(TrendMetrics)
+            .filter(TrendMetrics.cluster_id.in_(cluster_ids))
+            .distinct(TrendMetrics.cluster_id)
+            .order_by(TrendMetrics.cluster_id.desc(), TrendMetrics.metrics_at.desc())
+        )
+
+    def load_latest_metrics(self, cluster_ids: List[UUID]) -> Dict[UUID, TrendMetrics]:
+        """map cluster_id -> последний TrendMetrics."""
+        if not cluster_ids:
+            return {}
+        return {metric.cluster_id: metric for metric in self.latest_metrics_query(cluster_ids).all()}
+
+    def personalized_posts_query(self, cluster_ids: List[UUID], channel_ids: Set[UUID], limit: int):
+        rank = func.row_number().over(
+            partition_by=TrendClusterPost.cluster_id,
+            order_by=(TrendClusterPost.posted_at.desc().nullslast(), TrendClusterPost.created_at.desc()),
+        ).label("rank")
+        ranked = (
+            self.db.query(
+                TrendClusterPost.cluster_id,
+                TrendClusterPost.post_id,
+                TrendClusterPost.channel_id,
+                TrendClusterPost.channel_title,
+                TrendClusterPost.posted_at,
+                TrendClusterPost.content_snippet,
+                rank,
+            )
+            .filter(TrendClusterPost.cluster_id.in_(cluster_ids))
+            .filter(TrendClusterPost.channel_id.in_(list(channel_ids)))
+            .subquery()
+        )
+        return (
+            self.db.query(ranked)
+            .filter(ranked.c.rank <= limit)
+            .order_by(ranked.c.cluster_id, ranked.c.rank)
+        )
+
+    def load_personalized_posts(
+        self,
+        cluster_ids: List[UUID],
+        channel_ids: Optional[Set[UUID]] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[UUID, List[Dict[str, Any]]]:
+        """map cluster_id -> до limit свежих постов кластера из каналов пользователя."""
+        channel_ids = self.user_channel_ids if channel_ids is None else channel_ids
+        if not cluster_ids or not channel_ids:
+            return {}
+        posts: Dict[UUID, List[Dict[str, Any]]] = {}
+        rows = self.personalized_posts_query(cluster_ids, channel_ids, limit or self.PERSONAL_SAMPLE_LIMIT).all()
+        for row in rows:
+            posts.setdefault(row.cluster_id, []).append(cluster_post_to_dict(row))
+        return posts
+
+    def assemble(
+        self,
+        clusters: List[TrendCluster],
+        min_sources: int = 0,
+        min_burst: float = 0.0,
+    ) -> List[TrendClusterResponse]:
+        """
+        Ответы по кластерам страницы в исходном порядке.
+
+        Кластеры ниже min_sources/min_burst (по последним метрикам) и пустые для пользователя
+        отбрасываются; персональные посты грузятся только для оставшихся.
+        """
+        metrics_map = self.load_latest_metrics([cluster.id for cluster in clusters])
+        kept: List[TrendCluster] = []
+        for cluster in clusters:
+            if min_sources and (cluster.source_diversity or 0) < min_sources:
+                continue
+            metric = metrics_map.get(cluster.id)
+            if min_burst and (not metric or (metric.burst_score or 0.0) < min_burst):
+                continue
+            kept.append(cluster)
+
+        personal_posts = (
+            self.load_personalized_posts([cluster.id for cluster in kept]) if self.user_id else {}
+        )
+        responses: List[TrendClusterResponse] = []
+        for cluster in kept:
+            base = cluster_to_response(cluster, metrics_map.get(cluster.id))
+            card = base.card
+            if self.user_id and card:
+                # персонализация (фильтрация по каналам пользователя)
+                card = personalized_card(card, personal_posts.get(cluster.id, []))
+                if card.stats.mentions <= 0:
+                    # пусто для данного пользователя — пропускаем
+                    continue
+            responses.append(TrendClusterResponse(**{**base.model_dump(), "card": card}))
+        return responses
@@ -0,0 +1,221 @@
+"""
+Кэш QA-вердиктов для кластеров трендов.
+
+Context7: вердикт QA-агента хранится в Redis под ключом (cluster_id, ревизия кластера,
+хэш профиля). Ревизия строится по стабильным полям кластера (id, состав постов, правка
+редактора), а не по тексту карточки: summary/why_important/label LLM перегенерирует при
+каждом обновлении, и кэш по ним инвалидировался бы на каждом цикле. Изменение ревизии или
+профиля даёт новый ключ - старый вердикт просто истекает по TTL.
+
+Холодные записи оцениваются параллельно (семафор) в пределах бюджета времени; оценки,
+не уложившиеся в бюджет, дорабатывают в фоне и попадают в кэш к следующему запросу.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+QA_CACHE_VERSION = "v2"
+QA_CACHE_PREFIX = "trend:qa"
+
+# Стабильные поля кластера: идентичность, статус и версия правки редактора (last_edited_at,
+# quality_score). Тексты карточки, primary_topic (trends_worker переписывает его с каждым
+# постом) и счётчики упоминаний в ревизию не входят.
+_REVISION_FIELDS = (
+    "id",
+    "cluster_key",
+    "status",
+    "quality_score",
+    "last_edited_at",
+)
+
+
+def _digest(payload: Any) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def cluster_revision(cluster: Any, member_ids: Optional[Iterable[Any]] = None) -> str:
+    """Ревизия кластера: хэш стабильных полей и состава постов (member_ids)."""
+    payload = {field: getattr(cluster, field, None) for field in _REVISION_FIELDS}
+    payload["members"] = sorted(str(member_id) for member_id in (member_ids or []))
+    return _digest(payload)
+
+
+def profile_hash(
+    user_id: Optional[Any],
+    user_profile: Optional[Dict[str, Any]],
+    user_channels: Optional[Iterable[Any]] = None,
+) -> str:
+    """Хэш контекста пользователя для QA (профиль интересов + каналы)."""
+    if not user_id:
+        return "anon"
+    profile = user_profile or {}
+    return _digest(
+        {
+            "user_id": str(user_id),
+            "preferred_topics": profile.get("preferred_topics") or [],
+            "preferred_categories": profile.get("preferred_categories") or [],
+            "channels": sorted(str(channel) for channel in (user_channels or [])),
+        }
+    )
+
+
+def qa_cache_key(cluster_id: Any, revision: str, user_hash: str) -> str:
+    return f"{QA_CACHE_PREFIX}:{QA_CACHE_VERSION}:{cluster_id}:{revision}:{user_hash}"
+
+
+def is_final_verdict(verdict: Optional[Dict[str, Any]]) -> bool:
+    """Вердикт кэшируется: не fail-open ошибка LLM (transient) и не заглушка pending."""
+    return verdict is not None and not verdict.get("transient") and not verdict.get("pending")
+
+
+def precomputed_revision_key(cluster_id: Any) -> str:
+    return f"{QA_CACHE_PREFIX}:{QA_CACHE_VERSION}:precomputed:{cluster_id}"
+
+
+class TrendQAVerdictCache:
+    """
+    Redis кэш QA-вердиктов с ограниченной параллельной дооценкой промахов.
+
+    Redis клиент - redis.asyncio.Redis (mget + pipeline). Вердикты с флагом
+    ``transient`` (fail-open при недоступном LLM) не кэшируются.
+    """
+
+    def __init__(
+        self,
+        redis_client: Any,
+        ttl_seconds: int = 6 * 3600,
+        budget_seconds: float = 0.3,
+        max_concurrency: int = 8,
+    ):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.budget_seconds = budget_seconds
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        if not keys:
+            return []
+        raw_values = await self.redis.mget(list(keys))
+        verdicts: List[Optional[Dict[str, Any]]] = []
+        for raw in raw_values:
+            if raw is None:
+                verdicts.append(None)
+                continue
+            try:
+                verdicts.append(json.loads(raw))
+            except (TypeError, ValueError):
+                verdicts.append(None)
+        return verdicts
+
+    async def set_many(self, verdicts: Dict[str, Dict[str, Any]]):
+        cacheable = {key: verdict for key, verdict in verdicts.items() if is_final_verdict(verdict)}
+        if not cacheable:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for key, verdict in cacheable.items():
+            pipe.set(key, json.dumps(verdict, ensure_ascii=False), ex=self.ttl_seconds)
+        await pipe.execute()
+
+    async def get_precomputed_revisions(self, cluster_ids: Sequence[Any]) -> Dict[Any, Optional[str]]:
+        """cluster_id -> ревизия, для которой планировщик уже посчитал вердикты."""
+        if not cluster_ids:
+            return {}
+        raw_values = await self.redis.mget([precomputed_revision_key(cid) for cid in cluster_ids])
+        return {
+            cluster_id: raw.decode() if isinstance(raw, bytes) else raw
+            for cluster_id, raw in zip(cluster_ids, raw_values)
+        }
+
+    async def mark_precomputed(self, revisions: Dict[Any, str]):
+        """Отметка посчитанных ревизий; TTL как у вердиктов (истёкшие посчитаются заново)."""
+        if not revisions:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for cluster_id, revision in revisions.items():
+            pipe.set(precomputed_revision_key(cluster_id), revision, ex=self.ttl_seconds)
+        await pipe.execute()
+
+    async def resolve(
+        self,
+        items: Dict[str, Callable[[], Awaitable[Optional[Dict[str, Any]]]]],
+        budget_seconds: Optional[float] = None,
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Вердикты по ключам: кэш одним MGET, промахи - параллельно в пределах бюджета.
+
+        Args:
+            items: cache key -> фабрика корутины оценки (вызывается только при промахе)
+            budget_seconds: бюджет ожидания холодных оценок (None - бюджет кэша)
+
+        Returns:
+            cache key -> вердикт; None для оценок, не уложившихся в бюджет
+        """
+        keys = list(items)
+        results: Dict[str, Optional[Dict[str, Any]]] = dict.fromkeys(keys)
+        if not keys:
+            return results
+
+        cached = await self.get_many(keys)
+        misses = []
+        for key, verdict in zip(keys, cached):
+            if verdict is None:
+                misses.append(key)
+            else:
+                results[key] = verdict
+        if not misses:
+            return results
+
+        tasks = {key: self._evaluate(key, items[key]) for key in misses}
+        budget = self.budget_seconds if budget_seconds is None else budget_seconds
+        done, _ = await asyncio.wait(set(tasks.values()), timeout=budget)
+        for key, task in tasks.items():
+            if task in done and not task.cancelled() and task.exception() is None:
+                results[key] = task.result()
+        return results
+
+    def _evaluate(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> asyncio.Task:
+        """Задача оценки ключа; одна на ключ, переживает таймаут запроса и пишет в кэш."""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+
+        async def run() -> Optional[Dict[str, Any]]:
+            async with self._semaphore:
+                verdict = await factory()
+            if verdict is not None:
+                try:
+                    await self.set_many({key: verdict})
+                except Exception:
+                    # Кэш - оптимизация: вердикт всё равно отдаётся вызывающему
+                    pass
+            return verdict
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        self._background.add(task)
+
+        def _done(finished: asyncio.Task):
+            self._background.discard(finished)
+            if self._inflight.get(key) is finished:
+                self._inflight.pop(key, None)
+            if not finished.cancelled():
+                finished.exception()  # помечаем исключение как полученное
+
+        task.add_done_callback(_done)
+        return task
+
+    async def drain(self):
+        """Дождаться фоновых оценок (для фоновых задач и тестов)."""
+        if self._background:
+            await asyncio.gather(*list(self._background), return_exceptions=True)
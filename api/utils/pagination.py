@@ -0,0 +1,40 @@
+"""
+Context7: keyset (cursor) пагинация.
+
+Курсор - непрозрачная строка (urlsafe base64 от JSON) с позицией последней строки
+страницы: (sort_value, id). Следующая страница выбирается условием
+``(sort_col, id) < (:cursor_value, :cursor_id)`` по индексу (sort_col DESC, id DESC),
+поэтому глубокие страницы стоят столько же, сколько первая (в отличие от OFFSET).
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Курсор не удалось декодировать."""
+
+
+def encode_cursor(sort_value: datetime, row_id: Any) -> str:
+    payload = json.dumps({"v": sort_value.isoformat(), "id": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    """
+    Returns:
+        (sort_value, id) или None для пустого курсора
+
+    Raises:
+        InvalidCursorError: курсор повреждён
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return datetime.fromisoformat(payload["v"]), str(payload["id"])
+    except Exception as exc:
+        raise InvalidCursorError(f"invalid cursor: {cursor!r}") from exc
@@ -37,6 +37,7 @@ from api.services.s3_storage import S3StorageService
 from services.budget_gate import BudgetGateService
 from services.storage_quota import StorageQuotaService
 from services.retry_policy import create_retry_decorator, DEFAULT_RETRY_CONFIG
+from services.image_pipeline import ImagePrepareOptions, PreparedImage, prepare_image
 
 logger = structlog.get_logger()
 
@@ -347,7 +348,8 @@ class GigaChatVisionAdapter:
         analysis_prompt: Optional[str] = None,
         preprocess_enabled: Optional[bool] = None,
         roi_crop_enabled: Optional[bool] = None,
-        max_output_tokens_override: Optional[int] = None
+        max_output_tokens_override: Optional[int] = None,
+        prepared_image: Optional[PreparedImage] = None
     ) -> Dict[str, Any]:
         """
         Анализ медиа через GigaChat Vision API.
@@ -359,6 +361,7 @@ class GigaChatVisionAdapter:
             tenant_id: ID tenant
             trace_id: Trace ID для корреляции
             analysis_prompt: Кастомный промпт для анализа
+            prepared_image: Результат ImageProcessingPool (препроцессинг уже выполнен вне loop)
             
         Returns:
             Vision analysis results
@@ -450,7 +453,19 @@ class GigaChatVisionAdapter:
                 processed_content = file_content
                 upload_mime_type = mime_type
 
-                if should_preprocess and mime_type and mime_type.lower().startswith("image/"):
+                if prepared_image is not None:
+                    # Context7: [C7-ID: VISION-IMAGE-POOL-001] decode/resize/re-encode уже сделаны в пуле
+                    if prepared_image.preprocessed:
+                        processed_content = prepared_image.content
+                        upload_mime_type = prepared_image.mime_type
+                    elif prepared_image.preprocess_error:
+                        logger.warning(
+                            "Vision preprocessing failed, falling back to original image",
+                            error=prepared_image.preprocess_error,
+                            mime_type=mime_type,
+                            trace_id=trace_id,
+                        )
+                elif should_preprocess and mime_type and mime_type.lower().startswith("image/"):
                     try:
                         processed_content, upload_mime_type = self._preprocess_image(
                             file_content=file_content,
@@ -757,6 +772,23 @@ class GigaChatVisionAdapter:
             )
             raise
     
+    def image_prepare_options(
+        self,
+        preprocess_enabled: bool,
+        roi_crop_enabled: bool,
+        phash_hash_size: Optional[int] = None,
+    ) -> ImagePrepareOptions:
+        """Параметры препроцессинга адаптера для ImageProcessingPool."""
+        return ImagePrepareOptions(
+            preprocess=preprocess_enabled,
+            grayscale=self.preprocess_grayscale,
+            max_dim=self.preprocess_max_dim,
+            jpeg_quality=self.preprocess_quality,
+            roi_crop=roi_crop_enabled,
+            roi_max_dim=self.roi_max_dim,
+            phash_hash_size=phash_hash_size,
+        )
+
     def _preprocess_image(
         self,
         file_content: bytes,
@@ -769,67 +801,36 @@ class GigaChatVisionAdapter:
         if not mime_type or not mime_type.lower().startswith("image/"):
             return file_content, mime_type or "application/octet-stream"
 
-        image = Image.open(io.BytesIO(file_content))
-        original_mode = image.mode
-        original_size = image.size
-
-        if self.preprocess_grayscale:
-            image = image.convert("L")
-        else:
-            image = image.convert("RGB")
-
-        if roi_crop_enabled:
-            image = self._crop_to_content(image, trace_id=trace_id, sha256=post_sha)
-
-        if self.preprocess_max_dim > 0:
-            max_dim = self.preprocess_max_dim
-            image.thumbnail((max_dim, max_dim), Image.LANCZOS)
-
-        if image.mode != "L":
-            image = image.convert("RGB")
-
-        buffer = io.BytesIO()
-        image.save(
-            buffer,
-            format="JPEG",
-            optimize=True,
-            quality=self.preprocess_quality,
+        prepared = prepare_image(
+            file_content,
+            mime_type,
+            self.image_prepare_options(preprocess_enabled=True, roi_crop_enabled=roi_crop_enabled),
         )
-        processed_bytes = buffer.getvalue()
+        if prepared.preprocess_error:
+            raise ValueError(prepared.preprocess_error)
+
+        if prepared.roi_bbox:
+            logger.debug(
+                "Vision ROI crop applied",
+                trace_id=trace_id,
+                sha256=post_sha[:16] + "..." if post_sha else None,
+                bbox=list(prepared.roi_bbox),
+            )
 
         logger.debug(
             "Vision image preprocessed",
             tenant_id=tenant_id,
             sha256=post_sha[:16] + "..." if post_sha else None,
             trace_id=trace_id,
-            original_mode=original_mode,
-            original_size=list(original_size),
-            new_size=list(image.size),
+            original_mode=prepared.original_mode,
+            original_size=list(prepared.original_size),
+            new_size=list(prepared.new_size),
             grayscale=self.preprocess_grayscale,
             bytes_before=len(file_content),
-            bytes_after=len(processed_bytes),
+            bytes_after=len(prepared.content),
         )
 
-        return processed_bytes, "image/jpeg"
-
-    def _crop_to_content(self, image: Image.Image, trace_id: str, sha256: Optional[str]) -> Image.Image:
-        bbox = image.getbbox()
-        if not bbox:
-            return image
-
-        cropped = image.crop(bbox)
-        if self.roi_max_dim > 0:
-            cropped.thumbnail((self.roi_max_dim, self.roi_max_dim), Image.LANCZOS)
-
-        logger.debug(
-            "Vision ROI crop applied",
-            trace_id=trace_id,
-            sha256=sha256[:16] + "..." if sha256 else None,
-            bbox=list(bbox),
-            original_size=list(image.size),
-            cropped_size=list(cropped.size),
-        )
-        return cropped
+        return prepared.content, prepared.mime_type
 
     async def _estimate_tokens(
         self,
@@ -0,0 +1,242 @@
+"""
+Микробатчинг запросов эмбеддингов.
+[C7-ID: AI-EMBEDDING-BATCHER-001]
+
+Context7 best practice: конкурентные вызовы generate_embedding из разных воркеров
+склеиваются в один запрос `input: [...]` к gpt2giga-proxy. Батч отправляется, когда набран
+max_batch_size или истёк max_linger (ожидание первого элемента батча).
+
+- Backpressure: очередь ограничена max_queue_size, submit() ждёт свободного места;
+  число батчей «в полёте» ограничено max_inflight_batches.
+- Per-item error fan-out: ошибка батча доставляется каждому ожидающему; если батч отклонён
+  как невалидный (ValueError), элементы переотправляются по одному, чтобы ошибку получил
+  только «виновный» текст.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple, Union
+
+import structlog
+
+from metrics_utils import Counter, Gauge, Histogram
+
+logger = structlog.get_logger()
+
+# Метрики
+embedding_batch_size = Histogram(
+    'embedding_batch_size',
+    'Number of texts per coalesced embedding request',
+    ['batcher'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+embedding_batch_linger_seconds = Histogram(
+    'embedding_batch_linger_seconds',
+    'Time the first item of a batch waited before dispatch',
+    ['batcher'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+
+embedding_batch_queue_depth = Gauge(
+    'embedding_batch_queue_depth',
+    'Texts waiting in the embedding micro-batcher queue',
+    ['batcher']
+)
+
+embedding_batch_items_total = Counter(
+    'embedding_batch_items_total',
+    'Texts processed by the embedding micro-batcher',
+    ['batcher', 'status']
+)
+
+# batch_fn возвращает вектор или исключение для каждого текста (в том же порядке)
+BatchResult = Sequence[Union[List[float], BaseException]]
+BatchFn = Callable[[List[str]], Awaitable[BatchResult]]
+_QueueItem = Tuple[str, asyncio.Future, float]
+
+
+class EmbeddingMicroBatcher:
+    """
+    [C7-ID: AI-EMBEDDING-BATCHER-002] Асинхронный коалесцер запросов эмбеддингов.
+
+    Очередь и фоновая задача привязаны к event loop: при смене loop (скрипты с
+    повторным asyncio.run) батчер пересоздаёт их лениво при следующем submit().
+    """
+
+    def __init__(
+        self,
+        batch_fn: BatchFn,
+        max_batch_size: int = 32,
+        max_linger_ms: float = 10.0,
+        max_queue_size: int = 1024,
+        max_inflight_batches: int = 1,
+        name: str = "default"
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self._batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_linger = max(0.0, max_linger_ms) / 1000.0
+        self.max_queue_size = max(1, max_queue_size)
+        self.max_inflight_batches = max(1, max_inflight_batches)
+        self.name = name
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._dispatches: set = set()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def submit(self, text: str) -> List[float]:
+        """Поставить текст в очередь и дождаться его эмбеддинга."""
+        future = await self._enqueue(text)
+        return await future
+
+    async def submit_many(
+        self,
+        texts: Sequence[str],
+        return_exceptions: bool = False
+    ) -> List[Union[List[float], BaseException]]:
+        """Поставить несколько текстов; результаты в исходном порядке."""
+        futures = [await self._enqueue(text) for text in texts]
+        return list(await asyncio.gather(*futures, return_exceptions=return_exceptions))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def close(self) -> None:
+        """Остановка фоновой задачи; ожидающие запросы завершаются ошибкой."""
+        if self._collector is not None and not self._collector.done():
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("Embedding batcher closed"))
+            embedding_batch_queue_depth.labels(batcher=self.name).set(0)
+        self._collector = None
+        self._queue = None
+        self._loop = None
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._inflight = asyncio.Semaphore(self.max_inflight_batches)
+            self._dispatches = set()
+            self._collector = None
+        if self._collector is None or self._collector.done():
+            self._collector = loop.create_task(self._collect_loop())
+
+    async def _enqueue(self, text: str) -> asyncio.Future:
+        self._ensure_started()
+        future = self._loop.create_future()
+        # Context7: bounded очередь — при перегрузке producer ждёт здесь (backpressure)
+        await self._queue.put((text, future, time.monotonic()))
+        embedding_batch_queue_depth.labels(batcher=self.name).set(self._queue.qsize())
+        return future
+
+    async def _collect_loop(self) -> None:
+        queue = self._queue
+        while True:
+            first = await queue.get()
+            batch: List[_QueueItem] = [first]
+            deadline = time.monotonic() + self.max_linger
+
+            while len(batch) < self.max_batch_size:
+                # Сначала забираем всё, что уже лежит в очереди, без ожидания
+                try:
+                    batch.append(queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            embedding_batch_queue_depth.labels(batcher=self.name).set(queue.qsize())
+
+            # Context7: ограничение батчей в полёте; пока слот занят, очередь копится
+            # и submit() блокируется — давление передаётся продюсерам
+            await self._inflight.acquire()
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[_QueueItem]) -> None:
+        try:
+            # Отменённые вызывающими элементы не отправляем
+            live = [item for item in batch if not item[1].done()]
+            if not live:
+                return
+
+            now = time.monotonic()
+            embedding_batch_size.labels(batcher=self.name).observe(len(live))
+            embedding_batch_linger_seconds.labels(batcher=self.name).observe(now - live[0][2])
+
+            texts = [text for text, _, _ in live]
+            try:
+                results = await self._run_batch(texts)
+            except ValueError as e:
+                if len(live) == 1:
+                    results = [e]
+                else:
+                    # Context7: невалидный батч — изолируем проблемный элемент
+                    logger.warning(
+                        "embedding_batch_rejected_splitting",
+                        batcher=self.name,
+                        batch_size=len(live),
+                        error=str(e)
+                    )
+                    results = await asyncio.gather(
+                        *(self._run_single(text) for text in texts)
+                    )
+            except Exception as e:
+                results = [e] * len(live)
+
+            for (_, future, _), result in zip(live, results):
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                    embedding_batch_items_total.labels(batcher=self.name, status='error').inc()
+                else:
+                    future.set_result(result)
+                    embedding_batch_items_total.labels(batcher=self.name, status='success').inc()
+        finally:
+            self._inflight.release()
+
+    async def _run_batch(self, texts: List[str]) -> BatchResult:
+        results = await self._batch_fn(texts)
+        if len(results) != len(texts):
+            raise RuntimeError(
+                f"Embedding batch returned {len(results)} results for {len(texts)} texts"
+            )
+        return results
+
+    async def _run_single(self, text: str) -> Union[List[float], BaseException]:
+        try:
+            return (await self._run_batch([text]))[0]
+        except Exception as e:
+            return e
@@ -6,16 +6,19 @@ Context7 best practice: retry logic для resilient API calls
 
 import asyncio
 import logging
-import unicodedata
-import re
-from typing import List, Optional, Dict, Any
+import os
+import time
+from typing import List, Optional, Dict, Any, Union
 from abc import ABC, abstractmethod
 
 import structlog
 from prometheus_client import Counter, Histogram
 
 from config import settings
-from services.retry_policy import create_retry_decorator, DEFAULT_RETRY_CONFIG, classify_error, ErrorCategory
+from ai_providers.embedding_batcher import EmbeddingMicroBatcher
+from ai_providers.proxy_http import ProxyHTTPPool, get_proxy_http_pool
+# Context7: нормализация вынесена в shared — от неё зависит ключ общего кэша эмбеддингов
+from shared.embeddings import EmbeddingCache, normalize_text  # noqa: F401
 
 logger = structlog.get_logger()
 
@@ -36,33 +39,6 @@ embedding_latency_seconds = Histogram(
 # TEXT PREPROCESSING
 # ============================================================================
 
-def normalize_text(s: str) -> str:
-    """
-    [C7-ID: EMBEDDING-TEXT-NORM-001] Нормализация текста для эмбеддингов.
-    
-    Context7 best practice: нормализация OCR и плохоформатированного текста.
-    - NFC normalization (унификация Unicode символов)
-    - Удаление zero-width символов
-    - Схлопывание множественных пробелов и переносов строк в одиночные пробелы
-    - Удаление начальных/конечных пробелов
-    
-    Особенно важно для OCR текста, который часто содержит:
-    - Множественные переносы строк (\n\n\n)
-    - Неправильные пробелы и табуляции
-    - Zero-width символы
-    """
-    if not s:
-        return ""
-    # NFC normalization для унификации Unicode символов
-    s = unicodedata.normalize("NFC", s)
-    # Удаление zero-width символов
-    s = s.replace("\u200b", "").replace("\u200c", "").replace("\u200d", "")
-    # Context7: Схлопывание всех видов whitespace (пробелы, табы, переносы строк) в одиночные пробелы
-    # Используем \s+ который включает: пробелы, табы, переносы строк, non-breaking spaces и др.
-    s = re.sub(r"\s+", " ", s)
-    # Удаление начальных/конечных пробелов
-    return s.strip()
-
 def approx_tokens(s: str) -> int:
     """
     [C7-ID: EMBEDDING-TOKEN-ESTIMATE-001] Эвристическая оценка токенов.
@@ -94,6 +70,20 @@ class EmbeddingProvider(ABC):
         """Генерация эмбеддинга для текста."""
         pass
     
+    async def embed_text_many(
+        self,
+        texts: List[str],
+        return_exceptions: bool = False
+    ) -> List[Union[List[float], BaseException]]:
+        """
+        Генерация эмбеддингов для нескольких текстов в исходном порядке.
+        Провайдеры с batch API переопределяют метод.
+        """
+        return list(await asyncio.gather(
+            *(self.embed_text(text) for text in texts),
+            return_exceptions=return_exceptions
+        ))
+    
     @abstractmethod
     def get_dimension(self) -> int:
         """Размерность эмбеддинга."""
@@ -112,6 +102,10 @@ class GigaChatEmbeddingProvider(EmbeddingProvider):
     """
     [C7-ID: AI-GIGACHAT-EMBED-001] Провайдер эмбеддингов через GigaChat API.
     Использует gpt2giga proxy для OpenAI-совместимого интерфейса.
+    
+    Context7: [C7-ID: AI-EMBEDDING-BATCHER-001] одиночные вызовы embed_text() проходят через
+    EmbeddingMicroBatcher и уходят в прокси одним запросом `input: [...]` через общий
+    HTTP-пул gpt2giga-proxy ([C7-ID: AI-PROXY-HTTP-001]: keep-alive, лимиты, retry).
     """
     
     def __init__(self, adapter):
@@ -125,21 +119,37 @@ class GigaChatEmbeddingProvider(EmbeddingProvider):
             self.dimension = 2560
         else:
             self.dimension = 2048
+        self.proxy_url = os.getenv("GIGACHAT_PROXY_URL", "http://gpt2giga-proxy:8090")
+        self.max_batch_size = settings.EMBEDDING_BATCH_MAX_SIZE
         # Context7: [C7-ID: gigachat-resilience-001] Кэш для результата health check
         self._proxy_health_cache = None
         self._proxy_health_cache_ttl = 30  # секунд
         self._proxy_health_cache_time = 0
+        # Context7: общий на процесс пул соединений к прокси
+        self._proxy: ProxyHTTPPool = get_proxy_http_pool(self.proxy_url)
+        credentials = os.getenv("GIGACHAT_CREDENTIALS")
+        scope = os.getenv("GIGACHAT_SCOPE", "GIGACHAT_API_PERS")
+        self._auth_headers = {
+            # Авторизация через credentials (как в тесте)
+            "Authorization": f"Bearer giga-cred-{credentials}:{scope}",
+        }
+        self._batcher: Optional[EmbeddingMicroBatcher] = None
+        if settings.EMBEDDING_BATCH_ENABLED:
+            self._batcher = EmbeddingMicroBatcher(
+                self.embed_texts,
+                max_batch_size=self.max_batch_size,
+                max_linger_ms=settings.EMBEDDING_BATCH_MAX_LINGER_MS,
+                max_queue_size=settings.EMBEDDING_BATCH_MAX_QUEUE,
+                max_inflight_batches=settings.EMBEDDING_BATCH_MAX_INFLIGHT,
+                name="gigachat"
+            )
     
-    def _check_proxy_health(self) -> bool:
+    async def _check_proxy_health(self) -> bool:
         """
         Context7: [C7-ID: gigachat-resilience-001] Проверка доступности gpt2giga-proxy.
         Использует /v1/models endpoint согласно документации gpt2giga.
         Результат кэшируется для снижения нагрузки на прокси.
         """
-        import time
-        import requests
-        import os
-        
         # Проверка кэша
         current_time = time.time()
         if (self._proxy_health_cache is not None and 
@@ -147,9 +157,10 @@ class GigaChatEmbeddingProvider(EmbeddingProvider):
             return self._proxy_health_cache
         
         try:
-            proxy_url = os.getenv("GIGACHAT_PROXY_URL", "http://gpt2giga-proxy:8090")
             # Согласно документации gpt2giga: /v1/models endpoint для health check
-            response = requests.get(f"{proxy_url}/v1/models", timeout=5)
+            response = await self._proxy.request(
+                "GET", "/v1/models", headers=self._auth_headers, timeout=5, retry=False
+            )
             is_healthy = response.status_code == 200
             
             # Обновление кэша
@@ -159,83 +170,61 @@ class GigaChatEmbeddingProvider(EmbeddingProvider):
             if not is_healthy:
                 logger.warning("gpt2giga-proxy health check failed", 
                              status_code=response.status_code,
-                             proxy_url=proxy_url)
+                             proxy_url=self.proxy_url)
             else:
-                logger.debug("gpt2giga-proxy health check passed", proxy_url=proxy_url)
+                logger.debug("gpt2giga-proxy health check passed", proxy_url=self.proxy_url)
             
             return is_healthy
         except Exception as e:
             logger.warning("gpt2giga-proxy health check error", 
                          error=str(e), 
                          error_type=type(e).__name__,
-                         proxy_url=os.getenv("GIGACHAT_PROXY_URL", "http://gpt2giga-proxy:8090"))
+                         proxy_url=self.proxy_url)
             # Кэшируем отрицательный результат на короткое время
             self._proxy_health_cache = False
             self._proxy_health_cache_time = current_time
             return False
     
-    def _embed_text_internal(self, text: str) -> List[float]:
+    async def _embed_batch_internal(self, texts: List[str]) -> List[List[float]]:
         """
-        Внутренний метод генерации эмбеддинга без retry.
-        Context7: [C7-ID: retry-embedding-001] - retry wrapper применяется к этому методу
+        Внутренний метод: один запрос `input: [...]`.
+        Context7: сетевые ошибки, 5xx и 429 ретраит HTTP-пул прокси и после исчерпания
+        попыток поднимает ConnectionError / TimeoutError.
         """
-        import time
-        import requests
-        import os
-        from requests.exceptions import RequestException, ConnectionError, Timeout
-        
         start_time = time.time()
         
         # Предобработка текста
-        text = normalize_text(text)
-        text = truncate_by_tokens(text, max_tokens=8192)
-        
-        # Прямой HTTP запрос к gpt2giga proxy
-        proxy_url = os.getenv("GIGACHAT_PROXY_URL", "http://gpt2giga-proxy:8090")
-        url = f"{proxy_url}/v1/embeddings"
-        
-        # Авторизация через credentials (как в тесте)
-        credentials = os.getenv("GIGACHAT_CREDENTIALS")
-        scope = os.getenv("GIGACHAT_SCOPE", "GIGACHAT_API_PERS")
-        auth_header = f"giga-cred-{credentials}:{scope}"
+        inputs = [truncate_by_tokens(normalize_text(text), max_tokens=8192) for text in texts]
         
-        response = requests.post(
-            url,
+        response = await self._proxy.request(
+            "POST",
+            "/v1/embeddings",
             json={
-                "input": text,
+                "input": inputs,
                 "model": "any"  # gpt2giga сам отправит на GPT2GIGA_EMBEDDINGS
             },
-            headers={
-                "Authorization": f"Bearer {auth_header}",
-                "Content-Type": "application/json"
-            },
-            timeout=30
+            headers=self._auth_headers,
+            timeout=settings.EMBEDDING_HTTP_TIMEOUT
         )
         
         if response.status_code != 200:
-            # Преобразуем HTTP ошибки в исключения для retry логики
-            error_msg = f"HTTP {response.status_code}: {response.text}"
-            if response.status_code >= 500:
-                # Server errors - retryable
-                raise ConnectionError(error_msg)
-            elif response.status_code == 429:
-                # Rate limit - retryable
-                raise Timeout(error_msg)
-            else:
-                # Client errors - non-retryable
-                raise ValueError(error_msg)
+            # Client errors - non-retryable (5xx и 429 уже обработаны пулом)
+            raise ValueError(f"HTTP {response.status_code}: {response.text}")
         
         data = response.json()
-        if "data" not in data or not data["data"]:
-            raise ValueError("No embedding data in response")
+        items = data.get("data") or []
+        if len(items) != len(inputs):
+            raise ValueError(f"Embedding response has {len(items)} items for {len(inputs)} inputs")
         
-        embedding = data["data"][0]["embedding"]
-        # Context7: Автоматическое определение размерности по фактическому эмбеддингу
-        # Если размерность не совпадает, обновляем её для этой модели
-        if not embedding:
+        # Context7: порядок восстанавливаем по index (OpenAI-совместимый ответ)
+        items = sorted(items, key=lambda item: item.get("index", 0))
+        embeddings = [item.get("embedding") for item in items]
+        if any(not embedding for embedding in embeddings):
             raise ValueError("Empty embedding received")
         
-        actual_dim = len(embedding)
+        # Context7: Автоматическое определение размерности по фактическому эмбеддингу
+        # Если размерность не совпадает, обновляем её для этой модели
+        actual_dim = len(embeddings[0])
         if actual_dim != self.dimension:
             # Обновляем размерность для текущей модели, если она отличается
             logger.warning("Embedding dimension mismatch, updating provider dimension",
@@ -249,90 +238,87 @@ class GigaChatEmbeddingProvider(EmbeddingProvider):
             provider='gigachat',
             model=self.model,
             status='success'
-        ).inc()
+        ).inc(len(embeddings))
         
         embedding_latency_seconds.labels(
             provider='gigachat',
             model=self.model
         ).observe(time.time() - start_time)
         
-        return embedding
+        return embeddings
     
-    async def embed_text(self, text: str) -> List[float]:
+    async def _embed_batch_with_retry(self, texts: List[str]) -> List[List[float]]:
         """
-        Генерация эмбеддинга через gpt2giga proxy с retry логикой.
-        Context7: [C7-ID: retry-embedding-001] - resilient API calls с exponential backoff
+        Один batch-запрос к gpt2giga proxy с retry логикой.
+        Context7: [C7-ID: retry-embedding-001] exponential backoff + jitter для сетевых ошибок,
+        5xx и 429 выполняет общий HTTP-пул прокси (один слой retry на все вызовы прокси).
         """
-        import time
-        import requests
-        from requests.exceptions import RequestException, ConnectionError, Timeout
-        
-        # Context7 best practice: retry для network errors и server errors
-        retry_decorator = create_retry_decorator(
-            config=DEFAULT_RETRY_CONFIG,
-            operation_name="gigachat_embedding"
-        )
-        
-        @retry_decorator
-        def _call_with_retry(text: str) -> List[float]:
-            import os
-            # Context7: [C7-ID: gigachat-resilience-001] Проверка доступности прокси перед запросом
-            if not self._check_proxy_health():
-                logger.warning("gpt2giga-proxy unavailable, proceeding with retry logic",
-                             proxy_url=os.getenv("GIGACHAT_PROXY_URL", "http://gpt2giga-proxy:8090"))
-                # Пробрасываем ConnectionError для retry логики
-                raise ConnectionError("gpt2giga-proxy health check failed")
-            
-            try:
-                return self._embed_text_internal(text)
-            except (ConnectionError, Timeout, RequestException) as e:
-                # Network/connection errors - retryable
-                error_category = classify_error(e)
-                if error_category == ErrorCategory.NON_RETRYABLE_VALIDATION:
-                    # Не retry для validation errors
-                    embedding_requests_total.labels(
-                        provider='gigachat',
-                        model=self.model,
-                        status='error'
-                    ).inc()
-                    raise
-                # Пробрасываем для retry
-                raise
-            except Exception as e:
-                error_category = classify_error(e)
-                if error_category != ErrorCategory.NON_RETRYABLE_VALIDATION:
-                    # Retry для network-like errors
-                    raise ConnectionError(str(e))
-                # Validation errors - не retry
-                embedding_requests_total.labels(
-                    provider='gigachat',
-                    model=self.model,
-                    status='error'
-                ).inc()
-                raise
-        
         try:
-            # Выполняем синхронный вызов с retry (requests - синхронная библиотека)
-            embedding = await asyncio.to_thread(_call_with_retry, text)
-            return embedding
+            return await self._embed_batch_internal(texts)
         except Exception as e:
-            logger.error("gigachat_embedding_failed", error=str(e), error_type=type(e).__name__)
+            logger.error("gigachat_embedding_failed",
+                         error=str(e),
+                         error_type=type(e).__name__,
+                         batch_size=len(texts))
             embedding_requests_total.labels(
                 provider='gigachat',
                 model=self.model,
                 status='error'
-            ).inc()
+            ).inc(len(texts))
             raise
     
+    async def embed_texts(self, texts: List[str]) -> List[Union[List[float], BaseException]]:
+        """
+        Эмбеддинги для списка текстов напрямую (без очереди батчера).
+        Тексты режутся на чанки по EMBEDDING_BATCH_MAX_SIZE.
+        """
+        results: List[Union[List[float], BaseException]] = []
+        for offset in range(0, len(texts), self.max_batch_size):
+            results.extend(await self._embed_batch_with_retry(texts[offset:offset + self.max_batch_size]))
+        return results
+    
+    async def embed_text(self, text: str) -> List[float]:
+        """
+        Генерация эмбеддинга через gpt2giga proxy.
+        Context7: при включённом батчинге запрос склеивается с конкурентными вызовами.
+        """
+        if self._batcher is not None:
+            return await self._batcher.submit(text)
+        return (await self._embed_batch_with_retry([text]))[0]
+    
+    async def embed_text_many(
+        self,
+        texts: List[str],
+        return_exceptions: bool = False
+    ) -> List[Union[List[float], BaseException]]:
+        """Несколько текстов через общую очередь батчера (склеиваются с чужими вызовами)."""
+        if self._batcher is not None:
+            return await self._batcher.submit_many(texts, return_exceptions=return_exceptions)
+        try:
+            return await self.embed_texts(texts)
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return [e] * len(texts)
+    
     def get_dimension(self) -> int:
         return self.dimension
     
     async def health_check(self) -> bool:
+        # Context7: дешёвая (кэшируемая) проверка /v1/models до пробного эмбеддинга
+        if not await self._check_proxy_health():
+            return False
         try:
             test_embedding = await self.embed_text("test")
             return len(test_embedding) == self.dimension
         except Exception:
             return False
+    
+    async def close(self) -> None:
+        """Остановка батчера и закрытие пула соединений."""
+        if self._batcher is not None:
+            await self._batcher.close()
+        await self._proxy.aclose()
 
 # ============================================================================
 # EMBEDDING SERVICE
@@ -344,13 +330,21 @@ class EmbeddingService:
     Только GigaChat API (без локальных моделей).
     """
     
-    def __init__(self, primary_provider: EmbeddingProvider, fallback_provider: Optional[EmbeddingProvider] = None):
+    def __init__(
+        self,
+        primary_provider: EmbeddingProvider,
+        fallback_provider: Optional[EmbeddingProvider] = None,
+        cache: Optional[EmbeddingCache] = None
+    ):
         self.primary_provider = primary_provider
         self.fallback_provider = fallback_provider
+        # Context7: [C7-ID: AI-EMBEDDING-CACHE-001] повторные тексты не уходят в GigaChat
+        self.cache = cache
         
         logger.info("embedding_service_initialized",
                    primary_dim=primary_provider.get_dimension(),
-                   has_fallback=fallback_provider is not None)
+                   has_fallback=fallback_provider is not None,
+                   has_cache=cache is not None)
     
     async def generate_embedding(self, text: str, use_fallback: bool = False) -> List[float]:
         """
@@ -366,6 +360,12 @@ class EmbeddingService:
         if not text or not text.strip():
             raise ValueError("Empty text for embedding")
         
+        if self.cache is not None and not use_fallback:
+            return await self.cache.get_or_compute_one(text, self._generate_embedding_uncached)
+        return await self._generate_embedding_uncached(text, use_fallback=use_fallback)
+    
+    async def _generate_embedding_uncached(self, text: str, use_fallback: bool = False) -> List[float]:
+        """Генерация эмбеддинга провайдером (без кэша)."""
         provider = self.fallback_provider if use_fallback and self.fallback_provider else self.primary_provider
         
         try:
@@ -394,10 +394,62 @@ class EmbeddingService:
             # Fallback если доступен
             if not use_fallback and self.fallback_provider:
                 logger.warning("embedding_fallback_attempt")
-                return await self.generate_embedding(text, use_fallback=True)
+                return await self._generate_embedding_uncached(text, use_fallback=True)
             
             raise
     
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        return_exceptions: bool = False
+    ) -> List[Union[List[float], BaseException]]:
+        """
+        Генерация эмбеддингов для списка текстов одним проходом через батчер.
+        
+        Args:
+            texts: Тексты для эмбеддинга
+            return_exceptions: Вернуть исключение на позиции упавшего текста вместо raise
+            
+        Returns:
+            Векторы в исходном порядке
+        """
+        results: List[Union[List[float], BaseException]] = [None] * len(texts)
+        pending: List[int] = []
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                results[i] = ValueError("Empty text for embedding")
+            else:
+                pending.append(i)
+        
+        if pending:
+            pending_texts = [texts[i] for i in pending]
+            if self.cache is not None:
+                embeddings = await self.cache.get_or_compute(pending_texts, self._generate_embeddings_uncached)
+            else:
+                embeddings = await self._generate_embeddings_uncached(pending_texts)
+            for i, embedding in zip(pending, embeddings):
+                results[i] = embedding
+        
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return results
+    
+    async def _generate_embeddings_uncached(self, texts: List[str]) -> List[Union[List[float], BaseException]]:
+        """Батч через провайдера (без кэша); fallback только для упавших текстов."""
+        results = await self.primary_provider.embed_text_many(texts, return_exceptions=True)
+        
+        failed = [i for i, result in enumerate(results) if isinstance(result, BaseException)]
+        if failed and self.fallback_provider:
+            logger.warning("embedding_fallback_attempt", failed=len(failed))
+            retried = await self.fallback_provider.embed_text_many(
+                [texts[i] for i in failed], return_exceptions=True
+            )
+            for i, embedding in zip(failed, retried):
+                results[i] = embedding
+        return results
+    
     async def generate_embedding_or_zeros(self, text: str) -> List[float]:
         """
         Генерация эмбеддинга с fallback на нулевой вектор (для non-blocking pipeline).
@@ -432,6 +484,42 @@ class EmbeddingService:
 # FACTORY
 # ============================================================================
 
+_shared_gigachat_provider: Optional[GigaChatEmbeddingProvider] = None
+_shared_embedding_cache: Optional[EmbeddingCache] = None
+
+def get_shared_embedding_provider(ai_adapter=None) -> GigaChatEmbeddingProvider:
+    """Общий на процесс GigaChat провайдер (одна очередь батчера и один пул соединений)."""
+    global _shared_gigachat_provider
+    if _shared_gigachat_provider is None:
+        _shared_gigachat_provider = GigaChatEmbeddingProvider(ai_adapter)
+    return _shared_gigachat_provider
+
+def get_shared_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Общий на процесс кэш эмбеддингов (LRU + Redis).
+    Context7: размерность не фиксируется — кэш узнаёт её из векторов/указателя в Redis,
+    поэтому ключи совпадают с ключами API (RAG, дайджесты).
+    """
+    global _shared_embedding_cache
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    if _shared_embedding_cache is None:
+        redis_client = None
+        if settings.EMBEDDING_CACHE_REDIS_ENABLED:
+            import redis.asyncio as redis_async
+            # decode_responses=False: в Redis лежат бинарные blob'ы векторов
+            redis_client = redis_async.from_url(settings.redis_url, decode_responses=False)
+        _shared_embedding_cache = EmbeddingCache(
+            model=settings.GIGACHAT_EMBEDDINGS_MODEL,
+            redis_client=redis_client,
+            lru_max_items=settings.EMBEDDING_CACHE_LRU_MAX_ITEMS,
+            lru_max_bytes=settings.EMBEDDING_CACHE_LRU_MAX_MB * 1024 * 1024,
+            redis_ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+            redis_max_items=settings.EMBEDDING_CACHE_REDIS_MAX_ITEMS,
+            dtype=settings.EMBEDDING_CACHE_DTYPE
+        )
+    return _shared_embedding_cache
+
 async def create_embedding_service(ai_adapter) -> EmbeddingService:
     """
     [C7-ID: AI-EMBEDDING-FACTORY-001] Создание EmbeddingService.
@@ -443,9 +531,14 @@ async def create_embedding_service(ai_adapter) -> EmbeddingService:
         Настроенный EmbeddingService
     """
     # Используем GigaChat через gpt2giga proxy для embeddings
-    primary = GigaChatEmbeddingProvider(ai_adapter)
+    # Context7: провайдер общий на процесс — батчер склеивает вызовы всех воркеров
+    primary = get_shared_embedding_provider(ai_adapter)
     
     # Fallback на OpenRouter (если нужно)
     fallback = None  # Пока отключаем fallback
     
-    return EmbeddingService(primary_provider=primary, fallback_provider=fallback)
+    return EmbeddingService(
+        primary_provider=primary,
+        fallback_provider=fallback,
+        cache=get_shared_embedding_cache()
+    )
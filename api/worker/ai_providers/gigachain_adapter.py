@@ -3,6 +3,10 @@ GigaChain адаптер для интеграции с GigaChat
 Поддерживает fallback на OpenRouter API
 Включает structured output, retries, batching и метрики
 Context7 best practice: Соблюдение лимита GigaChat в 1 поток
+
+Context7: [C7-ID: AI-TAGGING-BATCH-001] посты, пришедшие в коротком окне, склеиваются
+микробатчером в один мультиэлементный промпт с id элементов; JSON-ответ раскладывается
+обратно по постам, неразобранные элементы переотправляются отдельно.
 """
 
 import asyncio
@@ -19,8 +23,11 @@ import openai
 from pydantic import BaseModel, Field
 from prometheus_client import Counter, Histogram, Gauge
 
+from config import settings
 from feature_flags import feature_flags
-from prompts.tagging import STRICT_TAGGING_PROMPT
+from ai_providers.embedding_batcher import EmbeddingMicroBatcher
+from ai_providers.proxy_http import ProxyHTTPPool, ProxyRateLimitError, get_proxy_http_pool
+from prompts.tagging import BATCH_TAGGING_ITEM, BATCH_TAGGING_PROMPT, STRICT_TAGGING_PROMPT
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +72,18 @@ tagging_provider_used = Counter(
     ['provider']  # gigachat, openrouter
 )
 
+tagging_prompt_items = Histogram(
+    'tagging_prompt_items',
+    'Posts packed into one GigaChat tagging prompt',
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16)
+)
+
+tagging_batch_requeued_total = Counter(
+    'tagging_batch_requeued_total',
+    'Posts re-sent because the multi-item reply could not be parsed for them',
+    ['mode']  # batch, single
+)
+
 # ============================================================================
 # КОНФИГУРАЦИЯ
 # ============================================================================
@@ -121,6 +140,26 @@ class GigaChainAdapter:
         
         # Семафор для соблюдения лимита GigaChat в 1 поток
         self._request_semaphore = asyncio.Semaphore(primary_config.max_concurrent_requests)
+        # Провайдер эмбеддингов (общий на процесс, создаётся лениво)
+        self._embedding_provider = None
+        # Context7: общий на процесс HTTP-пул gpt2giga-proxy (используем его как OpenAI API)
+        self._proxy: ProxyHTTPPool = get_proxy_http_pool(
+            os.getenv('OPENAI_API_BASE', 'http://gpt2giga-proxy:8090/v1')
+        )
+        self._proxy_headers = {'Authorization': f"Bearer {os.getenv('OPENAI_API_KEY', 'dummy')}"}
+        self.tagging_batch_size = max(1, getattr(settings, 'TAGGING_BATCH_MAX_SIZE', 8))
+        # Context7: микробатчер склеивает конкурентные generate_tags_batch() в один вызов
+        # провайдера; один батч «в полёте» - как и семафор, соблюдает лимит GigaChat
+        self._tag_batcher: Optional[EmbeddingMicroBatcher] = None
+        if getattr(settings, 'TAGGING_BATCH_ENABLED', True) and self.tagging_batch_size > 1:
+            self._tag_batcher = EmbeddingMicroBatcher(
+                self._generate_tags_now,
+                max_batch_size=self.tagging_batch_size,
+                max_linger_ms=getattr(settings, 'TAGGING_BATCH_MAX_LINGER_MS', 200.0),
+                max_queue_size=getattr(settings, 'TAGGING_BATCH_MAX_QUEUE', 256),
+                max_inflight_batches=1,
+                name="tagging"
+            )
         
         logger.info(f"Initialized GigaChain adapter with primary: {primary_config.name}")
     
@@ -137,10 +176,22 @@ class GigaChainAdapter:
         Батчевое тегирование текстов с соблюдением лимита GigaChat.
         
         Context7 best practice: Использует семафор для соблюдения лимита в 1 поток.
+        По умолчанию тексты идут в очередь микробатчера и попадают в один промпт
+        с текстами конкурентных вызовов; force_immediate отправляет их сразу.
+        
+        Ошибки микробатчера (переполнение очереди, закрытие, сбой диспатча) пробрасываются,
+        а не превращаются в пустые теги - вызывающий применяет свой retry/DLQ.
         """
         if not texts:
             return []
         
+        if self._tag_batcher is not None and not force_immediate:
+            return await self._tag_batcher.submit_many(texts)
+        
+        return await self._generate_tags_now(texts)
+    
+    async def _generate_tags_now(self, texts: List[str]) -> List[TaggingResult]:
+        """Тегирование текстов одним вызовом провайдера (primary → fallback)."""
         # Проверка feature flags
         if self.tagging_config.enable_feature_flags:
             available_providers = feature_flags.get_available_ai_providers()
@@ -194,132 +245,186 @@ class GigaChainAdapter:
         """
         Генерация тегов через GigaChat с retry logic.
         
-        Context7: [C7-ID: rate-limit-backoff-003] - resilient API calls
+        Context7: [C7-ID: rate-limit-backoff-003] - resilient API calls; retry/backoff
+        выполняет общий HTTP-пул прокси [C7-ID: AI-PROXY-HTTP-001]
         Документация: https://github.com/ai-forever/gpt2giga
         """
-        max_retries = 5
-        base_delay = 1
-        
-        for attempt in range(max_retries):
-            try:
-                return await self._call_gigachat_api(texts)
-                
-            except Exception as e:
-                if hasattr(e, 'response') and e.response.status_code == 429:
-                    # GigaChat rate limit (согласно документации)
-                    retry_after = int(e.response.headers.get('Retry-After', base_delay * (2 ** attempt)))
-                    
-                    logger.warning(
-                        "GigaChat rate limit hit",
-                        attempt=attempt + 1,
-                        retry_after=retry_after,
-                        max_retries=max_retries
-                    )
-                    
-                    # Prometheus метрика
-                    gigachat_rate_limit_total.labels(retry_attempt=attempt).inc()
-                    
-                    # Exponential backoff с jitter
-                    import random
-                    jitter = random.uniform(0, 0.1 * retry_after)
-                    await asyncio.sleep(retry_after + jitter)
-                    
-                    continue
-                else:
-                    raise
+        try:
+            return await self._call_gigachat_api(texts)
+        except ProxyRateLimitError as e:
+            # GigaChat rate limit (согласно документации): Retry-After и backoff
+            # уже отработал HTTP-пул прокси, попытки исчерпаны
+            logger.warning("GigaChat rate limit hit", extra={"error": str(e), "retry_after": e.retry_after})
+            gigachat_rate_limit_total.labels(retry_attempt="exhausted").inc()
         
         # После всех попыток - fallback на OpenRouter
         logger.error("GigaChat failed after retries, falling back to OpenRouter")
         return await self._generate_tags_with_openrouter(texts)
     
     async def _call_gigachat_api(self, texts: List[str]) -> List[TaggingResult]:
-        """Вызов GigaChat API через gpt2giga-proxy."""
-        import requests
+        """
+        Вызов GigaChat API через gpt2giga-proxy.
+        
+        Context7: непустые тексты упаковываются в мультиэлементные промпты по
+        tagging_batch_size; HTTP ошибки пробрасываются для retry logic.
+        """
+        results = [TaggingResult(tags=[], language="unknown") for _ in texts]
+        items = [(index, text) for index, text in enumerate(texts) if text.strip()]
         
-        # Используем gpt2giga-proxy как OpenAI API
-        api_base = os.getenv('OPENAI_API_BASE', 'http://gpt2giga-proxy:8090/v1')
-        api_key = os.getenv('OPENAI_API_KEY', 'dummy')
+        for offset in range(0, len(items), self.tagging_batch_size):
+            chunk = items[offset:offset + self.tagging_batch_size]
+            for index, tags in (await self._tag_chunk(chunk)).items():
+                results[index] = TaggingResult(tags=tags, language="ru")
         
-        headers = {
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json'
+        return results
+    
+    async def _tag_chunk(self, items: List[tuple]) -> Dict[int, List[str]]:
+        """
+        Теги для элементов (index, text) одним промптом.
+        
+        Элементы, для которых ответ не разобран, переотправляются: меньшим батчем,
+        если часть элементов разобрана, иначе - по одному строгим промптом.
+        """
+        if len(items) == 1:
+            index, text = items[0]
+            return {index: await self._tag_single(text)}
+        
+        tagging_prompt_items.observe(len(items))
+        prompt = BATCH_TAGGING_PROMPT.format(items="\n".join(
+            BATCH_TAGGING_ITEM.format(item_id=item_id, text=text[:1000])
+            for item_id, (_, text) in enumerate(items, start=1)
+        ))
+        content = await self._chat_completion(prompt, max_tokens=60 * len(items))
+        parsed = self._parse_batch_tags(content, len(items))
+        
+        tags_by_index = {
+            index: parsed[item_id]
+            for item_id, (index, _) in enumerate(items, start=1)
+            if item_id in parsed
         }
+        missing = [item for item_id, item in enumerate(items, start=1) if item_id not in parsed]
+        if not missing:
+            return tags_by_index
         
-        results = []
+        logger.warning(
+            "Partially parsed batch tagging reply",
+            extra={"batch_size": len(items), "missing": len(missing), "content": content[:200]}
+        )
+        if len(missing) < len(items):
+            tagging_batch_requeued_total.labels(mode="batch").inc(len(missing))
+            tags_by_index.update(await self._tag_chunk(missing))
+        else:
+            tagging_batch_requeued_total.labels(mode="single").inc(len(missing))
+            for index, text in missing:
+                tags_by_index[index] = await self._tag_single(text)
+        return tags_by_index
+    
+    async def _tag_single(self, text: str) -> List[str]:
+        """Теги одного текста строгим промптом из централизованного шаблона."""
+        tagging_prompt_items.observe(1)
+        prompt = STRICT_TAGGING_PROMPT.format(text=text[:1000])
+        content = await self._chat_completion(prompt, max_tokens=100)
+        return self._parse_tags(content)
+    
+    async def _chat_completion(self, prompt: str, max_tokens: int) -> str:
+        """Один chat/completions запрос к gpt2giga-proxy; текст ответа модели."""
+        start_time = time.time()
+        try:
+            response = await self._proxy.request(
+                'POST',
+                '/chat/completions',
+                json={
+                    'model': 'GigaChat',
+                    'messages': [{'role': 'user', 'content': prompt}],
+                    'max_tokens': max_tokens,
+                    'temperature': 0.1
+                },
+                headers=self._proxy_headers,
+                timeout=getattr(settings, 'TAGGING_HTTP_TIMEOUT', 60.0)
+            )
+        except (ConnectionError, TimeoutError) as e:
+            gigachat_request_duration.labels(status="error").observe(time.time() - start_time)
+            logger.error("GigaChat API request failed", extra={"error": str(e)})
+            raise
         
-        for text in texts:
-            if not text.strip():
-                results.append(TaggingResult(tags=[], language="unknown"))
-                continue
-            
-            # Создаём строгий промпт из централизованного шаблона
-            prompt = STRICT_TAGGING_PROMPT.format(text=text[:1000])
-            
-            start_time = time.time()
-            try:
-                response = requests.post(
-                    f'{api_base}/chat/completions',
-                    headers=headers,
-                    json={
-                        'model': 'GigaChat',
-                        'messages': [{'role': 'user', 'content': prompt}],
-                        'max_tokens': 100,
-                        'temperature': 0.1
-                    },
-                    timeout=30
-                )
-                
-                # Prometheus метрики
-                duration = time.time() - start_time
-                gigachat_request_duration.labels(status="success" if response and response.status_code == 200 else "error").observe(duration)
-                tagging_provider_used.labels(provider="gigachat").inc()
-                
-                if response and response.status_code == 200:
-                    result = response.json()
-                    content = result['choices'][0]['message']['content'].strip()
-                    
-                    try:
-                        # Парсим JSON ответ
-                        import json
-                        import re
-                        
-                        # Context7: [C7-ID: json-parsing-fix-001] - исправление неправильных кавычек в GigaChat ответах
-                        # GigaChat иногда возвращает теги с неправильными кавычками: «вместо "
-                        content_fixed = content.replace('«', '"').replace('»', '"')
-                        
-                        tags = json.loads(content_fixed)
-                        if isinstance(tags, list):
-                            # Фильтруем пустые теги и ограничиваем количество
-                            tags = [tag.strip() for tag in tags if tag.strip()][:5]
-                        else:
-                            tags = []
-                    except (json.JSONDecodeError, TypeError) as e:
-                        logger.warning("Failed to parse tags JSON", extra={"content": content[:100], "error": str(e)})
-                        # Fallback: попробуем извлечь теги через regex
-                        import re
-                        tag_pattern = r'["«]([^"»]+)["»]'
-                        matches = re.findall(tag_pattern, content)
-                        tags = [match.strip() for match in matches if match.strip()][:5]
-                        if tags:
-                            logger.info(f"Extracted tags via regex: {tags}")
-                        else:
-                            tags = []
-                    
-                    results.append(TaggingResult(tags=tags, language="ru"))
-                else:
-                    error_msg = f"GigaChat API error: {response.status_code if response else 'No response'} - {response.text if response else 'No response'}"
-                    logger.error(error_msg)
-                    # Выбрасываем исключение для retry logic
-                    if response:
-                        response.raise_for_status()
-                    else:
-                        raise Exception("No response from GigaChat API")
-            except Exception as e:
-                logger.error("GigaChat API request failed", extra={"error": str(e)})
-                # Выбрасываем исключение для retry logic
-                raise
+        # Prometheus метрики
+        gigachat_request_duration.labels(status="success" if response.status_code == 200 else "error").observe(time.time() - start_time)
+        tagging_provider_used.labels(provider="gigachat").inc()
         
-        return results
+        if response.status_code != 200:
+            logger.error(f"GigaChat API error: {response.status_code} - {response.text}")
+            response.raise_for_status()
+        
+        result = response.json()
+        return result['choices'][0]['message']['content'].strip()
+    
+    @staticmethod
+    def _parse_tags(content: str) -> List[str]:
+        """Разбор JSON-массива тегов из ответа модели (с regex fallback)."""
+        import re
+        
+        # Context7: [C7-ID: json-parsing-fix-001] - исправление неправильных кавычек в GigaChat ответах
+        # GigaChat иногда возвращает теги с неправильными кавычками: «вместо "
+        content_fixed = content.replace('«', '"').replace('»', '"')
+        
+        try:
+            tags = json.loads(content_fixed)
+            if isinstance(tags, list):
+                # Фильтруем пустые теги и ограничиваем количество
+                return [tag.strip() for tag in tags if isinstance(tag, str) and tag.strip()][:5]
+            return []
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.warning("Failed to parse tags JSON", extra={"content": content[:100], "error": str(e)})
+            # Fallback: попробуем извлечь теги через regex
+            tag_pattern = r'["«]([^"»]+)["»]'
+            matches = re.findall(tag_pattern, content)
+            tags = [match.strip() for match in matches if match.strip()][:5]
+            if tags:
+                logger.info(f"Extracted tags via regex: {tags}")
+            return tags
+    
+    @staticmethod
+    def _parse_batch_tags(content: str, item_count: int) -> Dict[int, List[str]]:
+        """
+        Разбор ответа мультиэлементного промпта: id элемента -> теги.
+        
+        Принимает объект {"1": [...], ...} и список [{"id": 1, "tags": [...]}, ...]
+        (в том числе внутри ```json```). Элементы с невалидным значением в результат
+        не попадают - их переотправит вызывающий.
+        """
+        text = content.strip()
+        if text.startswith('```'):
+            text = text.strip('`')
+            if text.startswith('json'):
+                text = text[4:]
+        text = text.replace('«', '"').replace('»', '"')
+        start, end = text.find('{'), text.rfind('}')
+        if text.lstrip().startswith('[') or start == -1:
+            start, end = text.find('['), text.rfind(']')
+        try:
+            payload = json.loads(text[start:end + 1]) if start != -1 and end > start else None
+        except (json.JSONDecodeError, TypeError):
+            payload = None
+        
+        if isinstance(payload, list):
+            payload = {
+                entry.get('id'): entry.get('tags')
+                for entry in payload
+                if isinstance(entry, dict)
+            }
+        if not isinstance(payload, dict):
+            return {}
+        
+        parsed: Dict[int, List[str]] = {}
+        for key, tags in payload.items():
+            try:
+                item_id = int(str(key).strip().strip('[]').replace('id=', ''))
+            except ValueError:
+                continue
+            if not 1 <= item_id <= item_count or not isinstance(tags, list):
+                continue
+            parsed[item_id] = [tag.strip() for tag in tags if isinstance(tag, str) and tag.strip()][:5]
+        return parsed
     
     async def _generate_tags_with_openrouter(self, texts: List[str]) -> List[TaggingResult]:
         """Генерация тегов через OpenRouter API."""
@@ -390,7 +495,7 @@ class GigaChainAdapter:
             return [TaggingResult(tags=[], language="unknown")] * len(texts)
     
     # ========================================================================
-    # EMBEDDINGS (заглушка)
+    # EMBEDDINGS
     # ========================================================================
     
     async def generate_embeddings_batch(
@@ -398,12 +503,44 @@ class GigaChainAdapter:
         texts: List[str],
         force_immediate: bool = False
     ) -> List[Any]:
-        """Генерация эмбеддингов (заглушка)."""
-        # Возвращаем пустые эмбеддинги для совместимости
-        return [[] for _ in texts]
+        """
+        Батчевая генерация эмбеддингов через gpt2giga-proxy.
+        
+        Context7: по умолчанию тексты идут в общую очередь микробатчера и склеиваются
+        с конкурентными вызовами; force_immediate отправляет их отдельным запросом сразу.
+        Для текстов, эмбеддинг которых получить не удалось, возвращается пустой список.
+        """
+        if not texts:
+            return []
+        
+        if self._embedding_provider is None:
+            from ai_providers.embedding_service import get_shared_embedding_provider
+            self._embedding_provider = get_shared_embedding_provider(self)
+        
+        if force_immediate:
+            try:
+                results = await self._embedding_provider.embed_texts(texts)
+            except Exception as e:
+                results = [e] * len(texts)
+        else:
+            results = await self._embedding_provider.embed_text_many(texts, return_exceptions=True)
+        
+        embeddings = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning(f"Embedding generation failed: {result}")
+                embeddings.append([])
+            else:
+                embeddings.append(result)
+        return embeddings
     
     async def close(self):
         """Закрытие соединений."""
+        if self._tag_batcher is not None:
+            await self._tag_batcher.close()
+        if self._embedding_provider is not None:
+            await self._embedding_provider.close()
+        await self._proxy.aclose()
         logger.info("GigaChain adapter connections closed")
 
 # ============================================================================
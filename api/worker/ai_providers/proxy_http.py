@@ -0,0 +1,257 @@
+"""
+Общий асинхронный HTTP-слой для gpt2giga-proxy.
+[C7-ID: AI-PROXY-HTTP-001]
+
+Context7 best practice: все вызовы прокси из воркера (эмбеддинги, тегирование, health check)
+идут через один httpx.AsyncClient на процесс и event loop:
+- keep-alive пул соединений (+ HTTP/2, если установлен h2 и включён GIGACHAT_PROXY_HTTP2);
+- лимит конкурентных запросов на endpoint (chat/completions по умолчанию 1 - лимит GigaChat);
+- единые таймауты и retry (services.retry_policy) для сетевых ошибок, 5xx и 429.
+
+Ответы 4xx (кроме 429) возвращаются вызывающему как есть - их обработка зависит от endpoint.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+import structlog
+
+from config import settings
+from metrics_utils import Counter, Histogram
+from services.retry_policy import RetryConfig, create_retry_decorator
+
+logger = structlog.get_logger()
+
+DEFAULT_ENDPOINT_LIMITS = "embeddings=4,chat/completions=1,models=2"
+
+
+def _setting(name: str, default: Any) -> Any:
+    """Настройка GIGACHAT_PROXY_* с дефолтом worker config (модуль config может быть не воркерным)."""
+    return getattr(settings, name, default)
+
+
+proxy_http_requests_total = Counter(
+    'gigachat_proxy_http_requests_total',
+    'HTTP requests to gpt2giga-proxy',
+    ['endpoint', 'status']
+)
+
+proxy_http_duration_seconds = Histogram(
+    'gigachat_proxy_http_duration_seconds',
+    'gpt2giga-proxy request duration (single attempt, without limiter wait)',
+    ['endpoint']
+)
+
+proxy_http_limiter_wait_seconds = Histogram(
+    'gigachat_proxy_http_limiter_wait_seconds',
+    'Time spent waiting for a per-endpoint concurrency slot',
+    ['endpoint'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+
+
+class ProxyRateLimitError(TimeoutError):
+    """429 от прокси (retryable); retry_after - подсказка из заголовка Retry-After."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parse_endpoint_limits(raw: str) -> Dict[str, int]:
+    """'embeddings=4,chat/completions=1' -> {'embeddings': 4, 'chat/completions': 1}"""
+    limits: Dict[str, int] = {}
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        name, value = part.split("=", 1)
+        try:
+            limits[endpoint_name(name)] = max(1, int(value))
+        except ValueError:
+            logger.warning("Invalid proxy endpoint limit", entry=part)
+    return limits
+
+
+def endpoint_name(path: str) -> str:
+    """Нормализованное имя endpoint: '/v1/chat/completions' -> 'chat/completions'."""
+    path = path.split("?", 1)[0].strip().strip("/")
+    if path.startswith("v1/"):
+        path = path[3:]
+    return path or "root"
+
+
+class ProxyHTTPPool:
+    """
+    Пул соединений к одному base_url прокси.
+
+    httpx.AsyncClient и семафоры привязаны к event loop и пересоздаются лениво
+    при его смене (скрипты с повторным asyncio.run).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        max_connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+        endpoint_limits: Optional[Dict[str, int]] = None,
+        default_limit: Optional[int] = None,
+        retry_config: Optional[RetryConfig] = None,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections or _setting("GIGACHAT_PROXY_MAX_CONNECTIONS", 16)
+        self.timeout = timeout or _setting("GIGACHAT_PROXY_TIMEOUT", 30.0)
+        self.endpoint_limits = (
+            endpoint_limits if endpoint_limits is not None
+            else parse_endpoint_limits(_setting("GIGACHAT_PROXY_ENDPOINT_LIMITS", DEFAULT_ENDPOINT_LIMITS))
+        )
+        self.default_limit = default_limit or self.max_connections
+        self.retry_config = retry_config or RetryConfig(
+            max_attempts=_setting("GIGACHAT_PROXY_RETRY_ATTEMPTS", 4),
+            initial_delay_sec=_setting("GIGACHAT_PROXY_RETRY_DELAY", 0.5),
+            max_delay_sec=_setting("GIGACHAT_PROXY_RETRY_MAX_DELAY", 30.0),
+        )
+        wants_http2 = _setting("GIGACHAT_PROXY_HTTP2", True) if http2 is None else http2
+        self.http2 = bool(wants_http2) and _h2_available()
+        if wants_http2 and not self.http2:
+            logger.info("h2 package not installed, gpt2giga-proxy pool uses HTTP/1.1")
+        self._transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._limiters: Dict[str, asyncio.Semaphore] = {}
+        self._attempt_with_retry = create_retry_decorator(
+            self.retry_config, operation_name="gigachat_proxy"
+        )(self._attempt)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=self.http2,
+                timeout=httpx.Timeout(self.timeout, connect=_setting("GIGACHAT_PROXY_CONNECT_TIMEOUT", 5.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                transport=self._transport
+            )
+            self._loop = loop
+            self._limiters = {}
+        return self._client
+
+    def _limiter(self, endpoint: str) -> asyncio.Semaphore:
+        limiter = self._limiters.get(endpoint)
+        if limiter is None:
+            limiter = asyncio.Semaphore(self.endpoint_limits.get(endpoint, self.default_limit))
+            self._limiters[endpoint] = limiter
+        return limiter
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        retry: bool = True
+    ) -> httpx.Response:
+        """
+        Запрос к прокси с лимитом endpoint и retry.
+
+        Raises:
+            TimeoutError / ProxyRateLimitError / ConnectionError: после исчерпания попыток
+        """
+        if not retry:
+            return await self._attempt(method, path, json, headers, timeout)
+        return await self._attempt_with_retry(method, path, json, headers, timeout)
+
+    async def _attempt(
+        self,
+        method: str,
+        path: str,
+        json: Any,
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float]
+    ) -> httpx.Response:
+        endpoint = endpoint_name(path)
+        client = self._get_client()
+        wait_started = time.monotonic()
+        async with self._limiter(endpoint):
+            started = time.monotonic()
+            proxy_http_limiter_wait_seconds.labels(endpoint=endpoint).observe(started - wait_started)
+            try:
+                response = await client.request(
+                    method,
+                    path,
+                    json=json,
+                    headers=headers,
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+                )
+            except httpx.TimeoutException as e:
+                proxy_http_requests_total.labels(endpoint=endpoint, status="timeout").inc()
+                raise TimeoutError(f"gpt2giga-proxy timeout on {path}: {e}") from e
+            except httpx.TransportError as e:
+                proxy_http_requests_total.labels(endpoint=endpoint, status="transport_error").inc()
+                raise ConnectionError(f"gpt2giga-proxy transport error on {path}: {e}") from e
+            finally:
+                proxy_http_duration_seconds.labels(endpoint=endpoint).observe(time.monotonic() - started)
+
+        status = response.status_code
+        proxy_http_requests_total.labels(endpoint=endpoint, status=str(status)).inc()
+        if status == 429:
+            retry_after = _retry_after_seconds(response)
+            if retry_after:
+                # Context7: уважаем Retry-After прокси (в пределах max_delay политики)
+                await asyncio.sleep(min(retry_after, self.retry_config.max_delay_sec))
+            raise ProxyRateLimitError(f"HTTP 429 on {path}: {response.text[:200]}", retry_after)
+        if status >= 500:
+            raise ConnectionError(f"HTTP {status} on {path}: {response.text[:200]}")
+        return response
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+_pools: Dict[str, ProxyHTTPPool] = {}
+
+
+def get_proxy_http_pool(base_url: Optional[str] = None) -> ProxyHTTPPool:
+    """Общий пул на процесс для base_url (по умолчанию GIGACHAT_PROXY_URL)."""
+    base_url = (base_url or os.getenv("GIGACHAT_PROXY_URL", "http://gpt2giga-proxy:8090")).rstrip("/")
+    pool = _pools.get(base_url)
+    if pool is None:
+        pool = ProxyHTTPPool(base_url)
+        _pools[base_url] = pool
+    return pool
+
+
+async def close_proxy_http_pools() -> None:
+    """Закрытие всех пулов (shutdown воркера)."""
+    for pool in list(_pools.values()):
+        await pool.aclose()
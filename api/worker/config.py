@@ -39,6 +39,44 @@ class Settings:
     EMBED_DIM: int = int(os.getenv("EMBED_DIM", os.getenv("EMBEDDING_DIMENSION", "2560")))
     INDEXER_EMBED_IF_MISSING: bool = os.getenv("INDEXER_EMBED_IF_MISSING", "true").lower() == "true"
     
+    # Context7: микробатчинг эмбеддингов — конкурентные вызовы склеиваются в один input: [...]
+    EMBEDDING_BATCH_ENABLED: bool = os.getenv("EMBEDDING_BATCH_ENABLED", "true").lower() == "true"
+    EMBEDDING_BATCH_MAX_SIZE: int = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+    EMBEDDING_BATCH_MAX_LINGER_MS: float = float(os.getenv("EMBEDDING_BATCH_MAX_LINGER_MS", "10"))
+    EMBEDDING_BATCH_MAX_QUEUE: int = int(os.getenv("EMBEDDING_BATCH_MAX_QUEUE", "1024"))
+    # Context7: лимит GigaChat в 1 поток — по умолчанию один батч «в полёте»
+    EMBEDDING_BATCH_MAX_INFLIGHT: int = int(os.getenv("EMBEDDING_BATCH_MAX_INFLIGHT", "1"))
+    EMBEDDING_HTTP_TIMEOUT: float = float(os.getenv("EMBEDDING_HTTP_TIMEOUT", "30"))
+    
+    # Context7: микробатчинг тегирования — посты из короткого окна в одном промпте GigaChat
+    TAGGING_BATCH_ENABLED: bool = os.getenv("TAGGING_BATCH_ENABLED", "true").lower() == "true"
+    TAGGING_BATCH_MAX_SIZE: int = int(os.getenv("TAGGING_BATCH_MAX_SIZE", "8"))
+    TAGGING_BATCH_MAX_LINGER_MS: float = float(os.getenv("TAGGING_BATCH_MAX_LINGER_MS", "200"))
+    TAGGING_BATCH_MAX_QUEUE: int = int(os.getenv("TAGGING_BATCH_MAX_QUEUE", "256"))
+    TAGGING_HTTP_TIMEOUT: float = float(os.getenv("TAGGING_HTTP_TIMEOUT", "60"))
+    
+    # Context7: общий HTTP-пул к gpt2giga-proxy (ai_providers/proxy_http.py)
+    GIGACHAT_PROXY_HTTP2: bool = os.getenv("GIGACHAT_PROXY_HTTP2", "true").lower() == "true"
+    GIGACHAT_PROXY_MAX_CONNECTIONS: int = int(os.getenv("GIGACHAT_PROXY_MAX_CONNECTIONS", "16"))
+    GIGACHAT_PROXY_TIMEOUT: float = float(os.getenv("GIGACHAT_PROXY_TIMEOUT", "30"))
+    GIGACHAT_PROXY_CONNECT_TIMEOUT: float = float(os.getenv("GIGACHAT_PROXY_CONNECT_TIMEOUT", "5"))
+    # Лимиты конкурентных запросов на endpoint; chat/completions = 1 - лимит GigaChat в 1 поток
+    GIGACHAT_PROXY_ENDPOINT_LIMITS: str = os.getenv(
+        "GIGACHAT_PROXY_ENDPOINT_LIMITS", "embeddings=4,chat/completions=1,models=2"
+    )
+    GIGACHAT_PROXY_RETRY_ATTEMPTS: int = int(os.getenv("GIGACHAT_PROXY_RETRY_ATTEMPTS", "4"))
+    GIGACHAT_PROXY_RETRY_DELAY: float = float(os.getenv("GIGACHAT_PROXY_RETRY_DELAY", "0.5"))
+    GIGACHAT_PROXY_RETRY_MAX_DELAY: float = float(os.getenv("GIGACHAT_PROXY_RETRY_MAX_DELAY", "30"))
+    
+    # Context7: content-addressed кэш эмбеддингов (in-process LRU + Redis blob'ы)
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_REDIS_ENABLED: bool = os.getenv("EMBEDDING_CACHE_REDIS_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_LRU_MAX_ITEMS: int = int(os.getenv("EMBEDDING_CACHE_LRU_MAX_ITEMS", "10000"))
+    EMBEDDING_CACHE_LRU_MAX_MB: int = int(os.getenv("EMBEDDING_CACHE_LRU_MAX_MB", "64"))
+    EMBEDDING_CACHE_TTL_SECONDS: int = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+    EMBEDDING_CACHE_REDIS_MAX_ITEMS: int = int(os.getenv("EMBEDDING_CACHE_REDIS_MAX_ITEMS", "500000"))
+    EMBEDDING_CACHE_DTYPE: str = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")  # float16 | float32
+    
     # GigaChat
     GIGACHAT_BASE_URL: str = os.getenv("GIGACHAT_BASE_URL", "https://gigachat.devices.sberbank.ru/api/v1")
     GIGACHAT_EMBEDDINGS_MODEL: str = os.getenv("GIGACHAT_EMBEDDINGS_MODEL", "Embeddings")
@@ -378,6 +378,37 @@ class EventPublisher:
         logger.info(f"Published event {stream_name} with ID {message_id}")
         return message_id
 
+    async def publish_pipelined(self, events: List[tuple[str, Any]]) -> List[Any]:
+        """
+        Context7: публикация нескольких событий одним pipeline XADD (один round-trip).
+        
+        Формат сообщения тот же, что у publish_event: {"data": json bytes}.
+        
+        Args:
+            events: Список кортежей (stream_name, event)
+            
+        Returns:
+            Для каждого события по порядку: Message ID или исключение
+        """
+        results: List[Any] = [None] * len(events)
+        queued: List[int] = []
+        pipe = self.client.client.pipeline(transaction=False)
+        for idx, (stream_name, event) in enumerate(events):
+            try:
+                stream_key = STREAMS[stream_name]
+                data = self._to_json_bytes(self._to_payload_dict(event))
+            except Exception as e:
+                results[idx] = e
+                continue
+            pipe.xadd(stream_key, {"data": data}, maxlen=10000)
+            queued.append(idx)
+        
+        if queued:
+            replies = await pipe.execute(raise_on_error=False)
+            for idx, reply in zip(queued, replies):
+                results[idx] = reply
+        return results
+
     async def publish_json(self, stream_name: str, payload: Any) -> str:
         stream_key = STREAMS[stream_name]
         data = self._to_json_bytes(payload)
@@ -523,6 +554,18 @@ class ConsumerConfig:
     retry_delay: int = 5  # секунд
     idle_timeout: int = 300  # секунд
 
+def batch_handler(func):
+    """
+    Context7: помечает обработчик как батчевый.
+
+    Батчевый обработчик получает список событий одного XREADGROUP и возвращает
+    список той же длины: None для успешно обработанных событий, исключение - для
+    упавших (они идут по обычному пути retry → DLQ).
+    """
+    func.handles_batch = True
+    return func
+
+
 class EventConsumer:
     """Consumer событий из Redis Streams с поддержкой групп и DLQ."""
     
@@ -890,6 +933,9 @@ class EventConsumer:
     
     async def _process_messages(self, stream_key: str, dlq_key: str, messages: List, handler_func):
         """Обработка батча сообщений."""
+        if getattr(handler_func, "handles_batch", False):
+            await self._process_messages_batch(stream_key, dlq_key, messages, handler_func)
+            return
         for stream, stream_messages in messages:
             try:
                 print("dispatch_enter", stream, "msg_count", len(stream_messages), flush=True)
@@ -944,6 +990,52 @@ class EventConsumer:
                             print("dispatch_traceback:\n" + _tb.format_exc(), flush=True)
                             await self._handle_failed_message(stream_key, dlq_key, message_id, fields, str(e))
     
+    async def _process_messages_batch(self, stream_key: str, dlq_key: str, messages: List, handler_func):
+        """
+        Context7: обработка батча сообщений одним вызовом батчевого обработчика.
+
+        Успешные сообщения подтверждаются одним XACK, упавшие - через _handle_failed_message.
+        """
+        for stream, stream_messages in messages:
+            if not stream_messages:
+                continue
+            parsed: List[tuple] = []
+            for message_id, fields in stream_messages:
+                try:
+                    parsed.append((message_id, fields, self._parse_event_data(fields), None))
+                except Exception as e:
+                    parsed.append((message_id, fields, None, e))
+
+            valid = [item for item in parsed if item[3] is None]
+            errors: List[Optional[BaseException]] = []
+            if valid:
+                try:
+                    errors = list(await handler_func([item[2] for item in valid]))
+                    if len(errors) != len(valid):
+                        raise ValueError(
+                            f"batch handler returned {len(errors)} results for {len(valid)} events"
+                        )
+                except Exception as e:
+                    logger.error(f"dispatch_batch_fail stream={stream_key} size={len(valid)} err={e}")
+                    errors = [e] * len(valid)
+
+            results = iter(errors)
+            acked: List[str] = []
+            failed: List[tuple] = []
+            for message_id, fields, _, parse_error in parsed:
+                error = parse_error if parse_error is not None else next(results)
+                if error is None:
+                    acked.append(message_id)
+                else:
+                    failed.append((message_id, fields, error))
+
+            if acked:
+                await self.client.client.xack(stream_key, self.config.group_name, *acked)
+                redis_xack_total.labels(stream=stream_key).inc(len(acked))
+            for message_id, fields, error in failed:
+                logger.error(f"dispatch_fail stream={stream_key} msg_id={message_id} err={error}")
+                await self._handle_failed_message(stream_key, dlq_key, message_id, fields, str(error))
+
     async def _handle_failed_message(self, stream_key: str, dlq_key: str, message_id: str, fields: Dict, error: str):
         """Обработка неудачных сообщений (retry → DLQ)."""
         # Получить информацию о сообщении
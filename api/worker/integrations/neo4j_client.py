@@ -6,16 +6,239 @@ Neo4j Client с async-loop provider для предотвращения "Task go
 """
 
 import asyncio
+import json
 import os
 import logging
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import structlog
 from neo4j import AsyncGraphDatabase
 from neo4j.exceptions import ServiceUnavailable, AuthError
 
+from shared.graph import ensure_graph_schema, schema_bootstrap_enabled
+
 logger = structlog.get_logger()
 
+# ============================================================================
+# BATCH CYPHER (UNWIND $rows)
+# ============================================================================
+
+# [C7-ID: graph-batch-write-001] Запросы write_graph_batch: один запрос на вид записей,
+# параметры только через $rows (никогда f-strings)
+
+_POSTS_BATCH_QUERY = """
+UNWIND $rows AS row
+MERGE (p:Post {post_id: row.post_id})
+SET p.user_id = row.user_id,
+    p.tenant_id = row.tenant_id,
+    p.channel_id = row.channel_id,
+    p.expires_at = row.expires_at,
+    p.indexed_at = row.indexed_at,
+    p.enrichment_data = row.enrichment_data,
+    p.content = coalesce(row.content, p.content),
+    p.telegram_message_id = coalesce(row.telegram_message_id, p.telegram_message_id),
+    p.tg_channel_id = coalesce(row.tg_channel_id, p.tg_channel_id),
+    p.posted_at = coalesce(row.posted_at, p.posted_at)
+MERGE (u:User {user_id: row.user_id})
+SET u.tenant_id = row.tenant_id
+MERGE (c:Channel {channel_id: row.channel_id})
+SET c.tenant_id = row.tenant_id
+MERGE (u)-[:OWNS]->(p)
+MERGE (c)-[:HAS_POST]->(p)
+FOREACH (tag IN row.tags |
+    MERGE (t:Tag {name: tag.name})
+    SET t.category = tag.category
+    MERGE (p)-[:TAGGED_AS {confidence: tag.confidence}]->(t)
+)
+FOREACH (topic_name IN row.topics |
+    MERGE (topic:Topic {name: topic_name})
+    ON CREATE SET topic.created_at = datetime()
+    MERGE (p)-[:HAS_TOPIC]->(topic)
+)
+RETURN count(p) AS written
+"""
+
+_TAGS_BATCH_QUERY = """
+UNWIND $rows AS row
+MATCH (p:Post {post_id: row.post_id})
+FOREACH (tag IN row.tags |
+    MERGE (t:Tag {name: tag.name})
+    SET t.category = tag.category
+    MERGE (p)-[:TAGGED_AS {confidence: tag.confidence}]->(t)
+)
+FOREACH (topic_name IN row.topics |
+    MERGE (topic:Topic {name: topic_name})
+    ON CREATE SET topic.created_at = datetime()
+    MERGE (p)-[:HAS_TOPIC]->(topic)
+)
+RETURN count(p) AS written
+"""
+
+_RELATED_TOPICS_BATCH_QUERY = """
+UNWIND $post_ids AS post_id
+MATCH (p:Post {post_id: post_id})-[:HAS_TOPIC]->(t1:Topic)
+MATCH (p)-[:HAS_TOPIC]->(t2:Topic)
+WHERE t1.name < t2.name
+MERGE (t1)-[r:RELATED_TO]-(t2)
+ON CREATE SET r.similarity = 0.5, r.weight = 1
+ON MATCH SET r.weight = r.weight + 1, r.similarity = 0.5 + (r.weight * 0.1)
+RETURN count(r) AS written
+"""
+
+_FORWARDS_BATCH_QUERY = """
+UNWIND $rows AS row
+MERGE (fs:ForwardSource {source_id: row.source_id, source_type: row.source_type})
+SET fs.name = row.forward_from_name,
+    fs.forward_date = row.forward_date,
+    fs.updated_at = datetime()
+WITH row, fs
+MATCH (p:Post {post_id: row.post_id})
+MERGE (p)-[r:FORWARDED_FROM]->(fs)
+SET r.forward_from_message_id = row.forward_from_message_id,
+    r.forward_date = row.forward_date,
+    r.updated_at = datetime()
+RETURN count(r) AS written
+"""
+
+# Исходный пост форварда связывается, только если он уже проиндексирован
+_FORWARD_ORIGINALS_BATCH_QUERY = """
+UNWIND $rows AS row
+MATCH (p:Post {post_id: row.post_id})
+MATCH (orig_p:Post)
+WHERE orig_p.channel_id = row.original_channel_id
+  AND orig_p.telegram_message_id = row.forward_from_message_id
+MERGE (p)-[r:FORWARDED_FROM_POST]->(orig_p)
+SET r.forward_date = row.forward_date,
+    r.updated_at = datetime()
+RETURN count(r) AS written
+"""
+
+# Поиск исходного поста по channel_id (UUID) или tg_channel_id; если не найден -
+# fallback по каналу самого поста-ответа (как в create_reply_relationship)
+_REPLIES_BATCH_QUERY = """
+UNWIND $rows AS row
+MATCH (p:Post {post_id: row.post_id})
+OPTIONAL MATCH (direct:Post)
+WHERE direct.telegram_message_id = row.message_id
+  AND (direct.channel_id = row.channel_id_str OR direct.tg_channel_id = row.chat_id_num)
+WITH p, row, collect(direct) AS direct_matches
+OPTIONAL MATCH (same:Post)
+WHERE size(direct_matches) = 0
+  AND same.telegram_message_id = row.message_id
+  AND same.channel_id = p.channel_id
+WITH p, row, direct_matches + collect(same) AS originals
+UNWIND originals AS orig_p
+MERGE (p)-[r:REPLIES_TO]->(orig_p)
+SET r.thread_id = row.thread_id,
+    r.updated_at = datetime()
+RETURN count(r) AS written
+"""
+
+_AUTHORS_BATCH_QUERY = """
+UNWIND $rows AS row
+MERGE (a:Author {author_id: row.author_id, author_type: row.author_type})
+SET a.name = coalesce(row.author_name, a.name),
+    a.updated_at = datetime()
+WITH row, a
+MATCH (p:Post {post_id: row.post_id})
+MERGE (a)-[r:AUTHOR_OF]->(p)
+SET r.updated_at = datetime()
+RETURN count(r) AS written
+"""
+
+
+def _peer_identity(peer_id: Optional[Dict[str, Any]]) -> Tuple[Optional[str], Optional[str]]:
+    """(id, type) из peer JSON (user_id/channel_id/chat_id)."""
+    if not peer_id:
+        return None, None
+    for key, peer_type in (('user_id', 'user'), ('channel_id', 'channel'), ('chat_id', 'chat')):
+        if key in peer_id:
+            return str(peer_id[key]), peer_type
+    return None, None
+
+
+def _tag_rows(tags: Optional[List[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Теги в формате UNWIND-строки и нормализованные темы (lowercase, длина > 2)."""
+    tag_list = []
+    topics = set()
+    for tag in tags or []:
+        tag_name = tag.get('name', '')
+        if not tag_name:
+            continue
+        tag_list.append({
+            'name': tag_name,
+            'category': tag.get('category', 'other'),
+            'confidence': tag.get('confidence', 0.0)
+        })
+        topic_name = str(tag_name).strip().lower()
+        if len(topic_name) > 2:
+            topics.add(topic_name)
+    return tag_list, sorted(topics)
+
+
+def _post_row(post: Dict[str, Any]) -> Dict[str, Any]:
+    enrichment_data = post.get('enrichment_data')
+    content = post.get('content')
+    tags, topics = _tag_rows(post.get('tags'))
+    return {
+        'post_id': post['post_id'],
+        # Neo4j не поддерживает null в ключевых свойствах для MERGE
+        'user_id': post.get('user_id') or 'system',
+        'tenant_id': post.get('tenant_id'),
+        'channel_id': post.get('channel_id'),
+        'expires_at': post.get('expires_at'),
+        'indexed_at': post.get('indexed_at') or datetime.now(timezone.utc).isoformat(),
+        'enrichment_data': json.dumps(enrichment_data, ensure_ascii=False, default=str) if enrichment_data else None,
+        'content': content[:2048] if content else None,
+        'telegram_message_id': post.get('telegram_message_id'),
+        'tg_channel_id': post.get('tg_channel_id'),
+        'posted_at': post.get('posted_at'),
+        'tags': tags,
+        'topics': topics
+    }
+
+
+def _forward_row(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    source_id, source_type = _peer_identity(record.get('forward_from_peer_id'))
+    if not source_id:
+        return None
+    chat_id = record.get('forward_from_chat_id')
+    return {
+        'post_id': str(record['post_id']),
+        'source_id': source_id,
+        'source_type': source_type,
+        'forward_from_name': record.get('forward_from_name'),
+        'forward_from_message_id': record.get('forward_from_message_id'),
+        'forward_date': record.get('forward_date'),
+        'original_channel_id': str(chat_id) if chat_id else None
+    }
+
+
+def _reply_row(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    message_id = record.get('reply_to_message_id')
+    if not message_id:
+        return None
+    chat_id = record.get('reply_to_chat_id')
+    return {
+        'post_id': str(record['post_id']),
+        'message_id': message_id,
+        'channel_id_str': str(chat_id) if chat_id else None,
+        'chat_id_num': chat_id,
+        'thread_id': record.get('thread_id')
+    }
+
+
+def _author_row(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    author_id, peer_type = _peer_identity(record.get('author_peer_id'))
+    if not author_id:
+        return None
+    return {
+        'post_id': str(record['post_id']),
+        'author_id': author_id,
+        'author_type': record.get('author_type') or peer_type,
+        'author_name': record.get('author_name')
+    }
+
 # ============================================================================
 # NEO4J CLIENT
 # ============================================================================
@@ -26,7 +249,7 @@ class Neo4jClient:
     
     Поддерживает:
     - Единый провайдер драйвера с проверкой event loop
-    - Health-пинг перед операциями
+    - Проверка живости соединений пулом драйвера (без пинга перед каждой операцией)
     - MERGE с параметрами для upsert
     - Сквозной TTL в properties
     - Метрики и мониторинг
@@ -49,6 +272,8 @@ class Neo4jClient:
         self._driver = None
         self._current_loop = None
         self._session_pool = None
+        self.liveness_check_timeout = float(os.getenv("NEO4J_LIVENESS_CHECK_SEC", "30"))
+        self._schema_ready = False
         
         logger.info("Neo4jClient initialized", uri=self.uri, username=self.username)
     
@@ -63,23 +288,43 @@ class Neo4jClient:
             
             if self._driver is None or self._current_loop != current_loop:
                 # Создание нового драйвера в текущем event loop
+                # Context7: здоровье соединений отслеживает сам драйвер - соединение, простоявшее
+                # в пуле дольше liveness_check_timeout, проверяется перед выдачей, битые заменяются.
+                # Отдельный RETURN 1 перед каждой записью больше не нужен.
                 self._driver = AsyncGraphDatabase.driver(
                     self.uri,
-                    auth=(self.username, self.password)
+                    auth=(self.username, self.password),
+                    liveness_check_timeout=self.liveness_check_timeout
                 )
                 self._current_loop = current_loop
                 
-                # Проверка подключения
-                await self._ping()
+                # Проверка подключения (один раз при создании драйвера)
+                await self._driver.verify_connectivity()
                 
                 logger.info("Neo4jClient connected successfully")
+                
+                await self.ensure_schema()
             
         except Exception as e:
             logger.error("Failed to connect to Neo4j", error=str(e))
             raise
     
+    async def ensure_schema(self) -> None:
+        """
+        Context7: [C7-ID: NEO4J-SCHEMA-001] Ограничения и индексы для MERGE/MATCH по ключам.
+        
+        Выполняется один раз на клиент при подключении; ошибки не прерывают старт.
+        """
+        if self._schema_ready or not self._driver or not schema_bootstrap_enabled():
+            return
+        try:
+            await ensure_graph_schema(self._driver)
+            self._schema_ready = True
+        except Exception as e:
+            logger.error("Neo4j schema bootstrap failed", error=str(e))
+    
     async def _ping(self):
-        """Health-пинг перед операциями."""
+        """Явный health-пинг (используется только health_check)."""
         try:
             async with self._driver.session() as session:
                 result = await session.run("RETURN 1 as ping")
@@ -116,9 +361,6 @@ class Neo4jClient:
                 logger.error("Neo4j driver not initialized")
                 return False
             
-            # Health-пинг перед операцией
-            await self._ping()
-            
             async with self._driver.session() as session:
                 # [C7-ID: WORKER-NEO4J-PROVIDER-001] - MERGE с параметрами (никогда f-strings)
                 # Context7: Сериализация enrichment_data в JSON для Neo4j
@@ -184,6 +426,120 @@ class Neo4jClient:
                         error=str(e))
             return False
     
+    async def create_post_nodes_batch(self, posts: List[Dict[str, Any]]) -> bool:
+        """
+        Context7: [C7-ID: indexing-batch-002] Батчевое создание узлов Post одним UNWIND.
+        
+        За одну транзакцию создаёт Post/User/Channel, связи TAGGED_AS с тегами, HAS_TOPIC
+        с темами и RELATED_TO между темами каждого поста (семантика как у create_post_node
+        + create_tag_relationships).
+        
+        Args:
+            posts: [{post_id, user_id, tenant_id, channel_id, expires_at, indexed_at,
+                     enrichment_data, content, telegram_message_id, tg_channel_id,
+                     posted_at, tags: [{name, category, confidence}]}, ...]
+        """
+        return await self.write_graph_batch(posts=posts)
+    
+    async def write_graph_batch(
+        self,
+        posts: Optional[List[Dict[str, Any]]] = None,
+        tags: Optional[List[Dict[str, Any]]] = None,
+        forwards: Optional[List[Dict[str, Any]]] = None,
+        replies: Optional[List[Dict[str, Any]]] = None,
+        authors: Optional[List[Dict[str, Any]]] = None
+    ) -> bool:
+        """
+        Context7: [C7-ID: graph-batch-write-001] Батчевая запись графа одной транзакцией.
+        
+        Каждый вид записей применяется одним параметризованным UNWIND $rows; все запросы
+        батча выполняются в одной write-транзакции (session.execute_write), поэтому батч
+        либо записан целиком, либо откатан. Семантика совпадает с create_post_node,
+        create_tag_relationships, create_forward_relationship, create_reply_relationship
+        и create_author_relationship.
+        
+        Args:
+            posts: Записи как в create_post_nodes_batch
+            tags: [{post_id, tags: [{name, category, confidence}]}] для существующих постов
+            forwards: [{post_id, forward_from_peer_id, forward_from_chat_id,
+                        forward_from_message_id, forward_date, forward_from_name}]
+            replies: [{post_id, reply_to_message_id, reply_to_chat_id, thread_id}]
+            authors: [{post_id, author_peer_id, author_name, author_type}]
+        
+        Returns:
+            True если транзакция закоммичена (записи без данных для связи пропускаются)
+        """
+        post_rows = [_post_row(post) for post in posts or []]
+        tag_rows = []
+        for record in tags or []:
+            tag_list, topics = _tag_rows(record.get('tags'))
+            if tag_list:
+                tag_rows.append({'post_id': record['post_id'], 'tags': tag_list, 'topics': topics})
+        forward_rows = [row for row in map(_forward_row, forwards or []) if row]
+        reply_rows = [row for row in map(_reply_row, replies or []) if row]
+        author_rows = [row for row in map(_author_row, authors or []) if row]
+        
+        # Context7: темы из одного поста считаются связанными (как в create_tag_relationships)
+        related_post_ids = [row['post_id'] for row in post_rows + tag_rows if len(row['topics']) > 1]
+        original_rows = [
+            row for row in forward_rows
+            if row['original_channel_id'] and row['forward_from_message_id']
+        ]
+        
+        statements = [
+            (kind, query, params)
+            for kind, query, params, present in (
+                ('posts', _POSTS_BATCH_QUERY, {'rows': post_rows}, post_rows),
+                ('tags', _TAGS_BATCH_QUERY, {'rows': tag_rows}, tag_rows),
+                ('related_topics', _RELATED_TOPICS_BATCH_QUERY, {'post_ids': related_post_ids}, related_post_ids),
+                ('forwards', _FORWARDS_BATCH_QUERY, {'rows': forward_rows}, forward_rows),
+                ('forward_originals', _FORWARD_ORIGINALS_BATCH_QUERY, {'rows': original_rows}, original_rows),
+                ('replies', _REPLIES_BATCH_QUERY, {'rows': reply_rows}, reply_rows),
+                ('authors', _AUTHORS_BATCH_QUERY, {'rows': author_rows}, author_rows),
+            )
+            if present
+        ]
+        if not statements:
+            return True
+        
+        try:
+            if not self._driver:
+                logger.error("Neo4j driver not initialized")
+                return False
+            
+            async def _write(tx):
+                written = {}
+                for kind, query, params in statements:
+                    result = await tx.run(query, **params)
+                    record = await result.single()
+                    written[kind] = record["written"] if record else 0
+                return written
+            
+            async with self._driver.session() as session:
+                written = await session.execute_write(_write)
+            
+            if post_rows and written.get('posts') != len(post_rows):
+                logger.error("Batch post nodes write mismatch", expected=len(post_rows), written=written.get('posts'))
+                return False
+            
+            logger.debug("Graph batch written",
+                        posts_count=len(post_rows),
+                        tags_count=len(tag_rows),
+                        forwards_count=len(forward_rows),
+                        replies_count=len(reply_rows),
+                        authors_count=len(author_rows),
+                        written=written)
+            return True
+            
+        except Exception as e:
+            logger.error("Error writing graph batch",
+                        posts_count=len(post_rows),
+                        forwards_count=len(forward_rows),
+                        replies_count=len(reply_rows),
+                        authors_count=len(author_rows),
+                        error=str(e))
+            return False
+    
     async def create_tag_relationships(
         self,
         post_id: str,
@@ -201,8 +557,6 @@ class Neo4jClient:
             if not self._driver or not tags:
                 return True
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 topic_names = []
                 
@@ -291,8 +645,6 @@ class Neo4jClient:
             if not self._driver:
                 return False
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 # [C7-ID: WORKER-NEO4J-PROVIDER-001] - DETACH DELETE с параметрами
                 query = """
@@ -340,8 +692,6 @@ class Neo4jClient:
             if not self._driver:
                 return False
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 # Создание узла ImageContent
                 query = """
@@ -399,8 +749,6 @@ class Neo4jClient:
             if not self._driver or not labels:
                 return True
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 for label in labels:
                     if not label or not str(label).strip():
@@ -455,8 +803,6 @@ class Neo4jClient:
             if not self._driver:
                 return False
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 query = """
                 MATCH (c:Channel {channel_id: $channel_id})
@@ -512,8 +858,6 @@ class Neo4jClient:
             if not self._driver:
                 return False
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 query = """
                 MATCH (alb:Album {album_id: $album_id})
@@ -683,8 +1027,6 @@ class Neo4jClient:
             if not self._driver:
                 return False
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 # Context7 P2: Создание узла ForwardSource для источника форварда
                 # Используем комбинацию peer_id + message_id как уникальный идентификатор
@@ -810,8 +1152,6 @@ class Neo4jClient:
             if not self._driver or not reply_to_message_id:
                 return False
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 # Context7 P2: Улучшенный поиск исходного поста
                 # Поддерживаем поиск по разным форматам channel_id:
@@ -923,8 +1263,6 @@ class Neo4jClient:
             if not self._driver:
                 return False
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 # Определяем author_id и author_type
                 author_id = None
@@ -1012,8 +1350,6 @@ class Neo4jClient:
             if not self._driver:
                 return False
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 # Используем url_hash или url в качестве уникального идентификатора
                 webpage_id = url_hash or url
@@ -1060,8 +1396,6 @@ class Neo4jClient:
             if not self._driver:
                 return 0
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 # Поиск и удаление висячих тегов
                 query = """
@@ -1095,8 +1429,6 @@ class Neo4jClient:
             if not self._driver:
                 return 0
             
-            await self._ping()
-            
             current_time = datetime.now(timezone.utc).isoformat()
             
             async with self._driver.session() as session:
@@ -1128,8 +1460,6 @@ class Neo4jClient:
             if not self._driver:
                 return {}
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 # Статистика узлов
                 stats_query = """
@@ -1169,8 +1499,6 @@ class Neo4jClient:
             if not self._driver:
                 return []
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 query = """
                 MATCH (c:Channel {channel_id: $channel_id})-[:HAS_ALBUM]->(alb:Album)
@@ -1216,8 +1544,6 @@ class Neo4jClient:
             if not self._driver or not tag_names:
                 return []
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 query = """
                 MATCH (t:Tag)
@@ -1263,8 +1589,6 @@ class Neo4jClient:
             if not self._driver:
                 return []
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 query = """
                 MATCH (alb:Album {album_id: $album_id})-[r:CONTAINS]->(p:Post)
@@ -1310,8 +1634,6 @@ class Neo4jClient:
             if not self._driver:
                 return {'connected': False}
             
-            await self._ping()
-            
             post_stats = await self.get_post_stats()
             
             return {
@@ -1358,8 +1680,6 @@ class Neo4jClient:
             if not self._driver:
                 return False
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 import json
                 metadata_json = json.dumps(persona_metadata, ensure_ascii=False, default=str) if persona_metadata else None
@@ -1432,8 +1752,6 @@ class Neo4jClient:
             if not self._driver:
                 return False
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 import json
                 metadata_json = json.dumps(dialogue_metadata, ensure_ascii=False, default=str) if dialogue_metadata else None
@@ -1506,8 +1824,6 @@ class Neo4jClient:
             if not self._driver:
                 return False
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 # Создаём связь между Post и Dialogue
                 query = """
@@ -1586,8 +1902,6 @@ class Neo4jClient:
             if not self._driver or not entities:
                 return True
             
-            await self._ping()
-            
             async with self._driver.session() as session:
                 # Context7: Батч-операция через UNWIND для производительности
                 query = """
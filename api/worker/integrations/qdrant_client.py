@@ -2,20 +2,53 @@
 Qdrant Client с поддержкой sweeper job для очистки expired векторов
 [C7-ID: WORKER-QDRANT-SWEEP-001]
 
-Поддерживает per-user коллекции и периодическую очистку по expires_at
+Поддерживает per-user коллекции и периодическую очистку по expires_at.
+
+Context7: [C7-ID: WORKER-QDRANT-BULK-001] все вызовы идут через AsyncQdrantClient (не блокируют
+event loop воркера), upsert_vector буферизуется и сбрасывается батчами по размеру/времени.
+upsert_vector возвращает управление только после того, как точка записана (wait=True),
+поэтому вызывающий код ACK'ает сообщение стрима только для durable точек.
 """
 
 import asyncio
 import logging
+import os
+import time
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Union
 import structlog
+from metrics_utils import Counter, Histogram
+from qdrant_client import AsyncQdrantClient
 from qdrant_client import QdrantClient as QdrantSDK
 from qdrant_client.http import models
 from qdrant_client.http.exceptions import UnexpectedResponse
 
 logger = structlog.get_logger()
 
+# ============================================================================
+# METRICS
+# ============================================================================
+
+qdrant_upsert_batch_size = Histogram(
+    'qdrant_upsert_batch_size',
+    'Points per Qdrant upsert flush',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+qdrant_upsert_flush_seconds = Histogram(
+    'qdrant_upsert_flush_seconds',
+    'Qdrant upsert flush latency',
+    ['status']
+)
+
+qdrant_upsert_points_total = Counter(
+    'qdrant_upsert_points_total',
+    'Points written to Qdrant by the upsert pipeline',
+    ['status']  # success, error
+)
+
+_PendingPoint = Tuple[models.PointStruct, asyncio.Future]
+
 # ============================================================================
 # QDRANT CLIENT
 # ============================================================================
@@ -31,10 +64,28 @@ class QdrantClient:
     - Метрики и мониторинг
     """
     
-    def __init__(self, url: str = "http://localhost:6333"):
+    def __init__(
+        self,
+        url: str = "http://localhost:6333",
+        upsert_batch_size: Optional[int] = None,
+        upsert_max_delay_ms: Optional[float] = None
+    ):
         self.url = url
+        # Context7: sync клиент сохранён для диагностических скриптов (diagnose_post.py)
         self.client: Optional[QdrantSDK] = None
+        self.async_client: Optional[AsyncQdrantClient] = None
         self._collections_cache: Dict[str, bool] = {}
+        self._collection_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Буфер upsert: точки копятся по коллекциям и сбрасываются по размеру или времени
+        self.upsert_batch_size = upsert_batch_size or int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "64"))
+        delay_ms = upsert_max_delay_ms if upsert_max_delay_ms is not None else float(
+            os.getenv("QDRANT_UPSERT_MAX_DELAY_MS", "50")
+        )
+        self.upsert_max_delay = max(0.0, delay_ms) / 1000.0
+        self._pending_points: Dict[str, List[_PendingPoint]] = {}
+        self._flush_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._flush_tasks: set = set()
         
         logger.info("QdrantClient initialized", url=url)
     
@@ -42,6 +93,7 @@ class QdrantClient:
         """Подключение к Qdrant."""
         try:
             self.client = QdrantSDK(url=self.url)
+            self.async_client = AsyncQdrantClient(url=self.url)
             
             # Проверка подключения
             await self._ping()
@@ -56,7 +108,7 @@ class QdrantClient:
         """Проверка подключения к Qdrant."""
         try:
             # Простой запрос для проверки подключения
-            collections = self.client.get_collections()
+            collections = await self.async_client.get_collections()
             logger.debug("Qdrant ping successful", collections_count=len(collections.collections))
         except Exception as e:
             logger.error("Qdrant ping failed", error=str(e))
@@ -71,42 +123,47 @@ class QdrantClient:
         - Embeddings (Giga-Embeddings-instruct): 2048 измерений
         Если не указана, используется значение из EMBEDDING_DIMENSION или 2560 по умолчанию
         """
-        import os
         if vector_size is None:
             vector_size = int(os.getenv("EMBEDDING_DIMENSION", os.getenv("EMBED_DIM", "2560")))
-        try:
+        # Context7: быстрый путь без await — коллекция уже проверена этим процессом
+        if collection_name in self._collections_cache:
+            return
+        
+        lock = self._collection_locks.setdefault(collection_name, asyncio.Lock())
+        async with lock:
             if collection_name in self._collections_cache:
                 return
-            
-            # Проверка существования коллекции
             try:
-                collection_info = self.client.get_collection(collection_name)
+                # Проверка существования коллекции
+                if await self.async_client.collection_exists(collection_name):
+                    self._collections_cache[collection_name] = True
+                    logger.debug("Collection already exists", collection=collection_name)
+                    return
+                
+                # Создание коллекции
+                try:
+                    await self.async_client.create_collection(
+                        collection_name=collection_name,
+                        vectors_config=models.VectorParams(
+                            size=vector_size,
+                            distance=models.Distance.COSINE
+                        )
+                    )
+                except UnexpectedResponse as e:
+                    # Коллекцию мог создать другой воркер между проверкой и созданием
+                    if e.status_code != 409:
+                        raise
+                
                 self._collections_cache[collection_name] = True
-                logger.debug("Collection already exists", collection=collection_name)
-                return
-            except UnexpectedResponse:
-                # Коллекция не существует, создаем
-                pass
-            
-            # Создание коллекции
-            self.client.create_collection(
-                collection_name=collection_name,
-                vectors_config=models.VectorParams(
-                    size=vector_size,
-                    distance=models.Distance.COSINE
-                )
-            )
-            
-            self._collections_cache[collection_name] = True
-            logger.info("Collection created", 
-                       collection=collection_name,
-                       vector_size=vector_size)
-            
-        except Exception as e:
-            logger.error("Error ensuring collection", 
-                        collection=collection_name,
-                        error=str(e))
-            raise
+                logger.info("Collection created", 
+                           collection=collection_name,
+                           vector_size=vector_size)
+                
+            except Exception as e:
+                logger.error("Error ensuring collection", 
+                            collection=collection_name,
+                            error=str(e))
+                raise
     
     async def upsert_vector(
         self, 
@@ -115,22 +172,21 @@ class QdrantClient:
         vector: List[float], 
         payload: Dict[str, Any]
     ) -> str:
-        """Добавление/обновление вектора в коллекции."""
+        """
+        Добавление/обновление вектора в коллекции.
+        
+        Context7: точка попадает в буфер и записывается батчем вместе с конкурентными
+        upsert'ами; метод возвращается после durable записи или пробрасывает ошибку этой точки.
+        """
         try:
-            # Обеспечение существования коллекции
+            # Обеспечение существования коллекции (кэшировано)
             await self.ensure_collection(collection_name, len(vector))
             
-            # Upsert вектора
-            self.client.upsert(
-                collection_name=collection_name,
-                points=[
-                    models.PointStruct(
-                        id=vector_id,
-                        vector=vector,
-                        payload=payload
-                    )
-                ]
-            )
+            point = models.PointStruct(id=vector_id, vector=vector, payload=payload)
+            if self.upsert_batch_size <= 1:
+                await self._upsert_points(collection_name, [point])
+            else:
+                await self._enqueue_point(collection_name, point)
             
             logger.debug("Vector upserted successfully",
                         collection=collection_name,
@@ -145,10 +201,137 @@ class QdrantClient:
                         error=str(e))
             raise
     
+    async def upsert_vectors(
+        self,
+        collection_name: str,
+        points: List[Dict[str, Any]]
+    ) -> List[Union[str, BaseException]]:
+        """
+        Bulk upsert без буфера: [{"id", "vector", "payload"}, ...].
+        
+        Returns:
+            Для каждой точки — её id при успехе или исключение (per-point acknowledgement).
+        """
+        if not points:
+            return []
+        await self.ensure_collection(collection_name, len(points[0]["vector"]))
+        structs = [
+            models.PointStruct(id=p["id"], vector=p["vector"], payload=p.get("payload") or {})
+            for p in points
+        ]
+        results: List[Union[str, BaseException]] = []
+        for offset in range(0, len(structs), self.upsert_batch_size):
+            chunk = structs[offset:offset + self.upsert_batch_size]
+            outcomes = await self._upsert_with_isolation(collection_name, chunk)
+            results.extend(
+                point.id if outcome is None else outcome
+                for point, outcome in zip(chunk, outcomes)
+            )
+        return results
+    
+    async def flush_upserts(self, collection_name: Optional[str] = None):
+        """Принудительный сброс буфера (всех коллекций или одной) и ожидание записи."""
+        names = [collection_name] if collection_name else list(self._pending_points)
+        for name in names:
+            self._schedule_flush(name)
+        if self._flush_tasks:
+            await asyncio.gather(*list(self._flush_tasks), return_exceptions=True)
+    
+    async def close(self):
+        """Сброс буфера и закрытие клиентов."""
+        await self.flush_upserts()
+        if self.async_client is not None:
+            await self.async_client.close()
+        if self.client is not None:
+            self.client.close()
+    
+    async def _enqueue_point(self, collection_name: str, point: models.PointStruct):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending_points.setdefault(collection_name, [])
+        pending.append((point, future))
+        
+        if len(pending) >= self.upsert_batch_size:
+            self._schedule_flush(collection_name)
+        elif collection_name not in self._flush_timers:
+            self._flush_timers[collection_name] = loop.call_later(
+                self.upsert_max_delay, self._schedule_flush, collection_name
+            )
+        
+        await future
+    
+    def _schedule_flush(self, collection_name: str):
+        timer = self._flush_timers.pop(collection_name, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending_points.pop(collection_name, None)
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._flush_batch(collection_name, batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _flush_batch(self, collection_name: str, batch: List[_PendingPoint]):
+        points = [point for point, _ in batch]
+        outcomes = await self._upsert_with_isolation(collection_name, points)
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if outcome is None:
+                future.set_result(None)
+            else:
+                future.set_exception(outcome)
+    
+    async def _upsert_with_isolation(
+        self,
+        collection_name: str,
+        points: List[models.PointStruct]
+    ) -> List[Optional[BaseException]]:
+        """
+        Upsert батча; при ошибке батча точки переписываются по одной,
+        чтобы ошибка досталась только «плохим» точкам. None — точка durable.
+        """
+        try:
+            await self._upsert_points(collection_name, points)
+            return [None] * len(points)
+        except Exception as e:
+            if len(points) == 1:
+                return [e]
+            logger.warning("Qdrant batch upsert failed, retrying points individually",
+                          collection=collection_name,
+                          batch_size=len(points),
+                          error=str(e))
+        
+        async def _single(point: models.PointStruct) -> Optional[BaseException]:
+            try:
+                await self._upsert_points(collection_name, [point])
+                return None
+            except Exception as e:
+                return e
+        
+        return list(await asyncio.gather(*(_single(point) for point in points)))
+    
+    async def _upsert_points(self, collection_name: str, points: List[models.PointStruct]):
+        start_time = time.perf_counter()
+        try:
+            # wait=True: ответ приходит после применения операции — точка durable
+            await self.async_client.upsert(
+                collection_name=collection_name,
+                points=points,
+                wait=True
+            )
+        except Exception:
+            qdrant_upsert_flush_seconds.labels(status='error').observe(time.perf_counter() - start_time)
+            qdrant_upsert_points_total.labels(status='error').inc(len(points))
+            raise
+        qdrant_upsert_flush_seconds.labels(status='success').observe(time.perf_counter() - start_time)
+        qdrant_upsert_batch_size.observe(len(points))
+        qdrant_upsert_points_total.labels(status='success').inc(len(points))
+    
     async def delete_vector(self, collection_name: str, vector_id: str) -> bool:
         """Удаление вектора из коллекции."""
         try:
-            self.client.delete(
+            await self.async_client.delete(
                 collection_name=collection_name,
                 points_selector=models.PointIdsList(points=[vector_id])
             )
@@ -166,6 +349,42 @@ class QdrantClient:
                         error=str(e))
             return False
     
+    async def retrieve_vectors(
+        self,
+        collection_name: str,
+        vector_ids: List[str]
+    ) -> Dict[str, List[float]]:
+        """
+        Пакетное чтение сохранённых векторов по id (один retrieve на коллекцию).
+        
+        Returns:
+            vector_id -> вектор; отсутствующие точки и ошибки Qdrant дают пустой результат
+        """
+        if not vector_ids:
+            return {}
+        try:
+            points = await self.async_client.retrieve(
+                collection_name=collection_name,
+                ids=list(vector_ids),
+                with_payload=False,
+                with_vectors=True
+            )
+        except Exception as e:
+            logger.debug("Error retrieving vectors",
+                        collection=collection_name,
+                        error=str(e))
+            return {}
+        
+        vectors: Dict[str, List[float]] = {}
+        for point in points:
+            vector = point.vector
+            if isinstance(vector, dict):
+                # Именованные векторы: берём единственный/первый
+                vector = next(iter(vector.values()), None)
+            if vector:
+                vectors[str(point.id)] = list(vector)
+        return vectors
+    
     async def search_vectors(
         self, 
         collection_name: str, 
@@ -238,7 +457,7 @@ class QdrantClient:
             search_filter = models.Filter(must=must_conditions) if must_conditions else None
             
             # Поиск
-            search_results = self.client.search(
+            search_results = await self.async_client.search(
                 collection_name=collection_name,
                 query_vector=query_vector,
                 query_filter=search_filter,
@@ -290,7 +509,7 @@ class QdrantClient:
             offset = None
             
             while True:
-                scroll_result = self.client.scroll(
+                scroll_result = await self.async_client.scroll(
                     collection_name=collection_name,
                     scroll_filter=expired_filter,
                     limit=100,
@@ -312,7 +531,7 @@ class QdrantClient:
                 return 0
             
             # Удаление expired векторов
-            self.client.delete(
+            await self.async_client.delete(
                 collection_name=collection_name,
                 points_selector=models.PointIdsList(points=expired_points)
             )
@@ -333,7 +552,7 @@ class QdrantClient:
         """Sweep всех коллекций пользователей."""
         try:
             # Получение списка коллекций
-            collections = self.client.get_collections()
+            collections = await self.async_client.get_collections()
             # Context7: Поддержка нового формата t{tenant_id}_posts и старого user_{tenant_id}_posts
             user_collections = [
                 col.name for col in collections.collections 
@@ -362,7 +581,7 @@ class QdrantClient:
     async def get_collection_stats(self, collection_name: str) -> Dict[str, Any]:
         """Получение статистики коллекции."""
         try:
-            collection_info = self.client.get_collection(collection_name)
+            collection_info = await self.async_client.get_collection(collection_name)
             
             return {
                 'name': collection_name,
@@ -382,7 +601,7 @@ class QdrantClient:
     async def get_all_collections_stats(self) -> Dict[str, Dict[str, Any]]:
         """Получение статистики всех коллекций."""
         try:
-            collections = self.client.get_collections()
+            collections = await self.async_client.get_collections()
             stats = {}
             
             for collection in collections.collections:
@@ -410,7 +629,7 @@ class QdrantClient:
     async def get_stats(self) -> Dict[str, Any]:
         """Получение общей статистики Qdrant."""
         try:
-            collections = self.client.get_collections()
+            collections = await self.async_client.get_collections()
             # Context7: Поддержка нового формата t{tenant_id}_posts и старого user_{tenant_id}_posts
             user_collections = [
                 col.name for col in collections.collections 
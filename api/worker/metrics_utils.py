@@ -0,0 +1,28 @@
+"""
+Регистрация Prometheus метрик без дублей.
+
+Context7: модули worker импортируются и от корня worker (ai_providers.*), и как пакет
+(worker.ai_providers.*); повторная регистрация метрики с тем же именем в REGISTRY
+падает с DuplicatedTimeseries - в этом случае возвращается уже зарегистрированная.
+"""
+
+from prometheus_client import Counter as PromCounter, Gauge as PromGauge, Histogram as PromHistogram, REGISTRY
+
+
+def get_or_create_metric(factory, name, documentation, *args, **kwargs):
+    collectors = getattr(REGISTRY, "_names_to_collectors", None)
+    if collectors and name in collectors:
+        return collectors[name]
+    return factory(name, documentation, *args, **kwargs)
+
+
+def Counter(name, documentation, *args, **kwargs):
+    return get_or_create_metric(PromCounter, name, documentation, *args, **kwargs)
+
+
+def Gauge(name, documentation, *args, **kwargs):
+    return get_or_create_metric(PromGauge, name, documentation, *args, **kwargs)
+
+
+def Histogram(name, documentation, *args, **kwargs):
+    return get_or_create_metric(PromHistogram, name, documentation, *args, **kwargs)
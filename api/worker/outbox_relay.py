@@ -3,6 +3,12 @@ Outbox Relay для надёжной доставки событий из БД 
 [C7-ID: WORKER-OUTBOX-002]
 
 Поддерживает DLQ, trace_id, идемпотентность и метрики
+
+Context7: батч захватывается SELECT ... FOR UPDATE SKIP LOCKED внутри транзакции,
+публикуется одним pipeline XADD и отмечается одним UPDATE ... WHERE id = ANY(...).
+Реплики relay захватывают непересекающиеся батчи, поэтому их можно запускать N штук.
+Доставка at-least-once: при падении между XADD и COMMIT батч будет опубликован повторно
+(консьюмеры идемпотентны по idempotency_key).
 """
 
 import asyncio
@@ -11,7 +17,7 @@ import logging
 import time
 import uuid
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 import redis.asyncio as redis
 from prometheus_client import Counter, Histogram, Gauge
@@ -62,6 +68,11 @@ outbox_processing_duration = Histogram(
     ['event_type']
 )
 
+outbox_relay_lag_seconds = Gauge(
+    'outbox_relay_lag_seconds',
+    'Age of the oldest unprocessed outbox event (now - created_at)'
+)
+
 # ============================================================================
 # OUTBOX RELAY
 # ============================================================================
@@ -103,7 +114,8 @@ class OutboxRelay:
             'processed': 0,
             'failed': 0,
             'dlq_moved': 0,
-            'last_processed_at': None
+            'last_processed_at': None,
+            'lag_seconds': None
         }
         
         logger.info("OutboxRelay initialized", 
@@ -128,8 +140,11 @@ class OutboxRelay:
             # Основной цикл обработки
             while True:
                 try:
-                    await self._process_batch()
-                    await asyncio.sleep(self.processing_interval)
+                    claimed = await self._process_batch()
+                    await self._update_lag_metric()
+                    # Полный батч - в очереди есть ещё события, разбираем без паузы
+                    if claimed < self.batch_size:
+                        await asyncio.sleep(self.processing_interval)
                 except Exception as e:
                     logger.error("Error in outbox processing loop", error=str(e))
                     await asyncio.sleep(5)  # Пауза при ошибке
@@ -138,65 +153,53 @@ class OutboxRelay:
             logger.error("Failed to start OutboxRelay", error=str(e))
             raise
     
-    async def _process_batch(self):
-        """Обработка батча событий из outbox."""
+    async def _process_batch(self) -> int:
+        """
+        Обработка батча событий из outbox.
+        
+        Returns:
+            Количество захваченных событий
+        """
         start_time = time.time()
+        published: List[Dict[str, Any]] = []
+        failures: List[Tuple[Dict[str, Any], str]] = []
         
         try:
-            # Получение необработанных событий
-            events = await self._get_unprocessed_events()
-            
-            if not events:
-                logger.debug("No unprocessed events found")
-                return
-            
-            logger.info("Processing outbox batch", 
-                       batch_size=len(events),
-                       event_types=[e['event_type'] for e in events])
-            
-            # Обработка каждого события
-            processed_count = 0
-            failed_count = 0
-            
-            for event in events:
-                try:
-                    success = await self._process_single_event(event)
-                    if success:
-                        processed_count += 1
+            # Context7: строки батча заблокированы до COMMIT - другие реплики их пропускают
+            async with self.db_connection.transaction():
+                events = await self._claim_events()
+                
+                if not events:
+                    logger.debug("No unprocessed events found")
+                    return 0
+                
+                logger.info("Processing outbox batch", 
+                           batch_size=len(events),
+                           event_types=sorted({e['event_type'] for e in events}))
+                
+                to_publish: List[Tuple[Dict[str, Any], Any]] = []
+                for event in events:
+                    validated_event = self._validate_event(event)
+                    if validated_event is None:
+                        failures.append((event, "validation_failed"))
                     else:
-                        failed_count += 1
-                        
-                except Exception as e:
-                    logger.error("Error processing event", 
-                               event_id=event['id'],
-                               error=str(e))
-                    failed_count += 1
-            
-            # Обновление статистики
-            self.stats['processed'] += processed_count
-            self.stats['failed'] += failed_count
-            self.stats['last_processed_at'] = datetime.now(timezone.utc)
-            
-            # Метрики
-            outbox_processed_total.labels(
-                event_type='batch',
-                status='success'
-            ).inc(processed_count)
-            
-            outbox_failed_total.labels(
-                event_type='batch',
-                reason='processing_error'
-            ).inc(failed_count)
-            
-            outbox_batch_size.observe(len(events))
-            outbox_processing_duration.labels(
-                event_type='batch'
-            ).observe(time.time() - start_time)
-            
-            logger.info("Outbox batch processed",
-                       processed=processed_count,
-                       failed=failed_count,
-                       duration_ms=int((time.time() - start_time) * 1000))
+                        to_publish.append((event, validated_event))
+                
+                # Один pipeline XADD на весь батч
+                results = await self.event_publisher.publish_pipelined([
+                    (self._get_stream_name(event['event_type']), validated_event)
+                    for event, validated_event in to_publish
+                ]) if to_publish else []
+                
+                for (event, _), result in zip(to_publish, results):
+                    if isinstance(result, BaseException):
+                        failures.append((event, str(result)))
+                    else:
+                        published.append(event)
+                
+                await self._mark_batch_processed([event['id'] for event in published])
+                if failures:
+                    await self._record_failures(failures)
             
         except Exception as e:
             logger.error("Error in outbox batch processing", error=str(e))
@@ -204,9 +207,47 @@ class OutboxRelay:
                 event_type='batch',
                 reason='batch_error'
             ).inc()
+            return 0
+        
+        # Обновление статистики
+        self.stats['processed'] += len(published)
+        self.stats['failed'] += len(failures)
+        self.stats['last_processed_at'] = datetime.now(timezone.utc)
+        
+        # Метрики
+        now = datetime.now(timezone.utc)
+        for event in published:
+            outbox_processed_total.labels(
+                event_type=event['event_type'],
+                status='success'
+            ).inc()
+            outbox_lag_seconds.labels(event_type=event['event_type']).observe(
+                (now - event['created_at']).total_seconds()
+            )
+        for event, reason in failures:
+            outbox_failed_total.labels(
+                event_type=event['event_type'],
+                reason='validation_failed' if reason == 'validation_failed' else 'publish_error'
+            ).inc()
+        
+        outbox_batch_size.observe(len(events))
+        outbox_processing_duration.labels(
+            event_type='batch'
+        ).observe(time.time() - start_time)
+        
+        logger.info("Outbox batch processed",
+                   processed=len(published),
+                   failed=len(failures),
+                   duration_ms=int((time.time() - start_time) * 1000))
+        return len(events)
     
-    async def _get_unprocessed_events(self) -> List[Dict[str, Any]]:
-        """Получение необработанных событий из БД."""
+    async def _claim_events(self) -> List[Dict[str, Any]]:
+        """
+        Захват батча необработанных событий (вызывается внутри транзакции).
+        
+        Context7: FOR UPDATE SKIP LOCKED - строки, захваченные другой репликой, пропускаются
+        без ожидания; порядок по created_at идёт по частичному индексу idx_outbox_unprocessed.
+        """
         query = """
         SELECT id, event_type, payload, schema_version, trace_id, 
                aggregate_id, content_hash, created_at, retry_count, last_error
@@ -215,6 +256,7 @@ class OutboxRelay:
         AND (retry_count < %s OR retry_count IS NULL)
         ORDER BY created_at
         LIMIT %s
+        FOR UPDATE SKIP LOCKED
         """
         
         async with self.db_connection.cursor() as cursor:
@@ -238,72 +280,28 @@ class OutboxRelay:
             
             return events
     
-    async def _process_single_event(self, event: Dict[str, Any]) -> bool:
-        """Обработка одного события."""
-        event_id = event['id']
-        event_type = event['event_type']
-        
+    def _validate_event(self, event: Dict[str, Any]) -> Optional[Any]:
+        """Валидация события через Schema Registry (None - событие невалидно)."""
         try:
-            # Валидация события через Schema Registry
             validated_event = validate_event_data(
                 event['payload'],
-                event_type,
+                event['event_type'],
                 event['schema_version']
             )
-            
-            if not validated_event:
-                logger.error("Event validation failed", 
-                           event_id=event_id,
-                           event_type=event_type)
-                await self._increment_retry_count(event_id, "validation_failed")
-                return False
-            
-            # Публикация в Redis Streams
-            stream_name = self._get_stream_name(event_type)
-            message_id = await self.event_publisher.publish_event(
-                stream_name, 
-                validated_event
-            )
-            
-            # Отметка как обработанное (идемпотентно)
-            await self._mark_as_processed(event_id, message_id)
-            
-            # Метрики
-            outbox_processed_total.labels(
-                event_type=event_type,
-                status='success'
-            ).inc()
-            
-            # Лаг-метрика
-            lag_seconds = (datetime.now(timezone.utc) - event['created_at']).total_seconds()
-            outbox_lag_seconds.labels(event_type=event_type).observe(lag_seconds)
-            
-            logger.debug("Event processed successfully",
-                        event_id=event_id,
-                        event_type=event_type,
-                        message_id=message_id,
-                        lag_seconds=lag_seconds)
-            
-            return True
-            
         except Exception as e:
-            logger.error("Error processing event",
-                        event_id=event_id,
-                        event_type=event_type,
+            logger.error("Event validation error",
+                        event_id=event['id'],
+                        event_type=event['event_type'],
                         error=str(e))
-            
-            # Увеличение счетчика попыток
-            await self._increment_retry_count(event_id, str(e))
-            
-            # Метрики
-            outbox_failed_total.labels(
-                event_type=event_type,
-                reason='processing_error'
-            ).inc()
-            
-            return False
+            return None
+        
+        if not validated_event:
+            logger.error("Event validation failed", 
+                       event_id=event['id'],
+                       event_type=event['event_type'])
+        return validated_event
     
-    async def _get_stream_name(self, event_type: str) -> str:
+    def _get_stream_name(self, event_type: str) -> str:
         """Получение имени стрима для типа события."""
         # Маппинг типов событий на стримы
         stream_mapping = {
@@ -317,76 +315,97 @@ class OutboxRelay:
         
         return stream_mapping.get(event_type, event_type)
     
-    async def _mark_as_processed(self, event_id: int, message_id: str):
-        """Отметка события как обработанного (идемпотентно)."""
+    async def _mark_batch_processed(self, event_ids: List[int]):
+        """Отметка батча как обработанного одним UPDATE (идемпотентно)."""
+        if not event_ids:
+            return
         query = """
         UPDATE outbox_events 
         SET processed_at = NOW()
-        WHERE id = %s AND processed_at IS NULL
+        WHERE id = ANY(%s) AND processed_at IS NULL
         """
         
         async with self.db_connection.cursor() as cursor:
-            await cursor.execute(query, (event_id,))
-            if cursor.rowcount == 0:
-                logger.warning("Event already processed or not found", event_id=event_id)
+            await cursor.execute(query, (event_ids,))
+            if cursor.rowcount != len(event_ids):
+                logger.warning("Some events already processed or not found",
+                             expected=len(event_ids),
+                             updated=cursor.rowcount)
     
-    async def _increment_retry_count(self, event_id: int, error_message: str):
-        """Увеличение счетчика попыток и проверка на DLQ."""
+    async def _record_failures(self, failures: List[Tuple[Dict[str, Any], str]]):
+        """
+        Увеличение счетчиков попыток батча одним UPDATE и перенос исчерпавших в DLQ.
+        """
         query = """
-        UPDATE outbox_events 
-        SET retry_count = COALESCE(retry_count, 0) + 1,
-            last_error = %s
-        WHERE id = %s
-        RETURNING retry_count
+        UPDATE outbox_events o
+        SET retry_count = COALESCE(o.retry_count, 0) + 1,
+            last_error = f.error
+        FROM unnest(%s::bigint[], %s::text[]) AS f(id, error)
+        WHERE o.id = f.id
+        RETURNING o.id, o.retry_count
         """
         
+        event_ids = [event['id'] for event, _ in failures]
+        errors = [error for _, error in failures]
         async with self.db_connection.cursor() as cursor:
-            await cursor.execute(query, (error_message, event_id))
-            result = await cursor.fetchone()
-            
-            if result and result[0] >= self.max_retries:
-                # Перемещение в DLQ
-                await self._move_to_dlq(event_id)
+            await cursor.execute(query, (event_ids, errors))
+            rows = await cursor.fetchall()
+        
+        exhausted = [row[0] for row in rows if row[1] >= self.max_retries]
+        if exhausted:
+            await self._move_to_dlq(exhausted)
     
-    async def _move_to_dlq(self, event_id: int):
-        """Перемещение события в Dead Letter Queue."""
-        # Получение события
-        select_query = """
-        SELECT event_type, payload, retry_count, last_error
-        FROM outbox_events 
-        WHERE id = %s
+    async def _move_to_dlq(self, event_ids: List[int]):
         """
+        Перемещение событий в Dead Letter Queue.
         
-        # Вставка в DLQ
+        Строка outbox остаётся (на неё ссылается outbox_events_dlq.original_id)
+        и помечается обработанной, чтобы больше не захватываться.
+        """
         insert_query = """
         INSERT INTO outbox_events_dlq (original_id, event_type, payload, retry_count, last_error)
-        VALUES (%s, %s, %s, %s, %s)
+        SELECT id, event_type, payload, retry_count, last_error
+        FROM outbox_events
+        WHERE id = ANY(%s)
+        RETURNING original_id, event_type, retry_count
         """
         
         async with self.db_connection.cursor() as cursor:
-            await cursor.execute(select_query, (event_id,))
-            event_data = await cursor.fetchone()
+            await cursor.execute(insert_query, (event_ids,))
+            moved = await cursor.fetchall()
+            await cursor.execute(
+                "UPDATE outbox_events SET processed_at = NOW() WHERE id = ANY(%s)",
+                (event_ids,)
+            )
+        
+        for original_id, event_type, retry_count in moved:
+            logger.warning("Event moved to DLQ", 
+                         event_id=original_id,
+                         event_type=event_type,
+                         retry_count=retry_count)
             
-            if event_data:
-                await cursor.execute(insert_query, (
-                    event_id,
-                    event_data[0],  # event_type
-                    event_data[1],  # payload
-                    event_data[2],  # retry_count
-                    event_data[3]   # last_error
-                ))
-                
-                # Удаление из основной таблицы
-                await cursor.execute("DELETE FROM outbox_events WHERE id = %s", (event_id,))
-                
-                logger.warning("Event moved to DLQ", 
-                             event_id=event_id,
-                             event_type=event_data[0],
-                             retry_count=event_data[2])
-                
-                # Метрики
-                outbox_dlq_total.labels(event_type=event_data[0]).inc()
-                self.stats['dlq_moved'] += 1
+            # Метрики
+            outbox_dlq_total.labels(event_type=event_type).inc()
+            self.stats['dlq_moved'] += 1
+    
+    async def _update_lag_metric(self):
+        """Лаг relay: возраст самого старого необработанного события."""
+        query = """
+        SELECT EXTRACT(EPOCH FROM (NOW() - MIN(created_at)))
+        FROM outbox_events
+        WHERE processed_at IS NULL
+        AND (retry_count < %s OR retry_count IS NULL)
+        """
+        try:
+            async with self.db_connection.transaction():
+                async with self.db_connection.cursor() as cursor:
+                    await cursor.execute(query, (self.max_retries,))
+                    row = await cursor.fetchone()
+            lag = float(row[0]) if row and row[0] is not None else 0.0
+            outbox_relay_lag_seconds.set(lag)
+            self.stats['lag_seconds'] = lag
+        except Exception as e:
+            logger.debug("Failed to update outbox lag metric", error=str(e))
     
     async def get_stats(self) -> Dict[str, Any]:
         """Получение статистики outbox relay."""
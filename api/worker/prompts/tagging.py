@@ -18,3 +18,24 @@ STRICT_TAGGING_PROMPT = """Найди 3-5 ключевых слов или фр
 Текст:
 {text}
 """
+
+# Context7: мультиэлементный промпт для микробатчинга — несколько постов в одном запросе,
+# ответ раскладывается обратно по id элементов
+BATCH_TAGGING_PROMPT = """Для каждого текста ниже найди 3-5 ключевых слов или фраз, которые лучше всего описывают его содержание.
+
+Правила:
+- Используй слова и фразы, которые есть в соответствующем тексте
+- Можно использовать отдельные слова или короткие фразы (2-3 слова)
+- Избегай общих категорий типа "экономика", "технологии"
+- Формат ответа: только JSON-объект, где ключ — id текста, значение — JSON-массив строк
+- Без markdown, без комментариев; для каждого id должен быть ключ
+- Пример: {{"1": [\"Python\", \"релиз\"], \"2\": []}}
+- Если подходящих тегов для текста нет — верни для его id пустой массив []
+
+Тексты:
+{items}
+"""
+
+BATCH_TAGGING_ITEM = """[id={item_id}]
+{text}
+"""
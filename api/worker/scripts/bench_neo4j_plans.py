@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Проверка планов горячих Cypher-запросов на регрессию до полного перебора узлов.
+[C7-ID: NEO4J-SCHEMA-002]
+
+- применяет схему (shared.graph.ensure_graph_schema) и ждёт, пока индексы станут ONLINE;
+- для каждого запроса выполняет EXPLAIN (или PROFILE с --profile на засеянных данных);
+- завершается с кодом 1, если в плане есть NodeByLabelScan/AllNodesScan.
+
+По умолчанию работает с локальным Neo4j (bolt://localhost:7687); --start-container поднимает
+одноразовый контейнер neo4j:5 через docker и останавливает его после прогона.
+
+Usage:
+  python api/worker/scripts/bench_neo4j_plans.py --start-container
+  python api/worker/scripts/bench_neo4j_plans.py --uri bolt://localhost:7687 --password secret --profile
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+WORKER_DIR = Path(__file__).resolve().parents[1]
+if str(WORKER_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKER_DIR))
+
+from neo4j import AsyncGraphDatabase  # noqa: E402
+
+from integrations import neo4j_client as client_queries  # noqa: E402
+from shared.graph import ensure_graph_schema, find_scans  # noqa: E402
+
+CONTAINER_NAME = "neo4j-plan-bench"
+CONTAINER_PASSWORD = "bench-password"
+
+POST_ROW = {
+    "post_id": "bench-post-1", "user_id": "bench-user", "tenant_id": "bench-tenant",
+    "channel_id": "bench-channel", "expires_at": "2099-01-01T00:00:00+00:00",
+    "indexed_at": "2025-01-01T00:00:00+00:00", "enrichment_data": None, "content": "bench",
+    "telegram_message_id": 1, "tg_channel_id": 100, "posted_at": None,
+    "tags": [{"name": "bench", "category": "other", "confidence": 1.0}], "topics": ["bench"],
+}
+
+# (name, query, params) - запросы записи графа worker и чтения API по ключам
+HOT_QUERIES: List[Tuple[str, str, Dict[str, Any]]] = [
+    ("posts_batch", client_queries._POSTS_BATCH_QUERY, {"rows": [POST_ROW]}),
+    ("tags_batch", client_queries._TAGS_BATCH_QUERY, {"rows": [POST_ROW]}),
+    ("related_topics_batch", client_queries._RELATED_TOPICS_BATCH_QUERY, {"post_ids": ["bench-post-1"]}),
+    ("forwards_batch", client_queries._FORWARDS_BATCH_QUERY, {"rows": [{
+        "post_id": "bench-post-1", "source_id": "42", "source_type": "channel",
+        "forward_from_name": None, "forward_from_message_id": 1, "forward_date": None,
+        "original_channel_id": "bench-channel",
+    }]}),
+    ("forward_originals_batch", client_queries._FORWARD_ORIGINALS_BATCH_QUERY, {"rows": [{
+        "post_id": "bench-post-1", "original_channel_id": "bench-channel",
+        "forward_from_message_id": 1, "forward_date": None,
+    }]}),
+    ("replies_batch", client_queries._REPLIES_BATCH_QUERY, {"rows": [{
+        "post_id": "bench-post-1", "message_id": 1, "channel_id_str": "bench-channel",
+        "chat_id_num": 100, "thread_id": None,
+    }]}),
+    ("authors_batch", client_queries._AUTHORS_BATCH_QUERY, {"rows": [{
+        "post_id": "bench-post-1", "author_id": "7", "author_type": "user", "author_name": None,
+    }]}),
+    ("cleanup_expired_posts", """
+        MATCH (p:Post)
+        WHERE p.expires_at < $current_time
+        RETURN count(p) AS expired
+    """, {"current_time": "2000-01-01T00:00:00+00:00"}),
+    ("user_interests", """
+        MATCH (u:User {user_id: $user_id})-[r:INTERESTED_IN]->(t:Topic)
+        RETURN t.name AS topic, r.weight AS weight
+        ORDER BY r.weight DESC
+        LIMIT 20
+    """, {"user_id": "bench-user"}),
+    ("update_user_interest", """
+        MERGE (u:User {user_id: $user_id})
+        MERGE (t:Topic {name: $topic})
+        MERGE (u)-[r:INTERESTED_IN]->(t)
+        SET r.weight = $weight
+    """, {"user_id": "bench-user", "topic": "bench", "weight": 0.5}),
+    ("topic_posts", """
+        MATCH (t:Topic {name: $topic})<-[:HAS_TOPIC]-(p:Post)
+        WHERE p.tenant_id = $tenant_id
+        RETURN p.post_id AS post_id
+        LIMIT 10
+    """, {"topic": "bench", "tenant_id": "bench-tenant"}),
+]
+
+
+def start_container(port: int) -> None:
+    subprocess.run(["docker", "rm", "-f", CONTAINER_NAME], capture_output=True)
+    subprocess.run([
+        "docker", "run", "-d", "--rm", "--name", CONTAINER_NAME,
+        "-p", f"{port}:7687", "-e", f"NEO4J_AUTH=neo4j/{CONTAINER_PASSWORD}", "neo4j:5",
+    ], check=True, capture_output=True)
+
+
+def stop_container() -> None:
+    subprocess.run(["docker", "rm", "-f", CONTAINER_NAME], capture_output=True)
+
+
+async def wait_for_neo4j(driver, timeout_sec: float) -> None:
+    deadline = time.monotonic() + timeout_sec
+    while True:
+        try:
+            await driver.verify_connectivity()
+            return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(1)
+
+
+async def check_plans(driver, profile: bool) -> Dict[str, List[str]]:
+    """{query_name: [scan operators]} для всех HOT_QUERIES."""
+    prefix = "PROFILE" if profile else "EXPLAIN"
+    regressions: Dict[str, List[str]] = {}
+    async with driver.session() as session:
+        for name, query, params in HOT_QUERIES:
+            result = await session.run(f"{prefix} {query}", **params)
+            summary = await result.consume()
+            plan = summary.profile if profile else summary.plan
+            scans = find_scans(plan)
+            status = "SCAN" if scans else "ok"
+            print(f"{name:<26} {status:<5} {', '.join(scans)}")
+            if scans:
+                regressions[name] = scans
+    return regressions
+
+
+async def run(uri: str, user: str, password: str, profile: bool, wait_sec: float) -> int:
+    driver = AsyncGraphDatabase.driver(uri, auth=(user, password))
+    try:
+        await wait_for_neo4j(driver, wait_sec)
+        statuses = await ensure_graph_schema(driver)
+        degraded = {name: status for name, status in statuses.items() if status != "ok"}
+        if degraded:
+            print(f"schema degraded: {degraded}")
+        async with driver.session() as session:
+            await (await session.run("CALL db.awaitIndexes(300)")).consume()
+            if profile:
+                # PROFILE выполняет запросы - засеваем минимальный граф
+                await (await session.run(client_queries._POSTS_BATCH_QUERY, rows=[POST_ROW])).consume()
+        regressions = await check_plans(driver, profile)
+    finally:
+        await driver.close()
+
+    if regressions:
+        print(f"FAIL: {len(regressions)} query plan(s) regressed to a scan: {sorted(regressions)}")
+        return 1
+    print(f"OK: {len(HOT_QUERIES)} query plans use index lookups")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Neo4j query plan regression check")
+    parser.add_argument("--uri", default="bolt://localhost:7687")
+    parser.add_argument("--user", default="neo4j")
+    parser.add_argument("--password", default=CONTAINER_PASSWORD)
+    parser.add_argument("--profile", action="store_true", help="PROFILE вместо EXPLAIN (выполняет запросы)")
+    parser.add_argument("--start-container", action="store_true", help="Поднять одноразовый neo4j:5 в docker")
+    parser.add_argument("--port", type=int, default=7687, help="Порт bolt для --start-container")
+    parser.add_argument("--wait-sec", type=float, default=90.0, help="Ожидание готовности Neo4j")
+    args = parser.parse_args(argv)
+
+    uri = args.uri
+    if args.start_container:
+        start_container(args.port)
+        uri = f"bolt://localhost:{args.port}"
+    try:
+        return asyncio.run(run(uri, args.user, args.password, args.profile, args.wait_sec))
+    finally:
+        if args.start_container:
+            stop_container()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
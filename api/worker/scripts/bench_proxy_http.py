@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк HTTP-вызовов gpt2giga-proxy: блокирующий requests vs общий async пул.
+[C7-ID: AI-PROXY-HTTP-003]
+
+- before: requests.post на каждый вызов из корутины (новое соединение, event loop
+  заблокирован на время запроса - как было в _call_gigachat_api / _embed_text_internal);
+- after:  ProxyHTTPPool (keep-alive, конкурентные запросы в пределах лимита endpoint).
+
+По умолчанию поднимает локальную заглушку прокси (scripts/gpt2giga_stub.py) в отдельном
+потоке; --url направляет нагрузку на реальный прокси.
+
+Usage:
+  python api/worker/scripts/bench_proxy_http.py --requests 500 --concurrency 16 --latency-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Awaitable, List, Optional
+
+WORKER_DIR = Path(__file__).resolve().parents[1]
+if str(WORKER_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKER_DIR))
+
+from ai_providers.proxy_http import ProxyHTTPPool  # noqa: E402
+from scripts.gpt2giga_stub import Gpt2GigaStub  # noqa: E402
+
+PATH = "/v1/embeddings"
+PAYLOAD = {"input": ["бенчмарк gpt2giga-proxy"], "model": "any"}
+
+
+def start_stub_thread(latency_ms: float) -> str:
+    """Заглушка в своём event loop: блокирующий клиент не должен останавливать сервер."""
+    ready = threading.Event()
+    holder = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        stub = Gpt2GigaStub(latency_ms=latency_ms)
+        holder["url"] = loop.run_until_complete(stub.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return holder["url"]
+
+
+async def run_load(call: Callable[[], Awaitable[None]], total: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def bench_blocking(base_url: str, total: int, concurrency: int) -> dict:
+    import requests
+
+    async def call():
+        response = requests.post(f"{base_url}{PATH}", json=PAYLOAD, timeout=30)
+        response.raise_for_status()
+
+    return await run_load(call, total, concurrency)
+
+
+async def bench_pool(base_url: str, total: int, concurrency: int) -> dict:
+    pool = ProxyHTTPPool(base_url, max_connections=concurrency, endpoint_limits={"embeddings": concurrency})
+
+    async def call():
+        response = await pool.request("POST", PATH, json=PAYLOAD)
+        response.raise_for_status()
+
+    try:
+        await pool.request("GET", "/v1/models")  # прогрев соединения
+        return await run_load(call, total, concurrency)
+    finally:
+        await pool.aclose()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="gpt2giga-proxy HTTP client benchmark")
+    parser.add_argument("--url", help="Base URL прокси (по умолчанию - локальная заглушка)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Задержка заглушки")
+    args = parser.parse_args(argv)
+
+    base_url = args.url or start_stub_thread(args.latency_ms)
+    print(f"target={base_url} requests={args.requests} concurrency={args.concurrency}")
+    for name, bench in (("before (requests, blocking)", bench_blocking), ("after (ProxyHTTPPool)", bench_pool)):
+        result = asyncio.run(bench(base_url, args.requests, args.concurrency))
+        print(f"{name:<30} rps={result['rps']:8.1f}  p50={result['p50_ms']:7.1f}ms  p95={result['p95_ms']:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
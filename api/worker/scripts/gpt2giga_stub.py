@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Локальная заглушка gpt2giga-proxy для тестов и бенчмарков HTTP-слоя.
+[C7-ID: AI-PROXY-HTTP-002]
+
+Реализует OpenAI-совместимые endpoints, которые вызывает воркер:
+- GET  /v1/models
+- POST /v1/embeddings        (input: str | [str] -> data[].embedding)
+- POST /v1/chat/completions  (ответ - JSON-массив тегов)
+
+Только stdlib (asyncio), HTTP/1.1 с keep-alive. Поддерживает искусственную задержку,
+принудительные ошибки (503/429) и учёт пиковой конкурентности по endpoint.
+
+Usage:
+  python api/worker/scripts/gpt2giga_stub.py --port 8090 --latency-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+class Gpt2GigaStub:
+    """In-process заглушка прокси; start() возвращает base_url."""
+
+    def __init__(self, latency_ms: float = 0.0, dimension: int = 8):
+        self.latency = latency_ms / 1000.0
+        self.dimension = dimension
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.peak_concurrency: Dict[str, int] = defaultdict(int)
+        self.connections = 0
+        # path -> очередь статусов, отдаваемых вместо успешного ответа
+        self.fail_queue: Dict[str, List[Tuple[int, Dict[str, str]]]] = defaultdict(list)
+        self._active: Dict[str, int] = defaultdict(int)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: set = set()
+
+    def fail_next(self, path: str, status: int, times: int = 1, headers: Optional[Dict[str, str]] = None):
+        self.fail_queue[path].extend([(status, headers or {})] * times)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        bound_port = self._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = line.decode("latin-1").split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", "0") or 0)
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload, extra_headers = await self._dispatch(method, path, body)
+                raw = json.dumps(payload).encode("utf-8")
+                head = [
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'ERROR'}",
+                    "Content-Type: application/json",
+                    f"Content-Length: {len(raw)}",
+                    "Connection: keep-alive",
+                ] + [f"{name}: {value}" for name, value in extra_headers.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + raw)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, dict, Dict[str, str]]:
+        path = path.split("?", 1)[0]
+        self.requests[path] += 1
+        self._active[path] += 1
+        self.peak_concurrency[path] = max(self.peak_concurrency[path], self._active[path])
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.fail_queue[path]:
+                status, headers = self.fail_queue[path].pop(0)
+                return status, {"error": {"message": f"stub failure {status}"}}, headers
+
+            if method == "GET" and path == "/v1/models":
+                return 200, {"object": "list", "data": [{"id": "GigaChat"}, {"id": "EmbeddingsGigaR"}]}, {}
+            if method == "POST" and path == "/v1/embeddings":
+                inputs = json.loads(body or b"{}").get("input") or []
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+                data = [
+                    {"object": "embedding", "index": index, "embedding": [float(len(text))] * self.dimension}
+                    for index, text in enumerate(inputs)
+                ]
+                return 200, {"object": "list", "data": data}, {}
+            if method == "POST" and path == "/v1/chat/completions":
+                content = json.dumps(["stub", "тег"], ensure_ascii=False)
+                return 200, {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]}, {}
+            return 404, {"error": {"message": f"unknown endpoint {method} {path}"}}, {}
+        finally:
+            self._active[path] -= 1
+
+
+async def _serve(host: str, port: int, latency_ms: float):
+    stub = Gpt2GigaStub(latency_ms=latency_ms)
+    base_url = await stub.start(host, port)
+    print(f"gpt2giga stub listening on {base_url}", flush=True)
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local gpt2giga-proxy stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.host, args.port, args.latency_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
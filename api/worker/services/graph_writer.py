@@ -9,13 +9,13 @@ Context7 best practices:
 - Event-driven: читает события из Redis Streams
 - Decoupling: не зависит от Telethon напрямую
 - Идемпотентность через MERGE
-- Batch processing для эффективности
+- Batch processing: одна UNWIND-транзакция Neo4j и один XACK на батч сообщений
 """
 import asyncio
 import json
 import time
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import structlog
 import redis.asyncio as redis
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
@@ -274,61 +274,8 @@ class GraphWriter:
             if not messages:
                 return 0
             
-            processed = 0
-            for msg_id, fields in messages:
-                try:
-                    # Десериализация события
-                    event_data = self._parse_stream_message(fields)
-                    
-                    if not event_data:
-                        logger.warning("Failed to parse pending message",
-                                     message_id=msg_id,
-                                     stream_key=stream_key)
-                        continue
-                    
-                    # Обработка события
-                    success = await self._process_post_parsed_event(event_data)
-                    
-                    if success:
-                        # ACK сообщения после успешной обработки
-                        await self.redis_client.xack(stream_key, self.consumer_group, msg_id)
-                        processed += 1
-                        # Сброс retry count при успехе
-                        if msg_id in self._retry_count:
-                            del self._retry_count[msg_id]
-                    else:
-                        # Не ACK - оставляем в PEL для повторной обработки
-                        retry_count = self._retry_count.get(msg_id, 0) + 1
-                        self._retry_count[msg_id] = retry_count
-                        
-                        if retry_count > self.max_retries:
-                            logger.error("Message exceeded max retries, sending to DLQ",
-                                       message_id=msg_id,
-                                       retry_count=retry_count,
-                                       max_retries=self.max_retries,
-                                       post_id=event_data.get('post_id'))
-                            
-                            # Context7: Отправка в DLQ если превышен лимит retry
-                            await self._send_to_dlq(
-                                message_id=msg_id,
-                                event_data=event_data,
-                                retry_count=retry_count,
-                                error=Exception(f"Message exceeded max retries ({retry_count}/{self.max_retries})")
-                            )
-                            
-                            # ACK сообщение после отправки в DLQ (чтобы оно не обрабатывалось снова)
-                            await self.redis_client.xack(stream_key, self.consumer_group, msg_id)
-                            
-                            # Удаляем из retry count
-                            if msg_id in self._retry_count:
-                                del self._retry_count[msg_id]
-                        
-                except Exception as e:
-                    logger.error("Error processing pending message",
-                               message_id=msg_id,
-                               error=str(e),
-                               exc_info=True)
-                    # Не ACK - оставляем в PEL для повторной обработки
+            # Context7: зависшие сообщения обрабатываются тем же батчевым путём
+            processed, _ = await self._handle_post_messages(messages, stream_key)
             
             if processed > 0:
                 logger.debug("Processed pending messages",
@@ -361,76 +308,7 @@ class GraphWriter:
             stream_messages: Список сообщений из Redis Stream (message_id, fields_dict)
             stream_key: Имя stream для логирования
         """
-        processed = 0
-        failed = 0
-        
-        for message_id, fields in stream_messages:
-            try:
-                # Context7: Десериализация события из Redis Stream
-                event_data = self._parse_stream_message(fields)
-                
-                if not event_data:
-                    logger.warning("Failed to parse stream message",
-                                 message_id=message_id,
-                                 stream_key=stream_key)
-                    graph_writer_errors_total.labels(error_type='parse_error').inc()
-                    failed += 1
-                    continue
-                
-                # Обработка события и создание графовых связей
-                success = await self._process_post_parsed_event(event_data)
-                
-                if success:
-                    # Context7: ACK сообщения после успешной обработки
-                    await self.redis_client.xack(stream_key, self.consumer_group, message_id)
-                    processed += 1
-                    # Сброс retry count при успехе
-                    if message_id in self._retry_count:
-                        del self._retry_count[message_id]
-                else:
-                    failed += 1
-                    retry_count = self._retry_count.get(message_id, 0) + 1
-                    self._retry_count[message_id] = retry_count
-                    
-                    logger.warning("Failed to process event",
-                                 message_id=message_id,
-                                 post_id=event_data.get('post_id'),
-                                 retry_count=retry_count,
-                                 max_retries=self.max_retries)
-                    
-                    # Context7: Проверка превышения лимита retry
-                    if retry_count > self.max_retries:
-                        logger.error("Message exceeded max retries in batch processing, sending to DLQ",
-                                   message_id=message_id,
-                                   retry_count=retry_count,
-                                   max_retries=self.max_retries,
-                                   post_id=event_data.get('post_id'))
-                        
-                        # Отправка в DLQ
-                        await self._send_to_dlq(
-                            message_id=message_id,
-                            event_data=event_data,
-                            retry_count=retry_count,
-                            error=Exception(f"Message exceeded max retries ({retry_count}/{self.max_retries})")
-                        )
-                        
-                        # ACK сообщение после отправки в DLQ
-                        await self.redis_client.xack(stream_key, self.consumer_group, message_id)
-                        
-                        # Удаляем из retry count
-                        if message_id in self._retry_count:
-                            del self._retry_count[message_id]
-                    else:
-                        # Не ACK - оставляем в PEL для повторной обработки через XAUTOCLAIM
-                        pass
-                    
-            except Exception as e:
-                logger.error("Error processing stream message",
-                           message_id=message_id,
-                           error=str(e),
-                           exc_info=True)
-                failed += 1
-                # Не ACK - оставляем в PEL для повторной обработки через XAUTOCLAIM
+        processed, failed = await self._handle_post_messages(stream_messages, stream_key)
         
         # Context7 P2: Обновление метрик
         graph_writer_batch_size.labels(stream=stream_key).observe(len(stream_messages))
@@ -447,6 +325,129 @@ class GraphWriter:
                    failed=failed,
                    total=len(stream_messages))
     
+    async def _handle_post_messages(
+        self,
+        stream_messages: List[tuple],
+        stream_key: str
+    ) -> Tuple[int, int]:
+        """
+        Context7: [C7-ID: graph-batch-write-001] Батчевая обработка сообщений post.parsed.
+        
+        Все сообщения батча парсятся, метаданные постов читаются одним запросом, графовые
+        записи применяются одной транзакцией Neo4j (write_graph_batch). После commit'а
+        сообщения ACK'аются одним XACK. Если транзакция не прошла, батч делится пополам
+        до изоляции «ядовитых» событий (_write_post_events_isolated): остальные сообщения
+        ACK'аются, и только упавшие остаются в PEL и проходят обычный учёт retry/DLQ.
+        
+        Returns:
+            (processed, failed)
+        """
+        failed = 0
+        events = []
+        invalid = []
+        for message_id, fields in stream_messages:
+            event_data = self._parse_stream_message(fields)
+            if not event_data:
+                # Не ACK - оставляем в PEL для повторной обработки через XAUTOCLAIM
+                logger.warning("Failed to parse stream message",
+                             message_id=message_id,
+                             stream_key=stream_key)
+                graph_writer_errors_total.labels(error_type='parse_error').inc()
+                failed += 1
+            elif not event_data.get('post_id'):
+                logger.warning("Event missing post_id", message_id=message_id)
+                invalid.append((message_id, event_data))
+            else:
+                events.append((message_id, event_data))
+        
+        written, poisoned = await self._write_post_events_isolated(events) if events else ([], [])
+        
+        ack_ids = []
+        for message_id, _ in written:
+            ack_ids.append(message_id)
+            self._retry_count.pop(message_id, None)
+        processed = len(written)
+        invalid.extend(poisoned)
+        
+        for message_id, event_data in invalid:
+            failed += 1
+            if await self._register_failure(message_id, event_data):
+                ack_ids.append(message_id)
+        
+        if ack_ids:
+            try:
+                # Context7: один XACK на батч после commit'а графовой транзакции
+                await self.redis_client.xack(stream_key, self.consumer_group, *ack_ids)
+            except Exception as e:
+                # Сообщения останутся в PEL; повторная запись идемпотентна (MERGE)
+                graph_writer_errors_total.labels(error_type='redis_error').inc()
+                logger.error("Failed to ACK batch",
+                           stream_key=stream_key,
+                           count=len(ack_ids),
+                           error=str(e))
+        
+        return processed, failed
+    
+    async def _write_post_events_isolated(
+        self,
+        events: List[Tuple[Any, Dict[str, Any]]]
+    ) -> Tuple[List[Tuple[Any, Dict[str, Any]]], List[Tuple[Any, Dict[str, Any]]]]:
+        """
+        Context7: Запись батча с изоляцией «ядовитых» событий делением пополам.
+        
+        Одно событие, которое роняет транзакцию Neo4j, не должно тянуть в retry/DLQ весь
+        батч. Повторная запись половин безопасна - все графовые записи идут через MERGE.
+        
+        Args:
+            events: Пары (message_id, event_data)
+            
+        Returns:
+            (записанные, упавшие) пары (message_id, event_data)
+        """
+        if await self._write_post_events([event_data for _, event_data in events]):
+            return list(events), []
+        if len(events) == 1:
+            return [], list(events)
+        
+        middle = len(events) // 2
+        written_left, failed_left = await self._write_post_events_isolated(events[:middle])
+        written_right, failed_right = await self._write_post_events_isolated(events[middle:])
+        return written_left + written_right, failed_left + failed_right
+    
+    async def _register_failure(self, message_id: Any, event_data: Dict[str, Any]) -> bool:
+        """
+        Учёт неудачной попытки сообщения.
+        
+        Returns:
+            True если лимит retry превышен и сообщение отправлено в DLQ (его нужно ACK'нуть)
+        """
+        retry_count = self._retry_count.get(message_id, 0) + 1
+        self._retry_count[message_id] = retry_count
+        
+        logger.warning("Failed to process event",
+                     message_id=message_id,
+                     post_id=event_data.get('post_id'),
+                     retry_count=retry_count,
+                     max_retries=self.max_retries)
+        
+        if retry_count <= self.max_retries:
+            # Не ACK - оставляем в PEL для повторной обработки через XAUTOCLAIM
+            return False
+        
+        logger.error("Message exceeded max retries, sending to DLQ",
+                   message_id=message_id,
+                   retry_count=retry_count,
+                   max_retries=self.max_retries,
+                   post_id=event_data.get('post_id'))
+        await self._send_to_dlq(
+            message_id=message_id,
+            event_data=event_data,
+            retry_count=retry_count,
+            error=Exception(f"Message exceeded max retries ({retry_count}/{self.max_retries})")
+        )
+        del self._retry_count[message_id]
+        return True
+    
     def _parse_stream_message(self, fields: Dict[str, bytes]) -> Optional[Dict[str, Any]]:
         """
         Парсинг сообщения из Redis Stream в событие.
@@ -491,13 +492,9 @@ class GraphWriter:
     
     async def _process_post_parsed_event(self, event_data: Dict[str, Any]) -> bool:
         """
-        Обработка события post.parsed и создание графовых связей (Context7 P2).
+        Обработка одного события post.parsed (Context7 P2).
         
-        Создаёт:
-        1. Пост узел (если ещё не создан через indexing_task)
-        2. Forward связи (если есть forward_from_peer_id)
-        3. Reply связи (если есть reply_to_message_id)
-        4. Author связи (если есть author информация)
+        Обёртка над _write_post_events для одиночных вызовов.
         
         Args:
             event_data: Данные события post.parsed
@@ -505,170 +502,152 @@ class GraphWriter:
         Returns:
             True если успешно, False при ошибке
         """
+        if not event_data.get('post_id'):
+            logger.warning("Event missing post_id", event_data=event_data)
+            return False
+        return await self._write_post_events([event_data])
+    
+    async def _write_post_events(
+        self,
+        events: List[Dict[str, Any]],
+        fetch_metadata: bool = True
+    ) -> bool:
+        """
+        Создание графовых связей для батча событий post.parsed (Context7 P2).
+        
+        Создаёт одной транзакцией:
+        1. Forward связи (если есть forward_from_peer_id)
+        2. Reply связи (если есть reply_to_message_id)
+        3. Author связи (если есть author информация)
+        
+        Args:
+            events: События post.parsed (у каждого есть post_id)
+            fetch_metadata: Дочитать forwards/replies из PostgreSQL
+            
+        Returns:
+            True если транзакция закоммичена, False при ошибке
+        """
         start_time = time.perf_counter()
         try:
-            post_id = event_data.get('post_id')
-            if not post_id:
-                logger.warning("Event missing post_id", event_data=event_data)
-                return False
+            # Context7 P2: forwards/replies могут быть в БД, но не в событии - один запрос на батч
+            post_ids = [str(event['post_id']) for event in events]
+            metadata = await self._fetch_posts_metadata(post_ids) if fetch_metadata and self.db_session else {}
             
-            # Context7 P2: Получаем дополнительные данные из PostgreSQL если доступна сессия
-            # (forwards/replies могут быть в БД, но не в событии)
-            post_metadata = await self._fetch_post_metadata(post_id) if self.db_session else {}
-            
-            # Объединяем данные события и метаданные из БД
-            merged_data = {**event_data, **post_metadata}
-            
-            # Context7 P2: Создание forward связей
-            if merged_data.get('forward_from_peer_id') or merged_data.get('forward_from_chat_id'):
-                forward_start = time.perf_counter()
-                try:
-                    await self.neo4j_client.create_forward_relationship(
-                        post_id=post_id,
-                        forward_from_peer_id=merged_data.get('forward_from_peer_id'),
-                        forward_from_chat_id=merged_data.get('forward_from_chat_id'),
-                        forward_from_message_id=merged_data.get('forward_from_message_id'),
-                        forward_date=merged_data.get('forward_date'),
-                        forward_from_name=merged_data.get('forward_from_name')
-                    )
-                    graph_writer_processed_total.labels(operation_type='forward', status='ok').inc()
-                    graph_writer_operation_duration_seconds.labels(operation_type='forward').observe(time.perf_counter() - forward_start)
-                except Exception as e:
-                    graph_writer_processed_total.labels(operation_type='forward', status='error').inc()
-                    graph_writer_errors_total.labels(error_type='neo4j_error').inc()
-                    logger.error("Error creating forward relationship", post_id=post_id, error=str(e))
-            
-            # Context7 P2: Создание reply связей
-            if merged_data.get('reply_to_message_id'):
-                reply_start = time.perf_counter()
-                try:
-                    await self.neo4j_client.create_reply_relationship(
-                        post_id=post_id,
-                        reply_to_message_id=merged_data.get('reply_to_message_id'),
-                        reply_to_chat_id=merged_data.get('reply_to_chat_id'),
-                        thread_id=merged_data.get('thread_id')
-                    )
-                    graph_writer_processed_total.labels(operation_type='reply', status='ok').inc()
-                    graph_writer_operation_duration_seconds.labels(operation_type='reply').observe(time.perf_counter() - reply_start)
-                except Exception as e:
-                    graph_writer_processed_total.labels(operation_type='reply', status='error').inc()
-                    graph_writer_errors_total.labels(error_type='neo4j_error').inc()
-                    logger.error("Error creating reply relationship", post_id=post_id, error=str(e))
+            forwards, replies, authors = [], [], []
+            for event_data in events:
+                post_id = str(event_data['post_id'])
+                # Объединяем данные события и метаданные из БД
+                merged_data = {**event_data, **metadata.get(post_id, {})}
+                
+                if merged_data.get('forward_from_peer_id') or merged_data.get('forward_from_chat_id'):
+                    forwards.append({
+                        'post_id': post_id,
+                        'forward_from_peer_id': merged_data.get('forward_from_peer_id'),
+                        'forward_from_chat_id': merged_data.get('forward_from_chat_id'),
+                        'forward_from_message_id': merged_data.get('forward_from_message_id'),
+                        'forward_date': merged_data.get('forward_date'),
+                        'forward_from_name': merged_data.get('forward_from_name')
+                    })
+                
+                if merged_data.get('reply_to_message_id'):
+                    replies.append({
+                        'post_id': post_id,
+                        'reply_to_message_id': merged_data.get('reply_to_message_id'),
+                        'reply_to_chat_id': merged_data.get('reply_to_chat_id'),
+                        'thread_id': merged_data.get('thread_id')
+                    })
+                
+                # Автор может быть в post_author или в forward_from_name
+                author_peer_id = merged_data.get('author_peer_id')
+                author_name = merged_data.get('post_author') or merged_data.get('forward_from_name')
+                if author_peer_id or author_name:
+                    authors.append({
+                        'post_id': post_id,
+                        'author_peer_id': author_peer_id,
+                        'author_name': author_name,
+                        'author_type': merged_data.get('author_type')
+                    })
             
-            # Context7 P2: Создание author связей (если есть информация об авторе)
-            # Автор может быть в post_author или в forward_from_name
-            author_peer_id = merged_data.get('author_peer_id')
-            author_name = merged_data.get('post_author') or merged_data.get('forward_from_name')
+            success = await self.neo4j_client.write_graph_batch(
+                forwards=forwards,
+                replies=replies,
+                authors=authors
+            )
             
-            if author_peer_id or author_name:
-                author_start = time.perf_counter()
-                try:
-                    await self.neo4j_client.create_author_relationship(
-                        post_id=post_id,
-                        author_peer_id=author_peer_id,
-                        author_name=author_name,
-                        author_type=merged_data.get('author_type')
-                    )
-                    graph_writer_processed_total.labels(operation_type='author', status='ok').inc()
-                    graph_writer_operation_duration_seconds.labels(operation_type='author').observe(time.perf_counter() - author_start)
-                except Exception as e:
-                    graph_writer_processed_total.labels(operation_type='author', status='error').inc()
-                    graph_writer_errors_total.labels(error_type='neo4j_error').inc()
-                    logger.error("Error creating author relationship", post_id=post_id, error=str(e))
+            status = 'ok' if success else 'error'
+            for operation_type, records in (('forward', forwards), ('reply', replies), ('author', authors)):
+                if records:
+                    graph_writer_processed_total.labels(operation_type=operation_type, status=status).inc(len(records))
+            if not success:
+                graph_writer_errors_total.labels(error_type='neo4j_error').inc()
             
             elapsed = time.perf_counter() - start_time
             graph_writer_operation_duration_seconds.labels(operation_type='batch').observe(elapsed)
             
-            logger.debug("Processed post parsed event",
-                        post_id=post_id,
-                        has_forward=bool(merged_data.get('forward_from_peer_id')),
-                        has_reply=bool(merged_data.get('reply_to_message_id')),
-                        has_author=bool(author_peer_id or author_name),
+            logger.debug("Processed post parsed events",
+                        events=len(events),
+                        forwards=len(forwards),
+                        replies=len(replies),
+                        authors=len(authors),
+                        success=success,
                         duration_seconds=elapsed)
             
-            return True
+            return success
             
         except Exception as e:
             graph_writer_errors_total.labels(error_type='processing_error').inc()
-            logger.error("Error processing post parsed event",
-                        post_id=event_data.get('post_id'),
+            logger.error("Error processing post parsed events",
+                        events=len(events),
                         error=str(e),
                         exc_info=True)
             return False
     
-    async def _fetch_post_metadata(self, post_id: str) -> Dict[str, Any]:
+    async def _fetch_posts_metadata(self, post_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """
-        Получение метаданных поста из PostgreSQL (Context7 P2).
-        
-        Извлекает forwards/replies данные из таблиц post_forwards и post_replies.
+        Получение метаданных постов батча из PostgreSQL одним запросом (Context7 P2).
         
         Args:
-            post_id: ID поста
+            post_ids: ID постов
             
         Returns:
-            Словарь с метаданными (forward_from_peer_id, reply_to_message_id и т.д.)
+            {post_id: {forward_from_peer_id, reply_to_message_id, ...}} (только непустые поля)
         """
-        if not self.db_session:
+        if not self.db_session or not post_ids:
             return {}
         
         try:
-            metadata = {}
-            
-            # Получаем данные о forwards
-            forwards_result = await self.db_session.execute(
+            result = await self.db_session.execute(
                 text("""
                     SELECT 
+                        id,
                         forward_from_peer_id,
                         forward_from_chat_id,
                         forward_from_message_id,
                         forward_date,
-                        forward_from_name
-                    FROM posts
-                    WHERE id = :post_id
-                """),
-                {"post_id": post_id}
-            )
-            forwards_row = forwards_result.fetchone()
-            
-            if forwards_row:
-                if forwards_row.forward_from_peer_id:
-                    metadata['forward_from_peer_id'] = forwards_row.forward_from_peer_id
-                if forwards_row.forward_from_chat_id:
-                    metadata['forward_from_chat_id'] = forwards_row.forward_from_chat_id
-                if forwards_row.forward_from_message_id:
-                    metadata['forward_from_message_id'] = forwards_row.forward_from_message_id
-                if forwards_row.forward_date:
-                    metadata['forward_date'] = forwards_row.forward_date.isoformat() if hasattr(forwards_row.forward_date, 'isoformat') else str(forwards_row.forward_date)
-                if forwards_row.forward_from_name:
-                    metadata['forward_from_name'] = forwards_row.forward_from_name
-            
-            # Получаем данные о replies
-            replies_result = await self.db_session.execute(
-                text("""
-                    SELECT 
+                        forward_from_name,
                         reply_to_message_id,
                         reply_to_chat_id,
                         thread_id
                     FROM posts
-                    WHERE id = :post_id
+                    WHERE id = ANY(CAST(:post_ids AS uuid[]))
                 """),
-                {"post_id": post_id}
+                {"post_ids": post_ids}
             )
-            replies_row = replies_result.fetchone()
-            
-            if replies_row:
-                if replies_row.reply_to_message_id:
-                    metadata['reply_to_message_id'] = replies_row.reply_to_message_id
-                if replies_row.reply_to_chat_id:
-                    metadata['reply_to_chat_id'] = replies_row.reply_to_chat_id
-                if replies_row.thread_id:
-                    metadata['thread_id'] = replies_row.thread_id
             
+            metadata = {}
+            for row in result.fetchall():
+                fields = {
+                    key: value for key, value in row._mapping.items()
+                    if key != 'id' and value
+                }
+                if 'forward_date' in fields and hasattr(fields['forward_date'], 'isoformat'):
+                    fields['forward_date'] = fields['forward_date'].isoformat()
+                metadata[str(row.id)] = fields
             return metadata
             
         except Exception as e:
-            logger.warning("Failed to fetch post metadata from DB",
-                         post_id=post_id,
+            logger.warning("Failed to fetch posts metadata from DB",
+                         posts_count=len(post_ids),
                          error=str(e))
             return {}
     
@@ -721,36 +700,29 @@ class GraphWriter:
                     {"post_ids": batch}
                 )
                 
-                posts = result.fetchall()
+                # Создаём событие-подобные структуры из данных БД
+                events = [
+                    {
+                        'post_id': str(post.post_id),
+                        'channel_id': str(post.channel_id),
+                        'forward_from_peer_id': post.forward_from_peer_id,
+                        'forward_from_chat_id': post.forward_from_chat_id,
+                        'forward_from_message_id': post.forward_from_message_id,
+                        'forward_date': post.forward_date.isoformat() if post.forward_date and hasattr(post.forward_date, 'isoformat') else str(post.forward_date) if post.forward_date else None,
+                        'forward_from_name': post.forward_from_name,
+                        'reply_to_message_id': post.reply_to_message_id,
+                        'reply_to_chat_id': post.reply_to_chat_id,
+                        'thread_id': post.thread_id,
+                        'post_author': post.post_author
+                    }
+                    for post in result.fetchall()
+                ]
                 
-                for post in posts:
-                    try:
-                        # Создаём событие-подобную структуру из данных БД
-                        event_data = {
-                            'post_id': str(post.post_id),
-                            'channel_id': str(post.channel_id),
-                            'forward_from_peer_id': post.forward_from_peer_id,
-                            'forward_from_chat_id': post.forward_from_chat_id,
-                            'forward_from_message_id': post.forward_from_message_id,
-                            'forward_date': post.forward_date.isoformat() if post.forward_date and hasattr(post.forward_date, 'isoformat') else str(post.forward_date) if post.forward_date else None,
-                            'forward_from_name': post.forward_from_name,
-                            'reply_to_message_id': post.reply_to_message_id,
-                            'reply_to_chat_id': post.reply_to_chat_id,
-                            'thread_id': post.thread_id,
-                            'post_author': post.post_author
-                        }
-                        
-                        success = await self._process_post_parsed_event(event_data)
-                        if success:
-                            processed += 1
-                        else:
-                            failed += 1
-                            
-                    except Exception as e:
-                        logger.error("Error processing post from batch",
-                                   post_id=str(post.post_id),
-                                   error=str(e))
-                        failed += 1
+                # Context7: одна графовая транзакция на батч; метаданные уже прочитаны выше
+                if events and await self._write_post_events(events, fetch_metadata=False):
+                    processed += len(events)
+                else:
+                    failed += len(events)
                         
             except Exception as e:
                 logger.error("Error fetching batch from PostgreSQL",
@@ -884,6 +856,7 @@ class GraphWriter:
         """
         processed = 0
         failed = 0
+        ack_ids = []
         
         for msg_id, fields in stream_messages:
             try:
@@ -901,8 +874,8 @@ class GraphWriter:
                 success = await self._process_persona_message_event(event_data)
                 
                 if success:
-                    # ACK сообщения после успешной обработки
-                    await self.redis_client.xack(stream_key, self.consumer_group, msg_id)
+                    # ACK после успешной обработки - одним XACK в конце батча
+                    ack_ids.append(msg_id)
                     processed += 1
                     graph_writer_processed_total.labels(operation_type='persona', status='ok').inc()
                 else:
@@ -918,6 +891,16 @@ class GraphWriter:
                 failed += 1
                 graph_writer_errors_total.labels(error_type='processing_error').inc()
         
+        if ack_ids:
+            try:
+                await self.redis_client.xack(stream_key, self.consumer_group, *ack_ids)
+            except Exception as e:
+                graph_writer_errors_total.labels(error_type='redis_error').inc()
+                logger.error("Failed to ACK persona batch",
+                           stream_key=stream_key,
+                           count=len(ack_ids),
+                           error=str(e))
+        
         if processed > 0 or failed > 0:
             logger.info("Processed persona batch",
                        stream_key=stream_key,
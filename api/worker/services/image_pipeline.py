@@ -0,0 +1,286 @@
+"""
+CPU-bound стадия подготовки изображений для Vision пайплайна.
+[C7-ID: VISION-IMAGE-POOL-001]
+
+Context7 best practice: декодирование, конвертация, LANCZOS-thumbnail, JPEG re-encode
+и phash выполняются в пуле процессов, а не на asyncio loop воркера — большой альбом
+больше не останавливает остальных consumer'ов процесса. Изображение декодируется
+один раз: из одного decode получаются и байты для загрузки в GigaChat, и phash.
+
+phash считается по полному исходному изображению (как compute_phash), поэтому ключи
+phash-кэша совместимы с ранее сохранёнными.
+"""
+
+import asyncio
+import io
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = structlog.get_logger()
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+vision_image_pool_queue_depth = Gauge(
+    'vision_image_pool_queue_depth',
+    'Image preparation jobs waiting for a free pool worker'
+)
+
+vision_image_pool_busy_workers = Gauge(
+    'vision_image_pool_busy_workers',
+    'Image preparation jobs currently running in the pool'
+)
+
+vision_image_pool_utilization = Gauge(
+    'vision_image_pool_utilization',
+    'Share of image pool workers that are busy (0..1)'
+)
+
+vision_image_pool_task_seconds = Histogram(
+    'vision_image_pool_task_seconds',
+    'Image preparation time inside a pool worker',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+vision_image_pool_wait_seconds = Histogram(
+    'vision_image_pool_wait_seconds',
+    'Time an image preparation job waited for a pool worker',
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+vision_image_pool_jobs_total = Counter(
+    'vision_image_pool_jobs_total',
+    'Image preparation jobs by outcome',
+    ['status']  # ok | error | pool_restarted
+)
+
+
+# ============================================================================
+# PURE PROCESSING (выполняется в дочернем процессе)
+# ============================================================================
+
+@dataclass(frozen=True)
+class ImagePrepareOptions:
+    """Параметры подготовки изображения (picklable, передаются в пул)."""
+
+    preprocess: bool = True
+    grayscale: bool = True
+    max_dim: int = 1024
+    jpeg_quality: int = 75
+    roi_crop: bool = False
+    roi_max_dim: int = 1024
+    phash_hash_size: Optional[int] = 16  # None — phash не считается
+
+
+@dataclass
+class PreparedImage:
+    """Результат одного decode: байты для загрузки и phash."""
+
+    content: bytes
+    mime_type: str
+    preprocessed: bool
+    phash_hex: Optional[str] = None
+    phash_size: Optional[int] = None
+    original_mode: Optional[str] = None
+    original_size: Optional[Tuple[int, int]] = None
+    new_size: Optional[Tuple[int, int]] = None
+    roi_bbox: Optional[Tuple[int, int, int, int]] = None
+    preprocess_error: Optional[str] = None
+    phash_error: Optional[str] = None
+    duration_seconds: float = 0.0
+
+
+def prepare_image(file_content: bytes, mime_type: str, options: ImagePrepareOptions) -> PreparedImage:
+    """
+    Декодирование изображения один раз → phash + препроцессинг для Vision API.
+
+    Ошибки phash и препроцессинга не исключения: вызывающий код получает исходные
+    байты и текст ошибки, чтобы сохранить прежнюю деградацию.
+    """
+    from PIL import Image
+
+    started = time.perf_counter()
+    result = PreparedImage(content=file_content, mime_type=mime_type, preprocessed=False)
+
+    image = Image.open(io.BytesIO(file_content))
+    image.load()
+    result.original_mode = image.mode
+    result.original_size = image.size
+
+    if options.phash_hash_size:
+        try:
+            import imagehash
+
+            phash = imagehash.phash(image.convert("L"), hash_size=options.phash_hash_size)
+            result.phash_hex = str(phash)
+            result.phash_size = options.phash_hash_size
+        except Exception as exc:
+            result.phash_error = str(exc)
+
+    if options.preprocess:
+        try:
+            processed = image.convert("L") if options.grayscale else image.convert("RGB")
+
+            if options.roi_crop:
+                bbox = processed.getbbox()
+                if bbox:
+                    result.roi_bbox = tuple(bbox)
+                    processed = processed.crop(bbox)
+                    if options.roi_max_dim > 0:
+                        processed.thumbnail((options.roi_max_dim, options.roi_max_dim), Image.LANCZOS)
+
+            if options.max_dim > 0:
+                processed.thumbnail((options.max_dim, options.max_dim), Image.LANCZOS)
+
+            if processed.mode != "L":
+                processed = processed.convert("RGB")
+
+            buffer = io.BytesIO()
+            processed.save(buffer, format="JPEG", optimize=True, quality=options.jpeg_quality)
+            result.content = buffer.getvalue()
+            result.mime_type = "image/jpeg"
+            result.preprocessed = True
+            result.new_size = processed.size
+        except Exception as exc:
+            result.preprocess_error = str(exc)
+
+    result.duration_seconds = time.perf_counter() - started
+    return result
+
+
+# ============================================================================
+# POOL
+# ============================================================================
+
+class ImageProcessingPool:
+    """
+    [C7-ID: VISION-IMAGE-POOL-002] Асинхронный фасад над ProcessPoolExecutor.
+
+    Число одновременно отправленных в пул задач ограничено числом воркеров: остальные
+    ждут на семафоре, что даёт честную метрику глубины очереди и утилизации.
+    max_workers=0 — выполнение в потоке (для окружений без fork).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        if max_workers is None:
+            max_workers = int(os.getenv("VISION_IMAGE_POOL_WORKERS", str(min(2, os.cpu_count() or 1))))
+        self.max_workers = max(0, max_workers)
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiting = 0
+        self._busy = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers or 1
+
+    async def prepare(
+        self,
+        file_content: bytes,
+        mime_type: str,
+        options: ImagePrepareOptions,
+    ) -> PreparedImage:
+        """Подготовка изображения вне event loop (исключение — только если decode невозможен)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.capacity)
+
+        enqueued = time.monotonic()
+        self._waiting += 1
+        self._update_gauges()
+        waiting = True
+        try:
+            async with self._slots:
+                self._waiting -= 1
+                waiting = False
+                self._busy += 1
+                self._update_gauges()
+                vision_image_pool_wait_seconds.observe(time.monotonic() - enqueued)
+                try:
+                    result = await self._run(loop, file_content, mime_type, options)
+                finally:
+                    self._busy -= 1
+                    self._update_gauges()
+        finally:
+            if waiting:
+                # Отмена до получения слота
+                self._waiting -= 1
+                self._update_gauges()
+        vision_image_pool_task_seconds.observe(result.duration_seconds)
+        return result
+
+    async def _run(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        file_content: bytes,
+        mime_type: str,
+        options: ImagePrepareOptions,
+    ) -> PreparedImage:
+        if self.max_workers == 0:
+            try:
+                result = await asyncio.to_thread(prepare_image, file_content, mime_type, options)
+            except Exception:
+                vision_image_pool_jobs_total.labels(status='error').inc()
+                raise
+            vision_image_pool_jobs_total.labels(status='ok').inc()
+            return result
+
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                result = await loop.run_in_executor(executor, prepare_image, file_content, mime_type, options)
+                vision_image_pool_jobs_total.labels(status='ok').inc()
+                return result
+            except BrokenProcessPool:
+                # Context7: воркер пула упал (OOM на огромном изображении) — пересоздаём пул один раз
+                vision_image_pool_jobs_total.labels(status='pool_restarted').inc()
+                logger.warning("Image processing pool broken, restarting", attempt=attempt + 1)
+                self._reset_executor(executor)
+                if attempt:
+                    raise
+            except Exception:
+                vision_image_pool_jobs_total.labels(status='error').inc()
+                raise
+        raise RuntimeError("unreachable")
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            logger.info("Image processing pool started", max_workers=self.max_workers)
+        return self._executor
+
+    def _reset_executor(self, executor: Executor) -> None:
+        if self._executor is executor:
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _update_gauges(self) -> None:
+        vision_image_pool_queue_depth.set(self._waiting)
+        vision_image_pool_busy_workers.set(self._busy)
+        vision_image_pool_utilization.set(self._busy / self.capacity)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_shared_pool: Optional[ImageProcessingPool] = None
+
+
+def get_image_processing_pool() -> ImageProcessingPool:
+    """Общий пул процесса: все vision consumer'ы делят одни и те же воркеры."""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = ImageProcessingPool()
+    return _shared_pool
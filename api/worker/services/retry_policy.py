@@ -207,7 +207,7 @@ def create_retry_decorator(
     
     def log_after(retry_state: RetryCallState):
         """Логирование после retry."""
-        if retry_state.outcome and retry_state.outcome.successful():
+        if retry_state.outcome and not retry_state.outcome.failed:
             retry_success_total.labels(operation=operation_name).inc()
     
     return retry(
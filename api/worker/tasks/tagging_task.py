@@ -23,7 +23,7 @@ from metrics import posts_processed_total
 from ai_providers.gigachain_adapter import tagging_requests_total, tagging_latency_seconds
 
 from ai_providers.gigachain_adapter import GigaChainAdapter, create_gigachain_adapter
-from event_bus import EventConsumer, RedisStreamsClient, EventPublisher, DLQ_STREAMS
+from event_bus import EventConsumer, RedisStreamsClient, EventPublisher, DLQ_STREAMS, batch_handler
 from events.schemas import PostParsedEventV1, PostTaggedEventV1
 from feature_flags import feature_flags
 
@@ -107,6 +107,8 @@ class TaggingTask:
         self._user_uuid_cache: dict[str, tuple[float, Optional[str]]] = {}
         self._topics_cache_ttl = int(os.getenv("TAGGING_TOPICS_CACHE_TTL", "900"))
         self._user_uuid_cache_ttl = int(os.getenv("TAGGING_USER_UUID_CACHE_TTL", "900"))
+        # Context7: конкурентная обработка батча стрима (микробатчинг промптов в адаптере)
+        self.batch_mode = os.getenv("TAGGING_BATCH_ENABLED", "true").lower() == "true"
         
         logger.info(f"TaggingTask initialized (group={consumer_group}, consumer={consumer_name})")
     
@@ -168,9 +170,11 @@ class TaggingTask:
             logger.info("TaggingTask started successfully")
             
             # Context7: Используем consume_forever для правильного паттерна pending → новые
+            # Батч стрима обрабатывается конкурентно, чтобы посты попали в общий промпт тегирования
+            handler = self._process_batch if self.batch_mode else self._process_single_message
             await self.event_consumer.consume_forever(
                 "posts.parsed", 
-                self._process_single_message
+                handler
             )
                     
         except Exception as e:
@@ -204,6 +208,20 @@ class TaggingTask:
             logger.error(f"Error in message processing: {e}")
             # Ошибки логируются в gigachain_adapter
     
+    @batch_handler
+    async def _process_batch(self, messages: List[Dict[str, Any]]) -> List[Optional[BaseException]]:
+        """
+        Конкурентная обработка батча posts.parsed.
+        
+        Context7: вызовы _tag_post из батча попадают в очередь микробатчера адаптера
+        и уходят в GigaChat общими промптами; ошибки возвращаются поэлементно.
+        """
+        results = await asyncio.gather(
+            *(self._process_single_message(message) for message in messages),
+            return_exceptions=True
+        )
+        return [result if isinstance(result, BaseException) else None for result in results]
+    
     async def _process_single_message(self, message: Dict[str, Any]):
         """Обработка одного сообщения с инкрементацией метрик."""
         try:
@@ -576,10 +594,8 @@ class TaggingTask:
                         )
             
             # Тегирование (с обогащенным текстом, если Vision готов)
-            results = await self.ai_adapter.generate_tags_batch(
-                [text_for_tagging],
-                force_immediate=True
-            )
+            # Context7: без force_immediate пост склеивается с конкурентными в один промпт
+            results = await self.ai_adapter.generate_tags_batch([text_for_tagging])
             
             processing_time = time.time() - start_time
             tagging_latency_seconds.labels(provider="gigachain", model="gigachat").observe(processing_time)
@@ -601,7 +617,9 @@ class TaggingTask:
         except Exception as e:
             logger.error(f"Error in AI tagging for post {parsed_event.post_id}: {e}")
             tagging_requests_total.labels(provider="gigachain", model="gigachat", success="false").inc()
-            return None
+            # Context7: ошибка провайдера/микробатчера не публикуется как пустые теги -
+            # _process_single_message пробрасывает её consumer'у (retry/DLQ)
+            raise
     
     async def _publish_tagged_event(
         self,
@@ -27,6 +27,8 @@ from services.storage_quota import StorageQuotaService
 from services.retry_policy import create_retry_decorator, DEFAULT_RETRY_CONFIG, DLQService, should_retry, classify_error
 from services.experiment_manager import VisionExperimentManager
 from shared.utils.phash import compute_phash, PhashResult
+from shared.utils.phash_index import PhashIndex
+from services.image_pipeline import PreparedImage, get_image_processing_pool
 
 # Context7: Импорты из api (ВРЕМЕННОЕ ИСКЛЮЧЕНИЕ для архитектурной границы)
 # ⚠️ КРИТИЧЕСКОЕ ПРАВИЛО: Worker НЕ должен импортировать из API
@@ -238,6 +240,17 @@ class VisionAnalysisTask:
         default_ttl = str(7 * 24 * 3600)
         self.phash_cache_ttl_seconds = int(os.getenv("VISION_PHASH_CACHE_TTL_SECONDS", default_ttl))
         self.phash_redis_prefix = os.getenv("VISION_PHASH_REDIS_PREFIX", "vision:phash")
+        # Context7: [C7-ID: VISION-PHASH-INDEX-001] Поиск почти-дубликатов (пережатые/обрезанные мемы)
+        # по расстоянию Хэмминга; 0 — только точное совпадение phash
+        self.phash_max_distance = int(os.getenv("VISION_PHASH_MAX_DISTANCE", "10"))
+        self.phash_index: Optional[PhashIndex] = None
+        if self.phash_max_distance > 0:
+            self.phash_index = PhashIndex(
+                redis_client=redis_client,
+                prefix=self.phash_redis_prefix,
+                max_distance=self.phash_max_distance,
+                ttl_seconds=self.phash_cache_ttl_seconds,
+            )
         self._low_priority_backlog_processed = False
         
         logger.info(
@@ -1386,11 +1399,25 @@ class VisionAnalysisTask:
             
             cache_key = None
             phash_result: Optional[PhashResult] = None
-            if (
-                phash_active
-                and media_file.mime_type
-                and media_file.mime_type.lower().startswith("image/")
-            ):
+            prepared_image: Optional[PreparedImage] = None
+            is_image = bool(media_file.mime_type and media_file.mime_type.lower().startswith("image/"))
+            if is_image and (phash_active or should_preprocess):
+                # Context7: [C7-ID: VISION-IMAGE-POOL-001] один decode в пуле процессов → phash + JPEG для API
+                prepared_image = await self._prepare_image_safe(
+                    file_content=file_content,
+                    mime_type=media_file.mime_type,
+                    sha256=media_file.sha256,
+                    trace_id=trace_id,
+                    preprocess_enabled=should_preprocess,
+                    roi_crop_enabled=roi_enabled,
+                    phash_active=phash_active,
+                )
+                if prepared_image is not None and prepared_image.phash_hex:
+                    phash_result = PhashResult(
+                        hash_hex=prepared_image.phash_hex,
+                        size=prepared_image.phash_size or self.phash_hash_size,
+                    )
+            if phash_active and is_image and phash_result is None and prepared_image is None:
                 phash_result = self._compute_phash_safe(
                     file_content=file_content,
                     sha256=media_file.sha256,
@@ -1451,7 +1478,8 @@ class VisionAnalysisTask:
                         analysis_prompt=analysis_prompt,
                         preprocess_enabled=should_preprocess,
                         roi_crop_enabled=roi_enabled,
-                        max_output_tokens_override=effective_max_tokens
+                        max_output_tokens_override=effective_max_tokens,
+                        prepared_image=prepared_image
                     )
                     
                     if analysis_result:
@@ -2625,6 +2653,40 @@ class VisionAnalysisTask:
         if start_id == '0':
             self._low_priority_backlog_processed = False
 
+    async def _prepare_image_safe(
+        self,
+        file_content: bytes,
+        mime_type: str,
+        sha256: Optional[str],
+        trace_id: str,
+        preprocess_enabled: bool,
+        roi_crop_enabled: bool,
+        phash_active: bool,
+    ) -> Optional[PreparedImage]:
+        """
+        Подготовка изображения в ImageProcessingPool.
+
+        None — изображение не декодируется (или пул недоступен); тогда вызывающий код
+        использует прежний путь: compute_phash + препроцессинг в адаптере.
+        """
+        options = self.vision_adapter.image_prepare_options(
+            preprocess_enabled=preprocess_enabled,
+            roi_crop_enabled=roi_crop_enabled,
+            phash_hash_size=self.phash_hash_size if phash_active else None,
+        )
+        try:
+            return await get_image_processing_pool().prepare(file_content, mime_type, options)
+        except Exception as exc:
+            logger.debug(
+                "Image pool preparation failed, using inline path",
+                extra={
+                    "sha256": (sha256[:16] + "...") if sha256 else None,
+                    "trace_id": trace_id,
+                    "error": str(exc),
+                },
+            )
+            return None
+
     def _compute_phash_safe(
         self,
         file_content: bytes,
@@ -2685,6 +2747,8 @@ class VisionAnalysisTask:
                 self.phash_cache_ttl_seconds,
                 json.dumps(payload, ensure_ascii=False, default=str),
             )
+            if self.phash_index is not None:
+                await self.phash_index.add(tenant_id, phash_hex)
         except Exception as exc:
             logger.debug(
                 "Failed to store phash cache",
@@ -2719,43 +2783,49 @@ class VisionAnalysisTask:
             cached_value = None
 
         if cached_value:
-            try:
-                payload = json.loads(cached_value)
-                cache_key = payload.get("cache_key")
-                if cache_key and self.s3_service:
-                    try:
-                        cached_analysis = await self.s3_service.get_json(cache_key)
-                        if cached_analysis:
-                            return (
-                                {
-                                    "sha256": payload.get("sha256"),
-                                    "s3_key": cache_key,
-                                    "analysis": cached_analysis,
-                                },
-                                {"source": "redis", "cache_key": cache_key, "metric_label": "phash_redis"},
-                            )
-                    except Exception as exc:
+            cached_result, cache_meta = await self._load_phash_cache_entry(
+                cached_value, phash_hex, trace_id, metric_label="phash_redis"
+            )
+            if cached_result:
+                return cached_result, cache_meta
+
+        # Context7: [C7-ID: VISION-PHASH-INDEX-001] Почти-дубликат в пределах VISION_PHASH_MAX_DISTANCE
+        if self.phash_index is not None:
+            nearest = await self.phash_index.find_nearest(tenant_id, phash_hex, exclude_exact=True)
+            if nearest:
+                near_hex, distance = nearest
+                try:
+                    near_value = await self.redis.get(self._build_phash_redis_key(tenant_id, near_hex))
+                except Exception as exc:
+                    logger.debug(
+                        "Failed to read near phash cache",
+                        extra={"tenant_id": tenant_id, "phash": near_hex, "error": str(exc)},
+                    )
+                    near_value = None
+                if near_value:
+                    cached_result, cache_meta = await self._load_phash_cache_entry(
+                        near_value, near_hex, trace_id, metric_label="phash_near"
+                    )
+                    if cached_result:
+                        cache_meta.update({"source": "redis_near", "near_phash": near_hex, "distance": distance})
+                        # Алиас под точным хэшем: повторы этого варианта попадут в exact lookup
+                        await self._store_phash_cache(
+                            tenant_id=tenant_id,
+                            phash_hex=phash_hex,
+                            result=cached_result,
+                            cache_key=cache_meta.get("cache_key"),
+                        )
                         logger.debug(
-                            "Failed to load phash cache payload from S3",
-                            extra={
-                                "cache_key": cache_key,
-                                "phash": phash_hex,
-                                "error": str(exc),
-                                "trace_id": trace_id,
-                            },
+                            "Near-duplicate phash cache hit",
+                            extra={"phash": phash_hex, "near_phash": near_hex, "distance": distance, "trace_id": trace_id},
                         )
-                analysis_result = payload.get("analysis_result")
-                if analysis_result:
-                    return analysis_result, {"source": "redis", "cache_key": analysis_result.get("s3_key"), "metric_label": "phash_redis"}
-            except Exception as exc:
-                logger.debug(
-                    "Failed to deserialize phash cache payload",
-                    extra={
-                        "phash": phash_hex,
-                        "error": str(exc),
-                        "trace_id": trace_id,
-                    },
-                )
+                        return cached_result, cache_meta
+                else:
+                    # Запись кэша истекла — убираем хэш из индекса
+                    try:
+                        await self.phash_index.remove(tenant_id, near_hex)
+                    except Exception:
+                        pass
 
         try:
             result = await self.db.execute(
@@ -2833,6 +2903,53 @@ class VisionAnalysisTask:
 
         return None, {}
 
+    async def _load_phash_cache_entry(
+        self,
+        cached_value: Any,
+        phash_hex: str,
+        trace_id: str,
+        metric_label: str,
+    ) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """Разбор записи phash-кэша Redis (анализ из S3 по cache_key или inline)."""
+        try:
+            payload = json.loads(cached_value)
+            cache_key = payload.get("cache_key")
+            if cache_key and self.s3_service:
+                try:
+                    cached_analysis = await self.s3_service.get_json(cache_key)
+                    if cached_analysis:
+                        return (
+                            {
+                                "sha256": payload.get("sha256"),
+                                "s3_key": cache_key,
+                                "analysis": cached_analysis,
+                            },
+                            {"source": "redis", "cache_key": cache_key, "metric_label": metric_label},
+                        )
+                except Exception as exc:
+                    logger.debug(
+                        "Failed to load phash cache payload from S3",
+                        extra={
+                            "cache_key": cache_key,
+                            "phash": phash_hex,
+                            "error": str(exc),
+                            "trace_id": trace_id,
+                        },
+                    )
+            analysis_result = payload.get("analysis_result")
+            if analysis_result:
+                return analysis_result, {"source": "redis", "cache_key": analysis_result.get("s3_key"), "metric_label": metric_label}
+        except Exception as exc:
+            logger.debug(
+                "Failed to deserialize phash cache payload",
+                extra={
+                    "phash": phash_hex,
+                    "error": str(exc),
+                    "trace_id": trace_id,
+                },
+            )
+        return None, {}
+
     def _build_phash_redis_key(self, tenant_id: str, phash_hex: str) -> str:
         return f"{self.phash_redis_prefix}:{tenant_id}:{phash_hex}"
 
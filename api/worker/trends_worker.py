@@ -23,14 +23,21 @@ import httpx
 import structlog
 from prometheus_client import Counter, Histogram
 
-from event_bus import EventConsumer, RedisStreamsClient, EventPublisher, ConsumerConfig
+from event_bus import EventConsumer, RedisStreamsClient, EventPublisher, ConsumerConfig, batch_handler
 from event_bus import STREAMS  # noqa: F401 (validate presence)
 from integrations.qdrant_client import QdrantClient
 from ai_providers.gigachain_adapter import create_gigachain_adapter
 from ai_providers.embedding_service import create_embedding_service, EmbeddingService
 from config import settings
 from events.schemas import TrendEmergingEventV1
-from shared.trends import TrendRedisSchema, TrendWindow, TRENDS_EMERGING_STREAM
+from shared.trends import (
+    TrendCounterEngine,
+    TrendCounterUpdate,
+    TrendCounts,
+    TrendRedisSchema,
+    TrendWindow,
+    TRENDS_EMERGING_STREAM,
+)
 
 logger = structlog.get_logger()
 
@@ -87,6 +94,12 @@ trend_card_llm_requests_total = Counter(
     ["outcome"],
 )
 
+trend_embedding_source_total = Counter(
+    "trend_embedding_source_total",
+    "Where trend worker took post embeddings from",
+    ["source"],  # source: indexed|generated|none
+)
+
 trend_cluster_sample_posts = Histogram(
     "trend_cluster_sample_posts",
     "Number of sample posts stored per cluster card",
@@ -138,6 +151,19 @@ class PostSnapshot:
     grouped_id: Optional[int] = None  # Context7: Для дедупликации альбомов
 
 
+@dataclass
+class PreparedPost:
+    """Пост, сопоставленный с кластером, до обновления Redis счётчиков."""
+    post_id: str
+    snapshot: PostSnapshot
+    embedding: Optional[List[float]]
+    cluster_id: str
+    cluster_key: str
+    coherence: float
+    novelty: float
+    started_at: float
+
+
 # ============================================================================
 # TREND DETECTION WORKER
 # ============================================================================
@@ -169,6 +195,7 @@ class TrendDetectionWorker:
         self.db_pool: Optional[asyncpg.Pool] = None
 
         self.redis_schema = TrendRedisSchema()
+        self.trend_counters: Optional[TrendCounterEngine] = None
         self.collection_name = os.getenv("TRENDS_HOT_COLLECTION", "trends_hot")
 
         self.freq_ratio_threshold = float(os.getenv("TREND_FREQ_RATIO_THRESHOLD", "3.0"))
@@ -183,6 +210,10 @@ class TrendDetectionWorker:
         self.card_llm_max_tokens = int(os.getenv("TREND_CARD_LLM_MAX_TOKENS", "400"))
         self.card_llm_refresh_minutes = int(os.getenv("TREND_CARD_REFRESH_MINUTES", "10"))
         self.cluster_sample_limit = int(os.getenv("TREND_CLUSTER_SAMPLE_LIMIT", "10"))
+        # Context7: векторы постов уже посчитаны IndexingTask - читаем их из Qdrant вместо повторного embedding
+        self.reuse_indexed_vectors = os.getenv("TREND_REUSE_INDEXED_VECTORS", "true").lower() == "true"
+        # Context7: батчевый режим - счётчики всего батча стрима одним Redis pipeline
+        self.batch_mode = os.getenv("TREND_BATCH_MODE", "true").lower() == "true"
         self.card_refresh_tracker: Dict[str, float] = {}
         user_stopwords = {
             token.strip().lower()
@@ -210,7 +241,8 @@ class TrendDetectionWorker:
         await self._initialize()
         trend_events_processed_total.labels(status="ready").inc()
         logger.info("TrendDetectionWorker initialization completed", took=time.time() - start_ts)
-        await self.event_consumer.consume_forever("posts.indexed", self._handle_message)
+        handler = self._handle_batch if self.batch_mode else self._handle_message
+        await self.event_consumer.consume_forever("posts.indexed", handler)
 
     async def stop(self):
         """Graceful shutdown."""
@@ -233,6 +265,7 @@ class TrendDetectionWorker:
         self.redis_client = RedisStreamsClient(self.redis_url)
         await self.redis_client.connect()
         self.publisher = EventPublisher(self.redis_client)
+        self.trend_counters = TrendCounterEngine(self.redis_client.client, self.redis_schema)
 
         consumer_config = ConsumerConfig(
             group_name=os.getenv("TREND_CONSUMER_GROUP", "trend_workers"),
@@ -265,6 +298,74 @@ class TrendDetectionWorker:
 
     async def _handle_message(self, message: Dict[str, Any]):
         """Process single Redis message."""
+        indexed_vectors = await self._fetch_indexed_vectors([message])
+        prepared = await self._prepare_post(message, indexed_vectors=indexed_vectors)
+        if prepared is None:
+            return
+        try:
+            counts = await self.trend_counters.record(self._counter_update(prepared))
+            await self._finalize_post(prepared, counts)
+        except Exception as exc:
+            self._record_processing_error(prepared.post_id, prepared.started_at, exc)
+            raise
+
+    @batch_handler
+    async def _handle_batch(self, messages: List[Dict[str, Any]]) -> List[Optional[Exception]]:
+        """
+        Context7: обработка батча posts.indexed одним проходом по Redis.
+
+        Посты подготавливаются по одному (snapshot, альбомы, embedding, кластер),
+        счётчики всех постов батча обновляются одним pipeline, затем каждый пост
+        финализируется. Возвращает ошибку (или None) для каждого сообщения.
+        """
+        errors: List[Optional[Exception]] = [None] * len(messages)
+        prepared: List[Tuple[int, PreparedPost]] = []
+        batch_clusters: List[Tuple[List[float], str, str]] = []
+        indexed_vectors = await self._fetch_indexed_vectors(messages)
+        for idx, message in enumerate(messages):
+            try:
+                item = await self._prepare_post(message, batch_clusters, indexed_vectors)
+            except Exception as exc:
+                errors[idx] = exc
+                continue
+            if item is not None:
+                prepared.append((idx, item))
+
+        if not prepared:
+            return errors
+
+        try:
+            counts = await self.trend_counters.record_many(
+                [self._counter_update(item) for _, item in prepared]
+            )
+        except Exception as exc:
+            for idx, item in prepared:
+                self._record_processing_error(item.post_id, item.started_at, exc)
+                errors[idx] = exc
+            return errors
+
+        for (idx, item), item_counts in zip(prepared, counts):
+            try:
+                await self._finalize_post(item, item_counts)
+            except Exception as exc:
+                self._record_processing_error(item.post_id, item.started_at, exc)
+                errors[idx] = exc
+        return errors
+
+    async def _prepare_post(
+        self,
+        message: Dict[str, Any],
+        batch_clusters: Optional[List[Tuple[List[float], str, str]]] = None,
+        indexed_vectors: Optional[Dict[str, List[float]]] = None,
+    ) -> Optional[PreparedPost]:
+        """
+        Context7: всё до обновления Redis счётчиков - snapshot, дедупликация альбомов,
+        embedding и сопоставление с кластером.
+
+        batch_clusters - новые кластеры текущего батча: Qdrant о них ещё не знает,
+        поэтому похожие посты одного батча сводятся к одному кластеру здесь.
+        indexed_vectors - векторы постов из Qdrant (post_id -> vector), см. _fetch_indexed_vectors.
+        """
         process_start = time.time()
         payload = self._extract_payload(message)
         post_id = payload.get("post_id")
@@ -275,7 +376,7 @@ class TrendDetectionWorker:
                 error="post_id missing",
                 payload_keys=list(payload.keys()),
             )
-            return
+            return None
 
         try:
             # Context7: Детальное логирование начала обработки
@@ -292,7 +393,7 @@ class TrendDetectionWorker:
                     "trend_worker_post_not_found",
                     post_id=post_id,
                 )
-                return
+                return None
 
             # Context7: Дедупликация альбомов - пропускаем посты из альбомов, если уже обработан другой пост из того же альбома
             # Для альбомов обрабатываем только пост с наивысшим engagement_score
@@ -306,12 +407,21 @@ class TrendDetectionWorker:
                         grouped_id=snapshot.grouped_id,
                     )
                     trend_worker_latency_seconds.labels(outcome="skipped_album").observe(time.time() - process_start)
-                    return
+                    return None
 
-            embedding = await self._generate_embedding(snapshot)
+            embedding = (indexed_vectors or {}).get(post_id)
+            if embedding is not None:
+                trend_embedding_source_total.labels(source="indexed").inc()
+            else:
+                embedding = await self._generate_embedding(snapshot)
+                trend_embedding_source_total.labels(source="generated" if embedding else "none").inc()
             cluster_id, cluster_key, similarity = await self._match_cluster(
                 embedding, snapshot
             )
+            if (cluster_id is None or cluster_key is None) and batch_clusters and embedding:
+                batch_match = self._match_batch_cluster(embedding, batch_clusters)
+                if batch_match:
+                    cluster_id, cluster_key, similarity = batch_match
             coherence = similarity if similarity is not None else 0.0
             novelty = max(0.0, 1.0 - coherence) if similarity is not None else 1.0
 
@@ -319,176 +429,218 @@ class TrendDetectionWorker:
                 cluster_id = str(uuid.uuid4())
                 cluster_key = self._build_cluster_key(snapshot)
                 coherence = max(coherence, 0.6)
+                if batch_clusters is not None and embedding:
+                    batch_clusters.append((embedding, cluster_id, cluster_key))
             cluster_id = self._normalize_cluster_id(cluster_id)
+        except Exception as exc:
+            self._record_processing_error(post_id, process_start, exc)
+            raise
 
-            freq_short = await self._increment_window(cluster_key, TrendWindow.SHORT_5M)
-            freq_long = await self._increment_window(cluster_key, TrendWindow.MID_1H)
-            freq_baseline = await self._increment_window(cluster_key, TrendWindow.LONG_24H)
-            source_diversity = await self._update_source_diversity(cluster_key, snapshot.channel_id)
-            expected_short_baseline = self._expected_baseline(freq_baseline, TrendWindow.SHORT_5M.seconds)
-            burst_detection = self._compute_burst(freq_short, expected_short_baseline)
-            window_mentions = freq_long
-            window_baseline = self._expected_baseline(freq_baseline, TrendWindow.MID_1H.seconds)
-            burst_window = self._compute_burst(window_mentions, window_baseline)
-            rate_of_change = freq_short - max(freq_long, 1)
-            window_end = datetime.now(timezone.utc)
-            window_start = window_end - timedelta(seconds=self.card_window_seconds)
-            summary_text = (snapshot.content or "")[:400]
-            raw_topics = snapshot.topics or []
-            raw_keywords = snapshot.keywords or []
-            raw_entities = snapshot.entities or []
-            filtered_topics = self._filter_terms(raw_topics)
-            filtered_keywords = self._filter_terms(raw_keywords)
-            filtered_entities = self._filter_terms(raw_entities)
-            candidates = filtered_entities + filtered_topics + filtered_keywords
-            if not candidates:
-                candidates = self._filter_terms(self._extract_entities_from_content(snapshot.content))
-            primary_topic = self._build_primary_label(
-                entities=filtered_entities,
-                topics=filtered_topics,
-                keywords=filtered_keywords,
-                content=snapshot.content,
-            )
-            secondary = [term for term in candidates if term != primary_topic]
-            topics = (filtered_entities + filtered_topics)[:5] or secondary[:5]
-            keywords_for_card = (filtered_keywords + filtered_topics + filtered_entities)[:10] or filtered_keywords or raw_keywords[:10]
-            why_important = self._build_why_important(
-                window_mentions=window_mentions,
-                window_baseline=window_baseline,
-                window_start=window_start,
-                window_end=window_end,
-            )
-            await self._record_cluster_sample(cluster_id, snapshot)
-            sample_posts = await self._fetch_cluster_samples(
-                cluster_id, limit=min(5, self.cluster_sample_limit)
-            )
-            if not sample_posts:
-                sample_posts = [self._snapshot_to_example(snapshot)]
-            llm_card = await self._enhance_card_with_llm(
-                cluster_id=cluster_id,
-                primary_topic=primary_topic,
-                summary=summary_text,
-                keywords=keywords_for_card,
-                topics=topics,
-                window_minutes=max(1, int(self.card_window_seconds / 60)),
-                window_mentions=window_mentions,
-                window_baseline=window_baseline,
-                sources=source_diversity,
-                sample_posts=sample_posts,
-            )
-            if llm_card:
-                primary_topic = llm_card.get("title") or primary_topic
-                summary_text = llm_card.get("summary") or summary_text
-                why_important = llm_card.get("why_important") or why_important
-                llm_topics = llm_card.get("topics")
-                if llm_topics:
-                    topics = [topic for topic in llm_card.get("topics", []) if topic][:5]
-            else:
-                summary_text = self._summarize_samples(sample_posts) or summary_text
-            card_payload = self._build_card_payload(
-                cluster_key=cluster_key,
-                title=primary_topic,
-                summary=summary_text,
-                keywords=keywords_for_card,
-                topics=topics,
-                window_start=window_start,
-                window_end=window_end,
-                window_mentions=window_mentions,
-                window_baseline=window_baseline,
-                burst_score=burst_window,
-                sources=source_diversity,
-                channels=source_diversity,
-                coherence=coherence,
-                why_important=why_important,
-                sample_posts=sample_posts,
-            )
-
-            cluster_id = await self._upsert_cluster(
-                cluster_id=cluster_id,
-                cluster_key=cluster_key,
-                snapshot=snapshot,
-                embedding=embedding,
-                coherence=coherence,
-                novelty=novelty,
-                source_diversity=source_diversity,
-                primary_topic=primary_topic,
-                summary=summary_text,
-                window_start=window_start,
-                window_end=window_end,
-                window_mentions=window_mentions,
-                freq_baseline=freq_baseline,
-                burst_window=burst_window,
-                channels_count=source_diversity,
-                why_important=why_important,
-                topics=topics,
-                card_payload=card_payload,
-            )
-            await self._upsert_metrics(
-                cluster_id=cluster_id,
-                freq_short=freq_short,
-                freq_long=freq_long,
-                freq_baseline=freq_baseline,
-                rate_of_change=rate_of_change,
-                burst_score=burst_detection,
-                source_diversity=source_diversity,
-                coherence=coherence,
-            )
-
-            # Context7: Метрики для диагностики порогов детекции
-            ratio = self._compute_burst(freq_short, expected_short_baseline)
-            trend_detection_ratio_histogram.observe(ratio)
-            trend_detection_coherence_histogram.observe(coherence)
-            trend_detection_source_diversity_histogram.observe(source_diversity)
-            
-            # Context7: Детальное логирование значений для диагностики
-            logger.debug(
-                "trend_worker_detection_values",
-                post_id=post_id,
-                cluster_key=cluster_key,
-                ratio=ratio,
-                coherence=coherence,
-                source_diversity=source_diversity,
-                freq_short=freq_short,
-                expected_baseline=expected_short_baseline,
-                freq_ratio_threshold=self.freq_ratio_threshold,
-                coherence_threshold=self.similarity_threshold,
-                min_source_diversity=self.min_source_diversity,
-            )
-
-            await self._maybe_emit_emerging(
-                cluster_id=cluster_id,
-                cluster_key=cluster_key,
-                snapshot=snapshot,
-                freq_short=freq_short,
-                expected_baseline=expected_short_baseline,
-                source_diversity=source_diversity,
-                burst_score=burst_detection,
-                coherence=coherence,
-                primary_topic=primary_topic,
-                keywords=keywords_for_card,
-            )
+        return PreparedPost(
+            post_id=post_id,
+            snapshot=snapshot,
+            embedding=embedding,
+            cluster_id=cluster_id,
+            cluster_key=cluster_key,
+            coherence=coherence,
+            novelty=novelty,
+            started_at=process_start,
+        )
 
-            # Context7: Метрика успешной обработки
-            trend_events_processed_total.labels(status="processed").inc()
-            trend_worker_latency_seconds.labels(outcome="success").observe(time.time() - process_start)
-            
-            logger.debug(
-                "trend_worker_event_processed",
-                post_id=post_id,
-                cluster_key=cluster_key,
-                processing_time_ms=int((time.time() - process_start) * 1000),
-            )
+    def _counter_update(self, prepared: PreparedPost) -> TrendCounterUpdate:
+        return TrendCounterUpdate(
+            cluster_key=prepared.cluster_key,
+            channel_id=prepared.snapshot.channel_id,
+        )
 
-        except Exception as exc:
-            trend_events_processed_total.labels(status="error").inc()
-            trend_worker_latency_seconds.labels(outcome="error").observe(time.time() - process_start)
-            logger.error(
-                "trend_worker_processing_error",
-                error=str(exc),
-                post_id=post_id,
-                exc_info=True,
-            )
-            raise
+    def _match_batch_cluster(
+        self,
+        embedding: List[float],
+        batch_clusters: List[Tuple[List[float], str, str]],
+    ) -> Optional[Tuple[str, str, float]]:
+        """Ближайший новый кластер текущего батча (косинус >= similarity_threshold)."""
+        best: Optional[Tuple[str, str, float]] = None
+        for cluster_embedding, cluster_id, cluster_key in batch_clusters:
+            similarity = self._cosine_similarity(embedding, cluster_embedding)
+            if similarity >= self.similarity_threshold and (best is None or similarity > best[2]):
+                best = (cluster_id, cluster_key, similarity)
+        return best
+
+    async def _finalize_post(self, prepared: PreparedPost, counts: TrendCounts):
+        """Context7: карточка, upsert кластера/метрик и emerging по уже обновлённым счётчикам."""
+        snapshot = prepared.snapshot
+        embedding = prepared.embedding
+        cluster_id = prepared.cluster_id
+        cluster_key = prepared.cluster_key
+        coherence = prepared.coherence
+        novelty = prepared.novelty
+        freq_short = counts.freq_short
+        freq_long = counts.freq_long
+        freq_baseline = counts.freq_baseline
+        source_diversity = counts.source_diversity
+        expected_short_baseline = self._expected_baseline(freq_baseline, TrendWindow.SHORT_5M.seconds)
+        burst_detection = self._compute_burst(freq_short, expected_short_baseline)
+        window_mentions = freq_long
+        window_baseline = self._expected_baseline(freq_baseline, TrendWindow.MID_1H.seconds)
+        burst_window = self._compute_burst(window_mentions, window_baseline)
+        rate_of_change = freq_short - max(freq_long, 1)
+        window_end = datetime.now(timezone.utc)
+        window_start = window_end - timedelta(seconds=self.card_window_seconds)
+        summary_text = (snapshot.content or "")[:400]
+        raw_topics = snapshot.topics or []
+        raw_keywords = snapshot.keywords or []
+        raw_entities = snapshot.entities or []
+        filtered_topics = self._filter_terms(raw_topics)
+        filtered_keywords = self._filter_terms(raw_keywords)
+        filtered_entities = self._filter_terms(raw_entities)
+        candidates = filtered_entities + filtered_topics + filtered_keywords
+        if not candidates:
+            candidates = self._filter_terms(self._extract_entities_from_content(snapshot.content))
+        primary_topic = self._build_primary_label(
+            entities=filtered_entities,
+            topics=filtered_topics,
+            keywords=filtered_keywords,
+            content=snapshot.content,
+        )
+        secondary = [term for term in candidates if term != primary_topic]
+        topics = (filtered_entities + filtered_topics)[:5] or secondary[:5]
+        keywords_for_card = (filtered_keywords + filtered_topics + filtered_entities)[:10] or filtered_keywords or raw_keywords[:10]
+        why_important = self._build_why_important(
+            window_mentions=window_mentions,
+            window_baseline=window_baseline,
+            window_start=window_start,
+            window_end=window_end,
+        )
+        await self._record_cluster_sample(cluster_id, snapshot)
+        sample_posts = await self._fetch_cluster_samples(
+            cluster_id, limit=min(5, self.cluster_sample_limit)
+        )
+        if not sample_posts:
+            sample_posts = [self._snapshot_to_example(snapshot)]
+        llm_card = await self._enhance_card_with_llm(
+            cluster_id=cluster_id,
+            primary_topic=primary_topic,
+            summary=summary_text,
+            keywords=keywords_for_card,
+            topics=topics,
+            window_minutes=max(1, int(self.card_window_seconds / 60)),
+            window_mentions=window_mentions,
+            window_baseline=window_baseline,
+            sources=source_diversity,
+            sample_posts=sample_posts,
+        )
+        if llm_card:
+            primary_topic = llm_card.get("title") or primary_topic
+            summary_text = llm_card.get("summary") or summary_text
+            why_important = llm_card.get("why_important") or why_important
+            llm_topics = llm_card.get("topics")
+            if llm_topics:
+                topics = [topic for topic in llm_card.get("topics", []) if topic][:5]
+        else:
+            summary_text = self._summarize_samples(sample_posts) or summary_text
+        card_payload = self._build_card_payload(
+            cluster_key=cluster_key,
+            title=primary_topic,
+            summary=summary_text,
+            keywords=keywords_for_card,
+            topics=topics,
+            window_start=window_start,
+            window_end=window_end,
+            window_mentions=window_mentions,
+            window_baseline=window_baseline,
+            burst_score=burst_window,
+            sources=source_diversity,
+            channels=source_diversity,
+            coherence=coherence,
+            why_important=why_important,
+            sample_posts=sample_posts,
+        )
+        
+        cluster_id = await self._upsert_cluster(
+            cluster_id=cluster_id,
+            cluster_key=cluster_key,
+            snapshot=snapshot,
+            embedding=embedding,
+            coherence=coherence,
+            novelty=novelty,
+            source_diversity=source_diversity,
+            primary_topic=primary_topic,
+            summary=summary_text,
+            window_start=window_start,
+            window_end=window_end,
+            window_mentions=window_mentions,
+            freq_baseline=freq_baseline,
+            burst_window=burst_window,
+            channels_count=source_diversity,
+            why_important=why_important,
+            topics=topics,
+            card_payload=card_payload,
+        )
+        await self._upsert_metrics(
+            cluster_id=cluster_id,
+            freq_short=freq_short,
+            freq_long=freq_long,
+            freq_baseline=freq_baseline,
+            rate_of_change=rate_of_change,
+            burst_score=burst_detection,
+            source_diversity=source_diversity,
+            coherence=coherence,
+        )
+        
+        # Context7: Метрики для диагностики порогов детекции
+        ratio = self._compute_burst(freq_short, expected_short_baseline)
+        trend_detection_ratio_histogram.observe(ratio)
+        trend_detection_coherence_histogram.observe(coherence)
+        trend_detection_source_diversity_histogram.observe(source_diversity)
+        
+        # Context7: Детальное логирование значений для диагностики
+        logger.debug(
+            "trend_worker_detection_values",
+            post_id=prepared.post_id,
+            cluster_key=cluster_key,
+            ratio=ratio,
+            coherence=coherence,
+            source_diversity=source_diversity,
+            freq_short=freq_short,
+            expected_baseline=expected_short_baseline,
+            freq_ratio_threshold=self.freq_ratio_threshold,
+            coherence_threshold=self.similarity_threshold,
+            min_source_diversity=self.min_source_diversity,
+        )
+        
+        await self._maybe_emit_emerging(
+            cluster_id=cluster_id,
+            cluster_key=cluster_key,
+            snapshot=snapshot,
+            freq_short=freq_short,
+            expected_baseline=expected_short_baseline,
+            source_diversity=source_diversity,
+            burst_score=burst_detection,
+            coherence=coherence,
+            primary_topic=primary_topic,
+            keywords=keywords_for_card,
+        )
+        
+        # Context7: Метрика успешной обработки
+        trend_events_processed_total.labels(status="processed").inc()
+        trend_worker_latency_seconds.labels(outcome="success").observe(time.time() - prepared.started_at)
+        
+        logger.debug(
+            "trend_worker_event_processed",
+            post_id=prepared.post_id,
+            cluster_key=cluster_key,
+            processing_time_ms=int((time.time() - prepared.started_at) * 1000),
+        )
+        
+    def _record_processing_error(self, post_id: str, process_start: float, exc: Exception):
+        trend_events_processed_total.labels(status="error").inc()
+        trend_worker_latency_seconds.labels(outcome="error").observe(time.time() - process_start)
+        logger.error(
+            "trend_worker_processing_error",
+            error=str(exc),
+            post_id=post_id,
+            exc_info=True,
+        )
 
     # ------------------------------------------------------------------ #
     # Payload helpers
@@ -692,6 +844,57 @@ class TrendDetectionWorker:
             grouped_id=record.get("grouped_id"),  # Context7: Для дедупликации альбомов
         )
 
+    async def _fetch_indexed_vectors(self, messages: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+        """
+        Context7: векторы постов, сохранённые IndexingTask, одним retrieve на коллекцию арендатора.
+
+        Коллекция - t{tenant_id}_posts, id точки - vector_id из posts.indexed (= post_id).
+        Посты без сохранённого вектора (или с вектором другой размерности) эмбеддятся заново.
+        """
+        if not self.reuse_indexed_vectors or not self.qdrant_client:
+            return {}
+
+        ids_by_collection: Dict[str, Dict[str, str]] = {}
+        for message in messages:
+            payload = self._extract_payload(message)
+            post_id = payload.get("post_id")
+            tenant_id = payload.get("tenant_id")
+            if not post_id or not tenant_id or str(tenant_id).lower() in ("default", "none"):
+                continue
+            vector_id = str(payload.get("vector_id") or post_id)
+            ids_by_collection.setdefault(f"t{tenant_id}_posts", {})[vector_id] = post_id
+
+        if not ids_by_collection:
+            return {}
+
+        collections = list(ids_by_collection)
+        results = await asyncio.gather(
+            *(
+                self.qdrant_client.retrieve_vectors(name, list(ids_by_collection[name]))
+                for name in collections
+            ),
+            return_exceptions=True,
+        )
+
+        expected_dim = None
+        if self.embedding_service and hasattr(self.embedding_service, "get_dimension"):
+            expected_dim = self.embedding_service.get_dimension()
+
+        vectors: Dict[str, List[float]] = {}
+        for name, result in zip(collections, results):
+            if isinstance(result, BaseException):
+                logger.debug("trend_worker_vector_fetch_failed", collection=name, error=str(result))
+                continue
+            for vector_id, vector in result.items():
+                if expected_dim and len(vector) != expected_dim:
+                    continue
+                if not any(vector):
+                    continue
+                post_id = ids_by_collection[name].get(vector_id)
+                if post_id:
+                    vectors[post_id] = vector
+        return vectors
+
     async def _generate_embedding(self, snapshot: PostSnapshot) -> Optional[List[float]]:
         if not self.embedding_service:
             return None
@@ -1042,13 +1245,6 @@ class TrendDetectionWorker:
     # Redis helpers
     # ------------------------------------------------------------------ #
 
-    async def _increment_window(self, cluster_key: str, window: TrendWindow) -> int:
-        key = self.redis_schema.freq_key(cluster_key, window)
-        redis = self.redis_client.client
-        value = await redis.incr(key)
-        await redis.expire(key, window.seconds)
-        return value
-
     async def _should_skip_album_post(self, snapshot: PostSnapshot) -> bool:
         """
         Context7: Проверяет, нужно ли пропустить пост из альбома.
@@ -1113,21 +1309,12 @@ class TrendDetectionWorker:
             # При ошибке не пропускаем пост
             return False
 
-    async def _update_source_diversity(self, cluster_key: str, channel_id: str) -> int:
-        redis = self.redis_client.client
-        key = self.redis_schema.source_set_key(cluster_key)
-        await redis.sadd(key, channel_id)
-        await redis.expire(key, TrendWindow.LONG_24H.seconds)
-        return await redis.scard(key)
-
     async def _is_cluster_in_cooldown(self, cluster_key: str) -> bool:
         redis = self.redis_client.client
-        key = f"{self.redis_schema.namespace}:{cluster_key}:emitted"
-        was_set = await redis.setnx(key, "1")
-        if was_set:
-            await redis.expire(key, self.emerging_cooldown_sec)
-            return False
-        return True
+        key = self.redis_schema.cooldown_key(cluster_key)
+        # Context7: SET NX EX - флаг и TTL одной командой
+        was_set = await redis.set(key, "1", nx=True, ex=self.emerging_cooldown_sec)
+        return not was_set
 
     # ------------------------------------------------------------------ #
     # Utility helpers
@@ -1162,6 +1349,13 @@ class TrendDetectionWorker:
         filtered = self._filter_terms(unique)
         return filtered[:10]
 
+    def _cosine_similarity(self, left: List[float], right: List[float]) -> float:
+        dot = sum(a * b for a, b in zip(left, right))
+        norm = (sum(a * a for a in left) ** 0.5) * (sum(b * b for b in right) ** 0.5)
+        if norm == 0:
+            return 0.0
+        return dot / norm
+
     def _serialize_embedding(self, embedding: List[float]) -> str:
         return "[" + ",".join(f"{float(v):.6f}" for v in embedding) + "]"
 
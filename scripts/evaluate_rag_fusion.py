@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Офлайн-оценка стратегий слияния гибридного RAG поиска.
+
+Context7 best practice: сравнение стратегий на замороженных результатах веток —
+без обращения к Qdrant/PostgreSQL/Neo4j, детерминированно и воспроизводимо.
+
+Формат входного JSONL (одна строка — один запрос):
+    {"query": "...", "tenant_id": "...",
+     "legs": {"qdrant": [{"post_id": "...", "score": 0.83}, ...], "fts": [...], "graph": [...]},
+     "relevant": ["post_id", ...]}
+
+Если relevant пуст, качество оценивается как overlap@k с эталонной стратегией (--reference).
+
+Запуск:
+    python scripts/evaluate_rag_fusion.py frozen_queries.jsonl [--k 10] [--strategies rrf,minmax,zscore,weighted]
+    python scripts/evaluate_rag_fusion.py frozen_queries.jsonl --capture [--since-days 7] [--max-queries 200]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+for candidate in (ROOT, ROOT / "api"):
+    if str(candidate) not in sys.path:
+        sys.path.insert(0, str(candidate))
+
+from api.services.rank_fusion import FUSION_STRATEGIES, fuse  # noqa: E402
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+def ndcg_at_k(ranked: List[str], relevant: set, k: int) -> float:
+    dcg = sum(1.0 / math.log2(i + 2) for i, pid in enumerate(ranked[:k]) if pid in relevant)
+    ideal = sum(1.0 / math.log2(i + 2) for i in range(min(len(relevant), k)))
+    return dcg / ideal if ideal else 0.0
+
+
+def mrr(ranked: List[str], relevant: set) -> float:
+    for i, pid in enumerate(ranked, start=1):
+        if pid in relevant:
+            return 1.0 / i
+    return 0.0
+
+
+def recall_at_k(ranked: List[str], relevant: set, k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(ranked[:k]) & relevant) / len(relevant)
+
+
+def _fetch_depth_until_stable(
+    legs: Dict[str, List[Dict[str, Any]]],
+    strategy: str,
+    k: int,
+    max_multiplier: int
+) -> int:
+    """
+    Глубина выборки веток, на которой top-k стабилизируется.
+
+    RAGService._hybrid_search начинает с limit * rag_fusion_fetch_multiplier и догружает
+    неисчерпанные ветки до limit * rag_fusion_max_fetch_multiplier; метрика показывает,
+    какая глубина нужна для стабильного top-k.
+    """
+    fetch_limit = k
+    max_fetch = k * max_multiplier
+    while True:
+        truncated = {name: results[:fetch_limit] for name, results in legs.items()}
+        outcome = fuse(truncated, strategy=strategy, limit=k, fetch_limit=fetch_limit)
+        if outcome.stable or fetch_limit >= max_fetch:
+            return fetch_limit
+        fetch_limit = min(fetch_limit * 2, max_fetch)
+
+
+def evaluate(
+    records: List[Dict[str, Any]],
+    strategies: List[str],
+    k: int,
+    reference: str,
+    max_multiplier: int
+) -> Dict[str, Dict[str, float]]:
+    """Средние метрики по всем запросам для каждой стратегии."""
+    totals: Dict[str, Dict[str, float]] = {s: {} for s in strategies}
+    judged = [r for r in records if r.get("relevant")]
+
+    for record in records:
+        legs = record.get("legs") or {}
+        reference_top = [h.post_id for h in fuse(legs, strategy=reference).hits[:k]]
+        relevant = set(record.get("relevant") or [])
+
+        for strategy in strategies:
+            ranked = [h.post_id for h in fuse(legs, strategy=strategy).hits]
+            metrics = totals[strategy]
+            if relevant:
+                metrics["ndcg"] = metrics.get("ndcg", 0.0) + ndcg_at_k(ranked, relevant, k)
+                metrics["mrr"] = metrics.get("mrr", 0.0) + mrr(ranked, relevant)
+                metrics["recall"] = metrics.get("recall", 0.0) + recall_at_k(ranked, relevant, k)
+            overlap = len(set(ranked[:k]) & set(reference_top)) / k if k else 0.0
+            metrics["overlap_ref"] = metrics.get("overlap_ref", 0.0) + overlap
+            depth = _fetch_depth_until_stable(legs, strategy, k, max_multiplier)
+            metrics["fetch_depth"] = metrics.get("fetch_depth", 0.0) + depth
+
+    summary: Dict[str, Dict[str, float]] = {}
+    for strategy, metrics in totals.items():
+        summary[strategy] = {}
+        for name, value in metrics.items():
+            denominator = len(judged) if name in ("ndcg", "mrr", "recall") else len(records)
+            summary[strategy][name] = round(value / denominator, 4) if denominator else 0.0
+    return summary
+
+
+# ============================================================================
+# CAPTURE
+# ============================================================================
+
+async def capture(
+    output_path: Path,
+    since_days: int,
+    max_queries: int,
+    fetch_limit: int
+) -> int:
+    """
+    Заморозка результатов веток для запросов из rag_query_history.
+
+    Выполняется в окружении API (нужны DATABASE_URL, Qdrant, Neo4j, gpt2giga-proxy).
+    """
+    from sqlalchemy import text
+    from models.database import SessionLocal
+    from api.services.rag_service import get_rag_service
+
+    rag_service = get_rag_service()
+    db = SessionLocal()
+    written = 0
+    try:
+        rows = db.execute(
+            text("""
+                SELECT DISTINCT ON (h.query_text) h.query_text, h.user_id, u.tenant_id
+                FROM rag_query_history h
+                JOIN users u ON u.id = h.user_id
+                WHERE h.created_at > NOW() - make_interval(days => :since_days)
+                ORDER BY h.query_text, h.created_at DESC
+                LIMIT :max_queries
+            """),
+            {"since_days": since_days, "max_queries": max_queries}
+        ).fetchall()
+
+        with output_path.open("w", encoding="utf-8") as fh:
+            for row in rows:
+                embedding = await rag_service._generate_embedding(row.query_text)
+                fanout = await rag_service._fanout_retrieval(
+                    row.query_text, str(row.tenant_id), fetch_limit,
+                    db=db, user_id=str(row.user_id), query_embedding=embedding
+                )
+                legs = {
+                    name: [
+                        {"post_id": str(item.get("post_id")), "score": float(item.get("score") or 0.0)}
+                        for item in fanout.results(name) if item.get("post_id")
+                    ]
+                    for name in fanout.outcomes
+                }
+                fh.write(json.dumps({
+                    "query": row.query_text,
+                    "tenant_id": str(row.tenant_id),
+                    "legs": legs,
+                    "relevant": []
+                }, ensure_ascii=False) + "\n")
+                written += 1
+    finally:
+        db.close()
+    return written
+
+
+def load_records(path: Path) -> List[Dict[str, Any]]:
+    with path.open(encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline evaluation of RAG fusion strategies")
+    parser.add_argument("path", type=Path, help="JSONL с замороженными результатами веток")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--strategies", default=",".join(FUSION_STRATEGIES))
+    parser.add_argument("--reference", default="weighted", choices=FUSION_STRATEGIES)
+    parser.add_argument("--max-fetch-multiplier", type=int, default=4)
+    parser.add_argument("--capture", action="store_true", help="Заморозить live-результаты в path")
+    parser.add_argument("--since-days", type=int, default=int(os.getenv("EVAL_SINCE_DAYS", "7")))
+    parser.add_argument("--max-queries", type=int, default=200)
+    parser.add_argument("--fetch-limit", type=int, default=40)
+    args = parser.parse_args(argv)
+
+    if args.capture:
+        written = asyncio.run(capture(args.path, args.since_days, args.max_queries, args.fetch_limit))
+        print(f"Captured {written} queries -> {args.path}")
+        return 0
+
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = [s for s in strategies if s not in FUSION_STRATEGIES]
+    if unknown:
+        parser.error(f"Unknown strategies: {', '.join(unknown)}")
+
+    records = load_records(args.path)
+    summary = evaluate(records, strategies, args.k, args.reference, args.max_fetch_multiplier)
+
+    print(f"Queries: {len(records)} (judged: {sum(1 for r in records if r.get('relevant'))}), k={args.k}")
+    columns = ["ndcg", "mrr", "recall", "overlap_ref", "fetch_depth"]
+    print(f"{'strategy':<10} " + " ".join(f"{c:>12}" for c in columns))
+    for strategy, metrics in summary.items():
+        print(f"{strategy:<10} " + " ".join(f"{metrics.get(c, 0.0):>12.4f}" for c in columns))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
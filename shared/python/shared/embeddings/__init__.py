@@ -0,0 +1,17 @@
+"""
+Shared helpers for embedding generation.
+
+Context7: нормализация текста и content-addressed кэш эмбеддингов,
+общие для worker (индексация, тренды) и API (RAG, дайджесты).
+"""
+
+from .text import normalize_text  # noqa: F401
+from .cache import EmbeddingCache, embedding_cache_key, encode_vector, decode_vector  # noqa: F401
+
+__all__ = [
+    "normalize_text",
+    "EmbeddingCache",
+    "embedding_cache_key",
+    "encode_vector",
+    "decode_vector",
+]
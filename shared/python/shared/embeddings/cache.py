@@ -0,0 +1,338 @@
+"""
+Content-addressed кэш эмбеддингов.
+[C7-ID: AI-EMBEDDING-CACHE-001]
+
+Context7 best practice: ключ = sha256(normalize_text(text)) + модель + размерность, поэтому
+репосты и форварды одного текста из разных каналов не уходят в GigaChat повторно.
+
+Два уровня:
+- in-process LRU (ограничен по числу векторов и по байтам);
+- Redis: компактные blob'ы float16/float32 вместо JSON-списков, TTL и ограничение
+  числа ключей через индекс-ZSET (самые старые записи вытесняются).
+
+Redis клиент может быть синхронным или асинхронным (redis.asyncio) и должен работать
+с decode_responses=False.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import struct
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import structlog
+from prometheus_client import Counter, Gauge
+
+from .text import normalize_text
+
+logger = structlog.get_logger()
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+embedding_cache_requests_total = Counter(
+    'embedding_cache_requests_total',
+    'Embedding cache lookups by tier and result',
+    ['tier', 'result']  # tier: lru, redis; result: hit, miss
+)
+
+embedding_cache_evictions_total = Counter(
+    'embedding_cache_evictions_total',
+    'Embedding cache evictions by tier',
+    ['tier']
+)
+
+embedding_cache_errors_total = Counter(
+    'embedding_cache_errors_total',
+    'Embedding cache Redis errors',
+    ['operation']
+)
+
+embedding_cache_lru_bytes = Gauge(
+    'embedding_cache_lru_bytes',
+    'Bytes held by the in-process embedding LRU'
+)
+
+# ============================================================================
+# ENCODING
+# ============================================================================
+
+# Первый байт blob'а — код формата, чтобы смена EMBEDDING_CACHE_DTYPE не ломала чтение
+_DTYPE_CODES = {"float16": b"e", "float32": b"f"}
+_CODE_FORMATS = {b"e": ("e", 2), b"f": ("f", 4)}
+
+
+def encode_vector(vector: Sequence[float], dtype: str = "float16") -> bytes:
+    """Упаковка вектора в little-endian blob (float16 — 2 байта на компоненту)."""
+    code = _DTYPE_CODES.get(dtype)
+    if code is None:
+        raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+    fmt, _ = _CODE_FORMATS[code]
+    return code + struct.pack(f"<{len(vector)}{fmt}", *vector)
+
+
+def decode_vector(blob: bytes) -> List[float]:
+    """Распаковка blob'а, созданного encode_vector."""
+    code = blob[:1]
+    if code not in _CODE_FORMATS:
+        raise ValueError("Unknown embedding blob format")
+    fmt, size = _CODE_FORMATS[code]
+    count = (len(blob) - 1) // size
+    return list(struct.unpack(f"<{count}{fmt}", blob[1:1 + count * size]))
+
+
+def embedding_cache_key(text: str, model: str, dimension: int, namespace: str = "emb") -> str:
+    """Ключ кэша: хэш нормализованного текста + модель + размерность."""
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{namespace}:{model}:{dimension}:{digest}"
+
+
+async def _maybe_await(value: Any) -> Any:
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+ComputeFn = Callable[[List[str]], Awaitable[Sequence[Any]]]
+
+
+class EmbeddingCache:
+    """
+    [C7-ID: AI-EMBEDDING-CACHE-002] Двухуровневый кэш эмбеддингов (LRU + Redis).
+
+    Размерность может быть не известна заранее (API не знает, какую модель выставил
+    gpt2giga-proxy): тогда она берётся из первого вычисленного вектора или из
+    указателя `{namespace}:dim:{model}`, который записывает любой писатель кэша.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        dimension: Optional[int] = None,
+        redis_client: Optional[Any] = None,
+        namespace: str = "emb",
+        lru_max_items: int = 10000,
+        lru_max_bytes: int = 64 * 1024 * 1024,
+        redis_ttl_seconds: int = 30 * 24 * 3600,
+        redis_max_items: int = 500000,
+        dtype: str = "float16",
+    ):
+        if dtype not in _DTYPE_CODES:
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+        self.model = model
+        self.dimension = dimension
+        self.redis_client = redis_client
+        self.namespace = namespace
+        self.lru_max_items = max(0, lru_max_items)
+        self.lru_max_bytes = max(0, lru_max_bytes)
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.redis_max_items = redis_max_items
+        self.dtype = dtype
+
+        # LRU хранит blob'ы: компактнее списков float и не мутируется вызывающим кодом
+        self._lru: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lru_bytes = 0
+        self._index_key = f"{namespace}:index:{model}"
+        self._dimension_key = f"{namespace}:dim:{model}"
+        self._writes_since_trim = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def key_for(self, text: str, dimension: Optional[int] = None) -> Optional[str]:
+        dim = dimension or self.dimension
+        if not dim:
+            return None
+        return embedding_cache_key(text, self.model, dim, self.namespace)
+
+    async def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Поиск векторов: сначала LRU, затем одним MGET в Redis."""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        if not texts:
+            return results
+        if not self.dimension:
+            await self._load_dimension()
+        keys = [self.key_for(text) for text in texts]
+        if keys[0] is None:
+            embedding_cache_requests_total.labels(tier='lru', result='miss').inc(len(texts))
+            return results
+
+        redis_pending: List[int] = []
+        for i, key in enumerate(keys):
+            blob = self._lru_get(key)
+            if blob is not None:
+                results[i] = decode_vector(blob)
+                embedding_cache_requests_total.labels(tier='lru', result='hit').inc()
+            else:
+                embedding_cache_requests_total.labels(tier='lru', result='miss').inc()
+                redis_pending.append(i)
+
+        if redis_pending and self.redis_client is not None:
+            try:
+                blobs = await _maybe_await(self.redis_client.mget([keys[i] for i in redis_pending]))
+            except Exception as e:
+                embedding_cache_errors_total.labels(operation='mget').inc()
+                logger.warning("embedding_cache_redis_get_failed", error=str(e))
+                blobs = [None] * len(redis_pending)
+            for i, blob in zip(redis_pending, blobs):
+                if blob:
+                    try:
+                        results[i] = decode_vector(blob)
+                    except ValueError:
+                        embedding_cache_requests_total.labels(tier='redis', result='miss').inc()
+                        continue
+                    self._lru_put(keys[i], blob)
+                    embedding_cache_requests_total.labels(tier='redis', result='hit').inc()
+                else:
+                    embedding_cache_requests_total.labels(tier='redis', result='miss').inc()
+        return results
+
+    async def set_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Запись векторов в оба уровня (Redis — одним pipeline)."""
+        entries: Dict[str, bytes] = {}
+        for text, vector in zip(texts, vectors):
+            if not vector or not any(vector):
+                # Пустые и нулевые (fallback) векторы не кэшируем
+                continue
+            self._learn_dimension(len(vector))
+            key = self.key_for(text, dimension=len(vector))
+            blob = encode_vector(vector, self.dtype)
+            self._lru_put(key, blob)
+            entries[key] = blob
+
+        if not entries or self.redis_client is None:
+            return
+        try:
+            now = time.time()
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, blob in entries.items():
+                pipe.set(key, blob, ex=self.redis_ttl_seconds)
+            pipe.zadd(self._index_key, {key: now for key in entries})
+            pipe.set(self._dimension_key, str(self.dimension))
+            await _maybe_await(pipe.execute())
+            self._writes_since_trim += len(entries)
+            if self.redis_max_items and self._writes_since_trim >= max(100, self.redis_max_items // 100):
+                self._writes_since_trim = 0
+                await self._trim_redis()
+        except Exception as e:
+            embedding_cache_errors_total.labels(operation='set').inc()
+            logger.warning("embedding_cache_redis_set_failed", error=str(e))
+
+    async def get_or_compute(self, texts: Sequence[str], compute: ComputeFn) -> List[Any]:
+        """
+        Векторы для texts; промахи вычисляются одним вызовом compute(missing_texts).
+
+        Одинаковые (после нормализации) тексты внутри вызова вычисляются один раз.
+        compute может вернуть исключение на позиции текста — оно пробрасывается
+        вызывающему в результате и не кэшируется.
+        """
+        results: List[Any] = list(await self.get_many(texts))
+
+        missing: "OrderedDict[str, List[int]]" = OrderedDict()
+        for i, text in enumerate(texts):
+            if results[i] is None:
+                missing.setdefault(normalize_text(text), []).append(i)
+        if not missing:
+            return results
+
+        representatives = [texts[positions[0]] for positions in missing.values()]
+        computed = await compute(representatives)
+
+        to_store_texts: List[str] = []
+        to_store_vectors: List[Sequence[float]] = []
+        for text, positions, vector in zip(representatives, missing.values(), computed):
+            for i in positions:
+                results[i] = vector
+            if not isinstance(vector, BaseException) and vector:
+                to_store_texts.append(text)
+                to_store_vectors.append(vector)
+
+        if to_store_texts:
+            await self.set_many(to_store_texts, to_store_vectors)
+        return results
+
+    async def get_or_compute_one(self, text: str, compute: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+        """Одиночный вариант get_or_compute (исключение compute пробрасывается)."""
+        async def _compute(batch: List[str]) -> List[List[float]]:
+            return [await compute(batch[0])]
+
+        return (await self.get_or_compute([text], _compute))[0]
+
+    def clear_local(self) -> None:
+        self._lru.clear()
+        self._lru_bytes = 0
+        embedding_cache_lru_bytes.set(0)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _learn_dimension(self, dimension: int) -> None:
+        if self.dimension != dimension:
+            if self.dimension:
+                logger.warning(
+                    "embedding_cache_dimension_changed",
+                    model=self.model,
+                    old_dim=self.dimension,
+                    new_dim=dimension
+                )
+            self.dimension = dimension
+
+    async def _load_dimension(self) -> None:
+        if self.redis_client is None:
+            return
+        try:
+            value = await _maybe_await(self.redis_client.get(self._dimension_key))
+        except Exception as e:
+            embedding_cache_errors_total.labels(operation='get_dimension').inc()
+            logger.debug("embedding_cache_dimension_lookup_failed", error=str(e))
+            return
+        if value:
+            try:
+                self.dimension = int(value)
+            except (TypeError, ValueError):
+                pass
+
+    def _lru_get(self, key: str) -> Optional[bytes]:
+        blob = self._lru.get(key)
+        if blob is not None:
+            self._lru.move_to_end(key)
+        return blob
+
+    def _lru_put(self, key: str, blob: bytes) -> None:
+        if not self.lru_max_items or len(blob) > self.lru_max_bytes:
+            return
+        previous = self._lru.pop(key, None)
+        if previous is not None:
+            self._lru_bytes -= len(previous)
+        self._lru[key] = blob
+        self._lru_bytes += len(blob)
+        while self._lru and (len(self._lru) > self.lru_max_items or self._lru_bytes > self.lru_max_bytes):
+            _, evicted = self._lru.popitem(last=False)
+            self._lru_bytes -= len(evicted)
+            embedding_cache_evictions_total.labels(tier='lru').inc()
+        embedding_cache_lru_bytes.set(self._lru_bytes)
+
+    async def _trim_redis(self) -> None:
+        """Вытеснение самых старых записей Redis сверх redis_max_items."""
+        size = await _maybe_await(self.redis_client.zcard(self._index_key))
+        excess = int(size or 0) - self.redis_max_items
+        if excess <= 0:
+            return
+        stale = await _maybe_await(self.redis_client.zrange(self._index_key, 0, excess - 1))
+        if not stale:
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.delete(*stale)
+        pipe.zrem(self._index_key, *stale)
+        await _maybe_await(pipe.execute())
+        embedding_cache_evictions_total.labels(tier='redis').inc(len(stale))
+        logger.info("embedding_cache_redis_trimmed", model=self.model, evicted=len(stale))
@@ -0,0 +1,37 @@
+"""
+Нормализация текста перед генерацией эмбеддингов.
+
+Context7: единая реализация для worker и API — от неё зависит ключ кэша эмбеддингов,
+поэтому оба сервиса обязаны нормализовать текст одинаково.
+"""
+
+import re
+import unicodedata
+
+
+def normalize_text(s: str) -> str:
+    """
+    [C7-ID: EMBEDDING-TEXT-NORM-001] Нормализация текста для эмбеддингов.
+    
+    Context7 best practice: нормализация OCR и плохоформатированного текста.
+    - NFC normalization (унификация Unicode символов)
+    - Удаление zero-width символов
+    - Схлопывание множественных пробелов и переносов строк в одиночные пробелы
+    - Удаление начальных/конечных пробелов
+    
+    Особенно важно для OCR текста, который часто содержит:
+    - Множественные переносы строк (\n\n\n)
+    - Неправильные пробелы и табуляции
+    - Zero-width символы
+    """
+    if not s:
+        return ""
+    # NFC normalization для унификации Unicode символов
+    s = unicodedata.normalize("NFC", s)
+    # Удаление zero-width символов
+    s = s.replace("\u200b", "").replace("\u200c", "").replace("\u200d", "")
+    # Context7: Схлопывание всех видов whitespace (пробелы, табы, переносы строк) в одиночные пробелы
+    # Используем \s+ который включает: пробелы, табы, переносы строк, non-breaking spaces и др.
+    s = re.sub(r"\s+", " ", s)
+    # Удаление начальных/конечных пробелов
+    return s.strip()
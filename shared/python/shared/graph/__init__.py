@@ -0,0 +1,23 @@
+"""
+Shared helpers for the Neo4j graph.
+
+Context7: схема (ограничения и индексы) одна для worker и API.
+"""
+
+from .schema import (  # noqa: F401
+    GRAPH_SCHEMA,
+    SCAN_OPERATORS,
+    SchemaRule,
+    ensure_graph_schema,
+    find_scans,
+    schema_bootstrap_enabled,
+)
+
+__all__ = [
+    "GRAPH_SCHEMA",
+    "SCAN_OPERATORS",
+    "SchemaRule",
+    "ensure_graph_schema",
+    "find_scans",
+    "schema_bootstrap_enabled",
+]
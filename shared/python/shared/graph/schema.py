@@ -0,0 +1,151 @@
+"""
+Схема Neo4j: ограничения уникальности и индексы для MERGE/MATCH паттернов.
+[C7-ID: NEO4J-SCHEMA-001]
+
+Context7 best practice: каждый MERGE (:Label {key: ...}) и MATCH по ключу опирается на
+индекс. Без ограничений на свежей или восстановленной базе такие запросы деградируют до
+NodeByLabelScan. Bootstrap идемпотентен (IF NOT EXISTS) и вызывается при подключении
+worker (Neo4jClient) и API (GraphService).
+
+Если уникальность нельзя создать из-за уже существующих дублей, вместо ограничения
+создаётся обычный range-индекс - MERGE остаётся index seek, дубли логируются.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Операторы плана, означающие полный перебор узлов метки/базы
+SCAN_OPERATORS = frozenset({"AllNodesScan", "NodeByLabelScan"})
+
+
+@dataclass(frozen=True)
+class SchemaRule:
+    """Ограничение уникальности (unique=True) или range-индекс по свойствам метки."""
+
+    name: str
+    label: str
+    properties: Tuple[str, ...]
+    unique: bool = True
+
+    def _properties_clause(self) -> str:
+        props = ", ".join(f"n.{prop}" for prop in self.properties)
+        return props if len(self.properties) == 1 else f"({props})"
+
+    def cypher(self) -> str:
+        # Команды схемы не принимают параметры; имена берутся только из GRAPH_SCHEMA
+        if self.unique:
+            return (
+                f"CREATE CONSTRAINT {self.name} IF NOT EXISTS "
+                f"FOR (n:{self.label}) REQUIRE {self._properties_clause()} IS UNIQUE"
+            )
+        return self.index_cypher(self.name)
+
+    def index_cypher(self, name: str) -> str:
+        props = ", ".join(f"n.{prop}" for prop in self.properties)
+        return f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{self.label}) ON ({props})"
+
+
+GRAPH_SCHEMA: Tuple[SchemaRule, ...] = (
+    # Ключи MERGE из worker/integrations/neo4j_client.py
+    SchemaRule("post_post_id_unique", "Post", ("post_id",)),
+    SchemaRule("channel_channel_id_unique", "Channel", ("channel_id",)),
+    SchemaRule("user_user_id_unique", "User", ("user_id",)),
+    SchemaRule("tag_name_unique", "Tag", ("name",)),
+    SchemaRule("topic_name_unique", "Topic", ("name",)),
+    SchemaRule("label_name_unique", "Label", ("name",)),
+    SchemaRule("album_album_id_unique", "Album", ("album_id",)),
+    SchemaRule("image_sha256_unique", "Image", ("sha256",)),
+    SchemaRule("webpage_url_unique", "WebPage", ("url",)),
+    SchemaRule("author_key_unique", "Author", ("author_id", "author_type")),
+    SchemaRule("forward_source_key_unique", "ForwardSource", ("source_id", "source_type")),
+    SchemaRule("entity_key_unique", "Entity", ("name", "type")),
+    SchemaRule("persona_key_unique", "Persona", ("user_id", "tenant_id")),
+    SchemaRule("dialogue_key_unique", "Dialogue", ("dialogue_id", "user_id", "tenant_id")),
+    # Ключи MERGE из api/services/graph_service.py
+    SchemaRule("group_key_unique", "Group", ("group_id", "tenant_id")),
+    SchemaRule("conversation_digest_id_unique", "Conversation", ("digest_id",)),
+    SchemaRule("participant_key_unique", "Participant", ("participant_key",)),
+    # Поиск исходных постов для REPLIES_TO / FORWARDED_FROM_POST и очистка по TTL
+    SchemaRule("post_telegram_message_id", "Post", ("telegram_message_id",), unique=False),
+    SchemaRule("post_channel_message", "Post", ("channel_id", "telegram_message_id"), unique=False),
+    SchemaRule("post_expires_at", "Post", ("expires_at",), unique=False),
+    SchemaRule("post_tenant_id", "Post", ("tenant_id",), unique=False),
+)
+
+
+def schema_bootstrap_enabled() -> bool:
+    return os.getenv("NEO4J_SCHEMA_BOOTSTRAP", "true").lower() in ("1", "true", "yes")
+
+
+async def _run_schema(session: Any, cypher: str) -> None:
+    result = await session.run(cypher)
+    await result.consume()
+
+
+async def ensure_graph_schema(
+    driver: Any,
+    rules: Iterable[SchemaRule] = GRAPH_SCHEMA,
+    database: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    Идемпотентное создание ограничений и индексов.
+
+    Каждая команда выполняется отдельной auto-commit транзакцией: ошибка одного правила
+    не мешает остальным и не роняет старт сервиса.
+
+    Returns:
+        {rule_name: "ok" | "index_fallback" | "error"}
+    """
+    statuses: Dict[str, str] = {}
+    session_kwargs = {"database": database} if database else {}
+    async with driver.session(**session_kwargs) as session:
+        for rule in rules:
+            try:
+                await _run_schema(session, rule.cypher())
+                statuses[rule.name] = "ok"
+                continue
+            except Exception as e:
+                if not rule.unique:
+                    statuses[rule.name] = "error"
+                    logger.error("Failed to create Neo4j index", rule=rule.name, error=str(e))
+                    continue
+                # Чаще всего - дубли в существующих данных
+                logger.error("Failed to create Neo4j uniqueness constraint, falling back to index",
+                             rule=rule.name,
+                             label=rule.label,
+                             properties=list(rule.properties),
+                             error=str(e))
+            try:
+                await _run_schema(session, rule.index_cypher(f"{rule.name}_index"))
+                statuses[rule.name] = "index_fallback"
+            except Exception as e:
+                statuses[rule.name] = "error"
+                logger.error("Failed to create fallback Neo4j index", rule=rule.name, error=str(e))
+
+    failed = sorted(name for name, status in statuses.items() if status != "ok")
+    logger.info("Neo4j schema bootstrap completed",
+                rules=len(statuses),
+                degraded=failed)
+    return statuses
+
+
+def find_scans(plan: Any) -> List[str]:
+    """
+    Операторы полного перебора в плане EXPLAIN/PROFILE (neo4j ResultSummary.plan/profile).
+
+    Имена операторов в Neo4j 5 могут иметь суффикс runtime ("NodeByLabelScan@neo4j").
+    """
+    if not plan:
+        return []
+    operator = str(plan.get("operatorType", "")).split("@", 1)[0]
+    scans = [operator] if operator in SCAN_OPERATORS else []
+    for child in plan.get("children") or []:
+        scans.extend(find_scans(child))
+    return scans
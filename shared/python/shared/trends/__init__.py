@@ -11,12 +11,20 @@ from .redis_schema import (  # noqa: F401
     TRENDS_EMERGING_STREAM,
     FREQUENCY_WINDOWS_MINUTES,
 )
+from .counters import (  # noqa: F401
+    TrendCounterEngine,
+    TrendCounterUpdate,
+    TrendCounts,
+)
 
 __all__ = [
     "TrendRedisSchema",
     "TrendWindow",
     "TRENDS_EMERGING_STREAM",
     "FREQUENCY_WINDOWS_MINUTES",
+    "TrendCounterEngine",
+    "TrendCounterUpdate",
+    "TrendCounts",
 ]
 
 
@@ -0,0 +1,161 @@
+"""
+Sliding-window trend counters on Redis.
+
+Context7: частоты упоминаний кластера хранятся кольцом временных бакетов
+(HASH bucket_index -> count), поэтому окно действительно скользящее, а не
+«сбрасывается» при каждом EXPIRE. Разнообразие источников считается через
+HyperLogLog по бакетам: PFCOUNT по нескольким ключам даёт объединение за окно.
+
+Все обновления по посту выполняются одним Lua скриптом; батч постов - одним
+pipeline из EVALSHA (один round-trip на батч стрима).
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .redis_schema import TrendRedisSchema, TrendWindow
+
+# Размер бакета для каждого окна: погрешность скользящего окна не больше одного бакета
+WINDOW_BUCKET_SECONDS: Dict[TrendWindow, int] = {
+    TrendWindow.SHORT_5M: 30,
+    TrendWindow.MID_1H: 5 * 60,
+    TrendWindow.LONG_24H: 60 * 60,
+}
+
+SOURCE_WINDOW = TrendWindow.LONG_24H
+SOURCE_BUCKET_SECONDS = 60 * 60
+
+COUNTER_WINDOWS: Tuple[TrendWindow, ...] = (
+    TrendWindow.SHORT_5M,
+    TrendWindow.MID_1H,
+    TrendWindow.LONG_24H,
+)
+
+# KEYS: ring-ключи окон (по порядку COUNTER_WINDOWS), затем HLL ключи источников
+#       (первый - текущий бакет, остальные - предыдущие бакеты окна)
+# ARGV: channel_id, затем для каждого окна: current_bucket, oldest_bucket, ttl; затем hll_ttl
+TREND_COUNTERS_LUA = """
+local windows = #KEYS - tonumber(ARGV[2])
+local result = {}
+for i = 1, windows do
+    local key = KEYS[i]
+    local base = 3 + (i - 1) * 3
+    local current = ARGV[base]
+    local oldest = tonumber(ARGV[base + 1])
+    local ttl = tonumber(ARGV[base + 2])
+    redis.call('HINCRBY', key, current, 1)
+    local fields = redis.call('HGETALL', key)
+    local total = 0
+    for j = 1, #fields, 2 do
+        local bucket = tonumber(fields[j])
+        if bucket < oldest then
+            redis.call('HDEL', key, fields[j])
+        else
+            total = total + tonumber(fields[j + 1])
+        end
+    end
+    redis.call('EXPIRE', key, ttl)
+    result[i] = total
+end
+local hll_ttl = tonumber(ARGV[3 + windows * 3])
+local hll_keys = {}
+for i = windows + 1, #KEYS do
+    hll_keys[#hll_keys + 1] = KEYS[i]
+end
+if ARGV[1] ~= '' then
+    redis.call('PFADD', hll_keys[1], ARGV[1])
+    redis.call('EXPIRE', hll_keys[1], hll_ttl)
+end
+result[windows + 1] = redis.call('PFCOUNT', unpack(hll_keys))
+return result
+"""
+
+
+@dataclass(frozen=True)
+class TrendCounterUpdate:
+    """Одно упоминание кластера постом."""
+
+    cluster_key: str
+    channel_id: Optional[str]
+    timestamp: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class TrendCounts:
+    """Скользящие счётчики кластера после применения обновления."""
+
+    freq_short: int
+    freq_long: int
+    freq_baseline: int
+    source_diversity: int
+
+
+class TrendCounterEngine:
+    """
+    Движок trend-счётчиков поверх TrendRedisSchema.
+
+    Redis клиент - redis.asyncio.Redis (используются register_script и pipeline).
+    """
+
+    def __init__(self, redis_client: Any, schema: Optional[TrendRedisSchema] = None):
+        self.redis = redis_client
+        self.schema = schema or TrendRedisSchema()
+        self._script = redis_client.register_script(TREND_COUNTERS_LUA)
+
+    def build_call(self, update: TrendCounterUpdate, now: Optional[float] = None) -> Tuple[List[str], List[Any]]:
+        """KEYS/ARGV Lua скрипта для одного обновления."""
+        ts = update.timestamp if update.timestamp is not None else (now if now is not None else time.time())
+        keys: List[str] = []
+        args: List[Any] = [update.channel_id or ""]
+
+        source_buckets = SOURCE_WINDOW.seconds // SOURCE_BUCKET_SECONDS
+        args.append(source_buckets)
+
+        for window in COUNTER_WINDOWS:
+            bucket_seconds = WINDOW_BUCKET_SECONDS[window]
+            buckets = window.seconds // bucket_seconds
+            current = int(ts // bucket_seconds)
+            keys.append(self.schema.freq_ring_key(update.cluster_key, window))
+            args.extend([current, current - buckets + 1, window.seconds + bucket_seconds])
+
+        current_source = int(ts // SOURCE_BUCKET_SECONDS)
+        for offset in range(source_buckets):
+            keys.append(self.schema.source_hll_key(update.cluster_key, current_source - offset))
+        args.append(SOURCE_WINDOW.seconds + SOURCE_BUCKET_SECONDS)
+        return keys, args
+
+    @staticmethod
+    def parse_result(raw: Sequence[Any]) -> TrendCounts:
+        values = [int(value) for value in raw]
+        return TrendCounts(
+            freq_short=values[0],
+            freq_long=values[1],
+            freq_baseline=values[2],
+            source_diversity=values[3],
+        )
+
+    async def record(self, update: TrendCounterUpdate) -> TrendCounts:
+        """Применить одно обновление (один EVALSHA)."""
+        keys, args = self.build_call(update)
+        raw = await self._script(keys=keys, args=args)
+        return self.parse_result(raw)
+
+    async def record_many(self, updates: Sequence[TrendCounterUpdate]) -> List[TrendCounts]:
+        """
+        Применить обновления батча одним pipeline.
+
+        Скрипты выполняются по порядку, поэтому посты одного кластера в батче
+        получают последовательные значения счётчиков - как при обработке по одному.
+        """
+        if not updates:
+            return []
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        for update in updates:
+            keys, args = self.build_call(update, now=now)
+            await self._script(keys=keys, args=args, client=pipe)
+        raw_results = await pipe.execute()
+        return [self.parse_result(raw) for raw in raw_results]
@@ -46,6 +46,10 @@ class TrendRedisSchema:
         """Ключ для частоты упоминаний (time-series bucket)."""
         return f"{self.namespace}:{cluster_id}:freq:{window.value}"
 
+    def freq_ring_key(self, cluster_id: str, window: TrendWindow) -> str:
+        """Кольцо временных бакетов окна (HASH bucket_index -> count)."""
+        return f"{self.namespace}:{cluster_id}:freq:{window.value}:ring"
+
     def roc_key(self, cluster_id: str) -> str:
         """Ключ для rate-of-change."""
         return f"{self.namespace}:{cluster_id}:roc"
@@ -58,6 +62,14 @@ class TrendRedisSchema:
         """Множество источников (для source diversity)."""
         return f"{self.namespace}:{cluster_id}:sources"
 
+    def source_hll_key(self, cluster_id: str, bucket: int) -> str:
+        """HyperLogLog источников за один бакет (для source diversity по окну)."""
+        return f"{self.namespace}:{cluster_id}:sources:hll:{bucket}"
+
+    def cooldown_key(self, cluster_id: str) -> str:
+        """Флаг cooldown после публикации emerging события."""
+        return f"{self.namespace}:{cluster_id}:emitted"
+
     def coherence_key(self, cluster_id: str) -> str:
         """Последнее значение coherence score."""
         return f"{self.namespace}:{cluster_id}:coherence"
@@ -3,7 +3,9 @@
 # Context7: Опциональный импорт phash - не блокирует другие утилиты
 try:
     from .phash import PhashResult, compute_phash, hamming_distance
+    from .phash_index import PhashIndex
     __all__ = [
+        "PhashIndex",
         "PhashResult",
         "compute_phash",
         "hamming_distance",
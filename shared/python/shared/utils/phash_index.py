@@ -0,0 +1,188 @@
+"""
+Индекс ближайших perceptual hash по расстоянию Хэмминга (multi-index hashing).
+[C7-ID: VISION-PHASH-INDEX-001]
+
+Context7 best practice: phash делится на (max_distance + 1) непересекающихся кусков.
+По принципу Дирихле у двух хэшей с расстоянием <= max_distance хотя бы один кусок
+совпадает точно, поэтому кандидаты ищутся точными lookup'ами по кускам (Redis SET на
+кусок), а расстояние проверяется только для них через hamming_distance.
+
+Ключи: `{prefix}:mih:{tenant_id}:{hex_len}:{num_chunks}:{chunk_index}:{chunk_hex}` —
+длина хэша и число кусков входят в ключ, поэтому смена VISION_PHASH_HASH_SIZE или
+max_distance не смешивает несовместимые разбиения.
+
+Redis клиент может быть синхронным или асинхронным, decode_responses любой.
+"""
+
+from __future__ import annotations
+
+import inspect
+from typing import Any, List, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter, Histogram
+
+from .phash import hamming_distance
+
+logger = structlog.get_logger()
+
+phash_index_lookups_total = Counter(
+    'phash_index_lookups_total',
+    'Near-duplicate phash index lookups',
+    ['result']  # hit, miss, error
+)
+
+phash_index_match_distance = Histogram(
+    'phash_index_match_distance',
+    'Hamming distance of the nearest phash returned by the index',
+    buckets=(0, 1, 2, 4, 6, 8, 10, 12, 16, 24, 32)
+)
+
+phash_index_candidates = Histogram(
+    'phash_index_candidates',
+    'Candidates checked per near-duplicate phash lookup',
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250)
+)
+
+
+async def _maybe_await(value: Any) -> Any:
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+def _as_str(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+class PhashIndex:
+    """
+    [C7-ID: VISION-PHASH-INDEX-002] Multi-index hashing над phash с хранением в Redis.
+
+    Индекс хранит только хэши; сами результаты анализа лежат под точными ключами
+    phash-кэша, и вызывающий код читает их по найденному хэшу.
+    """
+
+    def __init__(
+        self,
+        redis_client: Any,
+        prefix: str = "vision:phash",
+        max_distance: int = 10,
+        ttl_seconds: int = 7 * 24 * 3600,
+        max_candidates: int = 256,
+    ):
+        if max_distance < 0:
+            raise ValueError("max_distance must be >= 0")
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.max_candidates = max_candidates
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def chunks(self, phash_hex: str) -> List[str]:
+        """
+        Разбиение hex-хэша на max_distance + 1 кусков по границам nibble'ов.
+
+        Если кусков больше, чем hex-символов, берётся по символу на кусок —
+        гарантия полноты тогда действует только до distance < len(phash_hex).
+        """
+        phash_hex = phash_hex.lower()
+        num_chunks = min(self.max_distance + 1, len(phash_hex))
+        base, extra = divmod(len(phash_hex), num_chunks)
+        chunks: List[str] = []
+        offset = 0
+        for i in range(num_chunks):
+            width = base + (1 if i < extra else 0)
+            chunks.append(phash_hex[offset:offset + width])
+            offset += width
+        return chunks
+
+    async def add(self, tenant_id: str, phash_hex: str) -> None:
+        """Регистрация хэша в индексе (идемпотентно, TTL бакетов продлевается)."""
+        phash_hex = phash_hex.lower()
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in self._bucket_keys(tenant_id, phash_hex):
+            pipe.sadd(key, phash_hex)
+            if self.ttl_seconds:
+                pipe.expire(key, self.ttl_seconds)
+        await _maybe_await(pipe.execute())
+
+    async def remove(self, tenant_id: str, phash_hex: str) -> None:
+        """Удаление хэша из индекса (например, если его запись в кэше истекла)."""
+        phash_hex = phash_hex.lower()
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in self._bucket_keys(tenant_id, phash_hex):
+            pipe.srem(key, phash_hex)
+        await _maybe_await(pipe.execute())
+
+    async def find_nearest(
+        self,
+        tenant_id: str,
+        phash_hex: str,
+        max_distance: Optional[int] = None,
+        exclude_exact: bool = False,
+    ) -> Optional[Tuple[str, int]]:
+        """
+        Ближайший сохранённый хэш в пределах max_distance.
+
+        Returns:
+            (phash_hex, distance) или None
+        """
+        phash_hex = phash_hex.lower()
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in self._bucket_keys(tenant_id, phash_hex):
+                pipe.smembers(key)
+            buckets = await _maybe_await(pipe.execute())
+        except Exception as exc:
+            phash_index_lookups_total.labels(result='error').inc()
+            logger.debug("phash_index_lookup_failed", tenant_id=tenant_id, error=str(exc))
+            return None
+
+        candidates = set()
+        for members in buckets:
+            for member in members or ():
+                candidates.add(_as_str(member))
+                if len(candidates) >= self.max_candidates:
+                    break
+            if len(candidates) >= self.max_candidates:
+                break
+        if exclude_exact:
+            candidates.discard(phash_hex)
+        phash_index_candidates.observe(len(candidates))
+
+        best: Optional[Tuple[str, int]] = None
+        for candidate in candidates:
+            if len(candidate) != len(phash_hex):
+                continue
+            try:
+                distance = hamming_distance(phash_hex, candidate)
+            except Exception:
+                continue
+            if distance <= limit and (best is None or distance < best[1]):
+                best = (candidate, distance)
+                if distance == 0:
+                    break
+
+        if best is None:
+            phash_index_lookups_total.labels(result='miss').inc()
+            return None
+        phash_index_lookups_total.labels(result='hit').inc()
+        phash_index_match_distance.observe(best[1])
+        return best
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _bucket_keys(self, tenant_id: str, phash_hex: str) -> List[str]:
+        chunks = self.chunks(phash_hex)
+        return [
+            f"{self.prefix}:mih:{tenant_id}:{len(phash_hex)}:{len(chunks)}:{i}:{chunk}"
+            for i, chunk in enumerate(chunks)
+        ]
@@ -9,7 +9,7 @@ import logging
 import os
 import time
 import uuid
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass
 import json
@@ -25,6 +25,7 @@ import structlog
 from .telethon_retry import fetch_messages_with_retry, is_channel_in_cooldown
 from .atomic_db_saver import AtomicDBSaver
 from .rate_limiter import RateLimiter, check_parsing_rate_limit
+from .message_dedup import MessageDedupIndex
 from .discussion_extractor import (
     get_discussion_message,
     extract_reply_chain,
@@ -68,6 +69,19 @@ album_save_failures_total = _get_or_create_counter(
     ['error_type']
 )
 
+# Context7: Эффективность инкрементального fetch - сколько скачано из Telegram vs сколько реально новых
+parser_messages_fetched_total = _get_or_create_counter(
+    'parser_messages_fetched_total',
+    'Total messages fetched from Telegram by channel parser',
+    ['mode', 'fetch']  # fetch: 'message_id' (min_id watermark) или 'date' (фильтрация по дате)
+)
+
+parser_messages_new_total = _get_or_create_counter(
+    'parser_messages_new_total',
+    'Total new messages saved by channel parser',
+    ['mode']
+)
+
 session_rollback_failures_total = _get_or_create_counter(
     'session_rollback_failures_total',
     'Total session rollback failures',
@@ -151,6 +165,11 @@ class ChannelParser:
         self.rate_limiter = rate_limiter
         self.telegram_client_manager = telegram_client_manager
         self.media_processor = media_processor  # MediaProcessor для обработки медиа
+        # Context7: Батчевая дедупликация (bitmap виденных telegram_message_id в Redis)
+        self.dedup_index = MessageDedupIndex(
+            self.redis_client,
+            ttl_seconds=config.idempotency_window_hours * 3600
+        )
         
         # Статистика
         self.stats = {
@@ -470,8 +489,17 @@ class ChannelParser:
             batch_count = 0
             has_successful_save = False  # Context7: Отслеживаем успешное сохранение хотя бы одного батча
             
+            # Context7: Message-ID watermark - Telegram отдаёт только сообщения новее сохранённых
+            min_message_id = await self._get_message_id_watermark(channel_id)
+            # Context7: Страницы после watermark идут по возрастанию id - watermark можно двигать
+            # после каждого батча; fetch по дате идёт от новых к старым, поэтому там watermark
+            # фиксируется только в конце полностью успешного запуска.
+            watermark_ascending = min_message_id is not None
+            watermark_blocked = False
+            pending_watermark = None
+            
             async for message_batch in self._get_message_batches(
-                telegram_client, channel_entity, since_date, mode
+                telegram_client, channel_entity, since_date, mode, min_message_id
             ):
                 batch_count += 1
                 
@@ -481,6 +509,7 @@ class ChannelParser:
                 )
                 
                 messages_processed += batch_result['processed']
+                parser_messages_new_total.labels(mode=mode).inc(batch_result['processed'])
                 self.stats['messages_parsed'] += batch_result['processed']
                 self.stats['messages_skipped'] += batch_result['skipped']
                 
@@ -489,6 +518,21 @@ class ChannelParser:
                 if batch_result['processed'] > 0:
                     has_successful_save = True
                 
+                # Context7: После первого неполного/упавшего батча watermark до конца запуска не двигается,
+                # иначе следующий запуск с min_id пропустит несохранённые сообщения
+                if not watermark_blocked:
+                    watermark_id = batch_result.get('watermark_id')
+                    if watermark_ascending and watermark_id is not None:
+                        await self._update_message_id_watermark(channel_id, watermark_id)
+                    elif watermark_id is not None and batch_result.get('watermark_complete'):
+                        pending_watermark = max(pending_watermark or 0, watermark_id)
+                    if batch_result.get('failed') or not batch_result.get('watermark_complete'):
+                        watermark_blocked = True
+                        logger.warning("Message id watermark frozen for the rest of the run",
+                                       channel_id=channel_id,
+                                       watermark_id=watermark_id if watermark_ascending else None,
+                                       batch_failed=batch_result.get('failed', False))
+                
                 # Track max_message_date across all batches
                 if batch_result.get('max_date') and (max_message_date is None or batch_result['max_date'] > max_message_date):
                     max_message_date = batch_result['max_date']
@@ -497,6 +541,9 @@ class ChannelParser:
                 if batch_count < (1000 // self.config.max_messages_per_batch):
                     await asyncio.sleep(self.config.batch_delay_ms / 1000.0)
             
+            if pending_watermark is not None and not watermark_blocked:
+                await self._update_message_id_watermark(channel_id, pending_watermark)
+            
             # Обновление статистики канала
             await self._update_channel_stats(channel_id, messages_processed)
             
@@ -855,6 +902,77 @@ class ChannelParser:
                          channel_id=channel_id,
                          error=str(e))
     
+    async def _get_message_id_watermark(self, channel_id: str) -> Optional[int]:
+        """
+        Context7: Message-ID watermark - максимальный telegram_message_id сохранённого поста канала.
+        
+        Хранится в Redis рядом с parse_hwm; при отсутствии восстанавливается из БД
+        (MAX(telegram_message_id) по уникальному индексу channel_id + telegram_message_id).
+        
+        Args:
+            channel_id: ID канала в БД
+        
+        Returns:
+            telegram_message_id или None, если постов нет (тогда используется фильтрация по дате)
+        """
+        watermark_key = f"parse_msg_wm:{channel_id}"
+        try:
+            watermark_raw = await self.redis_client.get(watermark_key)
+            if watermark_raw:
+                return int(watermark_raw)
+        except Exception as e:
+            logger.warning("Failed to get message id watermark from Redis",
+                         channel_id=channel_id,
+                         error=str(e))
+        
+        try:
+            result = await self.db_session.execute(
+                text("SELECT MAX(telegram_message_id) FROM posts WHERE channel_id = :channel_id"),
+                {"channel_id": channel_id}
+            )
+            row = result.fetchone()
+            watermark = int(row[0]) if row and row[0] is not None else None
+        except Exception as e:
+            logger.warning("Failed to get message id watermark from DB",
+                         channel_id=channel_id,
+                         error=str(e))
+            try:
+                await self.db_session.rollback()
+            except Exception:
+                pass
+            return None
+        
+        if watermark is not None:
+            await self._update_message_id_watermark(channel_id, watermark)
+        return watermark
+    
+    async def _update_message_id_watermark(self, channel_id: str, message_id: int):
+        """
+        Context7: Монотонное обновление message-ID watermark (SET только если больше текущего).
+        
+        Args:
+            channel_id: ID канала в БД
+            message_id: максимальный сохранённый telegram_message_id
+        """
+        try:
+            await self.redis_client.eval(
+                """
+                local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+                if tonumber(ARGV[1]) > current then
+                    redis.call('SET', KEYS[1], ARGV[1])
+                end
+                return 1
+                """,
+                1,
+                f"parse_msg_wm:{channel_id}",
+                int(message_id)
+            )
+        except Exception as e:
+            logger.warning("Failed to update message id watermark",
+                         channel_id=channel_id,
+                         message_id=message_id,
+                         error=str(e))
+    
     async def _get_last_post_date(self, channel_id: str) -> Optional[datetime]:
         """
         Context7 best practice: Получение реального времени последнего поста из БД.
@@ -1280,9 +1398,23 @@ class ChannelParser:
         client: TelegramClient,
         channel_entity: Channel,
         since_date: datetime,
-        mode: str = "historical"
+        mode: str = "historical",
+        min_message_id: Optional[int] = None
     ):
-        """Генератор батчей с временной фильтрацией."""
+        """
+        Генератор батчей сообщений.
+        
+        С message-ID watermark (min_message_id) сообщения запрашиваются через min_id
+        и листаются вперёд потоковыми батчами; без watermark (новый канал) - последние
+        сообщения с временной фильтрацией.
+        """
+        if min_message_id is not None:
+            async for batch in self._get_message_batches_after_id(
+                client, channel_entity, since_date, mode, min_message_id
+            ):
+                yield batch
+            return
+        
         batch_size = self.config.max_messages_per_batch
         batch = []
         messages_yielded = 0
@@ -1326,6 +1458,7 @@ class ChannelParser:
                 offset_date=offset_date_param,  # Всегда None для обоих режимов (получаем последние сообщения)
                 reverse=False  # Context7 P1.3: По умолчанию без reverse (для incremental/historical)
             )
+            parser_messages_fetched_total.labels(mode=mode, fetch='date').inc(len(messages))
             
             # Диагностика: логируем первое и последнее сообщение для понимания диапазона
             # Context7: Логируем для обоих режимов, чтобы отслеживать правильность работы
@@ -1481,6 +1614,62 @@ class ChannelParser:
         
         logger.info(f"Parsed {messages_yielded} messages since {since_date}")
     
+    async def _get_message_batches_after_id(
+        self,
+        client: TelegramClient,
+        channel_entity: Channel,
+        since_date: datetime,
+        mode: str,
+        min_message_id: int
+    ):
+        """
+        Context7: Потоковый fetch вперёд от message-ID watermark.
+        
+        Каждая страница - один запрос iter_messages(min_id=cursor, reverse=True) размером
+        с батч; уже сохранённые сообщения из Telegram не скачиваются. Для historical режима
+        нижняя граница дополнительно ограничена since_date (offset_date с reverse=True).
+        Общий объём за один запуск ограничен тем же лимитом, что и fetch по дате -
+        остаток забирается следующим тиком.
+        """
+        batch_size = self.config.max_messages_per_batch
+        max_messages = batch_size * 100 if mode == "incremental" else batch_size * 200
+        offset_date = since_date if mode == "historical" else None
+        cursor = min_message_id
+        messages_fetched = 0
+        
+        while messages_fetched < max_messages:
+            messages = await fetch_messages_with_retry(
+                client,
+                channel_entity,
+                limit=batch_size,
+                redis_client=self.redis_client,
+                offset_date=offset_date,
+                reverse=True,
+                min_id=cursor
+            )
+            parser_messages_fetched_total.labels(mode=mode, fetch='message_id').inc(len(messages))
+            
+            # Context7: Защита от повторной выдачи - только id строго выше курсора
+            messages = [message for message in messages if message.id > cursor]
+            if not messages:
+                break
+            
+            messages_fetched += len(messages)
+            cursor = max(message.id for message in messages)
+            
+            yield messages
+            
+            if len(messages) < batch_size:
+                break
+            await asyncio.sleep(self.config.batch_delay_ms / 1000.0)
+        
+        logger.info("Fetched messages after message id watermark",
+                   channel_id=channel_entity.id,
+                   mode=mode,
+                   min_message_id=min_message_id,
+                   last_message_id=cursor,
+                   messages_fetched=messages_fetched)
+    
     async def _process_message_batch(
         self,
         messages: List[Message],
@@ -1506,6 +1695,22 @@ class ChannelParser:
         logger.info(f"Processing batch of {len(messages)} messages", 
                    channel_id=channel_id, mode=mode)
         
+        # Context7: Проверка идемпотентности всего батча — один pipeline в Redis + один ANY(...) в БД
+        try:
+            duplicate_ids = await self.dedup_index.find_duplicates(
+                self.db_session, channel_id, [message.id for message in messages]
+            )
+        except Exception as e:
+            # Context7: UNIQUE (channel_id, telegram_message_id) всё равно защищает от дублей
+            logger.warning("Batch dedup check failed, relying on UNIQUE constraint",
+                           channel_id=channel_id, error=str(e))
+            duplicate_ids = set()
+        
+        # Context7: Watermark двигается только после коммита батча (см. stored_ids ниже),
+        # дубликаты сами по себе его не сдвигают
+        stored_ids = set(duplicate_ids)
+        save_failed = False
+        
         for message in messages:
             try:
                 # Context7: КРИТИЧНО - нормализуем message.date к UTC для корректного сравнения
@@ -1530,8 +1735,7 @@ class ChannelParser:
                 grouped_id = getattr(message, 'grouped_id', None)
                 
                 # Проверка идемпотентности
-                is_duplicate = await self._is_duplicate_message(message, channel_id, tenant_id)
-                if is_duplicate:
+                if message.id in duplicate_ids:
                     skipped += 1
                     logger.debug(f"Message {message.id} skipped as duplicate", 
                                channel_id=channel_id,
@@ -1830,6 +2034,10 @@ class ChannelParser:
                 # inserted_count - это количество реально сохраненных/обновленных постов
                 processed = inserted_count
                 
+                saved_message_ids = [post.get('telegram_message_id') for post in posts_data]
+                await self.dedup_index.mark_seen(channel_id, saved_message_ids)
+                stored_ids.update(mid for mid in saved_message_ids if mid is not None)
+                
                 logger.info("Atomic batch save successful", 
                           channel_id=channel_id,
                           inserted_count=inserted_count,
@@ -2636,19 +2844,41 @@ class ChannelParser:
             else:
                 # Context7: При ошибке сохранения processed остается 0
                 processed = 0
+                save_failed = True
                 logger.error("Atomic batch save failed", 
                            channel_id=channel_id,
                            error=error,
                            posts_data_count=len(posts_data))
                 self.stats['errors'] += 1
         
+        message_ids = [message.id for message in messages]
+        watermark_id = None if save_failed else self._stored_prefix_watermark(message_ids, stored_ids)
+        
         # Context7: Возвращаем processed только после успешного сохранения
         return {
             'processed': processed,
             'skipped': skipped,
-            'max_date': max_date
+            'max_date': max_date,
+            'watermark_id': watermark_id,
+            'watermark_complete': bool(message_ids) and watermark_id == max(message_ids),
+            'failed': save_failed
         }
     
+    @staticmethod
+    def _stored_prefix_watermark(message_ids: List[int], stored_ids: Set[int]) -> Optional[int]:
+        """
+        Context7: Наибольший id, ниже которого все сообщения батча сохранены или подтверждены дубликатами.
+        
+        Сообщения, упавшие при извлечении данных, обрывают префикс - иначе следующий
+        запрос с min_id пропустил бы их навсегда.
+        """
+        watermark_id = None
+        for message_id in sorted(message_ids):
+            if message_id not in stored_ids:
+                break
+            watermark_id = message_id
+        return watermark_id
+    
     async def _is_duplicate_message(
         self,
         message: Message,
@@ -2656,34 +2886,14 @@ class ChannelParser:
         tenant_id: str
     ) -> bool:
         """
-        Context7 best practice: Проверка дубликатов через уникальный индекс.
+        Context7 best practice: Проверка дубликата одного сообщения.
         Использует комбинацию channel_id + telegram_message_id для идемпотентности.
+        Для батчей используйте dedup_index.find_duplicates напрямую.
         """
-        # Context7: Глобальные каналы - проверка по channel_id + telegram_message_id
-        cache_key = f"parsed:{channel_id}:{message.id}"
-        
-        # Проверка в Redis (быстрая проверка)
-        # Context7: exists() - асинхронная функция в redis.asyncio
-        if await self.redis_client.exists(cache_key):
-            return True
-        
-        # Проверка в БД (Context7: используем существующий уникальный индекс)
-        result = await self.db_session.execute(
-            text("""
-                SELECT 1 FROM posts 
-                WHERE channel_id = :channel_id 
-                  AND telegram_message_id = :message_id
-            """),
-            {"channel_id": channel_id, "message_id": message.id}
+        duplicates = await self.dedup_index.find_duplicates(
+            self.db_session, channel_id, [message.id]
         )
-        
-        if result.fetchone():
-            # Кеширование результата
-            # Context7: setex() - асинхронная функция в redis.asyncio
-            await self.redis_client.setex(cache_key, 3600, "1")  # TTL 1 час
-            return True
-        
-        return False
+        return message.id in duplicates
     
     async def _extract_message_data(
         self,
@@ -0,0 +1,194 @@
+"""
+Context7 best practice: батчевая проверка дубликатов сообщений канала.
+
+Вместо EXISTS в Redis + SELECT 1 в Postgres на каждое сообщение батч проверяется
+одним pipeline (GETBIT по bitmap канала) и одним запросом
+``WHERE telegram_message_id = ANY(...)`` для оставшихся кандидатов.
+
+Bitmap хранит уже виденные telegram_message_id канала: Telegram выдаёт id
+последовательно в пределах канала, поэтому bitmap компактнее и точнее Bloom-фильтра
+(нет ложноположительных срабатываний). Bitmap прогревается из posts при первом
+обращении к каналу и живёт ограниченное время, после чего прогревается заново.
+"""
+
+from typing import Any, Iterable, List, Optional, Set
+
+import structlog
+from prometheus_client import Counter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = structlog.get_logger()
+
+# Context7: Метрики дедупликации
+parser_dedup_messages_total = Counter(
+    'parser_dedup_messages_total',
+    'Messages checked by batch dedup',
+    ['result'],  # bitmap_hit, db_hit, new
+    namespace='telethon'
+)
+
+parser_dedup_warmups_total = Counter(
+    'parser_dedup_warmups_total',
+    'Channel bitmap warmups from Postgres',
+    ['result'],  # ok, error
+    namespace='telethon'
+)
+
+
+class MessageDedupIndex:
+    """
+    Context7: Per-channel bitmap виденных telegram_message_id в Redis.
+
+    Features:
+    - Один pipelined round-trip в Redis на батч
+    - Один ANY(...) запрос в Postgres для промахов bitmap
+    - Прогрев bitmap из БД при первом обращении к каналу
+    - Graceful degradation: при ошибках Redis проверка идёт только по БД
+    """
+
+    KEY_PREFIX = "parsed:bitmap"
+
+    def __init__(self, redis_client: Any, ttl_seconds: int = 24 * 3600):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+
+    def _bitmap_key(self, channel_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{channel_id}"
+
+    def _warm_key(self, channel_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{channel_id}:warm"
+
+    async def find_duplicates(
+        self,
+        db_session: AsyncSession,
+        channel_id: str,
+        message_ids: Iterable[int]
+    ) -> Set[int]:
+        """
+        Возвращает подмножество message_ids, уже сохранённых для канала.
+
+        Args:
+            db_session: AsyncSession для проверки в posts
+            channel_id: UUID канала
+            message_ids: telegram_message_id сообщений батча
+
+        Returns:
+            Множество id, которые нужно пропустить как дубликаты
+        """
+        ids = sorted({int(mid) for mid in message_ids if mid is not None and int(mid) >= 0})
+        if not ids:
+            return set()
+
+        bitmap_key = self._bitmap_key(channel_id)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.exists(self._warm_key(channel_id))
+            for mid in ids:
+                pipe.getbit(bitmap_key, mid)
+            results = await pipe.execute()
+        except Exception as e:
+            logger.warning("Dedup bitmap lookup failed, falling back to DB",
+                           channel_id=channel_id, error=str(e))
+            duplicates = await self._select_existing(db_session, channel_id, ids)
+            parser_dedup_messages_total.labels(result='db_hit').inc(len(duplicates))
+            parser_dedup_messages_total.labels(result='new').inc(len(ids) - len(duplicates))
+            return duplicates
+
+        is_warm = bool(results[0])
+        duplicates = {mid for mid, bit in zip(ids, results[1:]) if bit}
+        parser_dedup_messages_total.labels(result='bitmap_hit').inc(len(duplicates))
+
+        candidates = [mid for mid in ids if mid not in duplicates]
+        if not candidates:
+            return duplicates
+
+        if not is_warm:
+            # Context7: Прогрев приносит все id канала — отдельный ANY(...) не нужен
+            existing = await self.warm(db_session, channel_id)
+            if existing is not None:
+                found = {mid for mid in candidates if mid in existing}
+                parser_dedup_messages_total.labels(result='db_hit').inc(len(found))
+                parser_dedup_messages_total.labels(result='new').inc(len(candidates) - len(found))
+                return duplicates | found
+
+        # Context7: Bitmap мог не увидеть посты, сохранённые другим процессом — подтверждаем по БД
+        found = await self._select_existing(db_session, channel_id, candidates)
+        if found:
+            await self.mark_seen(channel_id, found)
+        parser_dedup_messages_total.labels(result='db_hit').inc(len(found))
+        parser_dedup_messages_total.labels(result='new').inc(len(candidates) - len(found))
+        return duplicates | found
+
+    async def warm(self, db_session: AsyncSession, channel_id: str) -> Optional[Set[int]]:
+        """
+        Загружает все telegram_message_id канала из posts в bitmap.
+
+        Returns:
+            Множество id канала или None, если прогрев не удался
+        """
+        try:
+            result = await db_session.execute(
+                text("""
+                    SELECT telegram_message_id FROM posts
+                    WHERE channel_id = :channel_id
+                """),
+                {"channel_id": channel_id}
+            )
+            existing = {int(row[0]) for row in result.fetchall() if row[0] is not None}
+        except Exception as e:
+            parser_dedup_warmups_total.labels(result='error').inc()
+            logger.warning("Failed to load channel message ids for dedup warmup",
+                           channel_id=channel_id, error=str(e))
+            return None
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            bitmap_key = self._bitmap_key(channel_id)
+            for mid in existing:
+                pipe.setbit(bitmap_key, mid, 1)
+            pipe.expire(bitmap_key, self.ttl_seconds)
+            pipe.setex(self._warm_key(channel_id), self.ttl_seconds, "1")
+            await pipe.execute()
+            parser_dedup_warmups_total.labels(result='ok').inc()
+        except Exception as e:
+            # Context7: Данные из БД всё равно валидны для текущего батча
+            parser_dedup_warmups_total.labels(result='error').inc()
+            logger.warning("Failed to store dedup bitmap",
+                           channel_id=channel_id, error=str(e))
+
+        logger.debug("Dedup bitmap warmed",
+                     channel_id=channel_id, message_count=len(existing))
+        return existing
+
+    async def mark_seen(self, channel_id: str, message_ids: Iterable[int]) -> None:
+        """Отмечает сохранённые сообщения в bitmap канала (один pipeline)."""
+        ids: List[int] = [int(mid) for mid in message_ids if mid is not None and int(mid) >= 0]
+        if not ids:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            bitmap_key = self._bitmap_key(channel_id)
+            for mid in ids:
+                pipe.setbit(bitmap_key, mid, 1)
+            pipe.expire(bitmap_key, self.ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("Failed to mark messages in dedup bitmap",
+                           channel_id=channel_id, count=len(ids), error=str(e))
+
+    async def _select_existing(
+        self,
+        db_session: AsyncSession,
+        channel_id: str,
+        message_ids: List[int]
+    ) -> Set[int]:
+        result = await db_session.execute(
+            text("""
+                SELECT telegram_message_id FROM posts
+                WHERE channel_id = :channel_id
+                  AND telegram_message_id = ANY(:message_ids)
+            """),
+            {"channel_id": channel_id, "message_ids": list(message_ids)}
+        )
+        return {int(row[0]) for row in result.fetchall()}
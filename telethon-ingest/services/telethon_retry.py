@@ -69,7 +69,8 @@ async def fetch_messages_with_retry(
     offset_date: Optional[datetime] = None,  # Context7: Для получения сообщений после определенной даты
     reverse: bool = False,  # Context7 P1.3: Reverse итерация (от старых к новым)
     floodwait_manager: Optional[Any] = None,  # Context7 P0.2: FloodWaitManager для централизованного управления
-    account_id: Optional[str] = None  # Context7 P0.2: Идентификатор аккаунта для FloodWaitManager
+    account_id: Optional[str] = None,  # Context7 P0.2: Идентификатор аккаунта для FloodWaitManager
+    min_id: Optional[int] = None  # Context7: Только сообщения с id > min_id (инкрементальный fetch)
 ) -> List[Message]:
     """
     Context7: Retry с FloodWait и cooldown управлением (Context7 P1.3: с поддержкой reverse).
@@ -84,6 +85,8 @@ async def fetch_messages_with_retry(
             - Если reverse=False: сообщения ПРЕДШЕСТВУЮЩИЕ этой дате (старше)
             - Если reverse=True: сообщения ПОСЛЕ этой даты (новее, для backfilling)
         reverse: Reverse итерация (от старых к новым) - для backfilling истории
+        min_id: Нижняя граница telegram message id (исключительно); с reverse=True
+            сообщения идут вперёд от watermark
         
     Returns:
         List[Message] или пустой список при ошибке
@@ -116,11 +119,15 @@ async def fetch_messages_with_retry(
                 # offset_date с reverse=False возвращает сообщения ПРЕДШЕСТВУЮЩИЕ дате (для historical)
                 iter_params["offset_date"] = offset_date
             
+            if min_id:
+                iter_params["min_id"] = min_id
+            
             logger.debug("Fetching messages with iter_messages",
                         channel_id=channel_id,
                         limit=limit,
                         offset_date=offset_date.isoformat() if offset_date else None,
                         reverse=reverse,
+                        min_id=min_id,
                         attempt=attempt + 1)
             
             async for msg in client.iter_messages(channel, **iter_params):
@@ -6,6 +6,7 @@ Context7 best practice: автоопределение режима, устой
 """
 
 import asyncio
+import json
 import os
 import logging
 import random
@@ -22,6 +23,15 @@ from prometheus_client import Counter, Histogram, Gauge
 
 from config import settings
 from utils.time_utils import ensure_dt_utc
+from services.floodwait_manager import FloodWaitManager
+from tasks.parse_scheduling import (
+    AccountShard,
+    ChannelPriorityQueue,
+    account_concurrency,
+    group_channels_by_account,
+    predict_next_post_at,
+    shard_order,
+)
 
 logger = structlog.get_logger()
 
@@ -68,6 +78,24 @@ parser_mode_forced_total = Counter(
     ['reason']
 )
 
+scheduler_shard_lease_total = Counter(
+    'scheduler_shard_lease_total',
+    'Account shard lease acquisition attempts',
+    ['status']  # acquired, missed, rate_limited
+)
+
+scheduler_shard_channels = Gauge(
+    'scheduler_shard_channels',
+    'Channels parsed in the last tick per account shard',
+    ['account_id', 'status']  # processed, pending
+)
+
+scheduler_shard_concurrency = Gauge(
+    'scheduler_shard_concurrency',
+    'Concurrent channel parses per account shard',
+    ['account_id']
+)
+
 scheduler_last_tick_ts_seconds = Gauge(
     'scheduler_last_tick_ts_seconds',
     'Unix timestamp of last scheduler tick'
@@ -151,9 +179,16 @@ class ParseAllChannelsTask:
         self.interval_sec = int(os.getenv("PARSER_SCHEDULER_INTERVAL_SEC", "300"))
         self.enabled = os.getenv("FEATURE_INCREMENTAL_PARSING_ENABLED", "true").lower() == "true"
         
-        # Semaphore for concurrency control
+        # Semaphore for concurrency control (process-wide cap across account shards)
         self.semaphore = asyncio.Semaphore(self.config.max_concurrency)
         
+        # Context7: Шардирование по аккаунтам - отдельный ChannelParser (и AsyncSession) на воркер шарда
+        self.instance_id = os.getenv("HOSTNAME", "default")
+        self.floodwait_manager: Optional[FloodWaitManager] = None
+        self._async_engine = None
+        self._async_session_factory = None
+        self._shard_parsers: Dict[Tuple[int, int], Any] = {}
+        
         logger.info(
             "ParseAllChannelsTask initialized (simplified version for testing)",
             interval_sec=self.interval_sec,
@@ -195,10 +230,9 @@ class ParseAllChannelsTask:
             
             await asyncio.sleep(self.interval_sec)
     
-    async def _acquire_lock(self) -> bool:
-        """Try to acquire scheduler lock"""
-        instance_id = os.getenv("HOSTNAME", "default")
-        lock_key = "parse_all_channels:lock"
+    async def _acquire_lock(self, lock_key: str = "parse_all_channels:lock") -> bool:
+        """Try to acquire scheduler lock (or an account shard lease)"""
+        instance_id = self.instance_id
         ttl = self.interval_sec * 2
         
         try:
@@ -234,14 +268,23 @@ class ParseAllChannelsTask:
             logger.error(f"Failed to acquire lock: {str(e)}")
             return False
     
-    async def _release_lock(self):
-        """Release scheduler lock"""
+    async def _release_lock(self, lock_key: str = "parse_all_channels:lock"):
+        """Release scheduler lock (only if it is still owned by this instance)"""
         try:
-            # Context7: async Redis - используем await для delete()
-            # Context7: Проверяем, что lock существует перед удалением
-            lock_key = "parse_all_channels:lock"
-            deleted = await self.redis.delete(lock_key)
-            if deleted > 0:
+            # Context7: Сравнение владельца и удаление атомарно - не снимаем lease другой реплики,
+            # если наш TTL истёк во время длинного тика
+            deleted = await self.redis.eval(
+                """
+                if redis.call('GET', KEYS[1]) == ARGV[1] then
+                    return redis.call('DEL', KEYS[1])
+                end
+                return 0
+                """,
+                1,
+                lock_key,
+                self.instance_id
+            )
+            if deleted and int(deleted) > 0:
                 logger.debug("Lock released successfully", lock_key=lock_key)
             else:
                 logger.warning("Lock was not found when trying to release", lock_key=lock_key)
@@ -317,13 +360,101 @@ class ParseAllChannelsTask:
             logger.error(f"Failed to get system user/tenant: {str(e)}")
             return 0, "00000000-0000-0000-0000-000000000000"
     
-    async def _parse_channel_with_retry(self, channel: Dict[str, Any], mode: str):
+    def _get_async_session_factory(self):
+        """Общий async engine для всех ChannelParser'ов шардов (одна БД, один пул соединений)."""
+        if self._async_session_factory is None:
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+            
+            db_url_async = self.db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+            parsed = urlparse(db_url_async)
+            qs = parse_qs(parsed.query)
+            # Remove asyncpg-unsupported parameters
+            for key in ['connect_timeout', 'application_name', 'keepalives', 'keepalives_idle', 'keepalives_interval', 'keepalives_count']:
+                qs.pop(key, None)
+            new_query = urlencode(qs, doseq=True)
+            db_url_async = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, new_query, parsed.fragment))
+            
+            # Context7: Добавляем таймауты для предотвращения зависаний
+            # Пул рассчитан на одну сессию на каждый параллельный парсинг
+            self._async_engine = create_async_engine(
+                db_url_async, 
+                pool_pre_ping=True, 
+                pool_size=max(5, self.config.max_concurrency),
+                pool_timeout=30,
+                connect_args={
+                    "command_timeout": 60,
+                    "server_settings": {
+                        "application_name": "telethon_parser"
+                    }
+                }
+            )
+            self._async_session_factory = async_sessionmaker(self._async_engine, expire_on_commit=False)
+        return self._async_session_factory
+    
+    def _create_parser(self):
+        """Создание ChannelParser с собственной AsyncSession."""
+        from services.channel_parser import ChannelParser, ParserConfig
+        
+        # Create config
+        config = ParserConfig()
+        config.db_url = self.db_url
+        config.redis_url = os.getenv("REDIS_URL", "redis://redis:6379")
+        
+        db_session = self._get_async_session_factory()()
+        
+        return ChannelParser(
+            config=config,
+            db_session=db_session,
+            event_publisher=None,
+            redis_client=self.redis,
+            telegram_client_manager=self.telegram_client_manager,
+            media_processor=self.media_processor  # Context7: Передаём MediaProcessor
+        )
+    
+    def _get_parser(self, parser_key: Optional[Tuple[int, int]] = None):
+        """
+        ChannelParser для воркера шарда.
+        
+        AsyncSession нельзя использовать конкурентно, поэтому каждый воркер шарда
+        (telegram_id, worker_idx) получает свой parser; без ключа используется общий self.parser.
+        """
+        if parser_key is None:
+            if not self.parser:
+                logger.info("Initializing ChannelParser")
+                self.parser = self._create_parser()
+            return self.parser
+        
+        parser = self._shard_parsers.get(parser_key)
+        if parser is None:
+            logger.info("Initializing ChannelParser for shard worker",
+                        telegram_id=parser_key[0],
+                        worker=parser_key[1])
+            parser = self._create_parser()
+            self._shard_parsers[parser_key] = parser
+        return parser
+    
+    def _drop_parser(self, parser_key: Optional[Tuple[int, int]] = None):
+        """Сброс parser'а с повреждённой сессией - будет пересоздан при следующем обращении."""
+        if parser_key is None:
+            self.parser = None
+        else:
+            self._shard_parsers.pop(parser_key, None)
+    
+    async def _parse_channel_with_retry(
+        self,
+        channel: Dict[str, Any],
+        mode: str,
+        account: Optional[Tuple[int, str]] = None,
+        parser_key: Optional[Tuple[int, int]] = None
+    ):
         """
         Parse channel with exponential backoff retry and FloodWait handling.
         
         Args:
             channel: Channel data dictionary
             mode: Parsing mode (historical/incremental)
+            account: (telegram_id, tenant_id) аккаунта шарда; по умолчанию - системный аккаунт
+            parser_key: ключ ChannelParser'а воркера шарда (см. _get_parser)
             
         Returns:
             Parsing result or None if all retries exhausted
@@ -337,7 +468,10 @@ class ParseAllChannelsTask:
             return {"status": "skipped", "reason": "no_client_manager", "parsed": 0, "max_message_date": None}
         
         # Get telegram_id (int) and tenant_id (str) from database
-        telegram_id, tenant_id = await self._get_system_user_and_tenant()
+        if account:
+            telegram_id, tenant_id = account
+        else:
+            telegram_id, tenant_id = await self._get_system_user_and_tenant()
         
         if not telegram_id or telegram_id == 0:
             logger.warning("No telegram_id found in database, skipping parsing")
@@ -350,62 +484,15 @@ class ParseAllChannelsTask:
             return {"status": "skipped", "reason": "no_client", "parsed": 0, "max_message_date": None}
         
         for attempt in range(max_retries):
+            parser = None
             try:
                 async with self.semaphore:
                     logger.info(f"Parsing channel {channel['id']} with retry - mode={mode}, attempt={attempt + 1}")
                     
-                    # Initialize parser if needed
-                    if not self.parser:
-                        logger.info(f"Initializing ChannelParser for channel {channel['id']}")
-                        # Initialize ChannelParser with correct signature
-                        from services.channel_parser import ChannelParser, ParserConfig
-                        from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-                        
-                        # Create config
-                        config = ParserConfig()
-                        config.db_url = self.db_url
-                        config.redis_url = os.getenv("REDIS_URL", "redis://redis:6379")
-                        
-                        # Create async engine and session
-                        import re
-                        from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
-                        db_url_async = self.db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
-                        parsed = urlparse(db_url_async)
-                        qs = parse_qs(parsed.query)
-                        # Remove asyncpg-unsupported parameters
-                        for key in ['connect_timeout', 'application_name', 'keepalives', 'keepalives_idle', 'keepalives_interval', 'keepalives_count']:
-                            qs.pop(key, None)
-                        new_query = urlencode(qs, doseq=True)
-                        db_url_async = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, new_query, parsed.fragment))
-                        
-                        # Context7: Добавляем таймауты для предотвращения зависаний
-                        engine = create_async_engine(
-                            db_url_async, 
-                            pool_pre_ping=True, 
-                            pool_size=5,
-                            pool_timeout=30,
-                            connect_args={
-                                "command_timeout": 60,
-                                "server_settings": {
-                                    "application_name": "telethon_parser"
-                                }
-                            }
-                        )
-                        async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
-                        db_session = async_session_factory()
-                        
-                        # Initialize parser with correct parameters
-                        self.parser = ChannelParser(
-                            config=config,
-                            db_session=db_session,
-                            event_publisher=None,
-                            redis_client=self.redis,
-                            telegram_client_manager=self.telegram_client_manager,
-                            media_processor=self.media_processor  # Context7: Передаём MediaProcessor
-                        )
+                    parser = self._get_parser(parser_key)
                     
                     # Call actual parser
-                    result = await self.parser.parse_channel_messages(
+                    result = await parser.parse_channel_messages(
                         channel_id=channel['id'],
                         user_id=str(telegram_id),  # user_id для парсера — строка
                         tenant_id=tenant_id,
@@ -428,20 +515,20 @@ class ParseAllChannelsTask:
                 error_type = type(e).__name__
                 # Context7: Проверяем состояние db_session после ошибки
                 # Если сессия в неправильном состоянии, пересоздаем parser с новой сессией
-                if self.parser and hasattr(self.parser, 'db_session'):
+                if parser and hasattr(parser, 'db_session'):
                     try:
-                        if self.parser.db_session.in_transaction():
+                        if parser.db_session.in_transaction():
                             logger.warning("Session in transaction after error, rolling back",
                                          channel_id=channel.get('id'),
                                          error_type=error_type)
-                            await self.parser.db_session.rollback()
+                            await parser.db_session.rollback()
                     except Exception as session_error:
                         logger.warning("Failed to check/rollback session after error, may need to recreate parser",
                                      channel_id=channel.get('id'),
                                      error_type=error_type,
                                      session_error=str(session_error))
                         # Context7: Если не можем восстановить сессию, сбрасываем parser для пересоздания
-                        self.parser = None
+                        self._drop_parser(parser_key)
                 
                 # FloodWait handling
                 if "FloodWait" in error_type or "FLOOD_WAIT" in str(e):
@@ -484,127 +571,74 @@ class ParseAllChannelsTask:
         return None
     
     async def _run_tick(self):
-        """Run scheduler tick with lock protection"""
-        if not await self._acquire_lock():
-            logger.info("Lock held by another instance, skipping tick")
-            return
+        """
+        Run scheduler tick: account shards are parsed concurrently.
         
+        Context7: Вместо глобального lock каждый аккаунт (шард) захватывается отдельным
+        Redis lease - несколько реплик ingest делят шарды между собой. Внутри шарда
+        каналы берутся из очереди с приоритетом по ожидаемому времени следующего поста,
+        параллелизм ограничен FloodWait бюджетом аккаунта.
+        """
         tick_start_time = datetime.now(timezone.utc)
+        
+        # Получение активных каналов
+        channels = self._get_active_channels()
+        logger.info(
+            "Starting scheduler tick",
+            channels_count=len(channels),
+            tick_interval_sec=self.interval_sec
+        )
+        
+        if not channels:
+            logger.warning("No active channels found for parsing")
+            return
+        
+        # Context7: Ограничиваем время выполнения tick, чтобы lease не истекал во время парсинга
+        # TTL lease = interval_sec * 2
+        deadline = tick_start_time + timedelta(seconds=self.interval_sec * 1.5)
+        
+        shards = await self._build_account_shards(channels)
+        if not shards:
+            logger.warning("No Telegram accounts available for channels, skipping tick",
+                           channels_count=len(channels))
+            return
+        
+        if self.redis is not None and self.floodwait_manager is None:
+            self.floodwait_manager = FloodWaitManager(self.redis)
+        
+        # Захват lease'ов шардов (каждая реплика начинает со своего аккаунта)
+        owned_shards: List[AccountShard] = []
+        for telegram_id in shard_order(list(shards.keys()), self.instance_id):
+            if await self._acquire_lock(self._shard_lock_key(telegram_id)):
+                scheduler_shard_lease_total.labels(status="acquired").inc()
+                owned_shards.append(shards[telegram_id])
+            else:
+                scheduler_shard_lease_total.labels(status="missed").inc()
+        
+        if not owned_shards:
+            logger.info("All account shards are held by other instances, skipping tick",
+                        shards_total=len(shards))
+            return
+        
         try:
-            logger.info("Running scheduler tick (lock acquired)")
+            logger.info("Running scheduler tick",
+                        shards_owned=len(owned_shards),
+                        shards_total=len(shards))
             
-            # Получение активных каналов
-            channels = self._get_active_channels()
-            logger.info(
-                "Starting scheduler tick",
-                channels_count=len(channels),
-                tick_interval_sec=self.interval_sec
+            results = await asyncio.gather(
+                *(self._run_shard(shard, deadline) for shard in owned_shards),
+                return_exceptions=True
             )
             
-            if not channels:
-                logger.warning("No active channels found for parsing")
-                # Context7: Не делаем return здесь, чтобы finally блок освободил lock
-                # Просто пропускаем парсинг каналов
-            
-            # Context7: Ограничиваем время выполнения tick, чтобы lock не зависал
-            # TTL lock = interval_sec * 2, поэтому tick должен завершиться быстрее
-            max_tick_duration = self.interval_sec * 1.5  # 90% от TTL lock
             channels_processed = 0
-            
-            # Context7: Сортируем каналы по last_parsed_at (старые первыми) для равномерного парсинга
-            # Это гарантирует, что каналы с давно не обновленными данными обрабатываются в первую очередь
-            channels_sorted = sorted(
-                channels,
-                key=lambda c: (
-                    c.get('last_parsed_at') is None,  # Новые каналы (None) первыми
-                    c.get('last_parsed_at') or datetime.min.replace(tzinfo=timezone.utc)  # Затем по дате (старые первыми)
-                )
-            )
-            
-            for idx, channel in enumerate(channels_sorted):
-                # Context7: Проверяем, не превысили ли мы максимальное время выполнения
-                elapsed = (datetime.now(timezone.utc) - tick_start_time).total_seconds()
-                if elapsed > max_tick_duration:
-                    logger.warning(
-                        "Tick duration exceeded maximum, stopping channel processing",
-                        channels_processed=channels_processed,
-                        channels_total=len(channels),
-                        elapsed_seconds=elapsed,
-                        max_duration_seconds=max_tick_duration
-                    )
-                    break
-                try:
-                    # Get HWM from Redis
-                    hwm_key = f"parse_hwm:{channel['id']}"
-                    # Context7: async Redis - используем await для get()
-                    hwm_raw = await self.redis.get(hwm_key)
-                    
-                    # Context7 best practice: безопасная обработка типов через ensure_dt_utc
-                    hwm_ts = ensure_dt_utc(hwm_raw)
-                    if hwm_ts:
-                        age_seconds = (datetime.now(timezone.utc) - hwm_ts).total_seconds()
-                        parser_hwm_age_seconds.labels(channel_id=channel['id']).set(age_seconds)
-                    
-                    # Определение режима
-                    mode = self._decide_mode(channel)
-                    
-                    # Context7: Логирование для новых каналов с диагностикой
-                    is_new_channel = channel.get('last_parsed_at') is None
-                    lpa = channel.get('last_parsed_at')
-                    lpa_str = lpa.isoformat() if isinstance(lpa, datetime) else 'null'
-                    logger.info(
-                        "Channel parsing status",
-                        channel_id=channel['id'],
-                        channel_title=channel.get('title'),
-                        channel_username=channel.get('username'),
-                        mode=mode,
-                        is_new_channel=is_new_channel,
-                        last_parsed_at=lpa_str,
-                        has_telegram_id=bool(channel.get('tg_channel_id'))
-                    )
-                    
-                    # Call actual parser if telegram_client_manager is available
-                    if self.telegram_client_manager:
-                        # Parse channel with retry
-                        result = await self._parse_channel_with_retry(channel, mode)
-                        
-                        if result and result.get("status") == "success":
-                            parsed_count = result.get("messages_processed", 0)
-                            posts_parsed_total.labels(mode=mode, status="success").inc(parsed_count)
-                            parser_runs_total.labels(mode=mode, status="ok").inc()
-                        elif result and result.get("status") == "skipped":
-                            parser_runs_total.labels(mode=mode, status="skipped").inc()
-                        else:
-                            parser_runs_total.labels(mode=mode, status="failed").inc()
-                    else:
-                        # Just monitor without parsing
-                        parser_runs_total.labels(mode=mode, status='monitored').inc()
-                    
-                    # Gauge для возраста watermark с безопасной обработкой типов
-                    lpa_dt = ensure_dt_utc(channel.get('last_parsed_at'))
-                    if lpa_dt:
-                        age_seconds = (datetime.now(timezone.utc) - lpa_dt).total_seconds()
-                        incremental_watermark_age_seconds.labels(
-                            channel_id=channel['id']
-                        ).set(age_seconds)
-                    
-                    # Context7: [C7-ID: backfill-missing-posts-001] Проверка и запуск backfill при пропусках
-                    await self._check_and_trigger_backfill(channel)
-                    
-                    channels_processed += 1
-                    # Context7: Логируем прогресс каждые 10 каналов
-                    if channels_processed % 10 == 0:
-                        elapsed = (datetime.now(timezone.utc) - tick_start_time).total_seconds()
-                        logger.info(
-                            "Tick progress",
-                            channels_processed=channels_processed,
-                            channels_total=len(channels),
-                            elapsed_seconds=elapsed
-                        )
-                        
-                except Exception as e:
-                    logger.error(f"Failed to monitor channel {channel['id']}: {str(e)}")
-                    channels_processed += 1
+            for shard, result in zip(owned_shards, results):
+                if isinstance(result, Exception):
+                    logger.error("Account shard failed",
+                                 account_id=shard.account_id,
+                                 error=str(result),
+                                 error_type=type(result).__name__)
+                    continue
+                channels_processed += result
             
             # Update scheduler freshness metric
             now_ts = datetime.now(timezone.utc).timestamp()
@@ -619,24 +653,248 @@ class ParseAllChannelsTask:
             logger.info(
                 "Scheduler tick completed",
                 channels_processed=channels_processed,
-                channels_total=len(channels) if channels else 0,
+                channels_total=len(channels),
+                shards_owned=len(owned_shards),
                 duration_seconds=tick_duration
             )
             
         finally:
-            # Context7: Всегда освобождаем lock в finally блоке
-            # Context7: Логируем освобождение lock для диагностики
-            try:
-                await self._release_lock()
-                logger.debug("Lock released after tick", 
-                           tick_duration_seconds=(datetime.now(timezone.utc) - tick_start_time).total_seconds() if 'tick_start_time' in locals() else None)
-            except Exception as release_error:
-                logger.error("Failed to release lock in finally block", 
-                           error=str(release_error), 
-                           error_type=type(release_error).__name__,
-                           exc_info=True)
+            # Context7: Всегда освобождаем lease'ы в finally блоке
+            for shard in owned_shards:
+                try:
+                    await self._release_lock(self._shard_lock_key(shard.telegram_id))
+                except Exception as release_error:
+                    logger.error("Failed to release shard lease in finally block", 
+                               account_id=shard.account_id,
+                               error=str(release_error), 
+                               error_type=type(release_error).__name__,
+                               exc_info=True)
+    
+    @staticmethod
+    def _shard_lock_key(telegram_id: int) -> str:
+        return f"parse_all_channels:shard:{telegram_id}"
+    
+    async def _build_account_shards(self, channels: List[Dict[str, Any]]) -> Dict[int, AccountShard]:
+        """Шардирование каналов по подписанным авторизованным аккаунтам (fallback - системный аккаунт)."""
+        if not self.telegram_client_manager:
+            # Context7: Режим мониторинга без парсинга - один шард без аккаунта
+            return {0: AccountShard(telegram_id=0, tenant_id="", channels=list(channels))}
+        channel_accounts = self._get_channel_accounts([str(channel['id']) for channel in channels])
+        default_account = await self._get_system_user_and_tenant()
+        return group_channels_by_account(channels, channel_accounts, default_account)
+    
+    def _get_channel_accounts(self, channel_ids: List[str]) -> Dict[str, Tuple[int, str]]:
+        """
+        Аккаунт для каждого канала: самый ранний активный подписчик с авторизованной сессией.
+        
+        Returns:
+            channel_id -> (telegram_id, tenant_id)
+        """
+        if not channel_ids:
+            return {}
+        try:
+            conn = psycopg2.connect(self.db_url)
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("""
+                SELECT DISTINCT ON (uc.channel_id)
+                    uc.channel_id, u.telegram_id, u.tenant_id
+                FROM user_channel uc
+                JOIN users u ON u.id = uc.user_id
+                WHERE uc.channel_id = ANY(%s::uuid[])
+                  AND uc.is_active = true
+                  AND u.telegram_auth_status = 'authorized'
+                  AND u.telegram_id IS NOT NULL
+                ORDER BY uc.channel_id, uc.subscribed_at ASC
+            """, (channel_ids,))
+            rows = cursor.fetchall()
+            cursor.close()
+            conn.close()
+            return {
+                str(row['channel_id']): (int(row['telegram_id']), str(row['tenant_id']))
+                for row in rows
+            }
+        except Exception as e:
+            logger.error("Failed to get channel accounts, using system account",
+                         error=str(e))
+            return {}
+    
+    async def _load_interarrival_stats(
+        self,
+        channels: List[Dict[str, Any]],
+        parser: Optional[Any]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Статистика интервалов для всех каналов шарда.
+        
+        Кеш ChannelParser._calculate_interarrival_stats читается одним MGET,
+        промахи досчитываются через parser (и попадают в кеш для следующих тиков).
+        """
+        stats_by_channel: Dict[str, Optional[Dict[str, Any]]] = {}
+        channel_ids = [str(channel['id']) for channel in channels]
+        if not channel_ids:
+            return stats_by_channel
+        
+        cached_values: List[Any] = [None] * len(channel_ids)
+        try:
+            cached_values = await self.redis.mget([f"interarrival_stats:{cid}" for cid in channel_ids])
+        except Exception as e:
+            logger.debug("Failed to read cached interarrival stats", error=str(e))
+        
+        for channel_id, cached in zip(channel_ids, cached_values):
+            stats = None
+            if cached:
+                try:
+                    stats = json.loads(cached)
+                except (TypeError, ValueError):
+                    stats = None
+            if stats is None and parser and self.config.adaptive_thresholds_enabled:
+                try:
+                    stats = await parser._calculate_interarrival_stats(channel_id)
+                except Exception as e:
+                    logger.debug("Failed to calculate interarrival stats",
+                                 channel_id=channel_id,
+                                 error=str(e))
+            stats_by_channel[channel_id] = stats
+        return stats_by_channel
+    
+    async def _run_shard(self, shard: AccountShard, deadline: datetime) -> int:
+        """
+        Парсинг каналов одного аккаунта.
+        
+        Returns:
+            Количество обработанных каналов
+        """
+        account_id = shard.account_id
+        
+        if self.floodwait_manager and await self.floodwait_manager.is_rate_limited(account_id, "get_messages"):
+            scheduler_shard_lease_total.labels(status="rate_limited").inc()
+            logger.warning("Account shard is in FloodWait, skipping this tick",
+                           account_id=account_id,
+                           channels=len(shard.channels))
+            return 0
+        
+        adaptive_batch_size = 50
+        if self.floodwait_manager:
+            adaptive_batch_size = await self.floodwait_manager.get_adaptive_batch_size(account_id)
+        workers = account_concurrency(adaptive_batch_size, self.config.max_concurrency)
+        workers = min(workers, len(shard.channels))
+        scheduler_shard_concurrency.labels(account_id=account_id).set(workers)
+        
+        # Очередь с приоритетом: сначала новые каналы, затем по ожидаемому времени следующего поста
+        stats_by_channel = await self._load_interarrival_stats(
+            shard.channels,
+            self._get_parser((shard.telegram_id, 0)) if self.telegram_client_manager else None
+        )
+        queue = ChannelPriorityQueue()
+        for channel in shard.channels:
+            queue.push(channel, predict_next_post_at(channel, stats_by_channel.get(str(channel['id']))))
+        
+        logger.info("Starting account shard",
+                    account_id=account_id,
+                    channels=len(shard.channels),
+                    workers=workers,
+                    adaptive_batch_size=adaptive_batch_size)
+        
+        processed = 0
+        
+        async def _worker(worker_idx: int):
+            nonlocal processed
+            parser_key = (shard.telegram_id, worker_idx)
+            while True:
+                if datetime.now(timezone.utc) > deadline:
+                    return
+                channel = queue.pop()
+                if channel is None:
+                    return
+                await self._process_channel(channel, (shard.telegram_id, shard.tenant_id), parser_key)
+                processed += 1
+        
+        await asyncio.gather(*(_worker(idx) for idx in range(workers)))
+        
+        pending = len(queue)
+        scheduler_shard_channels.labels(account_id=account_id, status="processed").set(processed)
+        scheduler_shard_channels.labels(account_id=account_id, status="pending").set(pending)
+        if pending:
+            logger.warning(
+                "Tick duration exceeded maximum, pending channels left for next tick",
+                account_id=account_id,
+                channels_processed=processed,
+                channels_pending=pending
+            )
+        return processed
+    
+    async def _process_channel(
+        self,
+        channel: Dict[str, Any],
+        account: Tuple[int, str],
+        parser_key: Tuple[int, int]
+    ):
+        """Парсинг одного канала воркером шарда с метриками и проверкой backfill."""
+        try:
+            # Get HWM from Redis
+            hwm_key = f"parse_hwm:{channel['id']}"
+            # Context7: async Redis - используем await для get()
+            hwm_raw = await self.redis.get(hwm_key)
+            
+            # Context7 best practice: безопасная обработка типов через ensure_dt_utc
+            hwm_ts = ensure_dt_utc(hwm_raw)
+            if hwm_ts:
+                age_seconds = (datetime.now(timezone.utc) - hwm_ts).total_seconds()
+                parser_hwm_age_seconds.labels(channel_id=channel['id']).set(age_seconds)
+            
+            # Определение режима
+            mode = self._decide_mode(channel)
+            
+            # Context7: Логирование для новых каналов с диагностикой
+            is_new_channel = channel.get('last_parsed_at') is None
+            lpa = channel.get('last_parsed_at')
+            lpa_str = lpa.isoformat() if isinstance(lpa, datetime) else 'null'
+            logger.info(
+                "Channel parsing status",
+                channel_id=channel['id'],
+                channel_title=channel.get('title'),
+                channel_username=channel.get('username'),
+                account_id=str(account[0]),
+                mode=mode,
+                is_new_channel=is_new_channel,
+                last_parsed_at=lpa_str,
+                has_telegram_id=bool(channel.get('tg_channel_id'))
+            )
+            
+            # Call actual parser if telegram_client_manager is available
+            parser = None
+            if self.telegram_client_manager:
+                # Parse channel with retry
+                result = await self._parse_channel_with_retry(channel, mode, account, parser_key)
+                parser = self._get_parser(parser_key)
+                
+                if result and result.get("status") == "success":
+                    parsed_count = result.get("messages_processed", 0)
+                    posts_parsed_total.labels(mode=mode, status="success").inc(parsed_count)
+                    parser_runs_total.labels(mode=mode, status="ok").inc()
+                elif result and result.get("status") == "skipped":
+                    parser_runs_total.labels(mode=mode, status="skipped").inc()
+                else:
+                    parser_runs_total.labels(mode=mode, status="failed").inc()
+            else:
+                # Just monitor without parsing
+                parser_runs_total.labels(mode=mode, status='monitored').inc()
+            
+            # Gauge для возраста watermark с безопасной обработкой типов
+            lpa_dt = ensure_dt_utc(channel.get('last_parsed_at'))
+            if lpa_dt:
+                age_seconds = (datetime.now(timezone.utc) - lpa_dt).total_seconds()
+                incremental_watermark_age_seconds.labels(
+                    channel_id=channel['id']
+                ).set(age_seconds)
+            
+            # Context7: [C7-ID: backfill-missing-posts-001] Проверка и запуск backfill при пропусках
+            await self._check_and_trigger_backfill(channel, parser)
+                
+        except Exception as e:
+            logger.error(f"Failed to monitor channel {channel['id']}: {str(e)}")
     
-    async def _check_and_trigger_backfill(self, channel: Dict[str, Any]):
+    async def _check_and_trigger_backfill(self, channel: Dict[str, Any], parser: Optional[Any] = None):
         """
         Context7: [C7-ID: backfill-missing-posts-002] Проверка и запуск backfill с адаптивными порогами.
         
@@ -645,7 +903,9 @@ class ParseAllChannelsTask:
         
         Args:
             channel: данные канала
+            parser: ChannelParser воркера шарда (по умолчанию общий self.parser)
         """
+        parser = parser or self.parser
         try:
             import psycopg2
             from psycopg2.extras import RealDictCursor
@@ -704,9 +964,9 @@ class ParseAllChannelsTask:
                 
                 # Context7: Используем parser для получения адаптивного порога, если доступен
                 # Parser может быть не инициализирован в момент первой проверки
-                if self.parser and hasattr(self.parser, '_compute_adaptive_threshold'):
+                if parser and hasattr(parser, '_compute_adaptive_threshold'):
                     try:
-                        threshold_seconds = await self.parser._compute_adaptive_threshold(channel_id)
+                        threshold_seconds = await parser._compute_adaptive_threshold(channel_id)
                     except Exception as e:
                         logger.debug("Failed to get adaptive threshold, using fixed",
                                    channel_id=channel_id,
@@ -717,9 +977,9 @@ class ParseAllChannelsTask:
                     # Определяем контекст времени для логирования
                     is_quiet = False
                     quiet_reason = "normal"
-                    if self.parser and hasattr(self.parser, '_is_quiet_hours'):
+                    if parser and hasattr(parser, '_is_quiet_hours'):
                         try:
-                            is_quiet, quiet_reason = self.parser._is_quiet_hours(now)
+                            is_quiet, quiet_reason = parser._is_quiet_hours(now)
                         except Exception:
                             pass
                     
@@ -789,9 +1049,9 @@ class ParseAllChannelsTask:
                             
                             # Context7: Обновляем Low Watermark после планирования backfill
                             # Это позволяет отслеживать, с какого времени гарантированно спарсили всё
-                            if self.parser and hasattr(self.parser, '_update_low_watermark'):
+                            if parser and hasattr(parser, '_update_low_watermark'):
                                 try:
-                                    await self.parser._update_low_watermark(channel_id, last_post_date)
+                                    await parser._update_low_watermark(channel_id, last_post_date)
                                 except Exception as e:
                                     logger.debug("Failed to update low watermark",
                                                channel_id=channel_id,
@@ -843,10 +1103,11 @@ class ParseAllChannelsTask:
             
             # Context7: Получаем все активные каналы, приоритет новым (без last_parsed_at)
             cursor.execute("""
-                SELECT id, tg_channel_id, username, title, last_parsed_at, is_active
-                FROM channels
-                WHERE is_active = true
-                ORDER BY last_parsed_at NULLS FIRST, created_at DESC
+                SELECT c.id, c.tg_channel_id, c.username, c.title, c.last_parsed_at, c.is_active,
+                       (SELECT MAX(p.posted_at) FROM posts p WHERE p.channel_id = c.id) AS last_post_at
+                FROM channels c
+                WHERE c.is_active = true
+                ORDER BY c.last_parsed_at NULLS FIRST, c.created_at DESC
                 LIMIT %s
             """, (max_channels,))
             
@@ -0,0 +1,135 @@
+"""
+Context7: Планирование парсинга каналов.
+
+- Каналы шардируются по Telegram аккаунту (клиенту из TelegramClientManager),
+  шарды разных аккаунтов парсятся параллельно и разбираются репликами через Redis lease.
+- Внутри шарда каналы упорядочены очередью с приоритетом по ожидаемому времени
+  следующего поста (median/EWMA интервалов из ChannelParser._calculate_interarrival_stats).
+"""
+
+import heapq
+import itertools
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.time_utils import ensure_dt_utc
+
+
+@dataclass
+class AccountShard:
+    """Каналы, которые парсятся через один Telegram аккаунт."""
+    telegram_id: int
+    tenant_id: str
+    channels: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def account_id(self) -> str:
+        return str(self.telegram_id)
+
+
+def group_channels_by_account(
+    channels: List[Dict[str, Any]],
+    channel_accounts: Dict[str, Tuple[int, str]],
+    default_account: Optional[Tuple[int, str]] = None
+) -> Dict[int, AccountShard]:
+    """
+    Раскладывает каналы по аккаунтам.
+
+    Args:
+        channels: активные каналы
+        channel_accounts: channel_id -> (telegram_id, tenant_id) подписанного аккаунта
+        default_account: аккаунт для каналов без подписчика (системный)
+
+    Returns:
+        telegram_id -> AccountShard; каналы без аккаунта пропускаются
+    """
+    shards: Dict[int, AccountShard] = {}
+    for channel in channels:
+        account = channel_accounts.get(str(channel['id'])) or default_account
+        if not account or not account[0]:
+            continue
+        telegram_id, tenant_id = account
+        shard = shards.get(telegram_id)
+        if shard is None:
+            shard = shards[telegram_id] = AccountShard(telegram_id=telegram_id, tenant_id=tenant_id)
+        shard.channels.append(channel)
+    return shards
+
+
+def predict_next_post_at(
+    channel: Dict[str, Any],
+    stats: Optional[Dict[str, Any]]
+) -> Optional[datetime]:
+    """
+    Ожидаемое время следующего поста канала.
+
+    Returns:
+        None для ни разу не спарсенных каналов (наивысший приоритет); без статистики
+        интервалов - last_parsed_at (давно не парсенные первыми, как раньше)
+    """
+    last_parsed_at = ensure_dt_utc(channel.get('last_parsed_at'))
+    if last_parsed_at is None:
+        return None
+
+    interval = None
+    if stats:
+        interval = stats.get('median') or stats.get('ewma')
+    last_post_at = ensure_dt_utc(channel.get('last_post_at'))
+    if not interval or interval <= 0 or last_post_at is None:
+        return last_parsed_at
+
+    expected = last_post_at + timedelta(seconds=float(interval))
+    if expected <= last_parsed_at:
+        # Уже проверяли после ожидаемого момента и поста не было - ждём ещё один интервал
+        expected = last_parsed_at + timedelta(seconds=float(interval))
+    return expected
+
+
+class ChannelPriorityQueue:
+    """Min-heap каналов по ожидаемому времени следующего поста."""
+
+    def __init__(self):
+        self._heap: List[Tuple[int, float, int, Dict[str, Any]]] = []
+        self._counter = itertools.count()
+
+    def push(self, channel: Dict[str, Any], next_post_at: Optional[datetime]):
+        if next_post_at is None:
+            key = (0, 0.0)
+        else:
+            key = (1, next_post_at.timestamp())
+        heapq.heappush(self._heap, (key[0], key[1], next(self._counter), channel))
+
+    def pop(self) -> Optional[Dict[str, Any]]:
+        if not self._heap:
+            return None
+        return heapq.heappop(self._heap)[-1]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+def account_concurrency(adaptive_batch_size: int, max_concurrency: int, base_batch_size: int = 50) -> int:
+    """
+    Число параллельных каналов на аккаунт из FloodWait бюджета.
+
+    FloodWaitManager.get_adaptive_batch_size отдаёт base_batch_size в обычное время,
+    меньше днём и при активном FloodWait, больше ночью.
+    """
+    scaled = (max_concurrency * adaptive_batch_size) // base_batch_size
+    return max(1, min(max_concurrency, scaled))
+
+
+def shard_order(account_ids: List[int], instance_id: str) -> List[int]:
+    """
+    Порядок захвата шардов для реплики.
+
+    Реплики начинают с разных аккаунтов (сдвиг по хэшу instance_id), чтобы
+    lease'ы распределялись между ними, а не доставались первой реплике целиком.
+    """
+    ordered = sorted(account_ids)
+    if not ordered:
+        return ordered
+    offset = zlib.crc32(instance_id.encode()) % len(ordered)
+    return ordered[offset:] + ordered[:offset]
@@ -0,0 +1,177 @@
+"""
+Unit tests for message-ID watermark fetching in ChannelParser.
+
+Context7: при наличии watermark Telegram запрашивается через min_id постранично вперёд.
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from telethon_ingest.services import channel_parser as channel_parser_module
+from telethon_ingest.services.channel_parser import ChannelParser
+
+
+def _make_parser(batch_size=3):
+    parser = ChannelParser.__new__(ChannelParser)
+    parser.config = SimpleNamespace(max_messages_per_batch=batch_size, batch_delay_ms=0)
+    parser.redis_client = None
+    return parser
+
+
+def _message(message_id):
+    return SimpleNamespace(id=message_id, date=datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+
+@pytest.mark.asyncio
+async def test_batches_page_forward_from_watermark(monkeypatch):
+    channel_messages = [_message(i) for i in range(1, 11)]
+    calls = []
+
+    async def fake_fetch(client, channel, limit, redis_client, offset_date, reverse, min_id):
+        calls.append((min_id, reverse, offset_date))
+        return [m for m in channel_messages if m.id > min_id][:limit]
+
+    monkeypatch.setattr(channel_parser_module, "fetch_messages_with_retry", fake_fetch)
+    parser = _make_parser()
+    since_date = datetime(2024, 12, 31, tzinfo=timezone.utc)
+
+    batches = [
+        [m.id for m in batch]
+        async for batch in parser._get_message_batches(
+            None, SimpleNamespace(id=1), since_date, "incremental", min_message_id=4
+        )
+    ]
+
+    assert batches == [[5, 6, 7], [8, 9, 10]]
+    assert [c[0] for c in calls] == [4, 7, 10]
+    assert all(reverse and offset_date is None for _, reverse, offset_date in calls)
+
+
+@pytest.mark.asyncio
+async def test_historical_mode_bounds_by_since_date(monkeypatch):
+    calls = []
+
+    async def fake_fetch(client, channel, limit, redis_client, offset_date, reverse, min_id):
+        calls.append(offset_date)
+        return [_message(min_id + 1)]
+
+    monkeypatch.setattr(channel_parser_module, "fetch_messages_with_retry", fake_fetch)
+    parser = _make_parser()
+    since_date = datetime(2024, 12, 31, tzinfo=timezone.utc)
+
+    batches = [
+        batch
+        async for batch in parser._get_message_batches(
+            None, SimpleNamespace(id=1), since_date, "historical", min_message_id=100
+        )
+    ]
+
+    assert [m.id for m in batches[0]] == [101]
+    assert calls == [since_date]
+
+
+class _FakeRedis:
+    def __init__(self, value=None):
+        self.value = value
+
+    async def get(self, key):
+        return self.value
+
+    async def eval(self, script, numkeys, key, value):
+        if self.value is None or int(value) > int(self.value):
+            self.value = str(value)
+
+
+class _FakeSession:
+    def __init__(self, max_id):
+        self.max_id = max_id
+        self.calls = 0
+
+    async def execute(self, statement, params):
+        self.calls += 1
+        max_id = self.max_id
+        return SimpleNamespace(fetchone=lambda: (max_id,))
+
+
+@pytest.mark.asyncio
+async def test_watermark_restored_from_db_and_monotonic():
+    parser = _make_parser()
+    parser.redis_client = _FakeRedis()
+    parser.db_session = _FakeSession(42)
+
+    assert await parser._get_message_id_watermark("chan") == 42
+    assert parser.redis_client.value == "42"
+
+    await parser._update_message_id_watermark("chan", 10)
+    assert await parser._get_message_id_watermark("chan") == 42
+    assert parser.db_session.calls == 1
+
+
+def test_stored_prefix_stops_at_unsaved_message():
+    # 3 упал в _extract_message_data: watermark не должен перепрыгнуть через него
+    assert ChannelParser._stored_prefix_watermark([1, 2, 3, 4], {1, 2, 4}) == 2
+    assert ChannelParser._stored_prefix_watermark([5, 6], {6}) is None
+    assert ChannelParser._stored_prefix_watermark([7, 8], {7, 8}) == 8
+
+
+class _Row(tuple):
+    id = "chan"
+    last_parsed_at = None
+
+
+class _RunSession:
+    def in_transaction(self):
+        return False
+
+    async def execute(self, statement, params):
+        return SimpleNamespace(fetchone=lambda: _Row((None,)))
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_freezes_watermark_for_rest_of_run():
+    parser = _make_parser()
+    parser.config.adaptive_thresholds_enabled = False
+    parser.redis_client = _FakeRedis("10")
+    parser.db_session = _RunSession()
+    parser.rate_limiter = None
+
+    async def get_client(telegram_id):
+        return object()
+
+    async def noop(*args, **kwargs):
+        return None
+
+    async def channel_entity(client, channel_id):
+        return SimpleNamespace(id=1, title="chan"), 1
+
+    async def since_date(channel_data, mode):
+        return datetime(2024, 12, 31, tzinfo=timezone.utc)
+
+    async def batches(client, entity, since, mode, min_message_id):
+        assert min_message_id == 10
+        for page in ([11, 12, 13], [14, 15, 16], [17, 18, 19]):
+            yield [_message(i) for i in page]
+
+    async def process_batch(messages, *args):
+        ids = [m.id for m in messages]
+        if ids[0] == 14:
+            return {'processed': 0, 'skipped': 0, 'max_date': None,
+                    'watermark_id': None, 'watermark_complete': False, 'failed': True}
+        return {'processed': len(ids), 'skipped': 0, 'max_date': None,
+                'watermark_id': max(ids), 'watermark_complete': True, 'failed': False}
+
+    parser.telegram_client_manager = SimpleNamespace(get_client=get_client)
+    parser._get_channel_entity = channel_entity
+    parser._get_since_date = since_date
+    parser._get_message_batches = batches
+    parser._process_message_batch = process_batch
+    parser._update_channel_stats = noop
+    parser._update_last_parsed_at = noop
+    parser._monitor_missing_posts = noop
+
+    result = await parser.parse_channel_messages("chan", "123", "tenant", mode="incremental")
+
+    assert result['batch_count'] == 3
+    assert parser.redis_client.value == "13"
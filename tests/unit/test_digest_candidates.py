@@ -0,0 +1,147 @@
+"""
+Unit tests for shared digest topic candidates.
+
+Context7: планировщик окна считает каждую тему арендатора один раз для объединения
+каналов пользователей с глубиной, растущей с размером группы; генерация берёт кандидатов
+из плана, урезая их до каналов и лимита пользователя, и считает тему заново, если выборка
+плана упёрлась в глубину, а постов каналов пользователя в ней не хватает.
+"""
+
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from api.services import digest_service as digest_module
+from api.services.digest_candidates import (
+    DigestCandidateStore,
+    DigestPlanEntry,
+    TopicCandidates,
+    candidate_window_start,
+)
+from api.services.digest_service import DigestService
+
+
+class _FakePipeline:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    def set(self, key, value, ex=None):
+        self.redis_client.data[key] = value
+
+    async def execute(self):
+        return True
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.mget_calls = 0
+
+    async def mget(self, keys):
+        self.mget_calls += 1
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+
+def _post(post_id, channel_id, source="qdrant"):
+    return {
+        "post_id": post_id, "channel_id": channel_id, "grouped_id": None, "source": source,
+        "score": 0.9, "posted_at": datetime(2025, 1, 1, 10, tzinfo=timezone.utc),
+    }
+
+
+def _service():
+    return DigestService.__new__(DigestService)
+
+
+def test_window_start_is_aligned():
+    now = datetime(2025, 1, 1, 10, 47, 12, tzinfo=timezone.utc)
+
+    assert candidate_window_start(now, 60) == datetime(2025, 1, 1, 10, 0, tzinfo=timezone.utc)
+    assert candidate_window_start(now, 15) == datetime(2025, 1, 1, 10, 45, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_store_round_trip_prefers_first_window():
+    store = DigestCandidateStore(_FakeRedis(), window_minutes=60)
+    current = datetime(2025, 1, 1, 11, tzinfo=timezone.utc)
+    previous = datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+    await store.set_many("t1", previous, {"ai": TopicCandidates([_post("p1", "c1")], ["c1", "c2"], 10)})
+
+    found = await store.get_many("t1", [current, previous], ["ai", "crypto"])
+
+    assert list(found) == ["ai"]
+    assert found["ai"].posts[0]["posted_at"] == datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+    assert [post["post_id"] for post in found["ai"].for_user(["c1"], 10)] == ["p1"]
+    assert found["ai"].for_user(["c3"], 10) is None
+    assert found["ai"].for_user(["c1"], 20) is None
+    assert store.redis_client.mget_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_plan_retrieves_each_topic_once(monkeypatch):
+    store = DigestCandidateStore(_FakeRedis(), window_minutes=60)
+    monkeypatch.setattr(digest_module, "get_digest_candidate_store", lambda: store)
+    calls = []
+
+    async def retrieve(topics, tenant_id, channel_ids, limit_per_topic, db, failed_topics=None, topic_limits=None):
+        calls.append((list(topics), list(channel_ids), limit_per_topic, topic_limits))
+        failed_topics.add("broken")
+        return {topic: [_post(f"{topic}-1", "c1"), _post(f"{topic}-2", "c2")] for topic in topics}
+
+    service = _service()
+    monkeypatch.setattr(service, "_retrieve_topic_candidates", retrieve)
+    entries = [
+        DigestPlanEntry(str(uuid4()), ["ai", "crypto"], ["c1"], 5),
+        DigestPlanEntry(str(uuid4()), ["ai", "broken"], ["c2"], 10),
+        DigestPlanEntry(str(uuid4()), ["ai"], [], 10),
+    ]
+    now = datetime(2025, 1, 1, 10, 5, tzinfo=timezone.utc)
+
+    stats = await service.plan_shared_candidates("t1", entries, db=None, now=now)
+
+    assert stats == {"user_topics": 4, "topics": 3}
+    assert calls == [(["ai", "crypto", "broken"], ["c1", "c2"], 10, {"ai": 20, "crypto": 5, "broken": 10})]
+    stored = await store.get_many("t1", [candidate_window_start(now, 60)], ["ai", "crypto", "broken"])
+    assert sorted(stored) == ["ai", "crypto"]
+    assert stored["ai"].fetch_limit == 20
+
+
+def test_truncated_source_falls_back_for_quiet_channel_user():
+    # Выборка qdrant упёрлась в глубину 4 постами шумного канала c1
+    posts = [_post(f"p{i}", "c1") for i in range(3)] + [_post("p3", "c2")]
+    posts += [_post("g1", "c1", source="graph")]
+    entry = TopicCandidates(posts, ["c1", "c2"], fetch_limit=4)
+
+    assert [post["post_id"] for post in entry.for_user(["c1"], 2)] == ["p0", "p1", "g1"]
+    assert entry.for_user(["c2"], 2) is None
+
+    # Неусечённая выборка: постов c2 меньше лимита, но больше их нет и у собственного поиска
+    entry = TopicCandidates(posts[2:], ["c1", "c2"], fetch_limit=4)
+    assert [post["post_id"] for post in entry.for_user(["c2"], 2)] == ["p3"]
+
+
+@pytest.mark.asyncio
+async def test_collect_reuses_shared_candidates_and_filters_channels(monkeypatch):
+    service = _service()
+    computed = []
+
+    async def load_shared(topics, tenant_id, channel_ids, limit_per_topic):
+        return {"ai": [_post("p1", "c1"), _post("p2", "c2")]}
+
+    async def retrieve(topics, tenant_id, channel_ids, limit_per_topic, db, failed_topics=None, topic_limits=None):
+        computed.append(list(topics))
+        return {topic: [_post("p3", "c1")] for topic in topics}
+
+    monkeypatch.setattr(service, "_load_shared_candidates", load_shared)
+    monkeypatch.setattr(service, "_retrieve_topic_candidates", retrieve)
+
+    posts = await service._collect_posts_by_topics(
+        ["ai", "crypto"], "t1", uuid4(), channel_ids=["c1"], limit_per_topic=5, db=object()
+    )
+
+    assert computed == [["crypto"]]
+    assert sorted(post["post_id"] for post in posts) == ["p1", "p3"]
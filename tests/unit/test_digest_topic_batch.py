@@ -0,0 +1,138 @@
+"""
+Unit tests for batched digest topic retrieval.
+
+Context7: embeddings всех тем одним вызовом (общий async хелпер services.embedding_cache),
+один Qdrant search_batch на все темы, существование коллекции кэшируется на процесс;
+слияние кандидатов фильтрует каналы пользователя и дедуплицирует посты и альбомы.
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from api.services import digest_service as digest_module
+from api.services import embedding_cache as embedding_cache_module
+from api.services.digest_service import DigestService
+
+
+class _FakeQdrant:
+    def __init__(self, collections):
+        self.collections = collections
+        self.get_collections_calls = 0
+        self.batches = []
+
+    def get_collections(self):
+        self.get_collections_calls += 1
+        return SimpleNamespace(collections=[SimpleNamespace(name=name) for name in self.collections])
+
+    def search_batch(self, collection_name, requests):
+        self.batches.append((collection_name, requests))
+        return [[SimpleNamespace(payload={"post_id": f"p{i}"}, score=0.9)] for i, _ in enumerate(requests)]
+
+
+def _service(qdrant):
+    service = DigestService.__new__(DigestService)
+    service.qdrant_url = "http://qdrant-test:6333"
+    service.qdrant_client = qdrant
+    return service
+
+
+def _item(post_id, source, channel_id="c1", score=0.5, grouped_id=None, hour=10):
+    return {
+        "post_id": post_id, "channel_id": channel_id, "grouped_id": grouped_id, "source": source,
+        "score": score, "posted_at": datetime(2025, 1, 1, hour, tzinfo=timezone.utc),
+    }
+
+
+@pytest.mark.asyncio
+async def test_topics_are_embedded_in_one_request(monkeypatch):
+    service = _service(_FakeQdrant([]))
+    calls = []
+
+    async def request_embeddings(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    monkeypatch.setattr(embedding_cache_module, "get_embedding_cache", lambda: None)
+    monkeypatch.setattr(embedding_cache_module, "request_embeddings", request_embeddings)
+
+    vectors = await service._embed_topics(["ai", "", "crypto", "ai"])
+
+    assert calls == [["ai", "crypto"]]
+    assert vectors[1] == [] and vectors[0] and vectors[2]
+    assert vectors[3] == vectors[0]
+
+
+def test_single_search_batch_and_cached_collection(monkeypatch):
+    monkeypatch.setattr(digest_module, "_qdrant_collections", {})
+    qdrant = _FakeQdrant(["t1_posts"])
+    service = _service(qdrant)
+
+    for _ in range(2):
+        hits = service._search_topics_in_qdrant("1", ["ai", "crypto", "empty"], [[0.1], [0.2], []], ["c1"], 5)
+
+    assert qdrant.get_collections_calls == 1
+    assert len(qdrant.batches) == 2
+    collection_name, requests = qdrant.batches[0]
+    assert collection_name == "t1_posts"
+    assert [request.limit for request in requests] == [5, 5]
+    assert sorted(hits) == ["ai", "crypto"]
+
+
+def test_search_batch_uses_per_topic_depth(monkeypatch):
+    monkeypatch.setattr(digest_module, "_qdrant_collections", {})
+    qdrant = _FakeQdrant(["t1_posts"])
+    service = _service(qdrant)
+
+    service._search_topics_in_qdrant("1", ["ai", "crypto"], [[0.1], [0.2]], ["c1"], 5, {"ai": 20})
+
+    assert [request.limit for request in qdrant.batches[0][1]] == [20, 5]
+
+
+def test_merge_filters_channels_and_deduplicates_albums():
+    candidates = {
+        "ai": [
+            _item("p1", "qdrant", score=0.9, hour=12),
+            _item("p2", "qdrant", grouped_id=7, score=0.8),
+            _item("p3", "graph", grouped_id=7, score=0.7),
+            _item("p4", "fts", channel_id="other"),
+        ],
+        "crypto": [_item("p1", "fts", hour=12), _item("p5", "fts", hour=9)],
+    }
+
+    merged = DigestService._merge_topic_candidates(["ai", "crypto"], candidates, ["c1"])
+
+    assert [post["post_id"] for post in merged] == ["p1", "p2", "p5"]
+    assert candidates["ai"][0] is not merged[0]
+
+
+class _FakeAsyncClient:
+    posts = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def post(self, url, json=None, headers=None):
+        self.posts.append((url, json))
+        data = [{"index": 1, "embedding": [2.0]}, {"index": 0, "embedding": [1.0]}]
+        return SimpleNamespace(status_code=200, json=lambda: {"data": data})
+
+
+@pytest.mark.asyncio
+async def test_embedding_request_is_async_and_restores_order(monkeypatch):
+    _FakeAsyncClient.posts = []
+    monkeypatch.setattr(embedding_cache_module, "httpx", SimpleNamespace(AsyncClient=_FakeAsyncClient))
+
+    vectors = await embedding_cache_module.request_embeddings(["ai", "crypto"])
+
+    assert vectors == [[1.0], [2.0]]
+    assert len(_FakeAsyncClient.posts) == 1
+    url, payload = _FakeAsyncClient.posts[0]
+    assert url.endswith("/v1/embeddings") and payload["input"] == ["ai", "crypto"]
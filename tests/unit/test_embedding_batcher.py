@@ -0,0 +1,95 @@
+"""
+Unit tests for the embedding micro-batcher.
+
+Context7: конкурентные вызовы склеиваются в один batch-запрос, ошибки доставляются поэлементно.
+"""
+
+import asyncio
+
+import pytest
+
+from worker.ai_providers.embedding_batcher import EmbeddingMicroBatcher
+
+
+class _RecordingBackend:
+    def __init__(self, fail_on=None, delay=0.0):
+        self.calls = []
+        self.fail_on = fail_on
+        self.delay = delay
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail_on is not None and self.fail_on in texts:
+            raise ValueError(f"invalid input: {self.fail_on}")
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_coalesce_into_one_request():
+    backend = _RecordingBackend()
+    batcher = EmbeddingMicroBatcher(backend, max_batch_size=16, max_linger_ms=20)
+
+    results = await asyncio.gather(*(batcher.submit("x" * i) for i in range(1, 6)))
+
+    assert results == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert backend.calls == [["x", "xx", "xxx", "xxxx", "xxxxx"]]
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_batches_bounded_by_max_batch_size():
+    backend = _RecordingBackend()
+    batcher = EmbeddingMicroBatcher(backend, max_batch_size=2, max_linger_ms=20, max_inflight_batches=4)
+
+    results = await batcher.submit_many(["a", "bb", "ccc", "dddd", "eeeee"])
+
+    assert results == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert [len(call) for call in backend.calls] == [2, 2, 1]
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_invalid_batch_is_split_and_error_reaches_only_bad_item():
+    backend = _RecordingBackend(fail_on="bad")
+    batcher = EmbeddingMicroBatcher(backend, max_batch_size=8, max_linger_ms=20)
+
+    results = await batcher.submit_many(["ok", "bad", "fine"], return_exceptions=True)
+
+    assert results[0] == [2.0]
+    assert isinstance(results[1], ValueError)
+    assert results[2] == [4.0]
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_transport_error_fans_out_to_every_waiter():
+    async def backend(texts):
+        raise ConnectionError("proxy down")
+
+    batcher = EmbeddingMicroBatcher(backend, max_batch_size=8, max_linger_ms=20)
+
+    results = await batcher.submit_many(["a", "b"], return_exceptions=True)
+
+    assert all(isinstance(r, ConnectionError) for r in results)
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_applies_backpressure():
+    backend = _RecordingBackend(delay=0.05)
+    batcher = EmbeddingMicroBatcher(
+        backend, max_batch_size=1, max_linger_ms=0, max_queue_size=1, max_inflight_batches=1
+    )
+
+    producers = [asyncio.create_task(batcher.submit(str(i))) for i in range(4)]
+    await asyncio.sleep(0.01)
+
+    # Один батч в полёте, один ждёт слота, один в очереди — остальные продюсеры заблокированы на put()
+    assert batcher.queue_depth <= 1
+    assert len(backend.calls) == 1
+
+    results = await asyncio.gather(*producers)
+    assert results == [[1.0], [1.0], [1.0], [1.0]]
+    await batcher.close()
@@ -0,0 +1,138 @@
+"""
+Unit tests for the content-addressed embedding cache.
+
+Context7: ключ — хэш нормализованного текста + модель + размерность; Redis хранит blob'ы.
+"""
+
+import pytest
+
+from shared.embeddings import (
+    EmbeddingCache,
+    decode_vector,
+    embedding_cache_key,
+    encode_vector,
+)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._ops = []
+
+    def set(self, key, value, ex=None):
+        self._ops.append(("set", key, value))
+        return self
+
+    def zadd(self, key, mapping):
+        self._ops.append(("zadd", key, mapping))
+        return self
+
+    def delete(self, *keys):
+        self._ops.append(("delete", keys))
+        return self
+
+    def zrem(self, key, *members):
+        self._ops.append(("zrem", key, members))
+        return self
+
+    async def execute(self):
+        for op in self._ops:
+            if op[0] == "set":
+                self._redis.data[op[1]] = op[2] if isinstance(op[2], bytes) else str(op[2]).encode()
+            elif op[0] == "zadd":
+                self._redis.zsets.setdefault(op[1], {}).update(op[2])
+            elif op[0] == "delete":
+                for key in op[1]:
+                    self._redis.data.pop(key, None)
+            elif op[0] == "zrem":
+                for member in op[2]:
+                    self._redis.zsets.get(op[1], {}).pop(member, None)
+        return [True] * len(self._ops)
+
+
+class _FakeAsyncRedis:
+    def __init__(self):
+        self.data = {}
+        self.zsets = {}
+        self.mget_calls = 0
+
+    async def mget(self, keys):
+        self.mget_calls += 1
+        return [self.data.get(key) for key in keys]
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+    async def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    async def zrange(self, key, start, end):
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])
+        return [member for member, _ in members[start:end + 1]]
+
+
+def test_key_uses_normalized_text_model_and_dimension():
+    base = embedding_cache_key("Привет,\n\n мир", "EmbeddingsGigaR", 2560)
+    assert base == embedding_cache_key("Привет, мир ", "EmbeddingsGigaR", 2560)
+    assert base != embedding_cache_key("Привет, мир", "Embeddings", 2560)
+    assert base != embedding_cache_key("Привет, мир", "EmbeddingsGigaR", 2048)
+
+
+def test_float16_blob_roundtrip_is_compact():
+    vector = [0.125, -0.5, 0.0078125, 1.0]
+    blob = encode_vector(vector, "float16")
+    assert len(blob) == 1 + 2 * len(vector)
+    assert decode_vector(blob) == pytest.approx(vector)
+    assert decode_vector(encode_vector(vector, "float32")) == pytest.approx(vector)
+
+
+@pytest.mark.asyncio
+async def test_repeated_text_is_computed_once_and_shared_via_redis():
+    redis = _FakeAsyncRedis()
+    calls = []
+
+    async def compute(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+    writer = EmbeddingCache(model="m", redis_client=redis)
+    first = await writer.get_or_compute(["пост", "пост  ", "другой"], compute)
+    assert calls == [["пост", "другой"]]
+    assert first[0] == first[1]
+
+    # Другой процесс: пустой LRU, размерность узнаётся из указателя в Redis
+    reader = EmbeddingCache(model="m", redis_client=redis)
+    second = await reader.get_or_compute(["пост"], compute)
+    assert calls == [["пост", "другой"]]
+    assert second[0] == pytest.approx([4.0, 0.5])
+
+
+@pytest.mark.asyncio
+async def test_failures_and_zero_vectors_are_not_cached():
+    cache = EmbeddingCache(model="m", dimension=2)
+
+    async def compute(texts):
+        return [ValueError("bad"), [0.0, 0.0]]
+
+    results = await cache.get_or_compute(["a", "b"], compute)
+
+    assert isinstance(results[0], ValueError)
+    assert results[1] == [0.0, 0.0]
+    assert await cache.get_many(["a", "b"]) == [None, None]
+
+
+@pytest.mark.asyncio
+async def test_lru_and_redis_are_size_bounded():
+    redis = _FakeAsyncRedis()
+    cache = EmbeddingCache(model="m", dimension=2, redis_client=redis, lru_max_items=2, redis_max_items=2)
+
+    for text in ["a", "b", "c"]:
+        await cache.set_many([text], [[1.0, 2.0]])
+    await cache._trim_redis()
+
+    assert len(cache._lru) == 2
+    assert await redis.zcard(cache._index_key) == 2
+    assert cache.key_for("a") not in redis.data
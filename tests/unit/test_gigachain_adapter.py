@@ -98,10 +98,92 @@ async def test_generate_tags_batch_uses_feature_flags(monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_generate_embeddings_batch_returns_empty():
+async def test_generate_embeddings_batch_uses_provider_and_masks_failures():
     adapter = make_adapter()
-    embeddings = await adapter.generate_embeddings_batch(["text"], force_immediate=True)
-    assert embeddings == [[]]
+    provider = MagicMock()
+    provider.embed_text_many = AsyncMock(return_value=[[0.1, 0.2], ValueError("bad input")])
+    adapter._embedding_provider = provider
+
+    embeddings = await adapter.generate_embeddings_batch(["ok", "bad"])
+
+    assert embeddings == [[0.1, 0.2], []]
+    provider.embed_text_many.assert_awaited_once_with(["ok", "bad"], return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_batch_force_immediate_bypasses_queue():
+    adapter = make_adapter()
+    provider = MagicMock()
+    provider.embed_texts = AsyncMock(side_effect=ConnectionError("proxy down"))
+    adapter._embedding_provider = provider
+
+    embeddings = await adapter.generate_embeddings_batch(["a", "b"], force_immediate=True)
+
+    assert embeddings == [[], []]
+    provider.embed_text_many.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_tagging_calls_share_one_provider_call(monkeypatch):
+    adapter = make_adapter()
+    calls = []
+
+    async def _primary(texts):
+        calls.append(list(texts))
+        return [TaggingResult(tags=[text], language="ru") for text in texts]
+
+    monkeypatch.setattr(adapter, "_generate_tags_with_gigachat", _primary)
+
+    results = await asyncio.gather(*(adapter.generate_tags_batch([f"post {i}"]) for i in range(3)))
+
+    assert [r[0].tags for r in results] == [["post 0"], ["post 1"], ["post 2"]]
+    assert calls == [["post 0", "post 1", "post 2"]]
+    await adapter.close()
+
+
+@pytest.mark.asyncio
+async def test_batcher_errors_are_raised_not_masked_as_empty_tags(monkeypatch):
+    adapter = make_adapter()
+
+    async def _broken_dispatch(texts):
+        raise RuntimeError("dispatch failed")
+
+    monkeypatch.setattr(adapter._tag_batcher, "_batch_fn", _broken_dispatch)
+
+    with pytest.raises(RuntimeError, match="dispatch failed"):
+        await adapter.generate_tags_batch(["post"])
+    await adapter.close()
+
+
+@pytest.mark.asyncio
+async def test_multi_item_prompt_requeues_only_unparsed_items(monkeypatch):
+    adapter = make_adapter()
+    prompts = []
+    replies = iter([
+        '{"1": ["alpha"], "3": ["gamma"]}',  # для второго поста ответа нет
+        '["beta"]',
+    ])
+
+    async def _chat(prompt, max_tokens):
+        prompts.append(prompt)
+        return next(replies)
+
+    monkeypatch.setattr(adapter, "_chat_completion", _chat)
+
+    results = await adapter._call_gigachat_api(["first", "second", "   ", "third"])
+
+    assert [r.tags for r in results] == [["alpha"], ["beta"], [], ["gamma"]]
+    assert len(prompts) == 2
+    assert "[id=3]" in prompts[0]
+    assert "second" in prompts[1] and "first" not in prompts[1]
+
+
+def test_parse_batch_tags_accepts_object_and_list_forms():
+    assert GigaChainAdapter._parse_batch_tags('{"1": ["a"], "2": "bad", "9": ["x"]}', 2) == {1: ["a"]}
+    assert GigaChainAdapter._parse_batch_tags(
+        '```json\n[{"id": 2, "tags": ["b", ""]}]\n```', 2
+    ) == {2: ["b"]}
+    assert GigaChainAdapter._parse_batch_tags("not json", 2) == {}
 
 
 def test_provider_config_defaults():
@@ -0,0 +1,103 @@
+"""
+Unit tests for batched GraphWriter stream processing.
+
+Context7: батч сообщений post.parsed пишется одной транзакцией Neo4j и ACK'ается одним XACK;
+при неудаче батч делится пополам, и в PEL (учёт retry/DLQ) остаются только «ядовитые» события.
+"""
+
+import json
+
+import pytest
+
+from worker.services.graph_writer import GraphWriter
+
+
+class _FakeNeo4j:
+    def __init__(self, success=True):
+        self.success = success
+        self.batches = []
+
+    async def write_graph_batch(self, **records):
+        self.batches.append(records)
+        if callable(self.success):
+            return self.success(records)
+        return self.success
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.acks = []
+        self.dlq = []
+
+    async def xack(self, stream, group, *ids):
+        self.acks.append(list(ids))
+        return len(ids)
+
+    async def xadd(self, stream, fields, maxlen=None):
+        self.dlq.append(fields)
+        return b"dlq-1"
+
+
+def _message(message_id, **event):
+    return message_id, {b"data": json.dumps(event).encode()}
+
+
+def _writer(neo4j, redis_client, max_retries=10):
+    return GraphWriter(neo4j_client=neo4j, redis_client=redis_client, max_retries=max_retries)
+
+
+@pytest.mark.asyncio
+async def test_batch_is_written_once_and_acked_with_single_xack():
+    neo4j, redis_client = _FakeNeo4j(), _FakeRedis()
+    writer = _writer(neo4j, redis_client)
+    messages = [
+        _message(b"1-0", post_id="p1", forward_from_peer_id={"channel_id": 1}, forward_from_chat_id=1),
+        _message(b"2-0", post_id="p2", reply_to_message_id=10, reply_to_chat_id=1),
+        _message(b"3-0", post_id="p3", post_author="Автор"),
+        (b"4-0", {b"data": b"not json"}),
+    ]
+
+    processed, failed = await writer._handle_post_messages(messages, "stream:posts:parsed")
+
+    assert (processed, failed) == (3, 1)
+    assert len(neo4j.batches) == 1
+    batch = neo4j.batches[0]
+    assert [row["post_id"] for row in batch["forwards"]] == ["p1"]
+    assert [row["post_id"] for row in batch["replies"]] == ["p2"]
+    assert [row["author_name"] for row in batch["authors"]] == ["Автор"]
+    assert redis_client.acks == [[b"1-0", b"2-0", b"3-0"]]
+
+
+@pytest.mark.asyncio
+async def test_failed_transaction_keeps_messages_pending_until_dlq():
+    neo4j, redis_client = _FakeNeo4j(success=False), _FakeRedis()
+    writer = _writer(neo4j, redis_client, max_retries=1)
+    messages = [_message(b"1-0", post_id="p1", post_author="a"), _message(b"2-0", post_id="p2", post_author="b")]
+
+    assert await writer._handle_post_messages(messages, "stream:posts:parsed") == (0, 2)
+    assert redis_client.acks == []
+
+    assert await writer._handle_post_messages(messages, "stream:posts:parsed") == (0, 2)
+    assert [fields["post_id"] for fields in redis_client.dlq] == ["p1", "p2"]
+    assert redis_client.acks == [[b"1-0", b"2-0"]]
+    assert writer._retry_count == {}
+
+
+@pytest.mark.asyncio
+async def test_poison_event_is_isolated_and_rest_of_batch_is_acked():
+    def rejects_poison(records):
+        return all(row["author_name"] != "poison" for row in records["authors"])
+
+    neo4j, redis_client = _FakeNeo4j(success=rejects_poison), _FakeRedis()
+    writer = _writer(neo4j, redis_client, max_retries=3)
+    messages = [
+        _message(f"{i}-0".encode(), post_id=f"p{i}", post_author="poison" if i == 3 else f"a{i}")
+        for i in range(1, 6)
+    ]
+
+    processed, failed = await writer._handle_post_messages(messages, "stream:posts:parsed")
+
+    assert (processed, failed) == (4, 1)
+    assert sorted(redis_client.acks[0]) == [b"1-0", b"2-0", b"4-0", b"5-0"]
+    assert writer._retry_count == {b"3-0": 1}
+    assert redis_client.dlq == []
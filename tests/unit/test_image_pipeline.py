@@ -0,0 +1,80 @@
+"""
+Unit tests for the Vision image preparation pool.
+
+Context7: один decode даёт и phash (совместимый с compute_phash), и JPEG для API.
+"""
+
+import io
+
+import pytest
+from PIL import Image
+
+from shared.utils.phash import compute_phash
+from worker.services.image_pipeline import (
+    ImagePrepareOptions,
+    ImageProcessingPool,
+    prepare_image,
+    vision_image_pool_busy_workers,
+    vision_image_pool_queue_depth,
+)
+
+
+def _png_bytes(size=(640, 480)) -> bytes:
+    image = Image.new("RGB", size, (255, 255, 255))
+    for x in range(100, 300):
+        for y in range(50, 200):
+            image.putpixel((x, y), (x % 256, y % 256, 40))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_prepare_image_phash_matches_compute_phash():
+    content = _png_bytes()
+    prepared = prepare_image(content, "image/png", ImagePrepareOptions(max_dim=256))
+
+    assert prepared.phash_hex == compute_phash(content, hash_size=16).hash_hex
+    assert prepared.preprocessed
+    assert prepared.mime_type == "image/jpeg"
+    assert max(prepared.new_size) <= 256
+    assert Image.open(io.BytesIO(prepared.content)).format == "JPEG"
+
+
+def test_prepare_image_roi_crop_and_no_phash():
+    content = _png_bytes()
+    options = ImagePrepareOptions(grayscale=False, roi_crop=True, phash_hash_size=None)
+    prepared = prepare_image(content, "image/png", options)
+
+    assert prepared.phash_hex is None
+    assert prepared.roi_bbox is not None
+
+
+def test_prepare_image_skips_preprocess_when_disabled():
+    content = _png_bytes()
+    prepared = prepare_image(content, "image/png", ImagePrepareOptions(preprocess=False))
+
+    assert not prepared.preprocessed
+    assert prepared.content is content
+    assert prepared.phash_hex
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [0, 1])
+async def test_pool_prepares_and_resets_gauges(workers):
+    pool = ImageProcessingPool(max_workers=workers)
+    try:
+        prepared = await pool.prepare(_png_bytes(), "image/png", ImagePrepareOptions())
+    finally:
+        pool.shutdown()
+
+    assert prepared.preprocessed
+    assert vision_image_pool_queue_depth._value.get() == 0
+    assert vision_image_pool_busy_workers._value.get() == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_raises_on_undecodable_image():
+    pool = ImageProcessingPool(max_workers=0)
+    with pytest.raises(Exception):
+        await pool.prepare(b"not an image", "image/png", ImagePrepareOptions())
+    assert vision_image_pool_busy_workers._value.get() == 0
@@ -0,0 +1,136 @@
+"""
+Unit tests for vectorized IndexingTask batch processing.
+
+Context7: ошибка одной точки Qdrant оставляет в PEL только её сообщение,
+кэш lookup'ов живёт ровно один батч XREADGROUP.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from worker.tasks import indexing_task as indexing_module
+from worker.tasks.indexing_task import IndexingLookupCache, IndexingTask
+
+
+class _FakeQdrant:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.upserts = []
+
+    async def ensure_collection(self, collection_name, vector_size):
+        return True
+
+    async def upsert_vectors(self, collection_name, points):
+        self.upserts.append([point["id"] for point in points])
+        return [
+            ConnectionError("qdrant point rejected") if point["id"] in self.failing else f"vec-{point['id']}"
+            for point in points
+        ]
+
+
+class _FakeEmbeddings:
+    async def generate_embeddings(self, texts, return_exceptions=False):
+        return [[0.1, 0.2] for _ in texts]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.acks = []
+        self.client = self
+
+    async def xack(self, stream, group, *ids):
+        self.acks.append(list(ids))
+        return len(ids)
+
+
+def _task(qdrant, seen_caches=None):
+    task = IndexingTask.__new__(IndexingTask)
+    task.qdrant_client = qdrant
+    task.embedding_service = _FakeEmbeddings()
+    task.neo4j_client = None
+    task.redis_client = _FakeRedis()
+    task.event_consumer = SimpleNamespace(
+        _parse_event_data=lambda fields: dict(fields),
+        config=SimpleNamespace(group_name="indexing"),
+    )
+    task.publisher = SimpleNamespace(publish_event=_noop)
+    task.last_processed_id = None
+    task.processed_count_since_trim = 0
+    task.status_rows = []
+
+    async def get_posts_data(post_ids, raise_on_error=False):
+        return {post_id: {"text": f"text {post_id}", "tenant_id": "t1"} for post_id in post_ids}
+
+    async def prefetch_lookups(cache, posts):
+        if seen_caches is not None:
+            seen_caches.append(indexing_module._lookup_cache.get())
+        cache.albums.update({post_id: None for post_id in posts})
+
+    async def album_id(post_id):
+        return indexing_module._lookup_cache.get().albums[post_id]
+
+    async def build_payload(post_id, post_data, event_data, album_id):
+        return "t1_posts", {"post_id": post_id}
+
+    async def update_status_batch(status_rows, processed_post_ids, started_at):
+        task.status_rows.extend(status_rows)
+
+    task._get_posts_data = get_posts_data
+    task._compose_embedding_text = lambda post_data: post_data["text"]
+    task._prefetch_lookups = prefetch_lookups
+    task._get_album_id_for_post = album_id
+    task._build_qdrant_payload = build_payload
+    task._update_indexing_status_batch = update_status_batch
+    return task
+
+
+async def _noop(*args, **kwargs):
+    return None
+
+
+def _messages(*post_ids):
+    return [(f"{i}-0", {"post_id": post_id}) for i, post_id in enumerate(post_ids, start=1)]
+
+
+@pytest.mark.asyncio
+async def test_failed_qdrant_point_leaves_only_its_message_unacked():
+    qdrant = _FakeQdrant(failing={"p2"})
+    task = _task(qdrant)
+
+    acked = await task._consume_batch_vectorized("stream:posts:enriched", _messages("p1", "p2", "p3"))
+
+    assert acked == 2
+    assert qdrant.upserts == [["p1", "p2", "p3"]]
+    assert task.redis_client.acks == [["1-0", "3-0"]]
+    assert task.last_processed_id == "3-0"
+    statuses = {row[0]: row[1] for row in task.status_rows}
+    assert statuses == {"p1": "completed", "p2": "failed", "p3": "completed"}
+
+
+@pytest.mark.asyncio
+async def test_lookup_cache_is_scoped_to_one_batch():
+    seen_caches = []
+    task = _task(_FakeQdrant(), seen_caches)
+
+    await task._consume_batch_vectorized("stream:posts:enriched", _messages("p1"))
+    await task._consume_batch_vectorized("stream:posts:enriched", _messages("p2"))
+
+    assert all(isinstance(cache, IndexingLookupCache) for cache in seen_caches)
+    assert seen_caches[0] is not seen_caches[1]
+    assert list(seen_caches[1].albums) == ["p2"]
+    assert indexing_module._lookup_cache.get() is None
+
+
+@pytest.mark.asyncio
+async def test_lookup_cache_is_reset_when_batch_raises():
+    task = _task(_FakeQdrant())
+
+    async def broken_status_batch(status_rows, processed_post_ids, started_at):
+        raise RuntimeError("status writer down")
+
+    task._update_indexing_status_batch = broken_status_batch
+
+    assert await task._consume_batch_vectorized("stream:posts:enriched", _messages("p1")) == 0
+    assert task.redis_client.acks == []
+    assert indexing_module._lookup_cache.get() is None
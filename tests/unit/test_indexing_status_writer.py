@@ -0,0 +1,116 @@
+"""
+Unit tests for the coalescing indexing_status writer.
+
+Context7: статусы многих постов сбрасываются одной транзакцией за flush-интервал,
+промежуточные статусы поста схлопываются с финальным.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from worker.services.indexing_status_writer import IndexingStatusWriter
+
+
+class _RecordingWriter(IndexingStatusWriter):
+    def __init__(self, fail=False, **kwargs):
+        super().__init__(db_url="postgresql://test", **kwargs)
+        self.flushes = []
+        self.fail = fail
+
+    def _write_rows(self, status_rows, processed_ids):
+        if self.fail:
+            raise RuntimeError("db down")
+        self.flushes.append((list(status_rows), list(processed_ids)))
+
+
+@pytest.mark.asyncio
+async def test_statuses_of_many_posts_are_flushed_in_one_transaction():
+    writer = _RecordingWriter(flush_interval_ms=20, max_pending=100)
+
+    results = await asyncio.gather(*(
+        writer.write(f"post-{i}", "completed", "completed", f"vec-{i}", processed=True)
+        for i in range(5)
+    ))
+
+    assert results == [True] * 5
+    assert len(writer.flushes) == 1
+    status_rows, processed_ids = writer.flushes[0]
+    assert [row[0] for row in status_rows] == [f"post-{i}" for i in range(5)]
+    assert processed_ids == [f"post-{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_processing_status_coalesces_with_final_status():
+    writer = _RecordingWriter(flush_interval_ms=20)
+    started_at = datetime.now(timezone.utc)
+
+    assert await writer.write("post-1", "processing", "pending",
+                              processing_started_at=started_at, wait=False)
+    assert await writer.write("post-1", "completed", "completed", "vec-1", processed=True)
+
+    assert writer.flushes == [(
+        [("post-1", "completed", "completed", "vec-1", None, started_at)],
+        ["post-1"],
+    )]
+
+
+@pytest.mark.asyncio
+async def test_write_many_flushes_immediately_and_max_pending_splits_batches():
+    writer = _RecordingWriter(flush_interval_ms=10_000, max_pending=2)
+
+    ok = await writer.write_many(
+        [("a", "completed", "completed", "va", None), ("b", "skipped", "skipped", None, "empty"),
+         ("c", "failed", "failed", None, "[network] boom")],
+        processed_post_ids=["a", "b"],
+    )
+
+    assert ok
+    assert [[row[0] for row in rows] for rows, _ in writer.flushes] == [["a", "b"], ["c"]]
+    assert [processed for _, processed in writer.flushes] == [["a", "b"], []]
+
+
+@pytest.mark.asyncio
+async def test_flush_failure_is_reported_without_raising():
+    writer = _RecordingWriter(fail=True, flush_interval_ms=0)
+
+    assert await writer.write("post-1", "completed", "completed", processed=True) is False
+    await writer.close()
+
+
+def test_insert_sets_completed_at_for_new_rows(monkeypatch):
+    import psycopg2
+    import psycopg2.extras
+
+    statements = []
+
+    class _Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    class _Connection(_Cursor):
+        def cursor(self):
+            return _Cursor()
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(psycopg2, "connect", lambda url: _Connection())
+    monkeypatch.setattr(
+        psycopg2.extras, "execute_values",
+        lambda cursor, sql, rows, **kwargs: statements.append(" ".join(sql.split())),
+    )
+
+    IndexingStatusWriter(db_url="postgresql://test")._write_rows(
+        [("post-1", "completed", "completed", "vec-1", None, None)], []
+    )
+
+    insert_sql = statements[0]
+    select_part = insert_sql.split("SELECT", 1)[1].split("FROM (VALUES", 1)[0]
+    assert "processing_completed_at )" in insert_sql
+    assert "WHEN v.embedding_status IN ('completed', 'skipped')" in select_part
+    assert "THEN NOW()" in select_part
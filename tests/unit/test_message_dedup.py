@@ -0,0 +1,128 @@
+"""
+Unit tests for batch message dedup in ChannelParser.
+
+Context7: батч проверяется одним pipeline в Redis и не более чем одним запросом в БД.
+"""
+
+import pytest
+
+from telethon_ingest.services.message_dedup import MessageDedupIndex
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def exists(self, key):
+        self.ops.append(lambda: int(key in self.redis.strings))
+
+    def getbit(self, key, offset):
+        self.ops.append(lambda: int(offset in self.redis.bitmaps.get(key, set())))
+
+    def setbit(self, key, offset, value):
+        self.ops.append(lambda: self.redis.bitmaps.setdefault(key, set()).add(offset))
+
+    def expire(self, key, ttl):
+        self.ops.append(lambda: self.redis.ttls.__setitem__(key, ttl))
+
+    def setex(self, key, ttl, value):
+        self.ops.append(lambda: self.redis.strings.__setitem__(key, value))
+
+    async def execute(self):
+        self.redis.executions += 1
+        return [op() for op in self.ops]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.bitmaps = {}
+        self.strings = {}
+        self.ttls = {}
+        self.executions = 0
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+
+class _FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+class _FakeSession:
+    def __init__(self, existing_ids):
+        self.existing_ids = set(existing_ids)
+        self.queries = []
+
+    async def execute(self, statement, params):
+        self.queries.append(params)
+        ids = self.existing_ids
+        if "message_ids" in params:
+            ids = ids & set(params["message_ids"])
+        return _FakeResult([(mid,) for mid in sorted(ids)])
+
+
+@pytest.mark.asyncio
+async def test_cold_channel_is_warmed_from_db():
+    redis = _FakeRedis()
+    session = _FakeSession({1, 2, 3, 10})
+    index = MessageDedupIndex(redis)
+
+    duplicates = await index.find_duplicates(session, "chan", [2, 3, 4, 5])
+
+    assert duplicates == {2, 3}
+    assert len(session.queries) == 1
+    assert "message_ids" not in session.queries[0]
+    assert redis.bitmaps["parsed:bitmap:chan"] == {1, 2, 3, 10}
+
+
+@pytest.mark.asyncio
+async def test_warm_channel_uses_single_any_query_for_misses():
+    redis = _FakeRedis()
+    session = _FakeSession({1, 2})
+    index = MessageDedupIndex(redis)
+    await index.warm(session, "chan")
+    session.queries.clear()
+    redis.executions = 0
+
+    # Пост 7 сохранён другим процессом после прогрева
+    session.existing_ids.add(7)
+    duplicates = await index.find_duplicates(session, "chan", [1, 2, 7, 8, 9])
+
+    assert duplicates == {1, 2, 7}
+    assert session.queries == [{"channel_id": "chan", "message_ids": [7, 8, 9]}]
+    assert 7 in redis.bitmaps["parsed:bitmap:chan"]
+
+
+@pytest.mark.asyncio
+async def test_all_bitmap_hits_skip_db():
+    redis = _FakeRedis()
+    session = _FakeSession(set())
+    index = MessageDedupIndex(redis)
+    await index.warm(session, "chan")
+    await index.mark_seen("chan", [5, 6])
+    session.queries.clear()
+
+    duplicates = await index.find_duplicates(session, "chan", [5, 6])
+
+    assert duplicates == {5, 6}
+    assert session.queries == []
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_falls_back_to_db():
+    class _BrokenRedis:
+        def pipeline(self, transaction=False):
+            raise ConnectionError("redis down")
+
+    session = _FakeSession({3})
+    index = MessageDedupIndex(_BrokenRedis())
+
+    duplicates = await index.find_duplicates(session, "chan", [3, 4])
+
+    assert duplicates == {3}
+    assert session.queries == [{"channel_id": "chan", "message_ids": [3, 4]}]
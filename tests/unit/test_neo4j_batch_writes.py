@@ -0,0 +1,149 @@
+"""
+Unit tests for batched Neo4j writes used by IndexingTask batch mode.
+
+Context7: узлы Post, теги и темы всего батча пишутся одной UNWIND-транзакцией.
+"""
+
+import pytest
+
+from worker.integrations.neo4j_client import Neo4jClient
+
+
+class _FakeResult:
+    def __init__(self, written):
+        self._written = written
+
+    async def single(self):
+        return {"written": self._written}
+
+
+class _FakeTx:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def run(self, query, **params):
+        self.calls.append((query, params))
+        rows = params.get("rows")
+        return _FakeResult(len(rows) if rows is not None else 0)
+
+
+class _FakeSession:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute_write(self, work):
+        return await work(_FakeTx(self.calls))
+
+
+class _FakeDriver:
+    def __init__(self):
+        self.calls = []
+
+    def session(self):
+        return _FakeSession(self.calls)
+
+
+def _client():
+    client = Neo4jClient(uri="neo4j://neo4j:7687", username="neo4j", password="test")
+    client._driver = _FakeDriver()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_batch_write_uses_single_unwind_transaction():
+    client = _client()
+    posts = [
+        {
+            "post_id": "p1",
+            "tenant_id": "t1",
+            "channel_id": "c1",
+            "expires_at": "2025-01-01T00:00:00+00:00",
+            "content": "x" * 5000,
+            "enrichment_data": {"tags": {"tags": ["AI", "ml"]}},
+            "tags": [{"name": "AI", "category": "general", "confidence": 1.0}, {"name": "Python"}, {"name": "ml"}],
+        },
+        {
+            "post_id": "p2",
+            "user_id": None,
+            "tenant_id": "t1",
+            "channel_id": "c1",
+            "expires_at": "2025-01-01T00:00:00+00:00",
+            "tags": [],
+        },
+    ]
+
+    assert await client.create_post_nodes_batch(posts) is True
+
+    calls = client._driver.calls
+    # Одна UNWIND-запись; RELATED_TO не нужен — ни у одного поста нет двух тем
+    assert len(calls) == 1
+    rows = calls[0][1]["rows"]
+    assert [row["post_id"] for row in rows] == ["p1", "p2"]
+    assert len(rows[0]["content"]) == 2048
+    assert rows[0]["topics"] == ["python"]
+    assert rows[1]["user_id"] == "system"
+    assert isinstance(rows[0]["enrichment_data"], str)
+
+
+@pytest.mark.asyncio
+async def test_batch_write_related_topics_only_for_multi_topic_posts():
+    client = _client()
+    posts = [
+        {"post_id": "p1", "tenant_id": "t1", "channel_id": "c1", "expires_at": "x",
+         "tags": [{"name": "Python"}, {"name": "Rust"}]},
+        {"post_id": "p2", "tenant_id": "t1", "channel_id": "c1", "expires_at": "x",
+         "tags": [{"name": "Go"}, {"name": "Java"}]},
+    ]
+
+    assert await client.create_post_nodes_batch(posts) is True
+    calls = client._driver.calls
+    assert len(calls) == 2
+    assert calls[1][1]["post_ids"] == ["p1"]
+
+
+@pytest.mark.asyncio
+async def test_batch_write_without_driver_returns_false():
+    client = Neo4jClient(uri="neo4j://neo4j:7687", username="neo4j", password="test")
+    assert await client.create_post_nodes_batch([{"post_id": "p1"}]) is False
+    assert await client.create_post_nodes_batch([]) is True
+
+
+@pytest.mark.asyncio
+async def test_graph_batch_writes_all_record_kinds_in_one_transaction():
+    client = _client()
+
+    assert await client.write_graph_batch(
+        forwards=[
+            {"post_id": "p1", "forward_from_peer_id": {"channel_id": 42},
+             "forward_from_chat_id": 42, "forward_from_message_id": 7},
+            {"post_id": "p2", "forward_from_chat_id": 42},  # без peer_id - пропускается
+        ],
+        replies=[{"post_id": "p3", "reply_to_message_id": 5, "reply_to_chat_id": 42, "thread_id": 1}],
+        authors=[
+            {"post_id": "p1", "author_peer_id": {"user_id": 9}, "author_name": "Автор"},
+            {"post_id": "p2", "author_name": "Без peer_id"},
+        ],
+    ) is True
+
+    calls = client._driver.calls
+    assert all(query.lstrip().startswith("UNWIND") for query, _ in calls)
+    forwards, originals, replies, authors = (params["rows"] for _, params in calls)
+    assert forwards == [{
+        "post_id": "p1", "source_id": "42", "source_type": "channel", "forward_from_name": None,
+        "forward_from_message_id": 7, "forward_date": None, "original_channel_id": "42",
+    }]
+    assert [row["post_id"] for row in originals] == ["p1"]
+    assert replies[0]["channel_id_str"] == "42" and replies[0]["chat_id_num"] == 42
+    assert authors == [{"post_id": "p1", "author_id": "9", "author_type": "user", "author_name": "Автор"}]
+
+
+@pytest.mark.asyncio
+async def test_graph_batch_without_records_skips_driver():
+    client = Neo4jClient(uri="neo4j://neo4j:7687", username="neo4j", password="test")
+    assert await client.write_graph_batch(forwards=[{"post_id": "p1"}], replies=[{"post_id": "p1"}]) is True
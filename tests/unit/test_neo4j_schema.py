@@ -0,0 +1,89 @@
+"""
+Unit tests for the Neo4j schema bootstrap.
+
+Context7: ключи всех MERGE покрыты ограничениями уникальности, bootstrap идемпотентен и
+не падает на дублях; план с NodeByLabelScan считается регрессией.
+"""
+
+import pytest
+
+from shared.graph import GRAPH_SCHEMA, SchemaRule, ensure_graph_schema, find_scans
+
+
+class _FakeResult:
+    async def consume(self):
+        return None
+
+
+class _FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, cypher):
+        self.driver.statements.append(cypher)
+        if any(marker in cypher for marker in self.driver.fail_on):
+            raise RuntimeError("Unable to create Constraint: existing duplicates")
+        return _FakeResult()
+
+
+class _FakeDriver:
+    def __init__(self, fail_on=()):
+        self.statements = []
+        self.fail_on = fail_on
+
+    def session(self, **kwargs):
+        return _FakeSession(self)
+
+
+def test_rules_render_idempotent_cypher():
+    single = SchemaRule("post_post_id_unique", "Post", ("post_id",))
+    composite = SchemaRule("author_key_unique", "Author", ("author_id", "author_type"))
+    index = SchemaRule("post_expires_at", "Post", ("expires_at",), unique=False)
+
+    assert single.cypher() == (
+        "CREATE CONSTRAINT post_post_id_unique IF NOT EXISTS FOR (n:Post) REQUIRE n.post_id IS UNIQUE"
+    )
+    assert composite.cypher().endswith("REQUIRE (n.author_id, n.author_type) IS UNIQUE")
+    assert index.cypher() == "CREATE INDEX post_expires_at IF NOT EXISTS FOR (n:Post) ON (n.expires_at)"
+
+
+def test_schema_covers_merge_keys():
+    keys = {(rule.label, rule.properties) for rule in GRAPH_SCHEMA if rule.unique}
+    assert ("Post", ("post_id",)) in keys
+    assert ("Channel", ("channel_id",)) in keys
+    assert ("User", ("user_id",)) in keys
+    assert ("Topic", ("name",)) in keys
+    assert len({rule.name for rule in GRAPH_SCHEMA}) == len(GRAPH_SCHEMA)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_data_falls_back_to_index():
+    driver = _FakeDriver(fail_on=("CONSTRAINT tag_name_unique",))
+    rules = [SchemaRule("post_post_id_unique", "Post", ("post_id",)), SchemaRule("tag_name_unique", "Tag", ("name",))]
+
+    statuses = await ensure_graph_schema(driver, rules)
+
+    assert statuses == {"post_post_id_unique": "ok", "tag_name_unique": "index_fallback"}
+    assert driver.statements[-1] == "CREATE INDEX tag_name_unique_index IF NOT EXISTS FOR (n:Tag) ON (n.name)"
+
+
+def test_find_scans_walks_nested_plan():
+    plan = {
+        "operatorType": "ProduceResults@neo4j",
+        "children": [
+            {"operatorType": "Apply@neo4j", "children": [
+                {"operatorType": "NodeUniqueIndexSeek@neo4j", "children": []},
+                {"operatorType": "NodeByLabelScan@neo4j", "children": []},
+            ]},
+        ],
+    }
+
+    assert find_scans(plan) == ["NodeByLabelScan"]
+    assert find_scans({"operatorType": "NodeIndexSeek", "children": []}) == []
+    assert find_scans(None) == []
@@ -0,0 +1,145 @@
+"""
+Unit tests for the batched outbox relay.
+
+Context7: батч захватывается FOR UPDATE SKIP LOCKED, публикуется одним pipeline XADD
+и отмечается одним UPDATE ... WHERE id = ANY(...).
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+from worker import outbox_relay as outbox_module
+from worker.outbox_relay import OutboxRelay
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+        self._rows = []
+
+    async def execute(self, query, params=None):
+        self.conn.queries.append((" ".join(query.split()), params))
+        self._rows = self.conn.responder(query, params)
+        self.rowcount = len(self._rows)
+
+    async def fetchall(self):
+        return self._rows
+
+    async def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.transactions = 0
+        self.retry_counts = {}
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    def responder(self, query, params):
+        if "FOR UPDATE SKIP LOCKED" in query:
+            return self.rows
+        if "FROM unnest" in query:
+            ids, _ = params
+            return [(event_id, self.retry_counts.get(event_id, 1)) for event_id in ids]
+        if "INSERT INTO outbox_events_dlq" in query:
+            return [(event_id, "posts.parsed", 3) for event_id in params[0]]
+        if "WHERE id = ANY" in query:
+            return [(event_id,) for event_id in params[0]]
+        return []
+
+
+class _FakePublisher:
+    def __init__(self, fail_streams=()):
+        self.calls = []
+        self.fail_streams = set(fail_streams)
+
+    async def publish_pipelined(self, events):
+        self.calls.append(list(events))
+        return [
+            RuntimeError("xadd failed") if stream in self.fail_streams else f"{i}-0"
+            for i, (stream, _) in enumerate(events)
+        ]
+
+
+def _row(event_id, event_type="posts.parsed", retry_count=0):
+    return (
+        event_id, event_type, {"post_id": str(event_id)}, "v1", None,
+        None, None, datetime.now(timezone.utc), retry_count, None,
+    )
+
+
+def _relay(conn, publisher, batch_size=10):
+    relay = OutboxRelay(db_connection=conn, redis_url="redis://localhost", batch_size=batch_size)
+    relay.event_publisher = publisher
+    return relay
+
+
+@pytest.fixture(autouse=True)
+def _accept_all_events(monkeypatch):
+    monkeypatch.setattr(outbox_module, "validate_event_data", lambda payload, event_type, version: payload)
+
+
+def _queries(conn, marker):
+    return [params for query, params in conn.queries if marker in query]
+
+
+@pytest.mark.asyncio
+async def test_batch_published_in_one_pipeline_and_marked_with_one_update():
+    conn = _FakeConnection([_row(1), _row(2), _row(3, "posts.tagged")])
+    publisher = _FakePublisher()
+    relay = _relay(conn, publisher)
+
+    claimed = await relay._process_batch()
+
+    assert claimed == 3
+    assert conn.transactions == 1
+    assert len(publisher.calls) == 1
+    assert [stream for stream, _ in publisher.calls[0]] == ["posts.parsed", "posts.parsed", "posts.tagged"]
+    assert _queries(conn, "SET processed_at = NOW() WHERE id = ANY") == [([1, 2, 3],)]
+    assert not _queries(conn, "FROM unnest")
+    assert relay.stats["processed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_publish_failures_bump_retries_in_one_update_and_exhausted_go_to_dlq():
+    conn = _FakeConnection([_row(1), _row(2, "posts.tagged"), _row(3, "posts.tagged")])
+    conn.retry_counts = {2: 1, 3: 3}
+    relay = _relay(conn, _FakePublisher(fail_streams={"posts.tagged"}))
+
+    await relay._process_batch()
+
+    assert _queries(conn, "SET processed_at = NOW() WHERE id = ANY(%s) AND processed_at IS NULL") == [([1],)]
+    assert _queries(conn, "FROM unnest") == [([2, 3], ["xadd failed", "xadd failed"])]
+    # Исчерпавшие попытки: в DLQ и помечены обработанными (строка остаётся из-за FK)
+    assert _queries(conn, "INSERT INTO outbox_events_dlq") == [([3],)]
+    assert ([3],) in _queries(conn, "UPDATE outbox_events SET processed_at = NOW() WHERE id = ANY(%s)")
+    assert relay.stats["failed"] == 2
+    assert relay.stats["dlq_moved"] == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_claim_returns_zero_without_publishing():
+    conn = _FakeConnection([])
+    publisher = _FakePublisher()
+    relay = _relay(conn, publisher)
+
+    assert await relay._process_batch() == 0
+    assert publisher.calls == []
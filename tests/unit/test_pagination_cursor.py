@@ -0,0 +1,36 @@
+"""
+Unit tests for opaque keyset pagination cursors.
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip_keeps_timezone_awareness():
+    aware = datetime(2025, 11, 21, 10, 30, 15, 123456, tzinfo=timezone.utc)
+    naive = datetime(2025, 11, 21, 10, 30, 15)
+    row_id = "6f1c2a9e-4a0b-4d4e-9b1c-2f3e4d5c6b7a"
+
+    assert decode_cursor(encode_cursor(aware, row_id)) == (aware, row_id)
+    assert decode_cursor(encode_cursor(naive, row_id)) == (naive, row_id)
+
+
+def test_cursor_is_opaque_urlsafe():
+    cursor = encode_cursor(datetime(2025, 1, 1), "id")
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+
+
+def test_empty_and_broken_cursors():
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor")
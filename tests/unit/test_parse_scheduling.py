@@ -0,0 +1,78 @@
+"""
+Unit tests for account-sharded channel parse scheduling.
+
+Context7: каналы группируются по аккаунтам и берутся в порядке ожидаемого следующего поста.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from telethon_ingest.tasks.parse_scheduling import (
+    ChannelPriorityQueue,
+    account_concurrency,
+    group_channels_by_account,
+    predict_next_post_at,
+    shard_order,
+)
+
+
+NOW = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_channels_grouped_by_account_with_default():
+    channels = [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}]
+    accounts = {'a': (111, 't1'), 'b': (222, 't2')}
+
+    shards = group_channels_by_account(channels, accounts, default_account=(111, 't1'))
+
+    assert sorted(shards) == [111, 222]
+    assert [c['id'] for c in shards[111].channels] == ['a', 'c']
+    assert [c['id'] for c in shards[222].channels] == ['b']
+
+
+def test_channels_without_any_account_are_skipped():
+    shards = group_channels_by_account([{'id': 'a'}], {}, default_account=(0, ''))
+    assert shards == {}
+
+
+def test_predict_next_post_uses_interval_stats():
+    channel = {
+        'last_parsed_at': NOW - timedelta(minutes=30),
+        'last_post_at': NOW - timedelta(hours=1),
+    }
+    expected = predict_next_post_at(channel, {'median': 600.0})
+    # Последний пост час назад, интервал 10 минут, проверка была 30 минут назад -> ещё 10 минут после проверки
+    assert expected == NOW - timedelta(minutes=20)
+
+    channel['last_parsed_at'] = NOW - timedelta(hours=2)
+    assert predict_next_post_at(channel, {'median': 600.0}) == NOW - timedelta(minutes=50)
+
+
+def test_predict_next_post_fallbacks():
+    assert predict_next_post_at({'last_parsed_at': None}, None) is None
+    parsed_at = NOW - timedelta(minutes=5)
+    assert predict_next_post_at({'last_parsed_at': parsed_at}, None) == parsed_at
+
+
+def test_priority_queue_orders_new_channels_first():
+    queue = ChannelPriorityQueue()
+    queue.push({'id': 'later'}, NOW + timedelta(hours=1))
+    queue.push({'id': 'soon'}, NOW)
+    queue.push({'id': 'new'}, None)
+
+    assert [queue.pop()['id'] for _ in range(3)] == ['new', 'soon', 'later']
+    assert queue.pop() is None
+
+
+def test_account_concurrency_follows_floodwait_budget():
+    assert account_concurrency(50, 4) == 4
+    assert account_concurrency(25, 4) == 2
+    assert account_concurrency(12, 4) == 1
+    assert account_concurrency(100, 4) == 4
+
+
+def test_shard_order_is_rotation_of_all_accounts():
+    accounts = [5, 1, 3, 2]
+    ordered = shard_order(accounts, "replica-1")
+    assert sorted(ordered) == [1, 2, 3, 5]
+    start = ordered.index(1)
+    assert ordered[start:] + ordered[:start] == [1, 2, 3, 5]
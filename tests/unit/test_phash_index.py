@@ -0,0 +1,100 @@
+"""
+Unit tests for the multi-index hashing phash index.
+
+Context7: почти-дубликаты находятся через точные совпадения кусков хэша,
+расстояние проверяется только для кандидатов.
+"""
+
+import pytest
+
+from shared.utils.phash_index import PhashIndex
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def sadd(self, key, member):
+        self.ops.append(lambda: self.redis.sets.setdefault(key, set()).add(member))
+
+    def srem(self, key, member):
+        self.ops.append(lambda: self.redis.sets.get(key, set()).discard(member))
+
+    def expire(self, key, ttl):
+        self.ops.append(lambda: self.redis.ttls.__setitem__(key, ttl))
+
+    def smembers(self, key):
+        self.ops.append(lambda: {m.encode() for m in self.redis.sets.get(key, set())})
+
+    async def execute(self):
+        self.redis.executions += 1
+        return [op() for op in self.ops]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.sets = {}
+        self.ttls = {}
+        self.executions = 0
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+
+def _flip(hex_hash, nibbles):
+    """Инвертирует младший бит в указанных nibble'ах (по одному биту на позицию)."""
+    chars = list(hex_hash)
+    for pos in nibbles:
+        chars[pos] = format(int(chars[pos], 16) ^ 1, "x")
+    return "".join(chars)
+
+
+BASE = "f0e1d2c3b4a5968778695a4b3c2d1e0f" * 2  # 256-bit phash (hash_size=16)
+
+
+def test_chunks_partition_hash():
+    index = PhashIndex(_FakeRedis(), max_distance=10)
+    chunks = index.chunks(BASE)
+    assert len(chunks) == 11
+    assert "".join(chunks) == BASE
+
+
+@pytest.mark.asyncio
+async def test_find_nearest_within_distance():
+    redis = _FakeRedis()
+    index = PhashIndex(redis, max_distance=6)
+    far = _flip(BASE, range(0, 64, 4))  # 16 бит
+    near = _flip(BASE, [1, 9, 30])  # 3 бита
+    await index.add("t1", far)
+    await index.add("t1", near)
+
+    assert await index.find_nearest("t1", BASE) == (near, 3)
+    # Один pipeline на lookup
+    executions = redis.executions
+    await index.find_nearest("t1", BASE)
+    assert redis.executions == executions + 1
+
+
+@pytest.mark.asyncio
+async def test_find_nearest_respects_tenant_and_limit():
+    index = PhashIndex(_FakeRedis(), max_distance=4)
+    candidate = _flip(BASE, [0, 5, 10, 20, 40])  # 5 бит > max_distance
+    await index.add("t1", candidate)
+
+    assert await index.find_nearest("t1", BASE) is None
+    await index.add("t1", _flip(BASE, [2]))
+    assert await index.find_nearest("t2", BASE) is None
+    assert await index.find_nearest("t1", BASE, max_distance=0) is None
+    assert (await index.find_nearest("t1", BASE))[1] == 1
+
+
+@pytest.mark.asyncio
+async def test_exclude_exact_and_remove():
+    index = PhashIndex(_FakeRedis(), max_distance=4)
+    await index.add("t1", BASE)
+    assert await index.find_nearest("t1", BASE) == (BASE, 0)
+    assert await index.find_nearest("t1", BASE, exclude_exact=True) is None
+
+    await index.remove("t1", BASE)
+    assert await index.find_nearest("t1", BASE) is None
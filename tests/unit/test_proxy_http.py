@@ -0,0 +1,86 @@
+"""
+Unit tests for the shared gpt2giga-proxy HTTP pool.
+
+Context7: запросы идут через локальную заглушку прокси - проверяем keep-alive,
+лимиты конкурентности по endpoint и единый retry для 5xx/429.
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from worker.ai_providers.proxy_http import (
+    ProxyHTTPPool,
+    ProxyRateLimitError,
+    RetryConfig,
+    endpoint_name,
+    parse_endpoint_limits,
+)
+from worker.scripts.gpt2giga_stub import Gpt2GigaStub
+
+FAST_RETRY = RetryConfig(max_attempts=3, initial_delay_sec=0.01, max_delay_sec=0.05, jitter_enabled=False)
+
+
+@pytest_asyncio.fixture
+async def stub():
+    server = Gpt2GigaStub(latency_ms=10)
+    base_url = await server.start()
+    server.base_url = base_url
+    yield server
+    await server.stop()
+
+
+def _pool(stub, **kwargs):
+    kwargs.setdefault("retry_config", FAST_RETRY)
+    kwargs.setdefault("http2", False)
+    return ProxyHTTPPool(stub.base_url, **kwargs)
+
+
+def test_endpoint_limits_are_normalized():
+    assert endpoint_name("/v1/chat/completions?x=1") == "chat/completions"
+    assert parse_endpoint_limits("embeddings=4, /v1/chat/completions=1,bad") == {
+        "embeddings": 4,
+        "chat/completions": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_keepalive_connections_within_endpoint_limit(stub):
+    pool = _pool(stub, max_connections=8, endpoint_limits={"embeddings": 3})
+
+    responses = await asyncio.gather(*(
+        pool.request("POST", "/v1/embeddings", json={"input": ["text"]}) for _ in range(12)
+    ))
+
+    assert all(response.status_code == 200 for response in responses)
+    assert stub.peak_concurrency["/v1/embeddings"] == 3
+    assert stub.connections <= 3
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_server_errors_and_rate_limits_are_retried(stub):
+    pool = _pool(stub)
+    stub.fail_next("/v1/chat/completions", 503)
+    stub.fail_next("/v1/chat/completions", 429, headers={"Retry-After": "0"})
+
+    response = await pool.request("POST", "/v1/chat/completions", json={"messages": []})
+
+    assert response.status_code == 200
+    assert stub.requests["/v1/chat/completions"] == 3
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_exhausted_rate_limit_raises_and_client_errors_pass_through(stub):
+    pool = _pool(stub)
+    stub.fail_next("/v1/chat/completions", 429, times=3)
+
+    with pytest.raises(ProxyRateLimitError):
+        await pool.request("POST", "/v1/chat/completions", json={"messages": []})
+
+    response = await pool.request("GET", "/v1/unknown")
+    assert response.status_code == 404
+    assert stub.requests["/v1/unknown"] == 1
+    await pool.aclose()
@@ -0,0 +1,119 @@
+"""
+Unit tests for buffered Qdrant upserts in the worker QdrantClient.
+
+Context7: точки сбрасываются батчами, ошибка батча доставляется только «плохим» точкам.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from worker.integrations.qdrant_client import QdrantClient
+
+
+class _FakeAsyncQdrant:
+    def __init__(self, bad_ids=()):
+        self.upserts = []
+        self.bad_ids = set(bad_ids)
+        self.exists_calls = 0
+
+    async def collection_exists(self, collection_name):
+        self.exists_calls += 1
+        return True
+
+    async def upsert(self, collection_name, points, wait=True):
+        assert wait is True
+        if any(point.id in self.bad_ids for point in points):
+            raise ValueError("bad point")
+        self.upserts.append([point.id for point in points])
+
+
+def _client(fake, batch_size=4, delay_ms=20):
+    client = QdrantClient(url="http://qdrant:6333", upsert_batch_size=batch_size, upsert_max_delay_ms=delay_ms)
+    client.async_client = fake
+    return client
+
+
+def _pid(i):
+    return f"00000000-0000-0000-0000-{i:012d}"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_upserts_flush_as_one_batch_by_size():
+    fake = _FakeAsyncQdrant()
+    client = _client(fake, batch_size=3, delay_ms=1000)
+
+    ids = await asyncio.gather(*(
+        client.upsert_vector("t1_posts", _pid(i), [0.1, 0.2], {"n": i}) for i in range(3)
+    ))
+
+    assert ids == [_pid(0), _pid(1), _pid(2)]
+    assert fake.upserts == [[_pid(0), _pid(1), _pid(2)]]
+    # Проверка коллекции кэшируется
+    assert fake.exists_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_flushes_after_delay():
+    fake = _FakeAsyncQdrant()
+    client = _client(fake, batch_size=10, delay_ms=10)
+
+    await asyncio.gather(*(client.upsert_vector("t1_posts", _pid(i), [0.1], {}) for i in range(2)))
+
+    assert fake.upserts == [[_pid(0), _pid(1)]]
+
+
+@pytest.mark.asyncio
+async def test_failed_point_is_isolated_from_durable_points():
+    fake = _FakeAsyncQdrant(bad_ids={_pid(1)})
+    client = _client(fake, batch_size=3, delay_ms=1000)
+
+    results = await asyncio.gather(
+        *(client.upsert_vector("t1_posts", _pid(i), [0.1], {}) for i in range(3)),
+        return_exceptions=True
+    )
+
+    assert results[0] == _pid(0) and results[2] == _pid(2)
+    assert isinstance(results[1], ValueError)
+    assert sorted(sum(fake.upserts, [])) == [_pid(0), _pid(2)]
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_reports_per_point_outcome():
+    fake = _FakeAsyncQdrant(bad_ids={_pid(2)})
+    client = _client(fake, batch_size=2)
+
+    results = await client.upsert_vectors(
+        "t1_posts",
+        [{"id": _pid(i), "vector": [0.1], "payload": {}} for i in range(3)]
+    )
+
+    assert results[:2] == [_pid(0), _pid(1)]
+    assert isinstance(results[2], ValueError)
+
+
+class _FakeRetrieveQdrant:
+    def __init__(self, stored):
+        self.stored = stored
+        self.calls = []
+
+    async def retrieve(self, collection_name, ids, with_payload=True, with_vectors=False):
+        self.calls.append((collection_name, list(ids), with_payload, with_vectors))
+        return [
+            SimpleNamespace(id=point_id, vector=self.stored[point_id])
+            for point_id in ids
+            if point_id in self.stored
+        ]
+
+
+@pytest.mark.asyncio
+async def test_retrieve_vectors_single_call_and_missing_ids():
+    fake = _FakeRetrieveQdrant({_pid(1): [0.1, 0.2], _pid(2): {"dense": [0.3, 0.4]}})
+    client = _client(fake)
+
+    vectors = await client.retrieve_vectors("t1_posts", [_pid(1), _pid(2), _pid(3)])
+
+    assert vectors == {_pid(1): [0.1, 0.2], _pid(2): [0.3, 0.4]}
+    assert fake.calls == [("t1_posts", [_pid(1), _pid(2), _pid(3)], False, True)]
+    assert await client.retrieve_vectors("t1_posts", []) == {}
@@ -0,0 +1,113 @@
+"""
+Unit tests for hybrid RAG rank fusion.
+
+Context7: RRF и нормализаторы приводят несопоставимые скоры веток к общей шкале.
+"""
+
+import pytest
+
+from api.services.rank_fusion import (
+    fuse,
+    minmax_normalize,
+    resolve_fusion_strategy,
+    zscore_normalize,
+)
+
+
+def _leg(*pairs):
+    return [{"post_id": pid, "score": score} for pid, score in pairs]
+
+
+def test_minmax_normalize_bounds():
+    assert minmax_normalize([2.0, 4.0, 3.0]) == [0.0, 1.0, 0.5]
+    assert minmax_normalize([0.8, 0.8]) == [1.0, 1.0]
+    assert minmax_normalize([]) == []
+
+
+def test_zscore_normalize_is_monotonic_in_unit_interval():
+    normalized = zscore_normalize([0.1, 0.5, 0.9])
+    assert normalized[0] < normalized[1] < normalized[2]
+    assert all(0.0 <= v <= 1.0 for v in normalized)
+    assert zscore_normalize([0.3, 0.3]) == [0.5, 0.5]
+
+
+def test_rrf_ignores_score_scales():
+    legs = {
+        "qdrant": _leg(("a", 0.91), ("b", 0.90)),
+        "fts": _leg(("b", 0.0001), ("a", 0.00005)),
+    }
+
+    outcome = fuse(legs, strategy="rrf", weights={"qdrant": 0.5, "fts": 0.5})
+
+    scores = {hit.post_id: hit.fused_score for hit in outcome.hits}
+    assert scores["a"] == pytest.approx(scores["b"])
+    assert all(0.0 < s <= 1.0 for s in scores.values())
+
+
+def test_rrf_top_hit_in_all_legs_scores_one():
+    legs = {
+        "qdrant": _leg(("a", 0.9)),
+        "fts": _leg(("a", 0.1)),
+        "graph": _leg(("a", 0.8)),
+    }
+
+    outcome = fuse(legs, strategy="rrf")
+
+    assert outcome.hits[0].fused_score == pytest.approx(1.0)
+    assert outcome.hits[0].leg_ranks == {"qdrant": 1, "fts": 1, "graph": 1}
+
+
+def test_minmax_fusion_prefers_consensus():
+    legs = {
+        "qdrant": _leg(("a", 0.9), ("b", 0.85), ("c", 0.2)),
+        "fts": _leg(("b", 3.0), ("c", 1.0)),
+    }
+
+    outcome = fuse(legs, strategy="minmax", weights={"qdrant": 0.5, "fts": 0.5})
+
+    assert outcome.hits[0].post_id == "b"
+
+
+def test_unknown_strategy_raises():
+    with pytest.raises(ValueError):
+        fuse({}, strategy="borda")
+
+
+def test_topk_stable_when_legs_exhausted():
+    legs = {"qdrant": _leg(("a", 0.9), ("b", 0.5))}
+
+    outcome = fuse(legs, strategy="rrf", limit=2, fetch_limit=10)
+
+    assert outcome.stable
+
+
+def test_topk_unstable_when_unseen_posts_can_overtake():
+    legs = {
+        "qdrant": _leg(("a", 0.9), ("b", 0.8)),
+        "fts": _leg(("c", 2.0), ("d", 1.0)),
+    }
+
+    # Обе ветки вернули полную страницу: пост, найденный на 3-й позиции в обеих, обгонит top-2
+    outcome = fuse(legs, strategy="rrf", weights={"qdrant": 0.5, "fts": 0.5}, limit=2, fetch_limit=2)
+
+    assert not outcome.stable
+
+
+def test_topk_stable_with_strong_consensus():
+    legs = {
+        "qdrant": _leg(("a", 0.9), ("b", 0.8), ("x", 0.1)),
+        "fts": _leg(("a", 2.0), ("b", 1.0), ("y", 0.1)),
+    }
+
+    outcome = fuse(legs, strategy="rrf", weights={"qdrant": 0.5, "fts": 0.5}, limit=1, fetch_limit=3)
+
+    assert outcome.stable
+    assert outcome.hits[0].post_id == "a"
+
+
+def test_resolve_fusion_strategy_per_tenant():
+    overrides = {"tenant-1": "zscore", "tenant-2": "bogus"}
+
+    assert resolve_fusion_strategy("tenant-1", "rrf", overrides) == "zscore"
+    assert resolve_fusion_strategy("tenant-3", "minmax", overrides) == "minmax"
+    assert resolve_fusion_strategy("tenant-2", "rrf", overrides) == "rrf"
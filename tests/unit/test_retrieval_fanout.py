@@ -0,0 +1,143 @@
+"""
+Unit tests for FanOutRetriever.
+
+Context7: ветки гибридного поиска выполняются конкурентно и деградируют по дедлайну;
+догружаются только неисчерпанные ветки и только если top-k слияния не стабилен.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from api.services.retrieval_fanout import FanOutRetriever, RetrievalLeg
+
+
+def _leg(name, delay, results=None, budget=1.0, error=None, join_on_timeout=False):
+    async def factory():
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return results if results is not None else [{"post_id": name}]
+
+    return RetrievalLeg(name=name, factory=factory, budget_seconds=budget, join_on_timeout=join_on_timeout)
+
+
+@pytest.mark.asyncio
+async def test_legs_run_concurrently():
+    started = time.perf_counter()
+    result = await FanOutRetriever().run([
+        _leg("qdrant", 0.1),
+        _leg("fts", 0.1),
+        _leg("graph", 0.1),
+    ])
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.25
+    assert result.results("qdrant") == [{"post_id": "qdrant"}]
+    assert result.results("graph") == [{"post_id": "graph"}]
+    assert not result.degraded
+
+
+@pytest.mark.asyncio
+async def test_slow_leg_degrades_to_partial_result():
+    started = time.perf_counter()
+    result = await FanOutRetriever().run([
+        _leg("qdrant", 0.01),
+        _leg("graph", 1.0, budget=0.05),
+    ])
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5
+    assert result.outcomes["graph"].status == "timeout"
+    assert result.results("graph") == []
+    assert result.results("qdrant") == [{"post_id": "qdrant"}]
+    assert result.degraded
+
+
+@pytest.mark.asyncio
+async def test_failing_leg_does_not_break_others():
+    result = await FanOutRetriever().run([
+        _leg("qdrant", 0.01),
+        _leg("fts", 0.01, error=RuntimeError("db down")),
+    ])
+
+    assert result.outcomes["fts"].status == "error"
+    assert result.outcomes["fts"].error == "db down"
+    assert result.results("qdrant") == [{"post_id": "qdrant"}]
+
+
+@pytest.mark.asyncio
+async def test_join_detached_waits_for_session_bound_leg():
+    finished = []
+
+    async def factory():
+        await asyncio.sleep(0.1)
+        finished.append(True)
+        return [{"post_id": "late"}]
+
+    result = await FanOutRetriever().run([
+        RetrievalLeg(name="fts", factory=factory, budget_seconds=0.01, join_on_timeout=True),
+    ])
+
+    assert result.outcomes["fts"].status == "timeout"
+    assert not finished
+
+    await result.join_detached()
+
+    assert finished == [True]
+    assert result.results("fts") == []
+
+
+def _rag_service(monkeypatch, legs_by_depth):
+    from types import SimpleNamespace
+
+    from api.services import rag_service as rag_module
+    from api.services.retrieval_fanout import LEG_OK, FanOutResult, LegOutcome
+
+    monkeypatch.setattr(rag_module, "settings", SimpleNamespace(
+        rag_fusion_strategy="rrf", rag_fusion_tenant_strategies={},
+        rag_fusion_fetch_multiplier=2, rag_fusion_max_fetch_multiplier=4,
+    ))
+    service = rag_module.RAGService.__new__(rag_module.RAGService)
+    calls = []
+
+    async def fanout(query, tenant_id, fetch_limit, channel_ids, db, user_id, query_embedding=None, only_legs=None):
+        calls.append((fetch_limit, only_legs))
+        names = only_legs or set(legs_by_depth)
+        return FanOutResult(outcomes={
+            name: LegOutcome(name=name, status=LEG_OK, results=legs_by_depth[name](fetch_limit))
+            for name in names
+        })
+
+    monkeypatch.setattr(service, "_fanout_retrieval", fanout)
+    return service, calls
+
+
+def _ranked(prefix, count):
+    return [{"post_id": f"{prefix}{i}", "score": 1.0 - i / 100} for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_stops_after_first_fanout_when_legs_exhausted(monkeypatch):
+    service, calls = _rag_service(monkeypatch, {
+        "qdrant": lambda depth: _ranked("q", 3),
+        "graph": lambda depth: _ranked("q", 2),
+    })
+
+    results = await service._hybrid_search("q", [0.1], "t1", limit=5)
+
+    assert calls == [(10, None)]
+    assert len(results) == 3
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_deepens_only_unexhausted_legs(monkeypatch):
+    service, calls = _rag_service(monkeypatch, {
+        "qdrant": lambda depth: _ranked("q", depth),
+        "graph": lambda depth: _ranked("g", 3),
+    })
+
+    await service._hybrid_search("q", [0.1], "t1", limit=5)
+
+    assert calls == [(10, None), (20, {"qdrant"})]
@@ -0,0 +1,147 @@
+"""
+Unit tests for set-based trend card assembly.
+
+Context7: страница кластеров собирается фиксированным числом запросов - метрики одним
+DISTINCT ON, каналы пользователя один раз (или переданные хендлером), персональные посты
+одним оконным запросом.
+"""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from api.trends import card_assembler as assembler_module
+from api.trends.card_assembler import TrendCardAssembler
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+def _cluster(source_diversity=3):
+    now = datetime.now(timezone.utc)
+    return SimpleNamespace(
+        id=uuid4(), cluster_key="key", status="emerging", label="Запуск новой модели",
+        summary="Кратко", keywords=["ai"], primary_topic="ai", topics=["ai"],
+        novelty_score=0.5, coherence_score=0.7, source_diversity=source_diversity,
+        first_detected_at=now, last_activity_at=now, resolved_trend_id=None,
+        window_start=now - timedelta(hours=3), window_end=now, window_mentions=12,
+        freq_baseline=4, burst_score=2.0, sources_count=3, channels_count=3,
+        card_payload={}, why_important=None,
+    )
+
+
+def _metric(cluster_id, burst_score=2.0):
+    return SimpleNamespace(
+        cluster_id=cluster_id, freq_short=5, freq_long=20, freq_baseline=4,
+        rate_of_change=0.5, burst_score=burst_score, source_diversity=3,
+        coherence_score=0.7, metrics_at=datetime.now(timezone.utc),
+    )
+
+
+def _post(cluster_id, channel_id):
+    return SimpleNamespace(
+        cluster_id=cluster_id, post_id=uuid4(), channel_id=channel_id, channel_title="Канал",
+        posted_at=datetime.now(timezone.utc), content_snippet="Пример поста",
+    )
+
+
+def _sql(query):
+    return str(query.statement.compile(dialect=postgresql.dialect()))
+
+
+def test_queries_are_set_based():
+    assembler = TrendCardAssembler(Session())
+    ids = [uuid4(), uuid4()]
+
+    metrics_sql = _sql(assembler.latest_metrics_query(ids))
+    posts_sql = _sql(assembler.personalized_posts_query(ids, {uuid4()}, limit=10))
+
+    assert "DISTINCT ON (trend_metrics.cluster_id)" in metrics_sql
+    assert "row_number() OVER (PARTITION BY trend_cluster_posts.cluster_id" in posts_sql
+
+
+def test_personalized_page_uses_constant_number_of_queries(monkeypatch):
+    channel_id = uuid4()
+    clusters = [_cluster() for _ in range(20)]
+    empty_for_user = clusters[-1]
+    calls = {"metrics": 0, "posts": 0, "channels": 0}
+
+    def metrics_query(self, cluster_ids):
+        calls["metrics"] += 1
+        return _Rows([_metric(cluster_id) for cluster_id in cluster_ids])
+
+    def posts_query(self, cluster_ids, channel_ids, limit):
+        calls["posts"] += 1
+        assert channel_ids == {channel_id}
+        return _Rows([
+            _post(cluster_id, channel_id)
+            for cluster_id in cluster_ids if cluster_id != empty_for_user.id
+        ])
+
+    def load_channels(db, user_id):
+        calls["channels"] += 1
+        return {channel_id}
+
+    monkeypatch.setattr(TrendCardAssembler, "latest_metrics_query", metrics_query)
+    monkeypatch.setattr(TrendCardAssembler, "personalized_posts_query", posts_query)
+    monkeypatch.setattr(assembler_module, "load_user_channel_ids", load_channels)
+
+    responses = TrendCardAssembler(Session(), user_id=uuid4()).assemble(clusters, min_sources=2, min_burst=1.0)
+
+    assert calls == {"metrics": 1, "posts": 1, "channels": 1}
+    assert [response.id for response in responses] == [cluster.id for cluster in clusters[:-1]]
+    assert all(response.card.stats.mentions == 1 for response in responses)
+    assert responses[0].latest_metrics.burst_score == 2.0
+
+
+def test_threshold_filters_skip_personal_posts_for_dropped_clusters(monkeypatch):
+    weak, strong = _cluster(source_diversity=1), _cluster()
+    seen = []
+
+    monkeypatch.setattr(
+        TrendCardAssembler, "latest_metrics_query",
+        lambda self, cluster_ids: _Rows([_metric(cluster_id) for cluster_id in cluster_ids]),
+    )
+    monkeypatch.setattr(
+        TrendCardAssembler, "personalized_posts_query",
+        lambda self, cluster_ids, channel_ids, limit: seen.extend(cluster_ids) or _Rows([]),
+    )
+    monkeypatch.setattr(assembler_module, "load_user_channel_ids", lambda db, user_id: {uuid4()})
+
+    responses = TrendCardAssembler(Session(), user_id=uuid4()).assemble([weak, strong], min_sources=2)
+
+    assert seen == [strong.id]
+    assert responses == []
+
+
+def test_preloaded_user_channels_are_not_reloaded(monkeypatch):
+    channel_id = uuid4()
+    cluster = _cluster()
+    seen = []
+
+    def load_channels(db, user_id):
+        raise AssertionError("channels must come from the handler")
+
+    monkeypatch.setattr(
+        TrendCardAssembler, "latest_metrics_query",
+        lambda self, cluster_ids: _Rows([_metric(cluster_id) for cluster_id in cluster_ids]),
+    )
+    monkeypatch.setattr(
+        TrendCardAssembler, "personalized_posts_query",
+        lambda self, cluster_ids, channel_ids, limit: seen.append(channel_ids) or _Rows([_post(cluster.id, channel_id)]),
+    )
+    monkeypatch.setattr(assembler_module, "load_user_channel_ids", load_channels)
+
+    responses = TrendCardAssembler(Session(), user_id=uuid4(), user_channel_ids={channel_id}).assemble([cluster])
+
+    assert seen == [{channel_id}]
+    assert [response.id for response in responses] == [cluster.id]
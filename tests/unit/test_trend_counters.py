@@ -0,0 +1,95 @@
+"""
+Unit tests for the sliding-window trend counter engine.
+
+Context7: один EVALSHA на пост, батч постов - один pipeline.
+"""
+
+import pytest
+
+from shared.trends import TrendCounterEngine, TrendCounterUpdate, TrendRedisSchema, TrendWindow
+from shared.trends.counters import WINDOW_BUCKET_SECONDS
+
+
+class _FakePipeline:
+    def __init__(self, results):
+        self.calls = []
+        self.results = results
+        self.executed = 0
+
+    async def execute(self):
+        self.executed += 1
+        return self.results[: len(self.calls)]
+
+
+class _FakeScript:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    async def __call__(self, keys=None, args=None, client=None):
+        self.calls.append((keys, args, client))
+        if client is not None:
+            client.calls.append((keys, args))
+            return client
+        return self.result
+
+
+class _FakeRedis:
+    def __init__(self, result=(1, 2, 3, 1)):
+        self.script = _FakeScript(list(result))
+        self.pipe = None
+
+    def register_script(self, source):
+        return self.script
+
+    def pipeline(self, transaction=True):
+        self.pipe = _FakePipeline([[1, 1, 1, 1], [2, 2, 2, 2], [3, 3, 3, 1]])
+        return self.pipe
+
+
+def test_build_call_layout():
+    engine = TrendCounterEngine(_FakeRedis(), TrendRedisSchema())
+    ts = 1_700_000_000.0
+    keys, args = engine.build_call(TrendCounterUpdate("c1", "chan", timestamp=ts))
+
+    assert keys[:3] == [
+        "trend:c1:freq:5m:ring",
+        "trend:c1:freq:1h:ring",
+        "trend:c1:freq:24h:ring",
+    ]
+    # 24 часовых HLL бакета, первый - текущий
+    hll_keys = keys[3:]
+    assert len(hll_keys) == 24
+    assert hll_keys[0] == f"trend:c1:sources:hll:{int(ts // 3600)}"
+    assert hll_keys[-1] == f"trend:c1:sources:hll:{int(ts // 3600) - 23}"
+
+    assert args[0] == "chan"
+    assert args[1] == 24
+    current, oldest, ttl = args[2:5]
+    bucket = WINDOW_BUCKET_SECONDS[TrendWindow.SHORT_5M]
+    assert current == int(ts // bucket)
+    assert current - oldest + 1 == TrendWindow.SHORT_5M.seconds // bucket
+    assert ttl > TrendWindow.SHORT_5M.seconds
+    assert args[-1] > TrendWindow.LONG_24H.seconds
+
+
+@pytest.mark.asyncio
+async def test_record_parses_counts():
+    engine = TrendCounterEngine(_FakeRedis(result=(4, 9, 30, 2)), TrendRedisSchema())
+    counts = await engine.record(TrendCounterUpdate("c1", "chan"))
+    assert (counts.freq_short, counts.freq_long, counts.freq_baseline, counts.source_diversity) == (4, 9, 30, 2)
+
+
+@pytest.mark.asyncio
+async def test_record_many_uses_single_pipeline():
+    redis = _FakeRedis()
+    engine = TrendCounterEngine(redis, TrendRedisSchema())
+    updates = [TrendCounterUpdate("c1", "a"), TrendCounterUpdate("c1", "b"), TrendCounterUpdate("c2", None)]
+
+    counts = await engine.record_many(updates)
+
+    assert redis.pipe.executed == 1
+    assert len(redis.pipe.calls) == 3
+    assert redis.pipe.calls[2][1][0] == ""
+    assert [c.freq_short for c in counts] == [1, 2, 3]
+    assert await engine.record_many([]) == []
@@ -0,0 +1,149 @@
+"""
+Unit tests for the trend QA verdict cache.
+
+Context7: вердикты по (кластер, ревизия, профиль) из Redis, промахи - параллельно в пределах бюджета;
+ревизия - по стабильным полям и составу кластера, не по тексту карточки.
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from types import SimpleNamespace
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api.trends.qa_cache import (
+    TrendQAVerdictCache,
+    cluster_revision,
+    is_final_verdict,
+    profile_hash,
+    qa_cache_key,
+)
+
+
+class _FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def set(self, key, value, ex=None):
+        self.ops.append((key, value, ex))
+
+    async def execute(self):
+        for key, value, _ in self.ops:
+            self.store[key] = value
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.mget_calls = 0
+
+    async def mget(self, keys):
+        self.mget_calls += 1
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self.store)
+
+
+def _cluster(**overrides):
+    fields = dict(
+        id="c1", label="AI", primary_topic="AI", summary="s", why_important=None,
+        topics=["ai"], keywords=["llm"], quality_score=0.8, status="emerging",
+        card_payload={}, window_mentions=10, cluster_key="k1", last_edited_at=None,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def test_revision_ignores_regenerated_text_but_tracks_members_and_edits():
+    base = cluster_revision(_cluster(), ["p1", "p2"])
+    assert cluster_revision(_cluster(window_mentions=99), ["p2", "p1"]) == base
+    assert cluster_revision(_cluster(summary="changed", why_important="new", label="LLM"), ["p1", "p2"]) == base
+    assert cluster_revision(_cluster(primary_topic="Новый заголовок поста"), ["p1", "p2"]) == base
+    assert cluster_revision(_cluster(), ["p1", "p2", "p3"]) != base
+    assert cluster_revision(_cluster(last_edited_at="2025-01-01T10:00"), ["p1", "p2"]) != base
+
+
+def test_only_final_verdicts_count_as_cached():
+    assert is_final_verdict({"should_show": True})
+    assert not is_final_verdict(None)
+    assert not is_final_verdict({"should_show": True, "transient": True})
+    assert not is_final_verdict({"should_show": True, "pending": True})
+
+
+@pytest.mark.asyncio
+async def test_precomputed_revisions_round_trip():
+    cache = TrendQAVerdictCache(_FakeRedis(), ttl_seconds=60)
+
+    await cache.mark_precomputed({"c1": "rev-1"})
+
+    assert await cache.get_precomputed_revisions(["c1", "c2"]) == {"c1": "rev-1", "c2": None}
+
+
+def test_profile_hash_depends_on_profile_and_channels():
+    profile = {"preferred_topics": ["ai"]}
+    assert profile_hash(None, profile) == "anon"
+    first = profile_hash("u1", profile, ["b", "a"])
+    assert first == profile_hash("u1", profile, ["a", "b"])
+    assert first != profile_hash("u1", {"preferred_topics": ["sport"]}, ["a", "b"])
+
+
+@pytest.mark.asyncio
+async def test_hits_served_from_cache_and_misses_evaluated_concurrently():
+    redis = _FakeRedis()
+    cached_key = qa_cache_key("c0", "r", "u")
+    redis.store[cached_key] = json.dumps({"should_show": False})
+    cache = TrendQAVerdictCache(redis, budget_seconds=1.0, max_concurrency=3)
+
+    running = 0
+    peak = 0
+
+    async def evaluate():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"should_show": True}
+
+    items = {cached_key: evaluate}
+    items.update({qa_cache_key(f"c{i}", "r", "u"): evaluate for i in range(1, 6)})
+
+    results = await cache.resolve(items)
+
+    assert results[cached_key] == {"should_show": False}
+    assert all(results[key] == {"should_show": True} for key in items if key != cached_key)
+    assert peak == 3
+    assert redis.mget_calls == 1
+    assert len(redis.store) == 6
+
+
+@pytest.mark.asyncio
+async def test_slow_evaluations_finish_in_background_and_transient_not_cached():
+    redis = _FakeRedis()
+    cache = TrendQAVerdictCache(redis, budget_seconds=0.01)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return {"should_show": True}
+
+    async def transient():
+        return {"should_show": True, "transient": True}
+
+    slow_key = qa_cache_key("slow", "r", "u")
+    transient_key = qa_cache_key("llm-down", "r", "u")
+    results = await cache.resolve({slow_key: slow, transient_key: transient})
+
+    assert results[slow_key] is None
+    assert results[transient_key]["transient"] is True
+
+    await cache.drain()
+    assert slow_key in redis.store
+    assert transient_key not in redis.store
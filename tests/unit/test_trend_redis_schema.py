@@ -21,3 +21,10 @@ def test_source_and_stream_helpers():
     assert schema.emerging_stream() == TRENDS_EMERGING_STREAM
 
 
+
+
+def test_counter_engine_keys():
+    schema = TrendRedisSchema()
+    assert schema.freq_ring_key("foo", TrendWindow.SHORT_5M) == "trend:foo:freq:5m:ring"
+    assert schema.source_hll_key("foo", 42) == "trend:foo:sources:hll:42"
+    assert schema.cooldown_key("foo") == "trend:foo:emitted"
@@ -90,8 +90,8 @@ async def test_qa_agent_checks_relevance_with_user(mock_db, sample_cluster):
     }
 
     with patch("api.routers.trends.os.getenv", return_value="true"), patch(
-        "api.routers.trends._load_user_channel_ids", return_value={uuid4()}
-    ), patch("api.routers.trends._build_trend_card") as mock_card, patch(
+        "api.routers.trends.load_user_channel_ids", return_value={uuid4()}
+    ), patch("api.routers.trends.build_trend_card") as mock_card, patch(
         "api.routers.trends.httpx.AsyncClient"
     ) as mock_client:
         mock_card.return_value = MagicMock(